@@ -0,0 +1,119 @@
+"""
+Tuning-trial timings with and without the binned-dataset cache (modeling.dataset_cache).
+
+Runs fixed-parameter LightGBM and XGBoost trials for several binary targets on
+one random feature matrix, as the MLB tuning scripts do, once rebuilding the
+binned training and validation matrices in every trial and once through a
+shared DatasetCache. The cost of fingerprinting the feature matrix is reported
+separately: hashed on every lookup, and remembered per matrix object as the
+cache does.
+
+Example usage:
+    python benchmarks/dataset_cache_benchmarks.py --rows 32000 --features 80
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+# Add project root to the Python path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from src.modeling.dataset_cache import DatasetCache, matrix_fingerprint
+from src.modeling.tuning import LIGHTGBM_FIXED_PARAMS, XGBOOST_FIXED_PARAMS
+
+logger = logging.getLogger(__name__)
+
+LIGHTGBM_TRIAL_PARAMS = {**LIGHTGBM_FIXED_PARAMS, 'num_leaves': 31, 'learning_rate': 0.05,
+                         'feature_pre_filter': False, 'n_jobs': 1}
+XGBOOST_TRIAL_PARAMS = {**XGBOOST_FIXED_PARAMS, 'max_depth': 6, 'learning_rate': 0.05, 'n_jobs': 1}
+
+
+def make_data(rows: int, features: int, targets: int) -> Tuple[pd.DataFrame, pd.DataFrame, list]:
+    """Random features split 80/20 in order, with one learnable binary target per column."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(rows, features)), columns=[f"f{i}" for i in range(features)])
+    labels = [(X[f"f{i}"] + rng.normal(size=rows) > 0).astype(int) for i in range(targets)]
+    split = int(rows * 0.8)
+    return X.iloc[:split], X.iloc[split:], [(y.iloc[:split], y.iloc[split:]) for y in labels]
+
+
+def lightgbm_trial(train_set: lgb.Dataset, val_set: lgb.Dataset, rounds: int) -> None:
+    lgb.train(LIGHTGBM_TRIAL_PARAMS, train_set, num_boost_round=rounds, valid_sets=[val_set])
+
+
+def xgboost_trial(dtrain: Any, dval: Any, rounds: int) -> None:
+    xgb.train(XGBOOST_TRIAL_PARAMS, dtrain, num_boost_round=rounds, evals=[(dval, 'validation_0')],
+              verbose_eval=False)
+
+
+def run_trials(trial: Callable[[Any, Any], None], matrices: Callable[[Any, Any], Tuple[Any, Any]],
+               targets: list, n_trials: int) -> float:
+    start = time.perf_counter()
+    for y_train, y_val in targets:
+        for _ in range(n_trials):
+            trial(*matrices(y_train, y_val))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time tuning trials with and without the dataset cache.")
+    parser.add_argument("--rows", type=int, default=32000, help="Rows of the feature matrix.")
+    parser.add_argument("--features", type=int, default=80, help="Columns of the feature matrix.")
+    parser.add_argument("--targets", type=int, default=4, help="Binary targets tuned on the same features.")
+    parser.add_argument("--trials", type=int, default=5, help="Trials per target.")
+    parser.add_argument("--rounds", type=int, default=100, help="Boosting rounds per trial.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    X_train, X_val, targets = make_data(args.rows, args.features, args.targets)
+    n_trials = args.targets * args.trials
+    print(f"\n{n_trials} trials ({args.targets} targets x {args.trials}) on {len(X_train)} x {args.features} "
+          f"features, {args.rounds} rounds, 1 thread")
+
+    def lightgbm_rebuilt(y_train, y_val):
+        train_set = lgb.Dataset(X_train, label=y_train, params=LIGHTGBM_TRIAL_PARAMS)
+        return train_set, lgb.Dataset(X_val, label=y_val, reference=train_set)
+
+    def xgboost_rebuilt(y_train, y_val):
+        dtrain = xgb.QuantileDMatrix(X_train, label=y_train)
+        return dtrain, xgb.QuantileDMatrix(X_val, label=y_val, ref=dtrain)
+
+    cache = DatasetCache(root=None)
+    rounds = args.rounds
+    print(f"{'model':<12}{'rebuilt (s)':>14}{'cached (s)':>13}{'speedup':>10}")
+    for name, trial, rebuilt, cached in [
+        ('lightgbm', lightgbm_trial, lightgbm_rebuilt,
+         lambda y_train, y_val: cache.lightgbm_datasets(X_train, y_train, X_val, y_val)),
+        ('xgboost', xgboost_trial, xgboost_rebuilt,
+         lambda y_train, y_val: cache.xgboost_matrices(X_train, y_train, X_val, y_val)),
+    ]:
+        baseline = run_trials(lambda *m: trial(*m, rounds), rebuilt, targets, args.trials)
+        with_cache = run_trials(lambda *m: trial(*m, rounds), cached, targets, args.trials)
+        print(f"{name:<12}{baseline:>14.1f}{with_cache:>13.1f}{baseline / with_cache:>9.2f}x")
+
+    # Every trial looks up the training and validation matrices, for each model type
+    lookups = 2 * n_trials
+    start = time.perf_counter()
+    for _ in range(lookups):
+        matrix_fingerprint(X_train)
+    hashed = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(lookups):
+        cache.fingerprint(X_train)
+    remembered = time.perf_counter() - start
+    print(f"{'fingerprint':<12}{hashed:>14.3f}{remembered:>13.5f}  ({lookups} lookups of the training matrix)")
+    print(cache.summary())
+
+
+if __name__ == "__main__":
+    main()
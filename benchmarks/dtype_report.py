@@ -0,0 +1,90 @@
+"""
+Memory report of the compact dtype plan (preprocessing.dtypes) on synthetic data.
+
+Loads a synthetic database of the requested number of seasons and runs the NBA
+pipeline stages twice, with the plan disabled and enabled, printing the memory of
+each stage's output frame and the reduction.
+
+Example usage:
+    python benchmarks/dtype_report.py --seasons 5
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+# Add project root to the Python path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from src.utils.config import config
+from src.utils.instrumentation import MB, frame_memory
+from src.utils.synthetic_data import generate_database
+from src.preprocessing.data_cleaner import DataCleaner
+from src.preprocessing.data_integrator import DataIntegrator
+from src.preprocessing.dtypes import DtypePlan
+from src.feature_engineering.player_features import PlayerFeatures
+from src.feature_engineering.game_features import GameFeatures
+from src.feature_engineering.team_features import TeamFeatures
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = ROOT / 'data' / 'synthetic'
+TABLES = {'games': 'games', 'player_stats': 'player_game_stats', 'prop_odds': 'prop_odds'}
+
+
+def stage_memory(engine, enabled: bool) -> Tuple[Dict[str, int], float]:
+    """Bytes of every stage's output frame, and the seconds spent after loading."""
+    plan = DtypePlan({**config.get('preprocessing.dtypes', {}), 'enabled': enabled})
+    with engine.connect() as connection:
+        tables = {name: plan.apply(pd.read_sql(text(f"SELECT * FROM {table}"), connection))
+                  for name, table in TABLES.items()}
+    memory = {f'load:{name}': frame_memory(df) for name, df in tables.items()}
+
+    start = time.perf_counter()
+    integrator = DataIntegrator(config.get('preprocessing.integration', {}))
+    df = DataCleaner(config.get('preprocessing.cleaning', {})).clean_player_game_stats(tables['player_stats'])
+    memory['clean'] = frame_memory(df)
+    df = integrator.integrate_game_data(df, tables['games'])
+    memory['integrate'] = frame_memory(df)
+    df = PlayerFeatures(config.get('feature_engineering.player_features', {})).create_rolling_averages(df)
+    memory['player_features'] = frame_memory(df)
+    df = GameFeatures(config.get('feature_engineering.game_features', {})).create_game_context_features(df)
+    memory['game_features'] = frame_memory(df)
+    df = TeamFeatures(config.get('feature_engineering.team_features', {})).create_team_strength_features(df)
+    memory['team_features'] = frame_memory(df)
+    df = integrator.integrate_sportsbook_odds(df, tables['prop_odds'])
+    memory['odds_integration'] = frame_memory(df)
+    return memory, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the memory saved by the dtype plan.")
+    parser.add_argument("--seasons", type=int, default=5, help="Synthetic seasons per league (1-20).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    db_path = DATA_DIR / f"benchmark_{args.seasons}s.db"
+    if not db_path.exists():
+        generate_database(str(db_path), seasons=args.seasons)
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    before, before_seconds = stage_memory(engine, enabled=False)
+    after, after_seconds = stage_memory(engine, enabled=True)
+
+    print(f"\n{args.seasons} season(s): {db_path}")
+    print(f"{'frame':<24} {'default (MB)':>13} {'planned (MB)':>13} {'reduction':>10}")
+    for name, default_bytes in before.items():
+        print(f"{name:<24} {default_bytes / MB:>13.1f} {after[name] / MB:>13.1f} "
+              f"{1 - after[name] / default_bytes:>10.0%}")
+    print(f"{'pipeline time (s)':<24} {before_seconds:>13.2f} {after_seconds:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
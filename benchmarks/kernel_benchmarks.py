@@ -0,0 +1,137 @@
+"""
+Timings of the sequential feature kernels (feature_engineering.kernels) against pandas.
+
+Loads the player-games of a synthetic database of the requested number of seasons,
+sorted by player and date, and times every kernel with Numba (after a warm-up call
+that compiles it), with the NumPy fallback and as the equivalent pandas
+groupby/rolling/ewm expression, checking that all three agree.
+
+Example usage:
+    python benchmarks/kernel_benchmarks.py --seasons 5
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+# Add project root to the Python path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from src.feature_engineering import kernels
+from src.utils.synthetic_data import generate_database
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = ROOT / 'data' / 'synthetic'
+QUERY = """
+    SELECT s.player_id, s.team_id, g.date, g.home_team_id, g.away_team_id, s.points, s.minutes_played
+    FROM player_game_stats s JOIN games g ON s.game_id = g.game_id
+"""
+
+
+def load_player_games(db_path: Path) -> pd.DataFrame:
+    with create_engine(f"sqlite:///{db_path}").connect() as connection:
+        df = pd.read_sql(text(QUERY), connection, parse_dates=['date'])
+    df = df.sort_values(['player_id', 'date']).reset_index(drop=True)
+    df['opponent'] = pd.factorize(df['away_team_id'].where(df['team_id'] == df['home_team_id'], df['home_team_id']))[0]
+    df['points'] = df['points'].astype(float)
+    df['minutes_played'] = df['minutes_played'].astype(float)
+    return df
+
+
+def pandas_equivalents(df: pd.DataFrame) -> Dict[str, Callable[[], np.ndarray]]:
+    """The kernels' features as pandas expressions."""
+    by_player = df.groupby('player_id')
+
+    def ewm():
+        return df.groupby('player_id', group_keys=False)[['points', 'date']].apply(
+            lambda g: g['points'].ewm(halflife=pd.Timedelta(days=10), times=g['date']).mean().shift(1)).to_numpy()
+
+    def streak():
+        prior_mean = by_player['points'].transform(lambda x: x.shift(1).expanding().mean())
+        flag = pd.Series(np.where(prior_mean.isna(), 0, np.where(df['points'] > prior_mean, 1, -1)))
+        run = ((flag != flag.shift()) | (df['player_id'] != df['player_id'].shift())).cumsum()
+        after = flag * (flag.groupby(run).cumcount() + 1)
+        return after.groupby(df['player_id']).shift(1).fillna(0).to_numpy(dtype=float)
+
+    def minutes_weighted():
+        sums = pd.DataFrame({'weighted': df['points'] * df['minutes_played'], 'weight': df['minutes_played']})
+        rolled = sums.groupby(df['player_id']).transform(lambda x: x.shift(1).rolling(5, min_periods=1).sum())
+        return (rolled['weighted'] / rolled['weight']).where(rolled['weight'] > 0).to_numpy()
+
+    def vs_opponent():
+        return df.groupby(['player_id', 'opponent'])['points'].transform(
+            lambda x: x.shift(1).rolling(3, min_periods=1).mean()).to_numpy()
+
+    return {'ewm': ewm, 'streak': streak, 'minutes_weighted': minutes_weighted, 'vs_opponent': vs_opponent}
+
+
+def kernel_calls(df: pd.DataFrame, backend: str) -> Dict[str, Callable[[], np.ndarray]]:
+    values = df['points'].to_numpy()
+    offsets = kernels.group_offsets(pd.factorize(df['player_id'])[0])
+    days = df['date'].to_numpy('datetime64[s]').astype(np.int64) / 86400
+    return {
+        'ewm': lambda: kernels.ewm_time_decay(values, days, offsets, 10, backend=backend),
+        'streak': lambda: kernels.streaks(values, offsets, backend=backend),
+        'minutes_weighted': lambda: kernels.weighted_rolling_mean(
+            values, df['minutes_played'].to_numpy(), offsets, 5, backend=backend),
+        'vs_opponent': lambda: kernels.rolling_mean_by_key(
+            values, df['opponent'].to_numpy(), offsets, 3, backend=backend),
+    }
+
+
+def best_of(call: Callable[[], np.ndarray], repeat: int):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the sequential feature kernels against pandas.")
+    parser.add_argument("--seasons", type=int, default=5, help="Synthetic seasons per league (1-20).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per implementation (best is kept).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    db_path = DATA_DIR / f"benchmark_{args.seasons}s.db"
+    if not db_path.exists():
+        generate_database(str(db_path), seasons=args.seasons)
+    df = load_player_games(db_path)
+
+    implementations = {'pandas': pandas_equivalents(df), 'numpy': kernel_calls(df, 'numpy')}
+    if kernels.NUMBA_AVAILABLE:
+        implementations['numba'] = kernel_calls(df, 'numba')
+        for call in implementations['numba'].values():
+            call()  # compile
+    else:
+        logger.warning("numba is not installed; timing the NumPy fallback only")
+
+    print(f"\n{args.seasons} season(s): {len(df)} player-games, {df['player_id'].nunique()} players")
+    print(f"{'feature':<18}" + "".join(f"{name + ' (s)':>13}" for name in implementations) + f"{'speedup':>10}")
+    for feature, reference in implementations['pandas'].items():
+        row = {}
+        expected = None
+        for name, calls in implementations.items():
+            row[name], result = best_of(calls[feature], args.repeat)
+            if expected is None:
+                expected = result
+            elif not np.allclose(result, expected, rtol=1e-6, atol=1e-6, equal_nan=True):
+                raise AssertionError(f"{name} '{feature}' differs from pandas")
+        fastest = min(seconds for name, seconds in row.items() if name != 'pandas')
+        print(f"{feature:<18}" + "".join(f"{seconds:>13.4f}" for seconds in row.values())
+              + f"{row['pandas'] / fastest:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Scale benchmarks of the data, feature, training, prediction and backtest paths.
+
+Each case runs against a synthetic database (src/utils/synthetic_data.py) of the
+requested number of seasons, which is generated once and reused. Setup work is
+shared between cases and not timed; every case is timed ``--repeat`` times and its
+median is compared with the stored baseline of the same scale in
+benchmarks/baselines/, flagging any case slower than the tolerance allows.
+
+Example usage:
+    python benchmarks/run_benchmarks.py --seasons 1                  # run and compare
+    python benchmarks/run_benchmarks.py --seasons 1 --save-baseline  # record a new baseline
+    python benchmarks/run_benchmarks.py --seasons 3 --cases player_features backtest
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add project root to the Python path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+import lightgbm as lgb
+
+from src.utils.config import config
+from src.utils.database import db_manager
+from src.utils.synthetic_data import generate_database
+from src.preprocessing.data_cleaner import DataCleaner
+from src.preprocessing.data_integrator import DataIntegrator
+from src.feature_engineering.player_features import PlayerFeatures
+from src.feature_engineering.game_features import GameFeatures
+from src.feature_engineering.team_features import TeamFeatures
+from src.feature_engineering.mlb.real_master_dataset_simple import SimpleRealMasterDatasetBuilder
+from src.modeling.prepare_model_data import prepare_modeling_data
+from src.modeling.model_registry import ModelRegistry
+from src.prediction.slate import predict_slate, prop_model_name
+from src.prediction.value_bets import find_value_bets
+from src.analysis.backtest import backtest
+
+logger = logging.getLogger(__name__)
+
+BASELINE_DIR = ROOT / 'benchmarks' / 'baselines'
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+DATA_DIR = ROOT / 'data' / 'synthetic'
+# Trees in the benchmarked model; enough to dominate fit time without a tuning run
+N_ESTIMATORS = 200
+
+CASES: Dict[str, Callable[['BenchmarkContext'], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Registers a case: a function of the context returning the callable to time."""
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+
+class BenchmarkContext:
+    """Shared, lazily built inputs of the cases for one synthetic database."""
+
+    def __init__(self, db_path: Path, workdir: Path):
+        self.db_path = db_path
+        self.workdir = workdir
+        # Point the shared database manager at the synthetic database
+        db_manager.engine = create_engine(f"sqlite:///{db_path}")
+        db_manager.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_manager.engine)
+
+    @cached_property
+    def pipeline(self):
+        # Imported once the database is retargeted: the odds collector reads players at import
+        import run_pipeline
+        return run_pipeline
+
+    @cached_property
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        return self.pipeline.load_data_from_db()
+
+    @cached_property
+    def integrated(self) -> pd.DataFrame:
+        cleaned = DataCleaner(config.get('preprocessing.cleaning', {})).clean_player_game_stats(
+            self.tables['player_stats'].copy())
+        return DataIntegrator(config.get('preprocessing.integration', {})).integrate_game_data(
+            cleaned, self.tables['games'])
+
+    @cached_property
+    def features(self) -> pd.DataFrame:
+        features = PlayerFeatures(config.get('feature_engineering.player_features', {})).create_rolling_averages(
+            self.integrated.copy())
+        features = GameFeatures(config.get('feature_engineering.game_features', {})).create_game_context_features(features)
+        features = TeamFeatures(config.get('feature_engineering.team_features', {})).create_team_strength_features(features)
+        points_odds = self.tables['prop_odds'][self.tables['prop_odds']['prop_type'] == 'points']
+        return self.pipeline.integrate_sportsbook_odds(features, points_odds)
+
+    @cached_property
+    def modeling(self):
+        return prepare_modeling_data(self.features.copy())
+
+    @cached_property
+    def model(self) -> lgb.LGBMClassifier:
+        train_df, _ = self.modeling
+        return fit_model(train_df)
+
+    @cached_property
+    def registry(self) -> ModelRegistry:
+        ModelRegistry.clear_cache()
+        registry = ModelRegistry(str(self.workdir / 'registry'))
+        train_df, _ = self.modeling
+        features = [column for column in train_df.columns if column not in ('date', 'points_over_avg_5g')]
+        registry.register(prop_model_name('points'), self.model, features, aliases=['prod'])
+        return registry
+
+    @cached_property
+    def mlb_dir(self) -> Path:
+        # The MLB builder reads <data_dir>/sports_model.db
+        mlb_dir = self.workdir / 'mlb'
+        mlb_dir.mkdir(exist_ok=True)
+        (mlb_dir / 'sports_model.db').symlink_to(self.db_path)
+        return mlb_dir
+
+
+def fit_model(train_df: pd.DataFrame) -> lgb.LGBMClassifier:
+    X = train_df.drop(columns=['points_over_avg_5g', 'date'], errors='ignore')
+    model = lgb.LGBMClassifier(n_estimators=N_ESTIMATORS, learning_rate=0.05, num_leaves=31,
+                               verbosity=-1, random_state=42)
+    return model.fit(X, train_df['points_over_avg_5g'])
+
+
+@benchmark('db_load')
+def bench_db_load(ctx):
+    return ctx.pipeline.load_data_from_db
+
+
+@benchmark('player_features')
+def bench_player_features(ctx):
+    creator = PlayerFeatures(config.get('feature_engineering.player_features', {}))
+    integrated = ctx.integrated
+    return lambda: creator.create_rolling_averages(integrated.copy())
+
+
+@benchmark('team_features')
+def bench_team_features(ctx):
+    creator = TeamFeatures(config.get('feature_engineering.team_features', {}))
+    integrated = ctx.integrated
+    return lambda: creator.create_team_strength_features(integrated)
+
+
+@benchmark('game_features')
+def bench_game_features(ctx):
+    creator = GameFeatures(config.get('feature_engineering.game_features', {}))
+    integrated = ctx.integrated
+    return lambda: creator.create_game_context_features(integrated)
+
+
+@benchmark('mlb_dataset_build')
+def bench_mlb_dataset_build(ctx):
+    builder = SimpleRealMasterDatasetBuilder(data_dir=str(ctx.mlb_dir), save_intermediate=False)
+    return lambda: builder.build_master_dataset(season_filter=None)
+
+
+@benchmark('training')
+def bench_training(ctx):
+    train_df, _ = ctx.modeling
+    return lambda: fit_model(train_df)
+
+
+@benchmark('slate_prediction')
+def bench_slate_prediction(ctx):
+    registry = ctx.registry
+    slate_date = pd.to_datetime(ctx.tables['games']['date']).max().date()
+
+    def run():
+        with db_manager.get_session() as session:
+            return predict_slate(slate_date, props=['points'], registry=registry, session=session, write=False)
+    return run
+
+
+@benchmark('backtest')
+def bench_backtest(ctx):
+    # Noisy but informative over probabilities for every posted line, graded on the box scores
+    odds = ctx.tables['prop_odds']
+    stats = ctx.tables['player_stats']
+    rng = np.random.default_rng(0)
+    graded = odds.merge(stats[['game_id', 'player_id', 'points']], on=['game_id', 'player_id'])
+    graded = graded[graded['prop_type'] == 'points']
+    over = (graded['points'] > graded['line']).to_numpy()
+    predictions = graded[['game_id', 'player_id', 'prop_type']].assign(
+        predicted_probability=np.clip(0.5 + np.where(over, 0.03, -0.03) + rng.normal(0, 0.08, len(graded)), 0.01, 0.99)
+    ).drop_duplicates(['game_id', 'player_id', 'prop_type'])
+    games = ctx.tables['games'][['game_id', 'date', 'season']]
+    actuals = graded[['game_id', 'player_id', 'points']].drop_duplicates(['game_id', 'player_id'])
+
+    def run():
+        bets = find_value_bets(predictions, odds, max_bets_per_game=100)
+        bets = bets.merge(actuals.rename(columns={'points': 'actual_value'}), on=['game_id', 'player_id'])
+        return backtest(bets.merge(games, on='game_id'), staking='kelly')
+    return run
+
+
+def time_case(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return {'min': min(durations), 'median': statistics.median(durations), 'repeat': repeat}
+
+
+def run_benchmarks(seasons: int = 1, cases: Optional[List[str]] = None, repeat: int = 3,
+                   regenerate: bool = False) -> Dict:
+    """Runs the cases on a synthetic database of ``seasons`` seasons."""
+    db_path = DATA_DIR / f"benchmark_{seasons}s.db"
+    if regenerate or not db_path.exists():
+        generate_database(str(db_path), seasons=seasons)
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'seasons': seasons,
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor(), 'numpy': np.__version__, 'pandas': pd.__version__},
+        'cases': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = BenchmarkContext(db_path, Path(workdir))
+        for name in cases or list(CASES):
+            func = CASES[name](ctx)
+            results['cases'][name] = time_case(func, repeat)
+            logger.info(f"{name}: median {results['cases'][name]['median']:.3f}s")
+        ModelRegistry.clear_cache()
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, min_delta: float = 0.05) -> List[str]:
+    """Prints each case against its baseline and returns the regressed cases.
+
+    A case regresses when its median is more than ``tolerance`` slower than the
+    baseline and by more than ``min_delta`` seconds, so timer noise on very short
+    cases is not flagged.
+    """
+    regressions = []
+    print(f"\n{'case':<20} {'median (s)':>11} {'baseline (s)':>13} {'change':>9}")
+    for name, timing in results['cases'].items():
+        reference = baseline.get('cases', {}).get(name)
+        if reference is None:
+            print(f"{name:<20} {timing['median']:>11.3f} {'-':>13} {'new':>9}")
+            continue
+        change = timing['median'] / reference['median'] - 1
+        flag = ''
+        if change > tolerance and timing['median'] - reference['median'] > min_delta:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<20} {timing['median']:>11.3f} {reference['median']:>13.3f} {change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the scale benchmark suite on synthetic data.")
+    parser.add_argument("--seasons", type=int, default=1, help="Synthetic seasons per league (1-20).")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown of the median against the baseline.")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="Slowdowns smaller than this many seconds are never flagged.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild the synthetic database.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    results = run_benchmarks(args.seasons, args.cases, args.repeat, args.regenerate)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output = RESULTS_DIR / f"benchmark_{args.seasons}s_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.write_text(json.dumps(results, indent=2))
+    logger.info(f"Results saved to {output}")
+
+    baseline_path = BASELINE_DIR / f"seasons_{args.seasons}.json"
+    if args.save_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {'cases': {}}
+        baseline.update({key: value for key, value in results.items() if key != 'cases'})
+        baseline['cases'].update(results['cases'])
+        BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(baseline, indent=2))
+        logger.info(f"Baseline saved to {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        logger.warning(f"No baseline at {baseline_path}; run with --save-baseline to record one.")
+        return
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance, args.min_delta)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
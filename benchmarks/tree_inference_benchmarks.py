@@ -0,0 +1,130 @@
+"""
+Latency of NumPy tree-ensemble inference (modeling.tree_inference) against the
+LightGBM and XGBoost sklearn wrappers.
+
+Trains the advanced points model (advanced_model.DEFAULT_PARAMS), a default
+31-leaf LightGBM model and a depth-6 XGBoost model on the points over/under-average
+target of a synthetic database, compiles each one and times ``predict_proba`` on
+batches of 1, 100 and 10,000 player-games with both, checking that the compiled
+margins equal the originals. The time to load each saved model in a fresh
+interpreter is reported too, as a serving process would pay it.
+
+Example usage:
+    python benchmarks/tree_inference_benchmarks.py --seasons 1
+"""
+
+import argparse
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sqlalchemy import create_engine, text
+
+# Add project root to the Python path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from src.feature_engineering.feature_registry import FeatureExecutor, nba_feature_registry
+from src.modeling.advanced_model import DEFAULT_PARAMS
+from src.modeling.train_all_props import PropDatasets
+from src.modeling.tree_inference import compile_model
+from src.preprocessing.data_cleaner import DataCleaner
+from src.preprocessing.data_integrator import DataIntegrator
+from src.utils.config import config
+from src.utils.synthetic_data import generate_database
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = ROOT / 'data' / 'synthetic'
+BATCH_SIZES = [1, 100, 10_000]
+LOAD_SCRIPT = "import sys; sys.path.append({root!r}); {load}"
+
+
+def load_points_dataset(db_path: Path) -> pd.DataFrame:
+    """Featured player-games of the database with their points features and target."""
+    with create_engine(f"sqlite:///{db_path}").connect() as connection:
+        stats, games = (pd.read_sql(text(f"SELECT * FROM {name}"), connection)
+                        for name in ('player_game_stats', 'games'))
+    stats = DataCleaner({}).clean_player_game_stats(stats)
+    featured = FeatureExecutor(nba_feature_registry(config)).run(DataIntegrator({}).integrate_game_data(stats, games))
+    datasets = PropDatasets(featured, ['points'])
+    rows = np.flatnonzero(datasets.valid['points'])
+    X = datasets.frame('points', rows)
+    X['target'] = datasets.y['points'][rows]
+    return X
+
+
+def best_of(call: Callable[[], np.ndarray], repeat: int) -> float:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def load_seconds(load: str) -> float:
+    """Wall time of a fresh interpreter that loads a saved model."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', LOAD_SCRIPT.format(root=str(ROOT), load=load)], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time NumPy tree-ensemble inference against the model libraries.")
+    parser.add_argument("--seasons", type=int, default=1, help="Synthetic seasons per league (1-20).")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per batch (best is kept).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    db_path = DATA_DIR / f"benchmark_{args.seasons}s.db"
+    if not db_path.exists():
+        generate_database(str(db_path), seasons=args.seasons)
+    data = load_points_dataset(db_path)
+    X, y = data.drop(columns='target'), data['target']
+    # Score batches drawn from the whole season, repeating rows for small databases
+    batches = {size: X.iloc[np.resize(np.arange(len(X)), size)] for size in BATCH_SIZES}
+
+    models = {
+        'lightgbm advanced': lgb.LGBMClassifier(**DEFAULT_PARAMS),
+        'lightgbm 31 leaves': lgb.LGBMClassifier(n_estimators=200, verbosity=-1, random_state=42),
+        'xgboost depth 6': xgb.XGBClassifier(n_estimators=200, max_depth=6, random_state=42),
+    }
+    print(f"\n{args.seasons} season(s): {len(X)} player-games x {X.shape[1]} features")
+    print(f"{'model':<20}{'trees':>7}{'depth':>7}{'rows':>8}{'library (ms)':>15}{'numpy (ms)':>13}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, model in models.items():
+            model.fit(X, y)
+            ensemble = compile_model(model)
+            raw = (model.predict(X, raw_score=True) if isinstance(model, lgb.LGBMModel)
+                   else model.predict(X, output_margin=True))
+            # Raises when any margin is more than 1 ulp from the library's
+            np.testing.assert_array_max_ulp(ensemble.predict_raw(X), raw, maxulp=1)
+
+            for size, batch in batches.items():
+                library = best_of(lambda: model.predict_proba(batch), args.repeat)
+                numpy_ = best_of(lambda: ensemble.predict_proba(batch), args.repeat)
+                print(f"{name:<20}{ensemble.n_trees:>7}{ensemble.max_depth:>7}{size:>8}"
+                      f"{library * 1e3:>15.3f}{numpy_ * 1e3:>13.3f}{library / numpy_:>9.1f}x")
+
+            model_path, compiled_path = Path(tmp) / 'model.joblib', Path(tmp) / 'model.npz'
+            joblib.dump(model, model_path)
+            ensemble.save(compiled_path)
+            pickled = load_seconds(f"import joblib; joblib.load({str(model_path)!r})")
+            compiled = load_seconds("from src.modeling.tree_inference import TreeEnsemble; "
+                                    f"TreeEnsemble.load({str(compiled_path)!r})")
+            print(f"{name:<20}{'load in a new process':>29}{pickled * 1e3:>15.0f}{compiled * 1e3:>13.0f}"
+                  f"{pickled / compiled:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,9 +14,15 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 @click.group()
-def cli():
+@click.option('--profile', default=None, type=click.Choice(['cprofile', 'sampling', 'memory']),
+              help='Profile the command and write the report to logs/profiles/')
+@click.pass_context
+def cli(ctx, profile):
     """Sports Model CLI for NBA/WNBA predictive modeling."""
-    pass
+    if profile:
+        from src.utils.profiling import profile_run
+        # Entered now and closed once the subcommand has finished
+        ctx.with_resource(profile_run(profile, ctx.invoked_subcommand or 'cli'))
 
 @cli.command()
 @click.option('--source', default='basketball-reference', 
@@ -112,5 +118,21 @@ def predict():
         logger.error(f"Error in predictions: {e}")
         return False
 
+@cli.command()
+@click.option('--host', default=None, help='Interface to bind (defaults to prediction.server.host)')
+@click.option('--port', default=None, type=int, help='Port to listen on (defaults to prediction.server.port)')
+@click.option('--model-alias', default='prod', help='Registry alias of the models to serve')
+def serve(host, port, model_alias):
+    """Serve predictions over HTTP with warm models and micro-batching."""
+    import asyncio
+    from src.prediction.server import PredictionServer, build_service
+    
+    logger.info("Starting prediction server...")
+    server = PredictionServer.from_config(build_service(model_alias), host=host, port=port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger.info("Prediction server stopped.")
+
 if __name__ == "__main__":
     cli() 
\ No newline at end of file
@@ -1,3 +1,4 @@
+import argparse
 import logging
 import sys
 from pathlib import Path
@@ -7,6 +8,7 @@ sys.path.append(str(Path(__file__).resolve().parents[0]))
 
 from src.modeling.prepare_model_data import prepare_modeling_data, load_final_dataset, save_modeling_data
 from src.modeling.advanced_model import train_advanced_model, evaluate_model
+from src.utils.profiling import add_profile_argument, profile_run
 
 # Setup logging
 log_dir = Path("logs")
@@ -41,4 +43,8 @@ def retrain():
     logging.info("--- MODEL RETRAINING FINISHED ---")
 
 if __name__ == '__main__':
-    retrain() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Rebuild the modeling data and retrain the advanced model.")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    with profile_run(args.profile, 'retrain_model'):
+        retrain()
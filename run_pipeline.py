@@ -1,3 +1,4 @@
+import argparse
 import logging
 import pandas as pd
 import sys
@@ -11,11 +12,13 @@ from src.utils.database import db_manager, PropOdds
 from src.preprocessing.data_cleaner import DataCleaner
 from src.preprocessing.data_validator import DataValidator
 from src.preprocessing.data_integrator import DataIntegrator
-from src.feature_engineering.player_features import PlayerFeatures
-from src.feature_engineering.game_features import GameFeatures
-from src.feature_engineering.team_features import TeamFeatures
+from src.preprocessing.dtypes import DtypePlan
+from src.preprocessing.streaming import StreamingPipeline
+from src.feature_engineering.feature_registry import nba_feature_backend
 from src.data_collection.sports_game_odds_api import SportsGameOddsAPICollector
 from src.utils.config import config
+from src.utils.instrumentation import StageProfiler, instrumented
+from src.utils.profiling import add_profile_argument, profile_run
 from sqlalchemy import text, func
 from typing import Dict
 
@@ -23,6 +26,7 @@ from typing import Dict
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@instrumented('odds_collection')
 def run_historical_odds_collection():
     """Checks if historical odds need to be collected and runs the collector if so."""
     with db_manager.get_session() as session:
@@ -41,6 +45,7 @@ def run_historical_odds_collection():
     else:
         logger.info("Prop odds table already contains data. Skipping historical collection.")
 
+@instrumented('load')
 def load_data_from_db() -> Dict[str, pd.DataFrame]:
     """Loads all necessary tables from the database into pandas DataFrames."""
     logger.info("Loading data from database...")
@@ -51,81 +56,88 @@ def load_data_from_db() -> Dict[str, pd.DataFrame]:
         teams_df = pd.read_sql(text("SELECT * FROM teams"), session.bind)
         odds_df = pd.read_sql(text("SELECT * FROM prop_odds"), session.bind)
     logger.info(f"Loaded {len(games_df)} games, {len(stats_df)} player stats, {len(players_df)} players, {len(teams_df)} teams, and {len(odds_df)} prop odds.")
-    return {'games': games_df, 'player_stats': stats_df, 'players': players_df, 'teams': teams_df, 'prop_odds': odds_df}
+    dataframes = {'games': games_df, 'player_stats': stats_df, 'players': players_df, 'teams': teams_df, 'prop_odds': odds_df}
 
+    # Compact dtypes from here on (preprocessing.dtypes)
+    dtype_plan = DtypePlan(config.get('preprocessing.dtypes', {}))
+    return {name: dtype_plan.apply(df, name) for name, df in dataframes.items()}
+
+@instrumented('odds_integration')
 def integrate_sportsbook_odds(features_df: pd.DataFrame, odds_df: pd.DataFrame) -> pd.DataFrame:
     """
     Integrates historical sportsbook odds into the features DataFrame.
     """
-    logger.info("Integrating historical sportsbook odds...")
-    if odds_df.empty:
-        logger.warning("Odds DataFrame is empty. Skipping integration.")
-        # Still need to create the columns for the model
-        features_df['fanduel_points_line'] = 0
-        features_df['fanduel_points_over_odds'] = -110
-        features_df['fanduel_points_under_odds'] = -110
-        return features_df
-
-    # We will just use FanDuel for now for simplicity
-    fanduel_odds = odds_df[odds_df['sportsbook'] == 'FanDuel'].copy()
-    fanduel_odds = fanduel_odds.rename(columns={
-        'line': 'fanduel_points_line',
-        'over_odds': 'fanduel_points_over_odds',
-        'under_odds': 'fanduel_points_under_odds'
-    })
-
-    # Select relevant columns and merge
-    odds_to_merge = fanduel_odds[['game_id', 'player_id', 'fanduel_points_line', 'fanduel_points_over_odds', 'fanduel_points_under_odds']]
-    
-    # Need to make sure player_id types match for merging
-    features_df['player_id'] = features_df['player_id'].astype(str)
-    odds_to_merge['player_id'] = odds_to_merge['player_id'].astype(str)
-    
-    merged_df = pd.merge(features_df, odds_to_merge, on=['game_id', 'player_id'], how='left')
-
-    logger.info("Sportsbook odds integration complete.")
-    return merged_df
+    integrator = DataIntegrator(config.get('preprocessing.integration', {}))
+    return integrator.integrate_sportsbook_odds(features_df, odds_df)
 
 def run_pipeline():
     """
     Executes the full data processing and feature engineering pipeline.
     """
     logger.info("Starting data pipeline...")
-    
-    # 1. Collect historical odds if needed
-    run_historical_odds_collection()
 
-    # 2. Load data from DB (now including odds)
-    dataframes = load_data_from_db()
-    
-    # 3. Preprocessing
-    cleaner = DataCleaner(config.get('preprocessing.cleaning', {}))
-    validator = DataValidator(config.get('preprocessing.validation', {}))
-    integrator = DataIntegrator(config.get('preprocessing.integration', {}))
+    with StageProfiler('nba_pipeline') as profiler:
+        # 1. Collect historical odds if needed
+        run_historical_odds_collection()
 
-    cleaned_stats = cleaner.clean_player_game_stats(dataframes['player_stats'])
-    if not validator.validate_player_game_stats(cleaned_stats):
-        logger.error("Data validation failed. Halting pipeline.")
-        return
+        # 2. Load data from DB (now including odds)
+        dataframes = load_data_from_db()
 
-    integrated_df = integrator.integrate_game_data(cleaned_stats, dataframes['games'])
-    
-    # 4. Feature Engineering
-    player_feature_creator = PlayerFeatures(config.get('feature_engineering.player_features', {}))
-    game_feature_creator = GameFeatures(config.get('feature_engineering.game_features', {}))
-    team_feature_creator = TeamFeatures(config.get('feature_engineering.team_features', {}))
+        # 3. Preprocessing
+        cleaner = DataCleaner(config.get('preprocessing.cleaning', {}))
+        validator = DataValidator(config.get('preprocessing.validation', {}))
+        integrator = DataIntegrator(config.get('preprocessing.integration', {}))
 
-    features_df = player_feature_creator.create_rolling_averages(integrated_df)
-    features_df = game_feature_creator.create_game_context_features(features_df)
-    features_df = team_feature_creator.create_team_strength_features(features_df)
+        with profiler.stage('clean', dataframes['player_stats']) as stage:
+            cleaned_stats = stage.output(cleaner.clean_player_game_stats(dataframes['player_stats']))
+        with profiler.stage('validate', cleaned_stats) as stage:
+            cleaned_stats = stage.output(validator.check_player_game_stats(cleaned_stats))
+        if cleaned_stats is None:
+            logger.error("Data validation failed. Halting pipeline.")
+            return
+
+        with profiler.stage('integrate', [cleaned_stats, dataframes['games']]) as stage:
+            integrated_df = stage.output(integrator.integrate_game_data(cleaned_stats, dataframes['games']))
+
+        # 4. Feature Engineering (pandas feature groups run concurrently, or DuckDB window queries)
+        feature_backend = nba_feature_backend(config)
+        with profiler.stage('features', integrated_df) as stage:
+            features_df = stage.output(feature_backend.run(integrated_df))
 
-    # 5. Integrate Sportsbook Odds
-    features_df = integrate_sportsbook_odds(features_df, dataframes['prop_odds'])
+        # 5. Integrate Sportsbook Odds
+        features_df = integrate_sportsbook_odds(features_df, dataframes['prop_odds'])
 
-    # 6. Save processed data
-    output_path = config.get_data_path('processed') / 'featured_data.csv'
-    features_df.to_csv(output_path, index=False)
+        # 6. Save processed data
+        output_path = config.get_data_path('processed') / 'featured_data.csv'
+        with profiler.stage('write_csv', features_df):
+            features_df.to_csv(output_path, index=False)
+    logger.info(f"Pipeline complete. Processed data saved to {output_path}")
+
+def run_streaming_pipeline():
+    """
+    Executes the pipeline one player partition at a time, with bounded memory.
+    """
+    logger.info("Starting streaming data pipeline...")
+
+    with StageProfiler('nba_pipeline_streaming'):
+        run_historical_odds_collection()
+
+        output_path = config.get_data_path('processed') / 'featured_data.csv'
+        with db_manager.get_session() as session:
+            summary = StreamingPipeline(config).run(session.bind, output_path)
+    if summary is None:
+        logger.error("Data validation failed. Halting pipeline.")
+        return
     logger.info(f"Pipeline complete. Processed data saved to {output_path}")
 
 if __name__ == "__main__":
-    run_pipeline() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the NBA data processing and feature engineering pipeline.")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Process players in partitions with bounded memory (preprocessing.streaming).")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    with profile_run(args.profile, 'run_pipeline'):
+        if args.streaming:
+            run_streaming_pipeline()
+        else:
+            run_pipeline()
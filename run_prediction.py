@@ -5,27 +5,49 @@ from pathlib import Path
 # Add project root to the Python path
 sys.path.append(str(Path(__file__).resolve().parent))
 
-from src.prediction.predict import load_model, fetch_prediction_data, engineer_features, make_prediction
+from src.prediction.predict import load_model, load_registered_model, fetch_prediction_data, engineer_features, make_prediction
+from src.prediction.slate import predict_slate
+from src.prediction.value_bets import recommend_bets
+from src.utils.instrumentation import profiled
+from src.utils.profiling import add_profile_argument, profile_run
 
-def main():
-    """Main function to run the prediction CLI."""
-    parser = argparse.ArgumentParser(description="Make predictions for player performance in a given game.")
-    parser.add_argument("game_id", type=str, help="The ID of the game to predict.")
-    parser.add_argument("player_id", type=str, help="The ID of the player to predict for.")
-    parser.add_argument("--model_path", type=str, default="data/models/advanced_model.joblib", help="Path to the trained model file.")
-    
-    args = parser.parse_args()
+def run_slate(slate_date, model_alias):
+    """Predicts the whole slate of a date and prints a per-stage timing summary."""
+    print(f"--- Running Slate Prediction for {slate_date} ---")
+    predictions, timings = predict_slate(slate_date, alias=model_alias)
+    if predictions.empty:
+        print("❌ No predictions: no games on this date or no registered prop models.")
+    else:
+        print(predictions.groupby('prop_type')['predicted_outcome'].value_counts().unstack(fill_value=0))
+        bets = recommend_bets(predictions['game_id'].unique(), predictions=predictions)
+        print(f"\n{len(bets)} value bet(s) recommended")
+        if not bets.empty:
+            print(bets[['player_id', 'prop_type', 'bet_type', 'line', 'sportsbook', 'edge', 'stake_recommendation']]
+                  .to_string(index=False))
+    print("\n--- Timings ---")
+    for stage, seconds in timings.items():
+        print(f"{stage:>10}: {seconds * 1000:8.1f} ms")
+    print("---------------\n")
 
-    print(f"--- Running Prediction for game: {args.game_id}, player: {args.player_id} ---")
+@profiled('nba_prediction')
+def run_single(game_id, player_id, model_path, model_alias):
+    """Predicts one player in one game with the legacy or registered model."""
+    print(f"--- Running Prediction for game: {game_id}, player: {player_id} ---")
 
     # 1. Load Model
-    model = load_model(args.model_path)
+    if model_path:
+        model = load_model(model_path)
+    else:
+        # Fall back to the legacy model file until a model has been registered
+        model = load_registered_model(alias=model_alias)
+        if model is None and model_alias == "prod":
+            model = load_model()
     if model is None:
         print("❌ Prediction failed: Could not load the model.")
         return
 
     # 2. Fetch Data
-    raw_data = fetch_prediction_data(args.game_id, args.player_id)
+    raw_data = fetch_prediction_data(game_id, player_id)
     if raw_data is None:
         print("❌ Prediction failed: Could not fetch the required data.")
         return
@@ -49,5 +71,29 @@ def main():
     else:
         print("❌ Prediction failed during the final step.")
 
+def main():
+    """Main function to run the prediction CLI."""
+    parser = argparse.ArgumentParser(description="Make predictions for player performance in a given game.")
+    parser.add_argument("game_id", type=str, nargs="?", help="The ID of the game to predict.")
+    parser.add_argument("player_id", type=str, nargs="?", help="The ID of the player to predict for.")
+    parser.add_argument("--model_path", type=str, default=None, help="Path to a trained model file (bypasses the model registry).")
+    parser.add_argument("--model_alias", type=str, default="prod", help="Registry alias of the model to serve (e.g. prod, candidate).")
+    
+    parser.add_argument("--slate", type=str, default=None, metavar="DATE",
+                        help="Predict every configured prop for every game on DATE (YYYY-MM-DD) instead.")
+    add_profile_argument(parser)
+    
+    args = parser.parse_args()
+
+    if args.slate:
+        with profile_run(args.profile, 'run_prediction_slate'):
+            run_slate(args.slate, args.model_alias)
+        return
+    if not (args.game_id and args.player_id):
+        parser.error("game_id and player_id are required unless --slate is given")
+
+    with profile_run(args.profile, 'run_prediction'):
+        run_single(args.game_id, args.player_id, args.model_path, args.model_alias)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
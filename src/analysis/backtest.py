@@ -0,0 +1,286 @@
+"""
+Vectorized historical backtesting of prop bets.
+
+Bets are settled with array operations (American-odds payouts, pushes on the line,
+voids when no result exists), bankroll paths are simulated under flat or Kelly
+staking with a cumulative product over betting days, and ROI, drawdown, closing
+line value (CLV) and calibration are reported overall and by season, prop type
+and sportsbook.
+
+Input bets need: game_id, date, prop_type, sportsbook, line, bet_type ('over' or
+'under'), model_probability, american_odds and actual_value (NaN when void).
+Optional: season, stake_recommendation (bankroll share for Kelly staking),
+closing_odds (American price of the same side at close) and status ('void').
+
+Bets rebuilt from the database are priced at each book's line as it stood when the
+prediction was stored, never at a later move, and carry the book's last pre-game
+price of the same side as their closing odds.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.utils.config import config
+from src.utils.database import Games, PlayerGameStats, db_manager
+from src.utils.odds import american_to_decimal
+from src.prediction.slate import PROP_STATS, normalize_prop_types
+from src.prediction.value_bets import find_value_bets, get_latest_odds, get_latest_predictions
+
+logger = logging.getLogger(__name__)
+
+GROUPS = ['season', 'prop_type', 'sportsbook']
+# Summary columns that are counts or sums, zero when there is no bet
+TOTALS = ['bets', 'won', 'lost', 'push', 'void', 'staked', 'profit']
+
+
+def settle_bets(bets: pd.DataFrame) -> pd.DataFrame:
+    """Adds ``outcome`` (won/lost/push/void), ``decimal_odds`` and ``unit_profit`` per bet."""
+    line = bets['line'].to_numpy(dtype=float)
+    actual = bets['actual_value'].to_numpy(dtype=float)
+    over = (bets['bet_type'] == 'over').to_numpy()
+
+    void = np.isnan(actual)
+    if 'status' in bets:
+        void |= (bets['status'] == 'void').to_numpy()
+    push = ~void & (actual == line)
+    won = ~void & ~push & np.where(over, actual > line, actual < line)
+
+    decimal = american_to_decimal(bets['american_odds'].to_numpy(dtype=float))
+    settled = bets.assign(
+        outcome=np.select([void, push, won], ['void', 'push', 'won'], default='lost'),
+        decimal_odds=decimal,
+        unit_profit=np.select([void | push, won], [0.0, decimal - 1], default=-1.0),
+    )
+    if 'closing_odds' in bets:
+        # Positive CLV: the price taken beat the closing price of the same side
+        settled['clv'] = decimal / american_to_decimal(bets['closing_odds'].to_numpy(dtype=float)) - 1
+    return settled
+
+
+def simulate_bankroll(settled: pd.DataFrame, staking: str = 'flat', initial_bankroll: float = 100.0,
+                      flat_stake: float = 1.0, kelly_multiplier: float = 1.0,
+                      max_stake: Optional[float] = None) -> Dict[str, Any]:
+    """Stakes every bet and walks the bankroll through the betting days.
+
+    Flat staking bets ``flat_stake`` units per bet. Kelly staking bets
+    ``kelly_multiplier * stake_recommendation`` of the bankroll at the start of the
+    bet's day, so same-day bets are sized together and days compound.
+
+    Returns:
+        ``stakes`` and ``profits`` aligned with ``settled``, and the end-of-day
+        ``bankroll`` path indexed by date.
+    """
+    settled = settled.sort_values('date', kind='mergesort')
+    day = pd.to_datetime(settled['date']).dt.normalize().to_numpy()
+    days, day_index = np.unique(day, return_inverse=True)
+    unit_profit = settled['unit_profit'].to_numpy(dtype=float)
+    live = (settled['outcome'] != 'void').to_numpy()
+
+    if staking == 'flat':
+        stakes = np.where(live, flat_stake, 0.0)
+        profits = stakes * unit_profit
+        bankroll = initial_bankroll + np.cumsum(np.bincount(day_index, weights=profits, minlength=len(days)))
+    elif staking == 'kelly':
+        fractions = kelly_multiplier * settled['stake_recommendation'].to_numpy(dtype=float)
+        if max_stake is not None:
+            fractions = np.minimum(fractions, max_stake)
+        fractions = np.where(live, fractions, 0.0)
+        daily_return = np.bincount(day_index, weights=fractions * unit_profit, minlength=len(days))
+        # Stakes are a share of the bankroll at the start of each day
+        bankroll = initial_bankroll * np.cumprod(np.maximum(1 + daily_return, 0.0))
+        start_of_day = np.concatenate([[initial_bankroll], bankroll[:-1]])
+        stakes = fractions * start_of_day[day_index]
+        profits = stakes * unit_profit
+    else:
+        raise ValueError(f"Unknown staking '{staking}', expected 'flat' or 'kelly'")
+
+    return {
+        'stakes': pd.Series(stakes, index=settled.index),
+        'profits': pd.Series(profits, index=settled.index),
+        'bankroll': pd.Series(bankroll, index=pd.DatetimeIndex(days, name='date'), name='bankroll'),
+    }
+
+
+def max_drawdown(bankroll: pd.Series, initial_bankroll: float) -> float:
+    """Largest peak-to-trough loss as a share of the peak."""
+    path = np.concatenate([[initial_bankroll], bankroll.to_numpy(dtype=float)])
+    peaks = np.maximum.accumulate(path)
+    return float(np.max(1 - path / peaks))
+
+
+def summarize(settled: pd.DataFrame, by: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Record, staked, profit, ROI, hit rate, CLV and Brier score, overall or per group."""
+    frame = settled.assign(
+        won=settled['outcome'] == 'won', lost=settled['outcome'] == 'lost',
+        push=settled['outcome'] == 'push', void=settled['outcome'] == 'void',
+        squared_error=np.where(settled['outcome'].isin(['won', 'lost']),
+                               (settled['model_probability'] - (settled['outcome'] == 'won')) ** 2, np.nan),
+    )
+    aggregations = {
+        'bets': ('outcome', 'size'), 'won': ('won', 'sum'), 'lost': ('lost', 'sum'),
+        'push': ('push', 'sum'), 'void': ('void', 'sum'), 'staked': ('stake', 'sum'),
+        'profit': ('profit', 'sum'), 'mean_probability': ('model_probability', 'mean'),
+        'brier': ('squared_error', 'mean'),
+    }
+    if 'edge' in frame:
+        aggregations['mean_edge'] = ('edge', 'mean')
+    if 'clv' in frame:
+        aggregations['mean_clv'] = ('clv', 'mean')
+        frame = frame.assign(beat_close=np.where(frame['clv'].notna(), frame['clv'] > 0, np.nan))
+        aggregations['beat_close_rate'] = ('beat_close', 'mean')
+
+    if by:
+        table = frame.groupby(list(by), observed=True).agg(**aggregations)
+    else:
+        table = frame.groupby(np.zeros(len(frame)), observed=True).agg(**aggregations)
+        # One row even without any bet, e.g. for a season where none qualified
+        table = table.set_axis(['all'] * len(table)).reindex(['all'])
+        table[TOTALS] = table[TOTALS].fillna(0)
+    table['hit_rate'] = table['won'] / (table['won'] + table['lost']).replace(0, np.nan)
+    table['roi'] = table['profit'] / table['staked'].replace(0, np.nan)
+    return table
+
+
+def calibration_table(settled: pd.DataFrame, by: Optional[Sequence[str]] = None, n_bins: int = 10) -> pd.DataFrame:
+    """Mean predicted probability against observed win rate per probability bin."""
+    graded = settled[settled['outcome'].isin(['won', 'lost'])]
+    bins = pd.cut(graded['model_probability'], np.linspace(0, 1, n_bins + 1), include_lowest=True)
+    keys = list(by or []) + [bins.rename('probability_bin')]
+    table = graded.assign(won=graded['outcome'] == 'won').groupby(keys, observed=True).agg(
+        bets=('won', 'size'), predicted=('model_probability', 'mean'), observed=('won', 'mean'))
+    table['gap'] = table['observed'] - table['predicted']
+    return table
+
+
+def backtest(bets: pd.DataFrame, staking: str = 'flat', initial_bankroll: float = 100.0,
+             flat_stake: float = 1.0, kelly_multiplier: float = 1.0, max_stake: Optional[float] = None,
+             by: Sequence[str] = GROUPS, n_bins: int = 10) -> Dict[str, Any]:
+    """Settles, stakes and evaluates a set of historical bets.
+
+    Returns:
+        ``summary`` (dict), ``by_group`` and ``calibration`` tables keyed by group column, the daily
+        ``bankroll`` path and the ``bets`` with outcome, stake and profit.
+    """
+    settled = settle_bets(bets)
+    path = simulate_bankroll(settled, staking, initial_bankroll, flat_stake, kelly_multiplier, max_stake)
+    settled = settled.assign(stake=path['stakes'], profit=path['profits'])
+    groups = [column for column in by if column in settled]
+
+    overall = summarize(settled).iloc[0].to_dict()
+    summary = {
+        **{key: (int(value) if key in ('bets', 'won', 'lost', 'push', 'void') else float(value))
+           for key, value in overall.items()},
+        'staking': staking,
+        'initial_bankroll': initial_bankroll,
+        'final_bankroll': float(path['bankroll'].iloc[-1]) if len(path['bankroll']) else initial_bankroll,
+        'max_drawdown': max_drawdown(path['bankroll'], initial_bankroll),
+    }
+    return {
+        'summary': summary,
+        'by_group': {column: summarize(settled, [column]) for column in groups},
+        'calibration': {column: calibration_table(settled, [column], n_bins) for column in groups},
+        'bankroll': path['bankroll'],
+        'bets': settled,
+    }
+
+
+def load_backtest_bets(session, years: Optional[List[int]] = None, **thresholds) -> pd.DataFrame:
+    """Rebuilds the bets the value-bet engine would have placed in past seasons.
+
+    The latest stored prediction per (game, player, prop) is matched against every
+    book's latest line posted no later than the prediction was stored, so the bet
+    sees no line move it could not have known about. Each bet's ``closing_odds`` is
+    the book's last price of that side posted before the game, and bets are graded
+    on the player's box score for that game.
+    """
+    years = years or config.get('evaluation.backtest_years', [2023, 2024])
+    seasons = [str(year) for year in years]
+    # Read through the session so predictions and odds it has not committed yet are seen
+    connection = session.connection()
+    games = pd.read_sql(select(Games.game_id, Games.date, Games.season).where(Games.season.in_(seasons)),
+                        connection)
+    if games.empty:
+        return pd.DataFrame()
+    game_ids = games['game_id'].tolist()
+
+    predictions = get_latest_predictions(connection, game_ids)
+    odds = get_latest_odds(connection, game_ids)
+    stats = pd.read_sql(select(PlayerGameStats.game_id, PlayerGameStats.player_id, PlayerGameStats.points,
+                               PlayerGameStats.rebounds, PlayerGameStats.assists,
+                               PlayerGameStats.three_pointers_made)
+                        .where(PlayerGameStats.game_id.in_(game_ids)), connection)
+
+    keys = ['game_id', 'player_id', 'prop_type']
+    predictions = predictions.astype({'game_id': str, 'player_id': str})
+    odds = odds.assign(prop_type=normalize_prop_types(odds['prop_type'])).astype({'game_id': str, 'player_id': str})
+    posted = predictions[keys + ['created_at']].merge(odds, on=keys)
+    posted = posted[posted['timestamp'] <= posted['created_at']].drop(columns='created_at')
+
+    bets = find_value_bets(predictions, posted, **thresholds)
+    if bets.empty:
+        return bets
+
+    closing = odds.merge(games[['game_id', 'date']].astype({'game_id': str}), on='game_id')
+    closing = (closing[closing['timestamp'] <= closing['date']]
+               .sort_values('timestamp').drop_duplicates(keys + ['sportsbook'], keep='last'))
+    bets = bets.merge(closing[keys + ['sportsbook', 'over_odds', 'under_odds']],
+                      on=keys + ['sportsbook'], how='left')
+    bets['closing_odds'] = np.where(bets['bet_type'] == 'over', bets['over_odds'], bets['under_odds'])
+    bets = bets.drop(columns=['over_odds', 'under_odds'])
+
+    # Graded value of every prop, in long form to match the bets
+    actuals = pd.concat([
+        stats[['game_id', 'player_id']].assign(prop_type=prop, actual_value=stats[columns].sum(axis=1, min_count=len(columns)))
+        for prop, columns in PROP_STATS.items()
+    ]).astype({'game_id': str, 'player_id': str})
+    bets = bets.merge(actuals, on=['game_id', 'player_id', 'prop_type'], how='left')
+    return bets.merge(games.astype({'game_id': str}), on='game_id', how='left')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the value-bet strategy over past seasons.")
+    parser.add_argument("--years", type=int, nargs="+", default=None,
+                        help="Seasons to backtest (defaults to evaluation.backtest_years).")
+    parser.add_argument("--staking", choices=["flat", "kelly"], default="flat")
+    parser.add_argument("--bankroll", type=float, default=100.0)
+    parser.add_argument("--output-dir", type=str, default="analysis_results")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with db_manager.get_session() as session:
+        bets = load_backtest_bets(session, args.years)
+    if bets.empty:
+        logger.error("No bets to backtest: no stored predictions with odds for these seasons.")
+        return
+
+    results = backtest(bets, staking=args.staking, initial_bankroll=args.bankroll)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(exist_ok=True)
+    for column, table in results['by_group'].items():
+        table.to_csv(output_dir / f"backtest_by_{column}.csv")
+    for column, table in results['calibration'].items():
+        table.to_csv(output_dir / f"backtest_calibration_by_{column}.csv")
+    results['bankroll'].to_csv(output_dir / "backtest_bankroll.csv")
+
+    summary = results['summary']
+    print(f"\n=== BACKTEST ({summary['staking']} staking) ===")
+    print(f"Bets: {summary['bets']:,} ({summary['won']:,} won, {summary['lost']:,} lost, "
+          f"{summary['push']:,} push, {summary['void']:,} void)")
+    print(f"ROI: {summary['roi']:.2%}  Hit rate: {summary['hit_rate']:.2%}  Brier: {summary['brier']:.4f}")
+    print(f"Bankroll: {summary['initial_bankroll']:.2f} -> {summary['final_bankroll']:.2f}  "
+          f"Max drawdown: {summary['max_drawdown']:.2%}")
+    logger.info(f"Backtest tables saved to {output_dir.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Monte Carlo bankroll simulation of a betting policy.
+
+Each simulated season bets through a recommendation set (in order, or a resample of
+it) with outcomes drawn as Bernoulli trials at the model probabilities. Seasons are
+simulated in chunks of NumPy arrays, chunks are spread over a process pool, and every
+chunk draws from its own child seed so results do not depend on the worker count.
+
+Reported: risk of ruin, the distribution of final bankrolls, percentile bankroll
+curves, and the growth and ruin of a grid of Kelly multipliers on the same draws,
+from which the growth-optimal Kelly fraction is read.
+"""
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.utils.config import config
+from src.utils.database import BetRecommendations, db_manager
+from src.utils.odds import DEFAULT_AMERICAN_ODDS, american_to_decimal, kelly_fraction
+from src.prediction.slate import normalize_prop_types
+from src.prediction.value_bets import get_latest_odds
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = [5, 25, 50, 75, 95]
+KELLY_MULTIPLIERS = np.round(np.arange(0.05, 1.55, 0.05), 2)
+
+
+def load_recommendations(session, status: Optional[str] = 'pending') -> pd.DataFrame:
+    """Stored bet recommendations with the price of the side recommended.
+
+    ``bet_recommendations`` keeps the edge and stake but not the price, so the
+    book's latest line in ``prop_odds`` supplies it, as in find_value_bets (-110
+    when the line is gone).
+    """
+    query = select(BetRecommendations.game_id, BetRecommendations.player_id, BetRecommendations.prop_type,
+                   BetRecommendations.sportsbook, BetRecommendations.bet_type,
+                   BetRecommendations.model_probability, BetRecommendations.implied_probability,
+                   BetRecommendations.edge, BetRecommendations.stake_recommendation)
+    if status is not None:
+        query = query.where(BetRecommendations.status == status)
+    connection = session.connection()
+    recommendations = pd.read_sql(query, connection)
+    if recommendations.empty:
+        return recommendations
+
+    odds = get_latest_odds(connection, recommendations['game_id'].unique().tolist())
+    odds = (odds.assign(prop_type=normalize_prop_types(odds['prop_type']))
+            .sort_values('timestamp', kind='mergesort')
+            .drop_duplicates(['game_id', 'player_id', 'sportsbook', 'prop_type'], keep='last'))
+    merged = recommendations.merge(odds[['game_id', 'player_id', 'sportsbook', 'prop_type', 'over_odds', 'under_odds']],
+                                   on=['game_id', 'player_id', 'sportsbook', 'prop_type'], how='left')
+    price = np.where(merged['bet_type'] == 'over', merged['over_odds'], merged['under_odds'])
+    return merged.drop(columns=['over_odds', 'under_odds']).assign(
+        american_odds=pd.Series(price, index=merged.index).fillna(DEFAULT_AMERICAN_ODDS).astype(int))
+
+
+def _simulate_chunk(task: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Simulates one chunk of seasons; module-level so process pools can pickle it."""
+    rng = np.random.default_rng(task['seed'])
+    n_seasons, bets_per_season = task['n_seasons'], task['bets_per_season']
+    probability, decimal = task['probability'], task['decimal']
+    stake, full_kelly = task['stake'], task['full_kelly']
+
+    if task['resample']:
+        index = rng.integers(0, len(probability), size=(n_seasons, bets_per_season))
+        probability, decimal, stake, full_kelly = (array[index] for array in (probability, decimal, stake, full_kelly))
+    else:
+        # Every season replays the set in order; broadcasting avoids copying it per season
+        probability, decimal, stake, full_kelly = (array[None, :] for array in (probability, decimal, stake, full_kelly))
+
+    won = rng.random((n_seasons, bets_per_season)) < probability
+    unit_profit = np.where(won, decimal - 1, -1.0)
+    initial, ruin_level = task['initial_bankroll'], task['ruin_level'] * task['initial_bankroll']
+
+    if task['staking'] == 'kelly':
+        paths = initial * np.cumprod(np.maximum(1 + stake * unit_profit, 0.0), axis=1)
+    else:
+        paths = initial + np.cumsum(stake * unit_profit, axis=1)
+    ruined = paths.min(axis=1) <= ruin_level
+
+    # Log growth of each Kelly multiplier on the same outcomes
+    multipliers = task['multipliers']
+    log_growth = np.empty((len(multipliers), n_seasons), dtype=np.float32)
+    kelly_ruined = np.empty((len(multipliers), n_seasons), dtype=bool)
+    for i, multiplier in enumerate(multipliers):
+        step = np.log(np.maximum(1 + np.minimum(multiplier * full_kelly, 1.0) * unit_profit, 1e-12))
+        log_path = np.cumsum(step, axis=1)
+        log_growth[i] = log_path[:, -1]
+        kelly_ruined[i] = log_path.min(axis=1) <= np.log(task['ruin_level'])
+
+    return {
+        'final': paths[:, -1],
+        'ruined': ruined,
+        'curves': paths[:, task['checkpoints']].astype(np.float32),
+        'log_growth': log_growth,
+        'kelly_ruined': kelly_ruined,
+    }
+
+
+def simulate_bankroll(recommendations: pd.DataFrame, n_seasons: Optional[int] = None,
+                      bets_per_season: Optional[int] = None, staking: str = 'kelly',
+                      initial_bankroll: float = 100.0, flat_stake: float = 1.0,
+                      ruin_level: Optional[float] = None, chunk_size: Optional[int] = None,
+                      workers: Optional[int] = None, seed: Optional[int] = None,
+                      kelly_multipliers: Sequence[float] = KELLY_MULTIPLIERS,
+                      n_checkpoints: int = 50) -> Dict[str, Any]:
+    """Simulates seasons of betting a recommendation set.
+
+    Args:
+        recommendations: model_probability, stake_recommendation (share of bankroll)
+            and decimal_odds or american_odds of each bet.
+        n_seasons: Seasons to simulate (``simulation.n_seasons``).
+        bets_per_season: Bets per season, resampled from the set; by default every
+            season replays the set in order.
+        staking: 'kelly' bets ``stake_recommendation`` of the current bankroll;
+            'flat' bets ``flat_stake`` units.
+        ruin_level: Share of the initial bankroll counted as ruin (``simulation.ruin_level``).
+        chunk_size: Seasons per chunk (``simulation.chunk_size``).
+        workers: Processes; 0 or 1 simulates in this process (``simulation.workers``).
+        seed: Root seed (``simulation.seed``).
+        kelly_multipliers: Multiples of full Kelly evaluated for the optimal fraction.
+        n_checkpoints: Points along the season at which percentile curves are kept.
+    """
+    n_seasons = n_seasons or config.get('simulation.n_seasons', 100000)
+    ruin_level = config.get('simulation.ruin_level', 0.2) if ruin_level is None else ruin_level
+    chunk_size = chunk_size or config.get('simulation.chunk_size', 2000)
+    workers = config.get('simulation.workers', None) if workers is None else workers
+    seed = config.get('simulation.seed', 42) if seed is None else seed
+    if staking not in ('kelly', 'flat'):
+        raise ValueError(f"Unknown staking '{staking}', expected 'flat' or 'kelly'")
+    if recommendations.empty:
+        raise ValueError("No recommendations to simulate")
+
+    probability = recommendations['model_probability'].to_numpy(dtype=float)
+    if 'decimal_odds' in recommendations:
+        decimal = recommendations['decimal_odds'].to_numpy(dtype=float)
+    else:
+        decimal = american_to_decimal(recommendations['american_odds'].to_numpy(dtype=float))
+    if staking == 'kelly':
+        stake = recommendations['stake_recommendation'].to_numpy(dtype=float)
+    else:
+        stake = np.full(len(probability), float(flat_stake))
+    resample = bets_per_season is not None
+    bets_per_season = bets_per_season or len(probability)
+    checkpoints = np.unique(np.linspace(0, bets_per_season - 1, min(n_checkpoints, bets_per_season)).astype(int))
+    kelly_multipliers = np.asarray(kelly_multipliers, dtype=float)
+
+    sizes = [min(chunk_size, n_seasons - start) for start in range(0, n_seasons, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    shared = dict(probability=probability, decimal=decimal, stake=stake,
+                  full_kelly=kelly_fraction(probability, decimal), resample=resample,
+                  bets_per_season=bets_per_season, staking=staking, initial_bankroll=initial_bankroll,
+                  ruin_level=ruin_level, checkpoints=checkpoints, multipliers=kelly_multipliers)
+    tasks = [dict(shared, n_seasons=size, seed=child) for size, child in zip(sizes, seeds)]
+
+    if workers in (0, 1) or len(tasks) == 1:
+        chunks = [_simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(_simulate_chunk, tasks))
+    logger.info(f"Simulated {n_seasons:,} seasons of {bets_per_season:,} bets in {len(tasks)} chunks")
+
+    final = np.concatenate([chunk['final'] for chunk in chunks])
+    curves = np.concatenate([chunk['curves'] for chunk in chunks])
+    log_growth = np.concatenate([chunk['log_growth'] for chunk in chunks], axis=1)
+    kelly_ruined = np.concatenate([chunk['kelly_ruined'] for chunk in chunks], axis=1)
+
+    percentile_curves = pd.DataFrame(
+        np.percentile(curves, PERCENTILES, axis=0).T,
+        index=pd.Index(checkpoints + 1, name='bet'), columns=[f"p{p}" for p in PERCENTILES])
+    kelly_curve = pd.DataFrame({
+        'mean_log_growth': log_growth.mean(axis=1),
+        'median_final': initial_bankroll * np.exp(np.median(log_growth, axis=1)),
+        'risk_of_ruin': kelly_ruined.mean(axis=1),
+    }, index=pd.Index(kelly_multipliers, name='kelly_multiplier'))
+
+    return {
+        'n_seasons': n_seasons,
+        'bets_per_season': bets_per_season,
+        'staking': staking,
+        'initial_bankroll': initial_bankroll,
+        'risk_of_ruin': float(np.concatenate([chunk['ruined'] for chunk in chunks]).mean()),
+        'prob_profit': float((final > initial_bankroll).mean()),
+        'mean_final': float(final.mean()),
+        'final_percentiles': dict(zip([f"p{p}" for p in PERCENTILES], np.percentile(final, PERCENTILES).tolist())),
+        'percentile_curves': percentile_curves,
+        'kelly_curve': kelly_curve,
+        'optimal_kelly_multiplier': float(kelly_curve['mean_log_growth'].idxmax()),
+        'final_bankrolls': final,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo bankroll simulation of stored bet recommendations.")
+    parser.add_argument("--seasons", type=int, default=None, help="Seasons to simulate (simulation.n_seasons).")
+    parser.add_argument("--bets-per-season", type=int, default=None,
+                        help="Resample this many bets per season instead of replaying the set.")
+    parser.add_argument("--staking", choices=["flat", "kelly"], default="kelly")
+    parser.add_argument("--bankroll", type=float, default=100.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--status", type=str, default="pending",
+                        help="Recommendation status to simulate ('all' for every stored row).")
+    parser.add_argument("--output-dir", type=str, default="analysis_results")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with db_manager.get_session() as session:
+        recommendations = load_recommendations(session, None if args.status == 'all' else args.status)
+    if recommendations.empty:
+        logger.error("No bet recommendations to simulate.")
+        return
+
+    results = simulate_bankroll(recommendations, n_seasons=args.seasons, bets_per_season=args.bets_per_season,
+                                staking=args.staking, initial_bankroll=args.bankroll, workers=args.workers)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(exist_ok=True)
+    results['percentile_curves'].to_csv(output_dir / "simulation_percentile_curves.csv")
+    results['kelly_curve'].to_csv(output_dir / "simulation_kelly_curve.csv")
+
+    print(f"\n=== MONTE CARLO ({results['n_seasons']:,} seasons x {results['bets_per_season']:,} bets, "
+          f"{results['staking']} staking) ===")
+    print(f"Risk of ruin: {results['risk_of_ruin']:.2%}  P(profit): {results['prob_profit']:.2%}")
+    print("Final bankroll: " + "  ".join(f"{key} {value:,.2f}" for key, value in results['final_percentiles'].items()))
+    print(f"Growth-optimal Kelly multiplier: {results['optimal_kelly_multiplier']:.2f}")
+    logger.info(f"Simulation tables saved to {output_dir.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
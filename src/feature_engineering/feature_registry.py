@@ -0,0 +1,224 @@
+"""
+Declarative feature groups and their concurrent execution.
+
+A feature group declares the columns it reads, the keys its rows are identified by
+and the columns it produces. The executor orders the groups by their data
+dependencies (a group reading another group's output runs after it), computes the
+groups of one level concurrently, each on a narrow frame of just its keys and
+inputs (deduplicated to one row per key, so game-level groups see one row per game),
+and joins every result onto the base frame by key once at the end.
+
+Results are cached per group, keyed on a fingerprint of the group's input columns
+under the current data version of the domain (src/utils/cache.py): unchanged inputs
+reuse the cached result, and ingesting new data drops every cached entry.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from src.feature_engineering.game_features import GameFeatures
+from src.feature_engineering.player_features import PlayerFeatures
+from src.feature_engineering.team_features import TeamFeatures
+from src.feature_engineering import sql_backend
+from src.utils.cache import TTLCache, cache_key, get_cache
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureGroup:
+    """A set of features computed together from declared inputs."""
+
+    def __init__(self, name: str, keys: Sequence[str], inputs: Sequence[str], outputs: Sequence[str],
+                 compute: Callable[[pd.DataFrame], pd.DataFrame]):
+        """
+        Args:
+            name: Unique name of the group.
+            keys: Columns identifying one row of the group's result (e.g. game_id for
+                game-level features).
+            inputs: Columns read besides the keys; may be other groups' outputs.
+            outputs: Columns the group adds.
+            compute: Function of the narrow input frame returning a frame holding the
+                keys and outputs (other columns are ignored).
+        """
+        self.name = name
+        self.keys = list(keys)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.compute = compute
+
+    def __repr__(self) -> str:
+        return f"FeatureGroup({self.name!r}, keys={self.keys}, outputs={len(self.outputs)})"
+
+
+class FeatureRegistry:
+    """Feature groups of a pipeline, in registration (output column) order."""
+
+    def __init__(self):
+        self.groups: Dict[str, FeatureGroup] = {}
+
+    def register(self, group: FeatureGroup) -> FeatureGroup:
+        if group.name in self.groups:
+            raise ValueError(f"Feature group '{group.name}' is already registered")
+        produced = {col: other.name for other in self.groups.values() for col in other.outputs}
+        clashes = [col for col in group.outputs if col in produced]
+        if clashes:
+            raise ValueError(f"Feature group '{group.name}' outputs {clashes}, already produced by "
+                             f"{sorted({produced[col] for col in clashes})}")
+        self.groups[group.name] = group
+        return group
+
+    def dependencies(self, group: FeatureGroup) -> List[str]:
+        """Groups producing any of ``group``'s inputs."""
+        return [other.name for other in self.groups.values()
+                if other is not group and set(other.outputs) & set(group.inputs)]
+
+    def levels(self) -> List[List[FeatureGroup]]:
+        """Groups in dependency order; the groups of one level are independent."""
+        remaining = {name: set(self.dependencies(group)) for name, group in self.groups.items()}
+        done, levels = set(), []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if deps <= done]
+            if not ready:
+                raise ValueError(f"Feature groups with circular inputs: {sorted(remaining)}")
+            levels.append([self.groups[name] for name in ready])
+            done.update(ready)
+            for name in ready:
+                del remaining[name]
+        return levels
+
+
+class FeatureExecutor:
+    """Computes a registry's groups on a base frame and joins the results."""
+
+    def __init__(self, registry: FeatureRegistry, max_workers: Optional[int] = None,
+                 cache: Optional[TTLCache] = None, domain: str = 'nba'):
+        """
+        Args:
+            registry: The feature groups.
+            max_workers: Threads computing the groups of one level (None = one per group).
+            cache: Cache of group results (None = no caching).
+            domain: Data domain whose version invalidates cached results.
+        """
+        self.registry = registry
+        self.max_workers = max_workers
+        self.cache = cache
+        self.domain = domain
+        # Seconds and cache use of each group in the last run
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    def run(self, base_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns ``base_df`` with every group's outputs joined on, in registration order.
+
+        Raises:
+            ValueError: If a group's inputs are missing or its result lacks declared outputs.
+        """
+        self.timings = {}
+        results: Dict[str, pd.DataFrame] = {}
+        for level in self.registry.levels():
+            inputs = {group.name: self._narrow(group, base_df, results) for group in level}
+            workers = min(len(level), self.max_workers or len(level))
+            if workers <= 1:
+                computed = [self._compute(group, inputs[group.name]) for group in level]
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='features') as pool:
+                    computed = list(pool.map(lambda group: self._compute(group, inputs[group.name]), level))
+            results.update(zip((group.name for group in level), computed))
+
+        features_df = base_df
+        for name, group in self.registry.groups.items():
+            features_df = features_df.merge(results[name], on=group.keys, how='left')
+        logger.info("Feature groups: " + ", ".join(
+            f"{name} {timing['seconds']:.2f}s{' (cached)' if timing['cached'] else ''}"
+            for name, timing in self.timings.items()))
+        return features_df
+
+    def _narrow(self, group: FeatureGroup, base_df: pd.DataFrame, results: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """The group's keys and inputs, one row per key."""
+        from_base = [col for col in group.keys + group.inputs if col in base_df.columns]
+        narrow = base_df[list(dict.fromkeys(from_base))]
+        for name in self.registry.dependencies(group):
+            upstream = self.registry.groups[name]
+            wanted = [col for col in upstream.outputs if col in group.inputs]
+            narrow = narrow.merge(results[name][upstream.keys + wanted], on=upstream.keys, how='left')
+        missing = [col for col in group.keys + group.inputs if col not in narrow.columns]
+        if missing:
+            raise ValueError(f"Feature group '{group.name}' is missing input columns {missing}")
+        if narrow.duplicated(subset=group.keys).any():
+            narrow = narrow.drop_duplicates(subset=group.keys)
+        return narrow.reset_index(drop=True)
+
+    def _compute(self, group: FeatureGroup, narrow: pd.DataFrame) -> pd.DataFrame:
+        start = time.perf_counter()
+        key = None
+        if self.cache is not None:
+            fingerprint = int(pd.util.hash_pandas_object(narrow, index=False).sum())
+            key = cache_key(self.domain, 'feature_group',
+                            (group.name, tuple(narrow.columns), tuple(group.outputs), len(narrow), fingerprint))
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.timings[group.name] = {'seconds': time.perf_counter() - start, 'cached': True}
+                return cached
+
+        result = group.compute(narrow)
+        missing = [col for col in group.keys + group.outputs if col not in result.columns]
+        if missing:
+            raise ValueError(f"Feature group '{group.name}' did not produce {missing}")
+        result = result[group.keys + group.outputs]
+        if key is not None:
+            self.cache.set(key, result)
+        self.timings[group.name] = {'seconds': time.perf_counter() - start, 'cached': False}
+        return result
+
+
+def nba_feature_registry(config) -> FeatureRegistry:
+    """The player, rest-day and team-strength feature groups of the NBA pipeline.
+
+    Args:
+        config: The project configuration (``feature_engineering`` sections are read).
+    """
+    player_creator = PlayerFeatures(config.get('feature_engineering.player_features', {}))
+    game_creator = GameFeatures(config.get('feature_engineering.game_features', {}))
+    team_creator = TeamFeatures(config.get('feature_engineering.team_features', {}))
+    game_columns = ['date', 'home_team_id', 'away_team_id']
+
+    registry = FeatureRegistry()
+    registry.register(FeatureGroup(
+        'player_rolling', keys=['player_id', 'game_id'],
+        inputs=player_creator.input_columns(),
+        outputs=player_creator.feature_columns(), compute=player_creator.create_rolling_averages))
+    registry.register(FeatureGroup(
+        'rest_days', keys=['game_id'], inputs=game_columns,
+        outputs=game_creator.feature_columns(), compute=game_creator.create_game_context_features))
+    registry.register(FeatureGroup(
+        'team_strength', keys=['game_id'], inputs=game_columns + ['home_score', 'away_score'],
+        outputs=team_creator.feature_columns(), compute=team_creator.create_team_strength_features))
+    return registry
+
+
+def nba_feature_executor(config) -> FeatureExecutor:
+    """Executor of the NBA feature groups configured by ``feature_engineering.dag``."""
+    dag = config.get('feature_engineering.dag', {}) or {}
+    return FeatureExecutor(nba_feature_registry(config), max_workers=dag.get('max_workers'),
+                           cache=get_cache('feature_groups') if dag.get('cache', True) else None)
+
+
+def nba_feature_backend(config):
+    """The configured feature backend (``feature_engineering.backend``), with a ``run(base_df)`` method.
+
+    ``pandas`` runs the feature groups above; ``duckdb`` pushes the same features down
+    to DuckDB window queries (sql_backend.py), falling back to pandas when duckdb is
+    not installed.
+    """
+    backend = config.get('feature_engineering.backend', 'pandas')
+    if backend == 'duckdb':
+        if sql_backend.duckdb is not None:
+            return sql_backend.DuckDBFeatureBackend(config)
+        logger.warning("duckdb is not installed; using the pandas feature backend")
+    elif backend != 'pandas':
+        raise ValueError(f"Unknown feature backend '{backend}' (expected pandas or duckdb)")
+    return nba_feature_executor(config)
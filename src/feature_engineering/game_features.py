@@ -1,7 +1,7 @@
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 # Setup logging
 log_dir = Path("logs")
@@ -19,6 +19,10 @@ class GameFeatures:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
 
+    def feature_columns(self) -> List[str]:
+        """Columns added by create_game_context_features."""
+        return ['home_rest_days', 'away_rest_days']
+
     def create_game_context_features(self, integrated_df: pd.DataFrame) -> pd.DataFrame:
         """Create game-level features like rest days."""
         logging.info("Creating game-level context features...")
@@ -27,35 +31,26 @@ class GameFeatures:
             logging.error("The 'date' column is missing from the input DataFrame.")
             return integrated_df
             
-        # Sort games by date to calculate rest days correctly
-        games_sorted = integrated_df.sort_values(by='date')
-        
-        # Calculate rest days for each team
-        all_games_with_rest = []
-        # Need a unique list of all team IDs involved in the games
-        team_ids = pd.unique(games_sorted[['home_team_id', 'away_team_id']].values.ravel('K'))
-
-        for team_id in team_ids:
-            team_games = games_sorted[(games_sorted['home_team_id'] == team_id) | (games_sorted['away_team_id'] == team_id)].copy()
-            team_games = team_games.sort_values('date')
-
-            # Ensure columns are datetime objects
-            team_games['date'] = pd.to_datetime(team_games['date'])
-            team_games['last_game_date'] = pd.to_datetime(team_games['date'].shift(1))
-            
-            team_games['rest_days'] = (team_games['date'] - team_games['last_game_date']).dt.days
-            all_games_with_rest.append(team_games)
-
-        if not all_games_with_rest:
+        # One row per game (the input has one per player-game)
+        games = integrated_df[['game_id', 'date', 'home_team_id', 'away_team_id']].drop_duplicates(subset='game_id')
+        if games.empty:
             logging.warning("No games to process for feature engineering.")
             return integrated_df
 
-        rest_days_df = pd.concat(all_games_with_rest).drop_duplicates(subset=['game_id', 'player_id'])
-        
+        # Calculate rest days for each team from its own sequence of games
+        team_games = pd.concat([
+            games[['game_id', 'date', 'home_team_id']].rename(columns={'home_team_id': 'team_id'}).assign(side='home'),
+            games[['game_id', 'date', 'away_team_id']].rename(columns={'away_team_id': 'team_id'}).assign(side='away'),
+        ])
+        team_games['date'] = pd.to_datetime(team_games['date'])
+        team_games = team_games.sort_values(['team_id', 'date'], kind='mergesort')
+        # Whole days (NaN for a team's first game), exact in float32
+        team_games['rest_days'] = team_games.groupby('team_id')['date'].diff().dt.days.astype('float32')
+
         # Assign rest days to home and away teams
-        home_rest = rest_days_df[rest_days_df['home_team_id'] == rest_days_df['team_id']][['game_id', 'rest_days']].rename(columns={'rest_days': 'home_rest_days'})
-        away_rest = rest_days_df[rest_days_df['away_team_id'] == rest_days_df['team_id']][['game_id', 'rest_days']].rename(columns={'rest_days': 'away_rest_days'})
-        
+        home_rest = team_games[team_games['side'] == 'home'][['game_id', 'rest_days']].rename(columns={'rest_days': 'home_rest_days'})
+        away_rest = team_games[team_games['side'] == 'away'][['game_id', 'rest_days']].rename(columns={'rest_days': 'away_rest_days'})
+
         # Merge back into the original DataFrame
         final_df = integrated_df.merge(home_rest, on='game_id', how='left')
         final_df = final_df.merge(away_rest, on='game_id', how='left')
@@ -38,6 +38,11 @@ logger = logging.getLogger(__name__)
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.utils.instrumentation import instrumented, profiled
+
 # Import all feature engineering modules
 try:
     from advanced_stats_mlb import AdvancedStatsEngineer
@@ -100,6 +105,7 @@ class MasterDatasetBuilder:
         
         logger.info("Master Dataset Builder initialized")
     
+    @instrumented()
     def load_base_games_data(self, games_file: str) -> pd.DataFrame:
         """
         Load and prepare base games data.
@@ -189,6 +195,7 @@ class MasterDatasetBuilder:
         
         return df
     
+    @instrumented()
     def add_advanced_stats(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add advanced statistics features."""
         logger.info("Adding advanced statistics features...")
@@ -215,6 +222,7 @@ class MasterDatasetBuilder:
             self.feature_counts['advanced_stats'] = 0
             return df
     
+    @instrumented()
     def add_bvp_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add Batter vs Pitcher features."""
         logger.info("Adding Batter vs Pitcher (BvP) features...")
@@ -241,6 +249,7 @@ class MasterDatasetBuilder:
             self.feature_counts['bvp'] = 0
             return df
     
+    @instrumented()
     def add_platoon_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add platoon split features."""
         logger.info("Adding platoon split features...")
@@ -267,6 +276,7 @@ class MasterDatasetBuilder:
             self.feature_counts['platoon'] = 0
             return df
     
+    @instrumented()
     def add_ballpark_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add ballpark factor features."""
         logger.info("Adding ballpark factor features...")
@@ -293,6 +303,7 @@ class MasterDatasetBuilder:
             self.feature_counts['ballpark'] = 0
             return df
     
+    @instrumented()
     def add_weather_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add weather features."""
         logger.info("Adding weather features...")
@@ -319,6 +330,7 @@ class MasterDatasetBuilder:
             self.feature_counts['weather'] = 0
             return df
     
+    @instrumented()
     def finalize_dataset(self, df: pd.DataFrame) -> pd.DataFrame:
         """Final dataset preparation and cleaning."""
         logger.info("Finalizing master dataset...")
@@ -406,6 +418,7 @@ class MasterDatasetBuilder:
         
         return report
     
+    @profiled('mlb_master_dataset')
     def build_master_dataset(self, 
                            games_file: str,
                            output_file: Optional[str] = None) -> pd.DataFrame:
@@ -43,6 +43,7 @@ from utils.database import DatabaseManager
 from utils.mlb_database_models import MlbGame, MlbBatterStats, MlbPitcherStats
 from ballpark_features_mlb import BallparkFeatureEngineer
 from weather_features_mlb import WeatherFeatureEngineer
+from src.utils.instrumentation import instrumented, profiled
 
 class RealMasterDatasetBuilder:
     """Builds MLB dataset using real collected data from the database."""
@@ -72,6 +73,7 @@ class RealMasterDatasetBuilder:
         
         logger.info("Real Master Dataset Builder initialized")
     
+    @instrumented()
     def load_games_from_database(self, season_filter: Optional[str] = None) -> pd.DataFrame:
         """Load real MLB games data from the database."""
         logger.info("Loading MLB games from database...")
@@ -198,6 +200,7 @@ class RealMasterDatasetBuilder:
         
         return df
     
+    @instrumented()
     def add_player_stats_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add aggregated player statistics features."""
         logger.info("Adding player statistics features...")
@@ -298,6 +301,7 @@ class RealMasterDatasetBuilder:
         finally:
             session.close()
     
+    @instrumented()
     def add_ballpark_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add ballpark factor features."""
         logger.info("Adding ballpark factor features...")
@@ -324,6 +328,7 @@ class RealMasterDatasetBuilder:
             self.feature_counts['ballpark'] = 0
             return df
     
+    @instrumented()
     def add_weather_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add weather features."""
         logger.info("Adding weather features...")
@@ -350,6 +355,7 @@ class RealMasterDatasetBuilder:
             self.feature_counts['weather'] = 0
             return df
     
+    @instrumented()
     def finalize_dataset(self, df: pd.DataFrame) -> pd.DataFrame:
         """Final dataset preparation and cleaning."""
         logger.info("Finalizing real master dataset...")
@@ -421,6 +427,7 @@ class RealMasterDatasetBuilder:
         
         return report
     
+    @profiled('mlb_master_dataset')
     def build_master_dataset(self, season_filter: Optional[str] = "2023-2024", 
                            output_file: Optional[str] = None) -> pd.DataFrame:
         """Build the complete master dataset with all features using real data."""
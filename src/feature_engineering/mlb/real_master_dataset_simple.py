@@ -35,6 +35,11 @@ sys.path.append(current_dir)
 from ballpark_features_mlb import BallparkFeatureEngineer
 from weather_features_mlb import WeatherFeatureEngineer
 
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.utils.instrumentation import instrumented, profiled
+
 class SimpleRealMasterDatasetBuilder:
     """Builds MLB dataset using direct database queries."""
     
@@ -61,6 +66,7 @@ class SimpleRealMasterDatasetBuilder:
         
         logger.info("Simple Real Master Dataset Builder initialized")
     
+    @instrumented()
     def load_games_from_database(self, season_filter: Optional[str] = None) -> pd.DataFrame:
         """Load real MLB games data from the database."""
         logger.info("Loading MLB games from database...")
@@ -215,6 +221,7 @@ class SimpleRealMasterDatasetBuilder:
         
         return df
     
+    @instrumented()
     def add_player_stats_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add aggregated player statistics features."""
         logger.info("Adding player statistics features...")
@@ -338,6 +345,7 @@ class SimpleRealMasterDatasetBuilder:
         finally:
             conn.close()
     
+    @instrumented()
     def add_ballpark_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add ballpark factor features."""
         logger.info("Adding ballpark factor features...")
@@ -364,6 +372,7 @@ class SimpleRealMasterDatasetBuilder:
             self.feature_counts['ballpark'] = 0
             return df
     
+    @instrumented()
     def add_weather_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add weather features."""
         logger.info("Adding weather features...")
@@ -390,6 +399,7 @@ class SimpleRealMasterDatasetBuilder:
             self.feature_counts['weather'] = 0
             return df
     
+    @instrumented()
     def finalize_dataset(self, df: pd.DataFrame) -> pd.DataFrame:
         """Final dataset preparation and cleaning."""
         logger.info("Finalizing real master dataset...")
@@ -461,6 +471,7 @@ class SimpleRealMasterDatasetBuilder:
         
         return report
     
+    @profiled('mlb_master_dataset')
     def build_master_dataset(self, season_filter: Optional[str] = "2023-2024", 
                            output_file: Optional[str] = None) -> pd.DataFrame:
         """Build the complete master dataset with all features using real data."""
@@ -33,6 +33,11 @@ sys.path.append(current_dir)
 from ballpark_features_mlb import BallparkFeatureEngineer
 from weather_features_mlb import WeatherFeatureEngineer
 
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.utils.instrumentation import instrumented, profiled
+
 class SimpleMasterDatasetBuilder:
     """Builds MLB dataset with ballpark and weather features."""
     
@@ -58,6 +63,7 @@ class SimpleMasterDatasetBuilder:
         
         logger.info("Simple Master Dataset Builder initialized")
     
+    @instrumented()
     def load_base_games_data(self, games_file: str) -> pd.DataFrame:
         """Load and prepare base games data."""
         logger.info(f"Loading base games data from {games_file}")
@@ -152,6 +158,7 @@ class SimpleMasterDatasetBuilder:
         
         return df
     
+    @instrumented()
     def add_ballpark_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add ballpark factor features."""
         logger.info("Adding ballpark factor features...")
@@ -178,6 +185,7 @@ class SimpleMasterDatasetBuilder:
             self.feature_counts['ballpark'] = 0
             return df
     
+    @instrumented()
     def add_weather_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add weather features."""
         logger.info("Adding weather features...")
@@ -204,6 +212,7 @@ class SimpleMasterDatasetBuilder:
             self.feature_counts['weather'] = 0
             return df
     
+    @instrumented()
     def finalize_dataset(self, df: pd.DataFrame) -> pd.DataFrame:
         """Final dataset preparation and cleaning."""
         logger.info("Finalizing master dataset...")
@@ -265,6 +274,7 @@ class SimpleMasterDatasetBuilder:
         
         return report
     
+    @profiled('mlb_master_dataset')
     def build_master_dataset(self, games_file: str, output_file: Optional[str] = None) -> pd.DataFrame:
         """Build the complete master dataset with all features."""
         logger.info("=" * 60)
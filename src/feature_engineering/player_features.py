@@ -1,7 +1,11 @@
+import numpy as np
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from src.feature_engineering import kernels
+from src.preprocessing.dtypes import feature_float_dtype, unify_categories
 
 # Setup logging
 log_dir = Path("logs")
@@ -16,21 +20,39 @@ logging.basicConfig(
 )
 
 class PlayerFeatures:
+    # Box score columns of John Hollinger's Game Score
+    GAME_SCORE_COLUMNS = ['points', 'field_goals_made', 'field_goals_attempted',
+                          'free_throws_attempted', 'free_throws_made', 'offensive_rebounds',
+                          'defensive_rebounds', 'steals', 'assists', 'blocks',
+                          'personal_fouls', 'turnovers']
+    # Sequential feature types and the extra columns each reads besides its stat
+    SEQUENTIAL_TYPES = {
+        'ewm': ['date'],
+        'streak': [],
+        'minutes_weighted': ['minutes_played'],
+        'vs_opponent': ['team_id', 'home_team_id', 'away_team_id'],
+    }
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.stats_to_average = self.config.get('stats_to_average', 
             ['points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers', 'game_score'])
         self.rolling_windows = self.config.get('rolling_windows', [3, 5, 10])
+        # Sequential per-player features computed by the kernels in kernels.py, e.g.
+        # {'type': 'ewm', 'stat': 'points', 'halflife_days': 10}
+        self.sequential_features = self.config.get('sequential_features', []) or []
+        self.kernel_backend = self.config.get('kernel_backend')
+        for spec in self.sequential_features:
+            if spec.get('type') not in self.SEQUENTIAL_TYPES:
+                raise ValueError(f"Unknown sequential feature type '{spec.get('type')}' "
+                                 f"(expected one of {list(self.SEQUENTIAL_TYPES)})")
 
     def create_game_score(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculates John Hollinger's Game Score for each player-game."""
         logging.info("Calculating Game Score for each player-game...")
         
         # Ensure required columns are present
-        required_cols = ['points', 'field_goals_made', 'field_goals_attempted', 
-                         'free_throws_attempted', 'free_throws_made', 'offensive_rebounds',
-                         'defensive_rebounds', 'steals', 'assists', 'blocks',
-                         'personal_fouls', 'turnovers']
+        required_cols = self.GAME_SCORE_COLUMNS
         
         for col in required_cols:
             if col not in df.columns:
@@ -49,9 +71,84 @@ class PlayerFeatures:
             (0.7 * df['blocks']) - 
             (0.4 * df['personal_fouls']) - 
             df['turnovers']
-        )
+        ).astype(feature_float_dtype(*(df[col].dtype for col in required_cols)))
         return df
 
+    def feature_columns(self) -> List[str]:
+        """Columns added by create_rolling_averages."""
+        return ['game_score'] + [f'{stat}_roll_avg_{window}g'
+                                 for stat in self.stats_to_average for window in self.rolling_windows
+                                 ] + [self.sequential_column(spec) for spec in self.sequential_features]
+
+    def input_columns(self) -> List[str]:
+        """Columns read by create_rolling_averages."""
+        columns = ['date'] + self.GAME_SCORE_COLUMNS + list(self.stats_to_average)
+        for spec in self.sequential_features:
+            columns += [spec['stat']] + self.SEQUENTIAL_TYPES[spec['type']]
+        return [col for col in dict.fromkeys(columns) if col != 'game_score']
+
+    @staticmethod
+    def sequential_column(spec: Dict[str, Any]) -> str:
+        """Name of the column of a sequential feature."""
+        stat = spec['stat']
+        if spec['type'] == 'ewm':
+            return f"{stat}_ewm_{spec.get('halflife_days', 10)}d"
+        if spec['type'] == 'streak':
+            return f'{stat}_streak'
+        if spec['type'] == 'minutes_weighted':
+            return f"{stat}_min_wtd_avg_{spec.get('window', 5)}g"
+        return f"{stat}_vs_opp_avg_{spec.get('window', 3)}g"
+
+    def create_sequential_features(self, player_game_stats: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the configured sequential features to player-games sorted by player and date.
+
+        Each is computed from the player's earlier games only: an exponentially weighted
+        average decaying with the days between games ('ewm'), the run of games above or
+        below the player's average ('streak'), a minutes-weighted average over the last
+        games ('minutes_weighted') and the average over the last games against the same
+        opponent ('vs_opponent').
+        """
+        if not self.sequential_features or player_game_stats.empty:
+            for spec in self.sequential_features:
+                player_game_stats[self.sequential_column(spec)] = np.nan
+            return player_game_stats
+
+        offsets = kernels.group_offsets(pd.factorize(player_game_stats['player_id'])[0])
+        days = opponents = None
+        for spec in self.sequential_features:
+            col_name = self.sequential_column(spec)
+            missing = [col for col in [spec['stat']] + self.SEQUENTIAL_TYPES[spec['type']]
+                       if col not in player_game_stats.columns]
+            if missing:
+                logging.warning(f"Columns {missing} for '{col_name}' not found. Setting it to NaN.")
+                player_game_stats[col_name] = np.nan
+                continue
+
+            values = player_game_stats[spec['stat']].to_numpy(dtype=np.float64, na_value=np.nan)
+            if spec['type'] == 'ewm':
+                if days is None:
+                    dates = pd.to_datetime(player_game_stats['date']).to_numpy('datetime64[s]')
+                    days = dates.astype(np.int64) / 86400
+                feature = kernels.ewm_time_decay(values, days, offsets, spec.get('halflife_days', 10),
+                                                 backend=self.kernel_backend)
+            elif spec['type'] == 'streak':
+                feature = kernels.streaks(values, offsets, backend=self.kernel_backend)
+            elif spec['type'] == 'minutes_weighted':
+                minutes = player_game_stats['minutes_played'].to_numpy(dtype=np.float64, na_value=np.nan)
+                feature = kernels.weighted_rolling_mean(values, minutes, offsets, spec.get('window', 5),
+                                                        backend=self.kernel_backend)
+            else:
+                if opponents is None:
+                    teams = player_game_stats[['team_id', 'home_team_id', 'away_team_id']].copy()
+                    unify_categories(teams, list(teams.columns))
+                    is_home = teams['team_id'] == teams['home_team_id']
+                    opponents = pd.factorize(teams['away_team_id'].where(is_home, teams['home_team_id']))[0]
+                feature = kernels.rolling_mean_by_key(values, opponents, offsets, spec.get('window', 3),
+                                                      backend=self.kernel_backend)
+            player_game_stats[col_name] = feature.astype(feature_float_dtype(player_game_stats[spec['stat']].dtype))
+        return player_game_stats
+
     def create_rolling_averages(self, integrated_df: pd.DataFrame) -> pd.DataFrame:
         """Create player-level features, like rolling averages."""
         logging.info("Creating player-level rolling average features...")
@@ -66,12 +163,15 @@ class PlayerFeatures:
         player_game_stats = integrated_df.sort_values(by=['player_id', 'date'])
         
         for stat in self.stats_to_average:
+            # float32 averages of compact (dtype plan) stats, float64 otherwise
+            dtype = feature_float_dtype(player_game_stats[stat].dtype)
             for window in self.rolling_windows:
                 col_name = f'{stat}_roll_avg_{window}g'
                 player_game_stats[col_name] = player_game_stats.groupby('player_id')[stat].transform(
                     lambda x: x.shift(1).rolling(window, min_periods=1).mean()
-                )
-                
+                ).astype(dtype)
+
+        player_game_stats = self.create_sequential_features(player_game_stats)
         logging.info("Finished creating player-level features.")
         return player_game_stats
 
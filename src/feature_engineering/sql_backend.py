@@ -0,0 +1,223 @@
+"""
+SQL-pushdown feature backend on DuckDB.
+
+Player rolling averages, Game Score, rest days and team rolling aggregates are all
+window functions. This backend runs them inside DuckDB, directly over the stored
+tables (the SQLite database, attached through DuckDB's sqlite extension, or Parquet
+snapshots of the tables written by ``write_parquet_snapshots``), and hands back only
+the feature columns keyed by player_id and game_id. The queries are generated from
+the same configuration as the pandas ``PlayerFeatures``/``GameFeatures``/
+``TeamFeatures`` and give the same columns and values. The sequential player
+features (streaks, rest-decayed averages, ...) are not window aggregates; they are
+added afterwards by the same kernels the pandas pipeline uses.
+
+DuckDB is an optional dependency: ``nba_feature_backend`` falls back to the pandas
+feature groups when it is not installed.
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering.game_features import GameFeatures
+from src.feature_engineering.player_features import PlayerFeatures
+from src.feature_engineering.team_features import TeamFeatures
+from src.preprocessing.dtypes import align_categories, feature_float_dtype
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TABLES = ['games', 'player_game_stats']
+
+# Game Score weights of PlayerFeatures.create_game_score (defensive rebounds as the cleaner derives them)
+_GAME_SCORE_SQL = (
+    "points + 0.4::DOUBLE * field_goals_made - 0.7::DOUBLE * field_goals_attempted"
+    " - 0.4::DOUBLE * (free_throws_attempted - free_throws_made) + 0.7::DOUBLE * offensive_rebounds"
+    " + 0.3::DOUBLE * (rebounds - offensive_rebounds) + steals + 0.7::DOUBLE * assists"
+    " + 0.7::DOUBLE * blocks - 0.4::DOUBLE * personal_fouls - turnovers"
+)
+
+
+def write_parquet_snapshots(connection, directory: Path, tables: Sequence[str] = SNAPSHOT_TABLES) -> List[Path]:
+    """Writes ``<table>.parquet`` snapshots of database tables for the DuckDB backend."""
+    if duckdb is None:
+        raise ImportError("duckdb is required to write Parquet snapshots (pip install duckdb)")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    with duckdb.connect() as con:
+        for table in tables:
+            con.register('snapshot', pd.read_sql_table(table, connection))
+            path = directory / f"{table}.parquet"
+            con.execute(f"COPY snapshot TO '{path}' (FORMAT parquet)")
+            con.unregister('snapshot')
+            paths.append(path)
+    logger.info(f"Wrote {len(paths)} Parquet snapshot(s) to {directory}")
+    return paths
+
+
+def _window(partition: str, window: int) -> str:
+    return f"(PARTITION BY {partition} ORDER BY date ROWS BETWEEN {window} PRECEDING AND 1 PRECEDING)"
+
+
+class DuckDBFeatureBackend:
+    """Computes the NBA player, rest-day and team features with DuckDB window queries."""
+
+    def __init__(self, config, source: Optional[str] = None, threads: Optional[int] = None):
+        """
+        Args:
+            config: The project configuration (``feature_engineering`` and ``database``
+                sections are read).
+            source: A SQLite database file or a directory of Parquet snapshots
+                (defaults to ``feature_engineering.duckdb.source``, else the configured
+                SQLite database).
+            threads: DuckDB worker threads (None = DuckDB's default).
+        """
+        if duckdb is None:
+            raise ImportError("duckdb is required for the SQL feature backend (pip install duckdb)")
+        settings = config.get('feature_engineering.duckdb', {}) or {}
+        self.source = Path(source or settings.get('source') or config.get('database.sqlite_path'))
+        self.threads = threads if threads is not None else settings.get('threads')
+        self.player_creator = PlayerFeatures(config.get('feature_engineering.player_features', {}))
+        self.game_creator = GameFeatures(config.get('feature_engineering.game_features', {}))
+        self.team_creator = TeamFeatures(config.get('feature_engineering.team_features', {}))
+
+    def feature_columns(self) -> List[str]:
+        """Feature columns returned, in the order of the pandas pipeline."""
+        return (self.player_creator.feature_columns() + self.game_creator.feature_columns()
+                + self.team_creator.feature_columns())
+
+    def sql_feature_columns(self) -> List[str]:
+        """Feature columns computed by the query (all but the sequential player features)."""
+        sequential = {self.player_creator.sequential_column(spec) for spec in self.player_creator.sequential_features}
+        return [col for col in self.feature_columns() if col not in sequential]
+
+    def _connect(self):
+        con = duckdb.connect(config={'threads': self.threads} if self.threads else {})
+        if self.source.is_dir():
+            for table in SNAPSHOT_TABLES:
+                con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{self.source / f'{table}.parquet'}')")
+        else:
+            try:
+                con.execute(f"ATTACH '{self.source}' AS source_db (TYPE sqlite, READ_ONLY)")
+            except duckdb.Error as e:
+                con.close()
+                raise RuntimeError(f"DuckDB could not attach {self.source} ({e}); install the sqlite extension "
+                                   f"or point feature_engineering.duckdb.source at Parquet snapshots") from e
+            for table in SNAPSHOT_TABLES:
+                con.execute(f"CREATE VIEW {table} AS SELECT * FROM source_db.{table}")
+        return con
+
+    def query(self, restrict_to_keys: bool = False) -> str:
+        """The feature query; with ``restrict_to_keys`` only rows in the ``row_keys`` relation count."""
+        player_stats = list(dict.fromkeys(stat for stat in self.player_creator.stats_to_average if stat != 'game_score'))
+        player_rolls = [
+            f"AVG({stat}) OVER {_window('player_id', window)} AS {stat}_roll_avg_{window}g"
+            for stat in self.player_creator.stats_to_average for window in self.player_creator.rolling_windows]
+        team_rolls = [
+            f"AVG({stat}) OVER {_window('team_id', window)} AS team_{stat}_roll_avg_{window}g"
+            for stat in self.team_creator.stats_to_average for window in self.team_creator.rolling_windows]
+        team_columns = ['points_for', 'points_against'] + [
+            f'team_{stat}_roll_avg_{window}g'
+            for stat in self.team_creator.stats_to_average for window in self.team_creator.rolling_windows]
+        side_columns = [f"{side[0]}.{col} AS {side}_{col}" for side in ('home', 'away') for col in team_columns]
+        key_filter = ("WHERE (CAST(s.player_id AS VARCHAR), CAST(s.game_id AS VARCHAR)) IN "
+                      "(SELECT CAST(player_id AS VARCHAR), CAST(game_id AS VARCHAR) FROM row_keys)"
+                      if restrict_to_keys else "")
+        stat_columns = ", ".join(f"s.{col}" for col in dict.fromkeys(
+            ['rebounds'] + PlayerFeatures.GAME_SCORE_COLUMNS + player_stats) if col != 'defensive_rebounds')
+
+        return f"""
+        WITH stats AS (
+            SELECT CAST(s.player_id AS VARCHAR) AS player_id, CAST(s.game_id AS VARCHAR) AS game_id,
+                   CAST(g.date AS TIMESTAMP) AS date, {stat_columns}
+            FROM player_game_stats s JOIN games g ON s.game_id = g.game_id
+            {key_filter}
+        ), scored AS (
+            SELECT *, rebounds - offensive_rebounds AS defensive_rebounds, {_GAME_SCORE_SQL} AS game_score
+            FROM stats
+        ), player_features AS (
+            SELECT player_id, game_id, game_score, {', '.join(player_rolls)}
+            FROM scored
+        ), played AS (
+            SELECT CAST(game_id AS VARCHAR) AS game_id, CAST(date AS TIMESTAMP) AS date,
+                   CAST(home_team_id AS VARCHAR) AS home_team_id, CAST(away_team_id AS VARCHAR) AS away_team_id,
+                   home_score, away_score
+            FROM games WHERE CAST(game_id AS VARCHAR) IN (SELECT DISTINCT game_id FROM stats)
+        ), team_games AS (
+            SELECT game_id, date, home_team_id AS team_id, 'home' AS side,
+                   home_score AS points_for, away_score AS points_against FROM played
+            UNION ALL
+            SELECT game_id, date, away_team_id AS team_id, 'away' AS side,
+                   away_score AS points_for, home_score AS points_against FROM played
+        ), team_features AS (
+            SELECT game_id, side, points_for, points_against,
+                   floor(epoch(date - LAG(date) OVER (PARTITION BY team_id ORDER BY date)) / 86400) AS rest_days,
+                   {', '.join(team_rolls)}
+            FROM team_games
+        ), game_features AS (
+            SELECT h.game_id, h.rest_days AS home_rest_days, a.rest_days AS away_rest_days, {', '.join(side_columns)}
+            FROM team_features h JOIN team_features a ON a.game_id = h.game_id AND a.side = 'away'
+            WHERE h.side = 'home'
+        )
+        SELECT p.player_id, p.game_id, {', '.join(self.sql_feature_columns())}
+        FROM player_features p LEFT JOIN game_features USING (game_id)
+        """
+
+    def compute(self, row_keys: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Query feature columns of every player-game, keyed by player_id and game_id.
+
+        Args:
+            row_keys: If given, only these (player_id, game_id) rows are used, e.g. the
+                rows left after validation, so quarantined rows do not enter any window.
+        """
+        with self._connect() as con:
+            if row_keys is not None:
+                con.register('row_keys', row_keys[['player_id', 'game_id']])
+            return con.execute(self.query(restrict_to_keys=row_keys is not None)).df()
+
+    def run(self, base_df: pd.DataFrame) -> pd.DataFrame:
+        """Returns ``base_df`` (one row per player-game) with the features joined on."""
+        features = self.compute(row_keys=base_df)
+        # float32 features from compact (dtype plan) stats, as the pandas feature classes give
+        dtype = feature_float_dtype(*(base_df[col].dtype for col in PlayerFeatures.GAME_SCORE_COLUMNS
+                                      if col in base_df.columns))
+        if dtype == np.float32:
+            features = features.astype({col: np.float32 for col in self.sql_feature_columns()
+                                        if not col.endswith(('_points_for', '_points_against'))})
+        align_categories(base_df, features, ['player_id', 'game_id'])
+        logger.info(f"DuckDB feature backend: {len(features)} rows from {self.source}")
+        features_df = base_df.merge(features, on=['player_id', 'game_id'], how='left')
+
+        if self.player_creator.sequential_features:
+            keys = ['player_id', 'game_id']
+            inputs = [col for col in dict.fromkeys(keys + self.player_creator.input_columns()) if col in base_df.columns]
+            narrow = self.player_creator.create_game_score(base_df[inputs].drop_duplicates(subset=keys))
+            sequential = self.player_creator.create_sequential_features(narrow.sort_values(by=['player_id', 'date']))
+            sequential_columns = [col for col in self.feature_columns() if col not in self.sql_feature_columns()]
+            features_df = features_df.merge(sequential[keys + sequential_columns], on=keys, how='left')
+        return features_df[list(base_df.columns) + self.feature_columns()]
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    # Add project root to the Python path
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from src.utils.database import db_manager
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Write Parquet snapshots of the database for the DuckDB feature backend.")
+    parser.add_argument('directory', help="Output directory (set feature_engineering.duckdb.source to it).")
+    args = parser.parse_args()
+    with db_manager.get_session() as session:
+        write_parquet_snapshots(session.connection(), Path(args.directory))
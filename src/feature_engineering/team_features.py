@@ -1,7 +1,9 @@
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from src.preprocessing.dtypes import feature_float_dtype
 
 # Setup logging
 log_dir = Path("logs")
@@ -21,6 +23,13 @@ class TeamFeatures:
         self.stats_to_average = self.config.get('stats_to_average', ['points_for', 'points_against'])
         self.rolling_windows = self.config.get('rolling_windows', [3, 5, 10])
 
+    def feature_columns(self) -> List[str]:
+        """Columns added by create_team_strength_features."""
+        columns = ['points_for', 'points_against'] + [f'team_{stat}_roll_avg_{window}g'
+                                                      for stat in self.stats_to_average
+                                                      for window in self.rolling_windows]
+        return [f'{side}_{col}' for side in ('home', 'away') for col in columns]
+
     def create_team_strength_features(self, integrated_df: pd.DataFrame) -> pd.DataFrame:
         """Create team-level features."""
         logging.info("Creating team-level strength features...")
@@ -33,8 +42,8 @@ class TeamFeatures:
             logging.error("The 'date' column is missing from the input DataFrame.")
             return integrated_df
 
-        # Ensure games are sorted by date
-        games_df = integrated_df.sort_values(by='date')
+        # One row per game (the input has one per player-game), sorted by date
+        games_df = integrated_df.drop_duplicates(subset='game_id').sort_values(by='date')
 
         # Create a DataFrame with one row per team per game
         home_teams = games_df[['game_id', 'date', 'home_team_id', 'home_score', 'away_score']].rename(
@@ -48,26 +57,23 @@ class TeamFeatures:
         
         # Calculate rolling averages for team stats
         for stat in self.stats_to_average:
+            dtype = feature_float_dtype(team_game_stats[stat].dtype)
             for window in self.rolling_windows:
                 col_name = f'team_{stat}_roll_avg_{window}g'
                 team_game_stats[col_name] = team_game_stats.groupby('team_id')[stat].transform(
                     lambda x: x.shift(1).rolling(window, min_periods=1).mean()
-                )
+                ).astype(dtype)
 
-        # Merge these team features back into the main DataFrame
-        home_features = team_game_stats.copy()
-        home_feature_cols = {col: f'home_{col}' for col in home_features.columns if col not in ['game_id', 'date']}
-        home_features = home_features.rename(columns=home_feature_cols).rename(columns={'home_team_id': 'team_id'})
+        # Merge these team features back into the main DataFrame, keyed on the home and
+        # away team ids so that a player's own team_id column is left untouched
+        home_feature_cols = {col: f'home_{col}' for col in team_game_stats.columns if col not in ['game_id', 'date']}
+        home_features = team_game_stats.rename(columns=home_feature_cols)
 
-        away_features = team_game_stats.copy()
-        away_feature_cols = {col: f'away_{col}' for col in away_features.columns if col not in ['game_id', 'date']}
-        away_features = away_features.rename(columns=away_feature_cols).rename(columns={'away_team_id': 'team_id'})
+        away_feature_cols = {col: f'away_{col}' for col in team_game_stats.columns if col not in ['game_id', 'date']}
+        away_features = team_game_stats.rename(columns=away_feature_cols)
 
-        final_df = integrated_df.merge(home_features, left_on=['game_id', 'date', 'home_team_id'], right_on=['game_id', 'date', 'team_id'], how='left')
-        final_df = final_df.merge(away_features, left_on=['game_id', 'date', 'away_team_id'], right_on=['game_id', 'date', 'team_id'], how='left')
-        
-        # Clean up redundant columns from merges
-        final_df = final_df.drop(columns=['team_id_x', 'team_id_y'])
+        final_df = integrated_df.merge(home_features, on=['game_id', 'date', 'home_team_id'], how='left')
+        final_df = final_df.merge(away_features, on=['game_id', 'date', 'away_team_id'], how='left')
 
         logging.info("Finished creating team-level features.")
         return final_df
@@ -1,5 +1,6 @@
 import pandas as pd
 import logging
+import sys
 from pathlib import Path
 import lightgbm as lgb
 import joblib
@@ -7,6 +8,35 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_a
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.utils.config import config
+from src.modeling.cross_validation import WalkForwardSplit, run_walk_forward
+from src.modeling.model_registry import ModelRegistry
+from src.modeling.tree_inference import compile_model
+
+# Registry name shared with tune_hyperparameters.py
+MODEL_NAME = 'nba_lightgbm_points_over_avg_5g'
+
+# Hand-tuned parameters used until a tuning run has exported its best trial
+DEFAULT_PARAMS = {
+    'n_estimators': 992,
+    'learning_rate': 0.00860483369995987,
+    'num_leaves': 277,
+    'max_depth': 3,
+    'min_child_samples': 5,
+    'subsample': 0.7799991055981887,
+    'colsample_bytree': 0.8467993189633719,
+    'reg_alpha': 0.0006342386013819185,
+    'reg_lambda': 1.4588353193105266e-05,
+    'objective': 'binary',
+    'metric': 'auc',
+    'verbosity': -1,
+    'boosting_type': 'gbdt',
+    'random_state': 42
+}
+
 # Setup logging
 log_dir = Path("logs")
 log_dir.mkdir(exist_ok=True)
@@ -40,26 +70,19 @@ def train_advanced_model(train_df):
 
     logging.info("Training advanced model (LightGBM) with tuned parameters...")
     
-    X_train = train_df.drop(columns=['points_over_avg_5g'])
+    X_train = train_df.drop(columns=['points_over_avg_5g', 'date'], errors='ignore')
     y_train = train_df['points_over_avg_5g']
     
-    # Best parameters from Optuna tuning
-    best_params = {
-        'n_estimators': 992,
-        'learning_rate': 0.00860483369995987,
-        'num_leaves': 277,
-        'max_depth': 3,
-        'min_child_samples': 5,
-        'subsample': 0.7799991055981887,
-        'colsample_bytree': 0.8467993189633719,
-        'reg_alpha': 0.0006342386013819185,
-        'reg_lambda': 1.4588353193105266e-05,
-        'objective': 'binary',
-        'metric': 'auc',
-        'verbosity': -1,
-        'boosting_type': 'gbdt',
-        'random_state': 42
-    }
+    # Best parameters exported by the tuning service, falling back to the last hand-tuned set
+    best_params = ModelRegistry(config.get('paths.model_registry', 'data/models/registry')).load_tuned_params(MODEL_NAME) or DEFAULT_PARAMS
+    
+    # Out-of-time estimate before the final fit: each fold is scored on later games only
+    if 'date' in train_df.columns:
+        cv_results = run_walk_forward(
+            lgb.LGBMClassifier(**best_params), X_train, y_train,
+            WalkForwardSplit(n_splits=5, embargo_days=1), groups=train_df['date']
+        )
+        logging.info(f"Walk-forward ROC AUC: {cv_results['mean_score']:.4f} (+/- {cv_results['std_score']:.4f})")
     
     model = lgb.LGBMClassifier(**best_params)
     model.fit(X_train, y_train)
@@ -72,6 +95,8 @@ def train_advanced_model(train_df):
     model_path = models_dir / "advanced_model.joblib"
     joblib.dump(model, model_path)
     logging.info(f"Model saved to {model_path}")
+    # NumPy copy for low-latency scoring without LightGBM (see tree_inference.py)
+    compile_model(model).save(model_path.with_suffix('.npz'))
     
     return model
 
@@ -83,7 +108,7 @@ def evaluate_model(model, test_df):
 
     logging.info("Evaluating model performance...")
     
-    X_test = test_df.drop(columns=['points_over_avg_5g'])
+    X_test = test_df.drop(columns=['points_over_avg_5g', 'date'], errors='ignore')
     y_test = test_df['points_over_avg_5g']
     
     y_pred = model.predict(X_test)
@@ -129,6 +154,19 @@ def evaluate_model(model, test_df):
     plt.savefig(analysis_dir / "advanced_model_feature_importance.png")
     plt.close()
     logging.info(f"Feature importance plot saved to '{analysis_dir.resolve()}'")
+    
+    return {'accuracy': accuracy, 'precision': precision, 'recall': recall, 'roc_auc': roc_auc}
+
+def register_model(model, train_df, metrics=None):
+    """Registers the trained model as a new 'candidate' version (and 'prod' if there is none yet)."""
+    registry = ModelRegistry(config.get('paths.model_registry', 'data/models/registry'))
+    X_train = train_df.drop(columns=['points_over_avg_5g', 'date'], errors='ignore')
+    aliases = ['candidate'] if registry.resolve(MODEL_NAME, 'prod') else ['candidate', 'prod']
+    return registry.register(
+        MODEL_NAME, model, list(X_train.columns),
+        params=model.get_params(), metrics=metrics, training_data=X_train,
+        aliases=aliases, metadata={'target': 'points_over_avg_5g'}
+    )
 
 
 if __name__ == '__main__':
@@ -136,5 +174,6 @@ if __name__ == '__main__':
     if train_data is not None and test_data is not None:
         advanced_model = train_advanced_model(train_data)
         if advanced_model:
-            evaluate_model(advanced_model, test_data)
+            metrics = evaluate_model(advanced_model, test_data)
+            register_model(advanced_model, train_data, metrics)
     logging.info("Advanced modeling process finished.") 
\ No newline at end of file
@@ -39,7 +39,7 @@ def train_baseline_model(train_df):
 
     logging.info("Training baseline model (Logistic Regression)...")
     
-    X_train = train_df.drop(columns=['points_over_avg_5g'])
+    X_train = train_df.drop(columns=['points_over_avg_5g', 'date'], errors='ignore')
     y_train = train_df['points_over_avg_5g']
     
     model = LogisticRegression(random_state=42, max_iter=1000)
@@ -56,7 +56,7 @@ def evaluate_model(model, test_df):
 
     logging.info("Evaluating model performance...")
     
-    X_test = test_df.drop(columns=['points_over_avg_5g'])
+    X_test = test_df.drop(columns=['points_over_avg_5g', 'date'], errors='ignore')
     y_test = test_df['points_over_avg_5g']
     
     y_pred = model.predict(X_test)
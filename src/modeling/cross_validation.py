@@ -0,0 +1,271 @@
+"""
+Time-aware cross-validation utilities for the NBA/WNBA and MLB models.
+
+Games are ordered in time, so random (even stratified) splits let the model
+train on games played after the ones it is evaluated on. The helpers here
+split strictly by date: training windows always end before the evaluation
+window starts, optionally separated by an embargo gap so rolling features
+computed from the last few games cannot leak across the boundary.
+"""
+
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+
+logger = logging.getLogger(__name__)
+
+# Estimator parameters that control native thread pools (sklearn, LightGBM, XGBoost)
+THREAD_PARAMS = ('n_jobs', 'nthread', 'num_threads')
+
+# Scorers that are undefined when a fold's test rows hold only one class
+SINGLE_CLASS_UNDEFINED = ('roc_auc', 'roc_auc_ovr', 'roc_auc_ovo', 'average_precision', 'neg_log_loss')
+
+
+def date_ordinals(dates: Any, n_samples: Optional[int] = None) -> np.ndarray:
+    """Converts dates to integer day numbers so gaps can be measured in days.
+
+    Args:
+        dates: Array-like of dates (strings, datetimes) or None
+        n_samples: Number of rows, used when no dates are given
+
+    Returns:
+        Integer array with one ordinal per row. Without dates every row is
+        its own period (the row position), so gaps are measured in rows.
+    """
+    if dates is None:
+        if n_samples is None:
+            raise ValueError("Either dates or n_samples must be provided.")
+        return np.arange(n_samples, dtype=np.int64)
+
+    parsed = pd.to_datetime(pd.Series(np.asarray(dates)), errors='coerce')
+    if parsed.isna().any():
+        raise ValueError(f"Found {int(parsed.isna().sum())} missing or unparseable dates.")
+    return parsed.to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+def chronological_split(dates: Any, test_size: float = 0.2, embargo_days: int = 0,
+                        n_samples: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Splits rows into a training block followed by a later test block.
+
+    The split is made on distinct dates so games played on the same day never
+    straddle the boundary.
+
+    Args:
+        dates: Array-like of dates, or None to use row order
+        test_size: Fraction of distinct dates assigned to the test block
+        embargo_days: Days dropped from the end of the training block
+        n_samples: Number of rows, used when no dates are given
+
+    Returns:
+        Tuple of (train_indices, test_indices) as positional integer arrays
+    """
+    ordinals = date_ordinals(dates, n_samples)
+    unique_dates = np.unique(ordinals)
+    if len(unique_dates) < 2:
+        raise ValueError("Need at least two distinct dates for a chronological split.")
+
+    n_test = int(round(len(unique_dates) * test_size))
+    n_test = min(max(n_test, 1), len(unique_dates) - 1)
+    test_start = unique_dates[-n_test]
+
+    train_idx = np.flatnonzero(ordinals < test_start - embargo_days)
+    test_idx = np.flatnonzero(ordinals >= test_start)
+    if len(train_idx) == 0:
+        raise ValueError("Embargo gap leaves no rows for training.")
+    return train_idx, test_idx
+
+
+class WalkForwardSplit:
+    """Walk-forward cross-validator over game dates.
+
+    The distinct dates are divided into ``n_splits + 1`` consecutive blocks
+    (or test blocks of ``test_size`` dates each). Fold ``k`` evaluates on
+    block ``k + 1`` and trains on everything before it (expanding window) or
+    on the ``train_days`` preceding it (rolling window). Follows the sklearn
+    splitter protocol, so it can be passed as ``cv=`` with dates as ``groups``.
+    """
+
+    def __init__(self, n_splits: int = 5, window: str = 'expanding', train_days: Optional[int] = None,
+                 test_size: Optional[int] = None, embargo_days: int = 0, date_column: Optional[str] = None):
+        """Initialize the splitter.
+
+        Args:
+            n_splits: Number of folds
+            window: 'expanding' or 'rolling'
+            train_days: Length of the rolling training window in days
+            test_size: Number of distinct dates per test fold
+            embargo_days: Days skipped between the end of training and the test fold
+            date_column: Column of X holding the dates when groups are not given
+        """
+        if n_splits < 1:
+            raise ValueError("n_splits must be at least 1.")
+        if window not in ('expanding', 'rolling'):
+            raise ValueError(f"Unsupported window type: {window}")
+        if window == 'rolling' and not train_days:
+            raise ValueError("A rolling window requires train_days.")
+        if embargo_days < 0:
+            raise ValueError("embargo_days cannot be negative.")
+
+        self.n_splits = n_splits
+        self.window = window
+        self.train_days = train_days
+        self.test_size = test_size
+        self.embargo_days = embargo_days
+        self.date_column = date_column
+
+    def get_n_splits(self, X: Any = None, y: Any = None, groups: Any = None) -> int:
+        """Returns the number of folds."""
+        return self.n_splits
+
+    def _resolve_dates(self, X: Any, groups: Any) -> np.ndarray:
+        if groups is not None:
+            return date_ordinals(groups)
+        if self.date_column is not None and isinstance(X, pd.DataFrame):
+            return date_ordinals(X[self.date_column])
+        return date_ordinals(None, n_samples=len(X))
+
+    def split(self, X: Any, y: Any = None, groups: Any = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Generates positional (train, test) index arrays for each fold.
+
+        Args:
+            X: Feature matrix (only its length is used unless date_column is set)
+            y: Ignored, present for sklearn compatibility
+            groups: Dates of each row
+
+        Yields:
+            Tuples of (train_indices, test_indices)
+        """
+        ordinals = self._resolve_dates(X, groups)
+        unique_dates = np.unique(ordinals)
+        test_size = self.test_size or len(unique_dates) // (self.n_splits + 1)
+
+        if test_size < 1 or len(unique_dates) - self.n_splits * test_size < 1:
+            raise ValueError(
+                f"Cannot make {self.n_splits} walk-forward folds from {len(unique_dates)} distinct dates."
+            )
+
+        for fold in range(self.n_splits):
+            start_pos = len(unique_dates) - (self.n_splits - fold) * test_size
+            test_start = unique_dates[start_pos]
+            test_end = unique_dates[start_pos + test_size - 1]
+            train_end = test_start - self.embargo_days
+
+            train_mask = ordinals < train_end
+            if self.window == 'rolling':
+                train_mask &= ordinals >= train_end - self.train_days
+            test_mask = (ordinals >= test_start) & (ordinals <= test_end)
+
+            if not train_mask.any():
+                logger.warning(f"Walk-forward fold {fold} has no training rows after the embargo. Skipping.")
+                continue
+            yield np.flatnonzero(train_mask), np.flatnonzero(test_mask)
+
+
+def limit_estimator_threads(estimator: Any, n_threads: int) -> Any:
+    """Caps the native thread pool of an estimator, if it exposes one.
+
+    Args:
+        estimator: sklearn-compatible estimator
+        n_threads: Maximum threads the estimator may use
+
+    Returns:
+        The same estimator, with its thread parameter updated
+    """
+    params = estimator.get_params(deep=False)
+    for key in THREAD_PARAMS:
+        if key in params:
+            estimator.set_params(**{key: n_threads})
+            break
+    return estimator
+
+
+def _fit_and_score_fold(estimator: Any, X: np.ndarray, y: np.ndarray, train_idx: np.ndarray,
+                        test_idx: np.ndarray, scoring: str, fit_params: Dict[str, Any]) -> Tuple[float, Any]:
+    """Fits one fold on the shared matrices and scores it on the fold's test rows.
+
+    Folds whose test rows hold a single class (short embargoed windows, rare
+    per-prop outcomes) cannot be ranked and score NaN instead of raising.
+    """
+    estimator.fit(X[train_idx], y[train_idx], **fit_params)
+    if scoring in SINGLE_CLASS_UNDEFINED and len(np.unique(y[test_idx])) < 2:
+        return np.nan, estimator
+    try:
+        score = get_scorer(scoring)(estimator, X[test_idx], y[test_idx])
+    except ValueError as e:
+        logger.warning(f"Could not score a walk-forward fold with {scoring}: {e}")
+        return np.nan, estimator
+    return float(score), estimator
+
+
+def run_walk_forward(estimator: Any, X: Any, y: Any, cv: Any, groups: Any = None, scoring: str = 'roc_auc',
+                     n_jobs: int = -1, fit_params: Optional[Dict[str, Any]] = None,
+                     return_estimators: bool = False) -> Dict[str, Any]:
+    """Trains and scores every fold of a splitter in parallel.
+
+    The feature matrix is converted to one contiguous array up front; joblib
+    memory-maps it read-only into the worker processes, so folds share a
+    single copy instead of pickling the frame per fold. Each fold's estimator
+    is limited to its share of the cores to avoid oversubscription.
+
+    Args:
+        estimator: Unfitted sklearn-compatible estimator (cloned per fold)
+        X: Feature matrix (DataFrame or array)
+        y: Target vector
+        cv: Splitter such as WalkForwardSplit
+        groups: Dates passed through to cv.split
+        scoring: sklearn scorer name
+        n_jobs: Parallel folds (-1 for all cores)
+        fit_params: Extra keyword arguments for estimator.fit
+        return_estimators: Whether to include the fitted fold models
+
+    Returns:
+        Dictionary with per-fold scores, their mean/std and fold sizes
+    """
+    X_arr = np.ascontiguousarray(X.to_numpy(dtype=np.float64) if isinstance(X, pd.DataFrame) else X)
+    y_arr = np.asarray(y)
+    splits = list(cv.split(X, y_arr, groups))
+    if not splits:
+        raise ValueError("The splitter produced no folds.")
+
+    n_workers = max(1, min(effective_n_jobs(n_jobs), len(splits)))
+    threads_per_fold = max(1, (os.cpu_count() or 1) // n_workers)
+    logger.info(f"Running {len(splits)} walk-forward folds on {n_workers} workers "
+                f"({threads_per_fold} threads each)...")
+
+    results = Parallel(n_jobs=n_workers, max_nbytes='1M', mmap_mode='r')(
+        delayed(_fit_and_score_fold)(
+            limit_estimator_threads(clone(estimator), threads_per_fold),
+            X_arr, y_arr, train_idx, test_idx, scoring, fit_params or {}
+        )
+        for train_idx, test_idx in splits
+    )
+
+    scores = np.array([score for score, _ in results])
+    folds: List[Dict[str, Any]] = [
+        {'fold': i, 'train_size': len(train_idx), 'test_size': len(test_idx), 'score': scores[i]}
+        for i, (train_idx, test_idx) in enumerate(splits)
+    ]
+    for fold in folds:
+        logger.info(f"  Fold {fold['fold']}: train={fold['train_size']}, test={fold['test_size']}, "
+                    f"{scoring}={fold['score']:.4f}")
+    unscored = [fold['fold'] for fold in folds if np.isnan(fold['score'])]
+    if unscored:
+        logger.warning(f"Fold(s) {unscored} could not be scored with {scoring} (single-class test rows); "
+                       f"aggregating the other {len(folds) - len(unscored)}")
+
+    scored = scores[~np.isnan(scores)]
+    output = {
+        'scores': scores,
+        'mean_score': float(scored.mean()) if len(scored) else np.nan,
+        'std_score': float(scored.std()) if len(scored) else np.nan,
+        'folds': folds,
+    }
+    if return_estimators:
+        output['estimators'] = [model for _, model in results]
+    return output
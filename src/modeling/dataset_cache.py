@@ -0,0 +1,216 @@
+"""
+Cache of binned LightGBM Datasets and quantized XGBoost matrices.
+
+Building a LightGBM ``Dataset`` or an XGBoost ``QuantileDMatrix`` bins every
+feature, which is the same work for every tuning trial, every fold and every
+target trained on one feature matrix. The cache builds each binned matrix once
+per (feature-matrix fingerprint, binning parameters) and only swaps the label
+when the same features are reused for another target.
+
+LightGBM datasets are also saved as binary files, so worker processes and
+later runs load them instead of re-binning. XGBoost can only serialize plain
+``DMatrix`` objects, so quantized matrices are cached per process.
+
+Hashing a large matrix costs a full float64 copy, so each cache remembers the
+fingerprint of the matrix objects it has seen (by identity and shape) and
+hashes a matrix once per study rather than once per trial. Matrices must
+therefore not be modified in place while a cache is using them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+# LightGBM defaults; feature_pre_filter must be off so trials can vary min_child_samples
+LIGHTGBM_BINNING_PARAMS = {
+    'max_bin': 255,
+    'min_data_in_bin': 3,
+    'feature_pre_filter': False,
+    'verbosity': -1,
+}
+
+XGBOOST_BINNING_PARAMS = {
+    'max_bin': 256,
+}
+
+
+def matrix_fingerprint(X: Any) -> str:
+    """Content hash of a feature matrix (values, shape and column names).
+
+    Args:
+        X: DataFrame or array
+
+    Returns:
+        Hex digest identifying the matrix
+    """
+    digest = hashlib.sha1()
+    if isinstance(X, pd.DataFrame):
+        digest.update(json.dumps([str(c) for c in X.columns]).encode())
+        values = X.to_numpy(dtype=np.float64)
+    else:
+        values = np.asarray(X, dtype=np.float64)
+    digest.update(str(values.shape).encode())
+    digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Builds binned training matrices once and reuses them across trials, folds and targets."""
+
+    def __init__(self, root: Optional[str] = "data/models/dataset_cache",
+                 lightgbm_params: Optional[Dict[str, Any]] = None,
+                 xgboost_params: Optional[Dict[str, Any]] = None):
+        """Initialize the cache.
+
+        Args:
+            root: Directory for LightGBM binary datasets, or None to keep everything in memory
+            lightgbm_params: Overrides of the LightGBM binning parameters
+            xgboost_params: Overrides of the XGBoost binning parameters
+        """
+        self.root = Path(root) if root else None
+        if self.root:
+            self.root.mkdir(parents=True, exist_ok=True)
+        self.lightgbm_params = {**LIGHTGBM_BINNING_PARAMS, **(lightgbm_params or {})}
+        self.xgboost_params = {**XGBOOST_BINNING_PARAMS, **(xgboost_params or {})}
+        self._memory: Dict[str, Any] = {}
+        self._fingerprints: Dict[int, Tuple[weakref.ref, Tuple[int, ...], str]] = {}
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'build_seconds': 0.0}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Native handles cannot be pickled; worker processes reload from disk
+        state = self.__dict__.copy()
+        state['_memory'] = {}
+        state['_fingerprints'] = {}
+        return state
+
+    def fingerprint(self, X: Any) -> str:
+        """matrix_fingerprint of X, computed once per matrix object."""
+        cached = self._fingerprints.get(id(X))
+        if cached is not None and cached[0]() is X and cached[1] == np.shape(X):
+            return cached[2]
+
+        fingerprint = matrix_fingerprint(X)
+        try:
+            # The weak reference guards against a new matrix reusing a freed one's id
+            self._fingerprints[id(X)] = (weakref.ref(X), np.shape(X), fingerprint)
+        except TypeError:
+            pass
+        return fingerprint
+
+    def _key(self, kind: str, X: Any, params: Dict[str, Any], reference_key: str = '') -> str:
+        binning = json.dumps(params, sort_keys=True, default=str)
+        raw = f"{kind}|{self.fingerprint(X)}|{binning}|{reference_key}"
+        return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+    def _record_build(self, start: float) -> None:
+        self.stats['misses'] += 1
+        self.stats['build_seconds'] += time.perf_counter() - start
+
+    def _lightgbm_train(self, X: Any, y: Any) -> Tuple[str, lgb.Dataset]:
+        key = self._key('lgb', X, self.lightgbm_params)
+        dataset = self._memory.get(key)
+        if dataset is not None:
+            self.stats['hits'] += 1
+            dataset.set_label(y)
+            return key, dataset
+
+        start = time.perf_counter()
+        binary_path = self.root / f"lgb_{key}.bin" if self.root else None
+        if binary_path is not None and binary_path.exists():
+            dataset = lgb.Dataset(str(binary_path), label=y, params=self.lightgbm_params).construct()
+            self.stats['disk_hits'] += 1
+        else:
+            dataset = lgb.Dataset(X, label=y, params=self.lightgbm_params).construct()
+            if binary_path is not None:
+                # Write then rename so concurrent workers never read a partial file
+                tmp_path = binary_path.with_suffix(f".{os.getpid()}.tmp")
+                dataset.save_binary(str(tmp_path))
+                os.replace(tmp_path, binary_path)
+            self._record_build(start)
+
+        self._memory[key] = dataset
+        return key, dataset
+
+    def lightgbm_datasets(self, X_train: Any, y_train: Any, X_val: Any = None,
+                          y_val: Any = None) -> Tuple[lgb.Dataset, Optional[lgb.Dataset]]:
+        """Binned LightGBM training (and validation) datasets.
+
+        The validation set shares the training set's bin boundaries, as
+        LightGBM requires.
+
+        Returns:
+            Tuple of (train_dataset, valid_dataset or None)
+        """
+        train_key, train_set = self._lightgbm_train(X_train, y_train)
+        if X_val is None:
+            return train_set, None
+
+        val_key = self._key('lgb_val', X_val, self.lightgbm_params, reference_key=train_key)
+        val_set = self._memory.get(val_key)
+        if val_set is not None:
+            self.stats['hits'] += 1
+            val_set.set_label(y_val)
+        else:
+            start = time.perf_counter()
+            val_set = lgb.Dataset(X_val, label=y_val, reference=train_set, params=self.lightgbm_params).construct()
+            self._record_build(start)
+            self._memory[val_key] = val_set
+        return train_set, val_set
+
+    def xgboost_matrices(self, X_train: Any, y_train: Any, X_val: Any = None,
+                         y_val: Any = None) -> Tuple[xgb.QuantileDMatrix, Optional[xgb.QuantileDMatrix]]:
+        """Quantized XGBoost training (and validation) matrices for the hist tree method.
+
+        Returns:
+            Tuple of (train_matrix, valid_matrix or None)
+        """
+        train_key = self._key('xgb', X_train, self.xgboost_params)
+        train_matrix = self._memory.get(train_key)
+        if train_matrix is not None:
+            self.stats['hits'] += 1
+            train_matrix.set_label(y_train)
+        else:
+            start = time.perf_counter()
+            train_matrix = xgb.QuantileDMatrix(X_train, label=y_train, **self.xgboost_params)
+            self._record_build(start)
+            self._memory[train_key] = train_matrix
+
+        if X_val is None:
+            return train_matrix, None
+
+        val_key = self._key('xgb_val', X_val, self.xgboost_params, reference_key=train_key)
+        val_matrix = self._memory.get(val_key)
+        if val_matrix is not None:
+            self.stats['hits'] += 1
+            val_matrix.set_label(y_val)
+        else:
+            start = time.perf_counter()
+            val_matrix = xgb.QuantileDMatrix(X_val, label=y_val, ref=train_matrix, **self.xgboost_params)
+            self._record_build(start)
+            self._memory[val_key] = val_matrix
+        return train_matrix, val_matrix
+
+    def clear(self, remove_files: bool = False) -> None:
+        """Drop the in-memory matrices and, optionally, the binary files."""
+        self._memory.clear()
+        self._fingerprints.clear()
+        if remove_files and self.root:
+            for path in self.root.glob("lgb_*.bin"):
+                path.unlink()
+
+    def summary(self) -> str:
+        """One-line description of the cache activity."""
+        return (f"dataset cache: {self.stats['misses']} builds ({self.stats['build_seconds']:.2f}s), "
+                f"{self.stats['hits']} memory hits, {self.stats['disk_hits']} disk loads")
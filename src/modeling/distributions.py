@@ -0,0 +1,139 @@
+"""
+Count-distribution models for player props.
+
+An over/under-average classifier answers one binary question, so every sportsbook
+line would need its own model. A ``CountDistributionModel`` instead predicts the
+whole distribution of a box score count (points, rebounds, assists, threes) for
+each player-game: a LightGBM Poisson regression gives the mean, and a negative
+binomial (NB2, variance = mean + dispersion * mean^2) fitted on later held-out games
+widens it to the spread the counts actually show. The probability of going over
+any line is then one vectorized survival-function evaluation, so a single model
+per stat prices every book's line.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from scipy import optimize, special, stats
+
+logger = logging.getLogger(__name__)
+
+# Dispersion bounds; the lower one is practically Poisson
+MIN_DISPERSION = 1e-6
+MAX_DISPERSION = 20.0
+
+
+def _nbinom(mean: Any, dispersion: Any):
+    """scipy negative binomial with the given mean and NB2 dispersion."""
+    mean = np.maximum(np.asarray(mean, dtype=np.float64), 1e-9)
+    size = 1.0 / np.clip(np.asarray(dispersion, dtype=np.float64), MIN_DISPERSION, MAX_DISPERSION)
+    return stats.nbinom(size, size / (size + mean))
+
+
+def prob_over(mean: Any, dispersion: Any, line: Any) -> np.ndarray:
+    """P(count > line) for negative binomial counts; arguments broadcast.
+
+    A half-point line of 24.5 is P(count >= 25); on a whole-number line the push
+    (count == line) counts as neither over nor under.
+    """
+    return _nbinom(mean, dispersion).sf(np.floor(np.asarray(line, dtype=np.float64)))
+
+
+def prob_under(mean: Any, dispersion: Any, line: Any) -> np.ndarray:
+    """P(count < line) for negative binomial counts; arguments broadcast."""
+    return _nbinom(mean, dispersion).cdf(np.ceil(np.asarray(line, dtype=np.float64)) - 1)
+
+
+def nbinom_log_likelihood(y: np.ndarray, mean: np.ndarray, dispersion: float) -> np.ndarray:
+    """Log-likelihood of each count under NB2(mean, dispersion)."""
+    y = np.asarray(y, dtype=np.float64)
+    mean = np.maximum(np.asarray(mean, dtype=np.float64), 1e-9)
+    size = 1.0 / np.clip(dispersion, MIN_DISPERSION, MAX_DISPERSION)
+    return (special.gammaln(y + size) - special.gammaln(size) - special.gammaln(y + 1)
+            + size * np.log(size / (size + mean)) + y * np.log(mean / (size + mean)))
+
+
+def fit_dispersion(y: np.ndarray, mean: np.ndarray) -> float:
+    """Maximum-likelihood NB2 dispersion of counts ``y`` around predicted means."""
+    result = optimize.minimize_scalar(
+        lambda log_dispersion: -nbinom_log_likelihood(y, mean, np.exp(log_dispersion)).sum(),
+        bounds=(np.log(MIN_DISPERSION), np.log(MAX_DISPERSION)), method='bounded')
+    return float(np.exp(result.x))
+
+
+class CountDistributionModel:
+    """Negative binomial predictive distribution of a count, with a LightGBM mean."""
+
+    def __init__(self, params: Optional[Dict[str, Any]] = None, calibration_size: float = 0.2):
+        """
+        Args:
+            params: LightGBM parameters of the mean model (objective forced to Poisson).
+            calibration_size: Share of the (chronologically ordered) training rows the
+                dispersion is fitted on, from a mean model trained on the rows before them.
+        """
+        self.params = dict(params or {})
+        self.calibration_size = calibration_size
+
+    def _mean_model(self) -> lgb.LGBMRegressor:
+        params = {key: value for key, value in self.params.items() if key not in ('objective', 'metric')}
+        return lgb.LGBMRegressor(**params, objective='poisson')
+
+    def get_params(self, deep: bool = True) -> Dict[str, Any]:
+        return {'params': self.params, 'calibration_size': self.calibration_size}
+
+    def fit(self, X: pd.DataFrame, y: Any) -> 'CountDistributionModel':
+        """Fit the mean on all rows and the dispersion on the last ``calibration_size`` of them.
+
+        Rows must be in time order: the dispersion is estimated from predictions of a
+        model that has not seen the calibration games, as the served model has not
+        seen the games it prices.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        n_calibration = int(len(y) * self.calibration_size)
+        if n_calibration >= 20 and len(y) - n_calibration >= 20:
+            split = len(y) - n_calibration
+            holdout = self._mean_model().fit(X.iloc[:split], y[:split])
+            self.dispersion_ = fit_dispersion(y[split:], holdout.predict(X.iloc[split:]))
+        else:
+            self.dispersion_ = None
+        self.mean_model_ = self._mean_model().fit(X, y)
+        if self.dispersion_ is None:
+            # Too few rows to hold out: in-sample estimate, biased towards Poisson
+            self.dispersion_ = fit_dispersion(y, self.mean_model_.predict(X))
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        logger.info(f"Fitted count distribution on {len(y)} rows (dispersion {self.dispersion_:.4f})")
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """Predicted mean count of each row."""
+        return self.mean_model_.predict(X)
+
+    def predict_distribution(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean and dispersion of each row's negative binomial distribution."""
+        mean = self.predict(X)
+        return mean, np.full(len(mean), self.dispersion_)
+
+    def prob_over(self, X: pd.DataFrame, lines: Any) -> np.ndarray:
+        """P(count > line) for every row; ``lines`` is a scalar, one line per row, or
+        a (rows x lines) array pricing several lines per row at once."""
+        mean, dispersion = self.predict_distribution(X)
+        lines = np.asarray(lines, dtype=np.float64)
+        if lines.ndim == 2:
+            mean, dispersion = mean[:, None], dispersion[:, None]
+        return prob_over(mean, dispersion, lines)
+
+    def prob_under(self, X: pd.DataFrame, lines: Any) -> np.ndarray:
+        """P(count < line) for every row, with ``lines`` as in ``prob_over``."""
+        mean, dispersion = self.predict_distribution(X)
+        lines = np.asarray(lines, dtype=np.float64)
+        if lines.ndim == 2:
+            mean, dispersion = mean[:, None], dispersion[:, None]
+        return prob_under(mean, dispersion, lines)
+
+    def quantiles(self, X: pd.DataFrame, q: Any) -> np.ndarray:
+        """Quantiles ``q`` of every row's distribution, shape (rows, len(q))."""
+        mean, dispersion = self.predict_distribution(X)
+        return _nbinom(mean[:, None], dispersion[:, None]).ppf(np.atleast_1d(q)[None, :])
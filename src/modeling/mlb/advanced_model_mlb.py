@@ -2,16 +2,22 @@ import pandas as pd
 import numpy as np
 import logging
 from pathlib import Path
+import sys
 import lightgbm as lgb
 import xgboost as xgb
-import optuna
 import joblib
 import json
 from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score, confusion_matrix, classification_report
-from sklearn.model_selection import cross_val_score
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.utils.config import config
+from src.modeling.model_registry import ModelRegistry
+from src.modeling.tuning import TuningService
+
 # Setup logging
 log_dir = Path("logs")
 log_dir.mkdir(exist_ok=True)
@@ -49,63 +55,8 @@ def load_modeling_data(target='home_team_wins'):
         logging.error(f"Error loading modeling data: {e}. Please run data preparation first.")
         return None, None, None, None
 
-def lightgbm_objective(trial, X_train, y_train, X_val, y_val):
-    """Objective function for LightGBM hyperparameter optimization."""
-    
-    params = {
-        'objective': 'binary',
-        'metric': 'auc',
-        'verbosity': -1,
-        'boosting_type': 'gbdt',
-        'random_state': 42,
-        'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
-        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
-        'num_leaves': trial.suggest_int('num_leaves', 20, 300),
-        'max_depth': trial.suggest_int('max_depth', 3, 15),
-        'min_child_samples': trial.suggest_int('min_child_samples', 5, 100),
-        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-        'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 10.0, log=True),
-        'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 10.0, log=True),
-    }
-    
-    model = lgb.LGBMClassifier(**params)
-    model.fit(X_train, y_train)
-    
-    # Evaluate on validation set
-    y_val_pred_proba = model.predict_proba(X_val)[:, 1]
-    val_auc = roc_auc_score(y_val, y_val_pred_proba)
-    
-    return val_auc
-
-def xgboost_objective(trial, X_train, y_train, X_val, y_val):
-    """Objective function for XGBoost hyperparameter optimization."""
-    
-    params = {
-        'objective': 'binary:logistic',
-        'eval_metric': 'auc',
-        'random_state': 42,
-        'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
-        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
-        'max_depth': trial.suggest_int('max_depth', 3, 15),
-        'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
-        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-        'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 10.0, log=True),
-        'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 10.0, log=True),
-    }
-    
-    model = xgb.XGBClassifier(**params)
-    model.fit(X_train, y_train)
-    
-    # Evaluate on validation set
-    y_val_pred_proba = model.predict_proba(X_val)[:, 1]
-    val_auc = roc_auc_score(y_val, y_val_pred_proba)
-    
-    return val_auc
-
-def tune_lightgbm(train_df, val_df, target, features, n_trials=50):
-    """Tune LightGBM hyperparameters using Optuna."""
+def tune_lightgbm(train_df, val_df, target, features, n_trials=50, service=None):
+    """Tune LightGBM hyperparameters in the persistent, pruned Optuna study for this target."""
     logging.info(f"Tuning LightGBM hyperparameters with {n_trials} trials...")
     
     X_train = train_df[features]
@@ -113,29 +64,25 @@ def tune_lightgbm(train_df, val_df, target, features, n_trials=50):
     X_val = val_df[features]
     y_val = val_df[target]
     
-    study = optuna.create_study(direction='maximize', study_name=f'lightgbm_{target}')
-    study.optimize(lambda trial: lightgbm_objective(trial, X_train, y_train, X_val, y_val), n_trials=n_trials)
+    service = service or TuningService.from_config()
+    best_params, best_value, study = service.tune(
+        'lightgbm', f'lightgbm_{target}', X_train, y_train, X_val, y_val,
+        n_trials=n_trials,
+        model_name=f'mlb_lightgbm_{target}',
+        warm_start_from=service.list_studies(prefix='lightgbm_')
+    )
     
-    logging.info(f"LightGBM tuning completed. Best AUC: {study.best_value:.4f}")
-    logging.info(f"Best parameters: {study.best_params}")
+    logging.info(f"LightGBM tuning completed. Best AUC: {best_value:.4f}")
+    logging.info(f"Best parameters: {best_params}")
     
     # Train final model with best parameters
-    best_params = study.best_params.copy()
-    best_params.update({
-        'objective': 'binary',
-        'metric': 'auc',
-        'verbosity': -1,
-        'boosting_type': 'gbdt',
-        'random_state': 42
-    })
-    
     best_model = lgb.LGBMClassifier(**best_params)
     best_model.fit(X_train, y_train)
     
-    return best_model, study.best_params, study.best_value
+    return best_model, best_params, best_value
 
-def tune_xgboost(train_df, val_df, target, features, n_trials=50):
-    """Tune XGBoost hyperparameters using Optuna."""
+def tune_xgboost(train_df, val_df, target, features, n_trials=50, service=None):
+    """Tune XGBoost hyperparameters in the persistent, pruned Optuna study for this target."""
     logging.info(f"Tuning XGBoost hyperparameters with {n_trials} trials...")
     
     X_train = train_df[features]
@@ -143,24 +90,22 @@ def tune_xgboost(train_df, val_df, target, features, n_trials=50):
     X_val = val_df[features]
     y_val = val_df[target]
     
-    study = optuna.create_study(direction='maximize', study_name=f'xgboost_{target}')
-    study.optimize(lambda trial: xgboost_objective(trial, X_train, y_train, X_val, y_val), n_trials=n_trials)
+    service = service or TuningService.from_config()
+    best_params, best_value, study = service.tune(
+        'xgboost', f'xgboost_{target}', X_train, y_train, X_val, y_val,
+        n_trials=n_trials,
+        model_name=f'mlb_xgboost_{target}',
+        warm_start_from=service.list_studies(prefix='xgboost_')
+    )
     
-    logging.info(f"XGBoost tuning completed. Best AUC: {study.best_value:.4f}")
-    logging.info(f"Best parameters: {study.best_params}")
+    logging.info(f"XGBoost tuning completed. Best AUC: {best_value:.4f}")
+    logging.info(f"Best parameters: {best_params}")
     
     # Train final model with best parameters
-    best_params = study.best_params.copy()
-    best_params.update({
-        'objective': 'binary:logistic',
-        'eval_metric': 'auc',
-        'random_state': 42
-    })
-    
     best_model = xgb.XGBClassifier(**best_params)
     best_model.fit(X_train, y_train)
     
-    return best_model, study.best_params, study.best_value
+    return best_model, best_params, best_value
 
 def evaluate_model(model, test_df, target, features, model_name="Model"):
     """Evaluate the model on the test set."""
@@ -272,7 +217,24 @@ def save_model_and_params(model, model_name, target, best_params=None, best_scor
             json.dump(params_data, f, indent=2)
         logging.info(f"Parameters saved to {params_path}")
 
-def train_and_evaluate_advanced_models(target='home_team_wins', n_trials=30):
+def register_model(model, model_type, target, features, train_df, params=None, metrics=None):
+    """Register a trained model with its features, scaler and metrics as one versioned bundle.
+    
+    The new version becomes 'candidate'; it also becomes 'prod' if the model has no prod version yet.
+    """
+    scaler_path = Path("data/processed/mlb") / f"scaler_{target}.joblib"
+    scaler = joblib.load(scaler_path) if scaler_path.exists() else None
+    
+    registry = ModelRegistry(config.get('paths.model_registry', 'data/models/registry'))
+    model_name = f"mlb_{model_type.lower().replace(' ', '_')}_{target}"
+    aliases = ['candidate'] if registry.resolve(model_name, 'prod') else ['candidate', 'prod']
+    return registry.register(
+        model_name, model, features, scaler=scaler,
+        params=params, metrics=metrics, training_data=train_df[features],
+        aliases=aliases, metadata={'target': target, 'model_type': model_type}
+    )
+
+def train_and_evaluate_advanced_models(target='home_team_wins', n_trials=30, service=None):
     """Train and evaluate all advanced models for a specific target."""
     logging.info(f"\n{'='*70}")
     logging.info(f"TRAINING ADVANCED MODELS FOR TARGET: {target.upper()}")
@@ -291,10 +253,10 @@ def train_and_evaluate_advanced_models(target='home_team_wins', n_trials=30):
     logging.info("\n--- HYPERPARAMETER TUNING PHASE ---")
     
     # Tune LightGBM
-    lgb_model, lgb_params, lgb_score = tune_lightgbm(train_df, val_df, target, features, n_trials)
+    lgb_model, lgb_params, lgb_score = tune_lightgbm(train_df, val_df, target, features, n_trials, service=service)
     
     # Tune XGBoost
-    xgb_model, xgb_params, xgb_score = tune_xgboost(train_df, val_df, target, features, n_trials)
+    xgb_model, xgb_params, xgb_score = tune_xgboost(train_df, val_df, target, features, n_trials, service=service)
     
     # Evaluate models
     logging.info("\n--- EVALUATION PHASE ---")
@@ -310,6 +272,8 @@ def train_and_evaluate_advanced_models(target='home_team_wins', n_trials=30):
     logging.info("\n--- SAVING MODELS ---")
     save_model_and_params(lgb_model, "LightGBM", target, lgb_params, lgb_score)
     save_model_and_params(xgb_model, "XGBoost", target, xgb_params, xgb_score)
+    register_model(lgb_model, "LightGBM", target, features, train_df, lgb_params, lgb_results)
+    register_model(xgb_model, "XGBoost", target, features, train_df, xgb_params, xgb_results)
     
     # Compare models
     logging.info("\n--- MODEL COMPARISON ---")
@@ -341,9 +305,12 @@ def main():
     
     all_results = {}
     
+    # One service for all targets: they share the feature matrix, so its binned datasets are reused
+    service = TuningService.from_config()
+    
     for target in targets:
         try:
-            results = train_and_evaluate_advanced_models(target, n_trials=30)
+            results = train_and_evaluate_advanced_models(target, n_trials=30, service=service)
             if results:
                 all_results[target] = results
         except Exception as e:
@@ -367,6 +334,7 @@ def main():
     logging.info("ADVANCED VS BASELINE COMPARISON")
     logging.info(f"{'='*80}")
     logging.info("(Note: Load baseline results separately for detailed comparison)")
+    logging.info(service.dataset_cache.summary())
     
     logging.info(f"\n{'='*80}")
     logging.info("MLB ADVANCED MODELING COMPLETE")
@@ -1,11 +1,16 @@
 import pandas as pd
 import numpy as np
 import logging
+import sys
 from pathlib import Path
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import sqlite3
 
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.modeling.cross_validation import chronological_split
+
 # Setup logging
 log_dir = Path("logs")
 log_dir.mkdir(exist_ok=True)
@@ -139,8 +144,13 @@ def prepare_modeling_data(df):
 
     return df, available_features
 
-def create_model_datasets(df, features, target='home_team_wins', test_size=0.2, val_size=0.1):
-    """Create train/validation/test splits with proper handling of missing values."""
+def create_model_datasets(df, features, target='home_team_wins', test_size=0.2, val_size=0.1,
+                          date_column='game_date', embargo_days=0):
+    """Create chronological train/validation/test splits with proper handling of missing values.
+
+    Games are ordered by ``date_column``: training uses the earliest games, validation
+    the next block and test the most recent block, optionally separated by an embargo gap.
+    """
     logging.info(f"Creating model datasets for target: {target}")
     
     # Handle missing values more robustly
@@ -224,16 +234,25 @@ def create_model_datasets(df, features, target='home_team_wins', test_size=0.2,
     if y.isnull().sum() > 0:
         raise ValueError("y still contains NaN values!")
     
-    # First split: train+val vs test
-    X_temp, X_test, y_temp, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=42, stratify=y
-    )
+    # Order games in time so that no split trains on games played after its evaluation games
+    dates = df_encoded[date_column] if date_column in df_encoded.columns else None
+    if dates is not None:
+        order = np.argsort(pd.to_datetime(dates).to_numpy(), kind='stable')
+        X, y, dates = X.iloc[order], y.iloc[order], dates.iloc[order]
+    else:
+        logging.warning(f"Date column '{date_column}' not found. Using row order for the chronological split.")
     
-    # Second split: train vs val
+    # First split: train+val vs test (most recent games)
+    temp_idx, test_idx = chronological_split(dates, test_size=test_size, embargo_days=embargo_days, n_samples=len(X))
+    X_temp, X_test = X.iloc[temp_idx], X.iloc[test_idx]
+    y_temp, y_test = y.iloc[temp_idx], y.iloc[test_idx]
+    
+    # Second split: train vs val (the block just before the test games)
     val_size_adjusted = val_size / (1 - test_size)
-    X_train, X_val, y_train, y_val = train_test_split(
-        X_temp, y_temp, test_size=val_size_adjusted, random_state=42, stratify=y_temp
-    )
+    temp_dates = dates.iloc[temp_idx] if dates is not None else None
+    train_idx, val_idx = chronological_split(temp_dates, test_size=val_size_adjusted, embargo_days=embargo_days, n_samples=len(X_temp))
+    X_train, X_val = X_temp.iloc[train_idx], X_temp.iloc[val_idx]
+    y_train, y_val = y_temp.iloc[train_idx], y_temp.iloc[val_idx]
     
     logging.info(f"Data split completed:")
     logging.info(f"  - Training set: {len(X_train)} games ({len(X_train)/len(df_clean)*100:.1f}%)")
@@ -274,8 +293,12 @@ def scale_features(X_train, X_val, X_test, features_to_scale=None):
     
     return X_train_scaled, X_val_scaled, X_test_scaled, scaler
 
-def save_modeling_data(X_train, X_val, X_test, y_train, y_val, y_test, features, target, scaler=None):
-    """Save the prepared datasets and metadata."""
+def save_modeling_data(X_train, X_val, X_test, y_train, y_val, y_test, features, target, scaler=None, dates=None):
+    """Save the prepared datasets and metadata.
+
+    ``dates`` is an optional (train, val, test) tuple of game dates saved alongside
+    each split so tuning can run walk-forward validation.
+    """
     logging.info("Saving modeling data...")
     
     output_dir = Path("data/processed/mlb")
@@ -284,14 +307,19 @@ def save_modeling_data(X_train, X_val, X_test, y_train, y_val, y_test, features,
     # Save datasets
     train_df = X_train.copy()
     train_df[target] = y_train
-    train_df.to_csv(output_dir / f"modeling_train_{target}.csv", index=False)
     
     val_df = X_val.copy()
     val_df[target] = y_val
-    val_df.to_csv(output_dir / f"modeling_val_{target}.csv", index=False)
     
     test_df = X_test.copy()
     test_df[target] = y_test
+    
+    if dates is not None:
+        for split_df, split_dates in zip([train_df, val_df, test_df], dates):
+            split_df['game_date'] = split_dates.values
+    
+    train_df.to_csv(output_dir / f"modeling_train_{target}.csv", index=False)
+    val_df.to_csv(output_dir / f"modeling_val_{target}.csv", index=False)
     test_df.to_csv(output_dir / f"modeling_test_{target}.csv", index=False)
     
     # Save feature list
@@ -336,10 +364,15 @@ def prepare_all_targets(df, features):
                 X_train, X_val, X_test
             )
             
+            # Keep the game dates with each split for walk-forward tuning
+            dates = None
+            if 'game_date' in df.columns:
+                dates = tuple(df.loc[split.index, 'game_date'] for split in (X_train, X_val, X_test))
+            
             # Save datasets
             save_modeling_data(
                 X_train_scaled, X_val_scaled, X_test_scaled, 
-                y_train, y_val, y_test, updated_features, target, scaler
+                y_train, y_val, y_test, updated_features, target, scaler, dates=dates
             )
         else:
             logging.warning(f"Target {target} not found in dataframe")
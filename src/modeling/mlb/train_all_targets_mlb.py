@@ -0,0 +1,345 @@
+"""
+Concurrent training of all MLB targets and model families.
+
+``baseline_model_mlb.main`` and ``advanced_model_mlb.main`` each loop over the
+targets one at a time, reloading the CSVs for every target. This script loads
+the feature matrix once, schedules one job per (target, model family) on a
+process pool and writes a single comparison report. The feature arrays are
+memory-mapped read-only into the workers, and each job gets a fixed share of
+the cores so LightGBM/XGBoost do not oversubscribe them.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
+from threadpoolctl import threadpool_limits
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.modeling.mlb.baseline_model_mlb import train_logistic_regression, train_random_forest, save_model
+from src.modeling.mlb.advanced_model_mlb import tune_lightgbm, tune_xgboost, save_model_and_params, register_model
+from src.modeling.tuning import TuningService
+from src.utils.config import config
+
+# Setup logging
+log_dir = Path("logs")
+log_dir.mkdir(exist_ok=True)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(log_dir / "mlb_training_orchestrator.log"),
+        logging.StreamHandler()
+    ],
+    force=True
+)
+
+TARGETS = ['home_team_wins', 'high_scoring_game', 'low_scoring_game', 'close_game']
+MODEL_FAMILIES = ['logistic_regression', 'random_forest', 'lightgbm', 'xgboost']
+
+# Rough relative cost, used to start the longest jobs first
+FAMILY_COST = {'xgboost': 3, 'lightgbm': 2, 'random_forest': 1, 'logistic_regression': 0}
+
+SPLITS = ('train', 'val', 'test')
+
+
+def load_shared_data(targets=None, processed_dir="data/processed/mlb"):
+    """Load the modeling data of all targets, keeping one copy of each distinct feature matrix.
+
+    The prepared datasets of the targets normally share the same rows and features,
+    so only the first target's files are read in full; the others only read their
+    target (and date) column and point at the shared matrix. A target whose files
+    differ gets its own matrix.
+
+    Returns:
+        Dictionary with 'matrices' ({key: {split: float array}}) and
+        'targets' ({target: {'matrix', 'features', 'y'}}), or None if nothing was found
+    """
+    processed_dir = Path(processed_dir)
+    targets = targets or TARGETS
+    matrices = {}
+    target_data = {}
+    reference = None
+
+    for target in targets:
+        info_path = processed_dir / f"modeling_info_{target}.json"
+        if not info_path.exists():
+            logging.error(f"Modeling data for {target} not found. Please run data preparation first.")
+            continue
+        with open(info_path, 'r') as f:
+            features = json.load(f)['features']
+
+        if reference is not None and features == reference['features']:
+            # Only read the label (and date, to check the rows line up)
+            frames = {}
+            for split in SPLITS:
+                path = processed_dir / f"modeling_{split}_{target}.csv"
+                columns = pd.read_csv(path, nrows=0).columns
+                usecols = [target] + (['game_date'] if 'game_date' in columns else [])
+                frames[split] = pd.read_csv(path, usecols=usecols)
+
+            if all(_rows_match(frames[split], reference['frames'][split]) for split in SPLITS):
+                target_data[target] = {
+                    'matrix': reference['matrix'],
+                    'features': features,
+                    'y': {split: frames[split][target].to_numpy() for split in SPLITS},
+                }
+                continue
+            logging.warning(f"Rows for {target} differ from {reference['target']}; loading its own feature matrix.")
+
+        frames = {split: pd.read_csv(processed_dir / f"modeling_{split}_{target}.csv") for split in SPLITS}
+        matrix_key = f"matrix_{len(matrices)}"
+        matrices[matrix_key] = {
+            split: np.ascontiguousarray(frames[split][features].to_numpy(dtype=np.float64)) for split in SPLITS
+        }
+        target_data[target] = {
+            'matrix': matrix_key,
+            'features': features,
+            'y': {split: frames[split][target].to_numpy() for split in SPLITS},
+        }
+        if reference is None:
+            reference = {'target': target, 'features': features, 'matrix': matrix_key, 'frames': frames}
+
+    if not target_data:
+        return None
+
+    n_bytes = sum(arr.nbytes for matrix in matrices.values() for arr in matrix.values())
+    logging.info(f"Loaded {len(target_data)} targets sharing {len(matrices)} feature matrix(es) "
+                 f"({n_bytes / 1024 ** 2:.1f} MB)")
+    return {'matrices': matrices, 'targets': target_data}
+
+
+def _rows_match(frame, reference_frame):
+    if len(frame) != len(reference_frame):
+        return False
+    if 'game_date' in frame.columns and 'game_date' in reference_frame.columns:
+        return frame['game_date'].astype(str).equals(reference_frame['game_date'].astype(str))
+    return True
+
+
+def _split_frame(X, y, features, target):
+    df = pd.DataFrame(X, columns=features, copy=False)
+    df[target] = y
+    return df
+
+
+def _score(model, df, target, features):
+    X = df[features]
+    y_true = df[target]
+    y_pred = model.predict(X)
+    y_proba = model.predict_proba(X)[:, 1]
+    return {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'precision': precision_score(y_true, y_pred, average='binary', zero_division=0),
+        'recall': recall_score(y_true, y_pred, average='binary', zero_division=0),
+        'roc_auc': roc_auc_score(y_true, y_proba),
+    }
+
+
+def run_training_job(target, family, X, y, features, n_threads=1, n_trials=30, save=True, tuning_root=None):
+    """Train, evaluate and save one model family for one target.
+
+    Args:
+        target: Target column name
+        family: One of MODEL_FAMILIES
+        X: {split: feature array} (memory-mapped when run in a worker)
+        y: {split: label array}
+        features: Feature names, in column order of X
+        n_threads: Native threads this job may use
+        n_trials: Optuna trials for the tuned families
+        save: Whether to save and register the trained model
+        tuning_root: Directory for the Optuna studies, exported parameters and binned
+            datasets of the tuned families (default: their configured paths)
+
+    Returns:
+        Dictionary of test metrics, validation AUC and job timing
+    """
+    start = time.perf_counter()
+    train_df, val_df, test_df = (_split_frame(X[split], y[split], features, target) for split in SPLITS)
+    params = None
+    best_score = None
+
+    with threadpool_limits(limits=n_threads):
+        if family == 'logistic_regression':
+            model = train_logistic_regression(train_df, val_df, target, features)
+        elif family == 'random_forest':
+            model = train_random_forest(train_df, val_df, target, features)
+        elif family in ('lightgbm', 'xgboost'):
+            service = TuningService.from_config(root=tuning_root, n_threads=n_threads)
+            tune = tune_lightgbm if family == 'lightgbm' else tune_xgboost
+            model, params, best_score = tune(train_df, val_df, target, features, n_trials, service=service)
+        else:
+            raise ValueError(f"Unknown model family: {family}")
+
+        val_auc = roc_auc_score(val_df[target], model.predict_proba(val_df[features])[:, 1])
+        metrics = _score(model, test_df, target, features)
+
+    if save:
+        if params is not None:
+            save_model_and_params(model, 'LightGBM' if family == 'lightgbm' else 'XGBoost', target, params, best_score)
+        else:
+            save_model(model, family, target)
+        register_model(model, family, target, features, train_df, params, {**metrics, 'val_auc': val_auc})
+
+    return {
+        'target': target,
+        'model': family,
+        **metrics,
+        'val_auc': val_auc,
+        'job_seconds': time.perf_counter() - start,
+        'n_threads': n_threads,
+        'pid': os.getpid(),
+    }
+
+
+def run_all(targets=None, families=None, n_workers=None, n_trials=30, processed_dir="data/processed/mlb",
+            save=True):
+    """Run every (target, model family) job on a process pool.
+
+    Args:
+        targets: Targets to train (all MLB targets by default)
+        families: Model families to train (all by default)
+        n_workers: Concurrent jobs; 1 runs the jobs sequentially in this process
+        n_trials: Optuna trials for the tuned families
+        processed_dir: Directory holding the prepared modeling data
+        save: Whether to save and register the trained models. Without saving, nothing
+            persists: tuning runs against a temporary study storage, registry and
+            dataset cache, so it neither warm-starts from nor leaves trials for later runs
+
+    Returns:
+        Tuple of (comparison DataFrame, runtime metrics dict), or (None, None) without data
+    """
+    data = load_shared_data(targets, processed_dir)
+    if data is None:
+        return None, None
+
+    families = families or MODEL_FAMILIES
+    jobs = sorted(
+        ((target, family) for target in data['targets'] for family in families),
+        key=lambda job: FAMILY_COST.get(job[1], 0),
+        reverse=True,
+    )
+    n_workers = n_workers or config.get('modeling.orchestration.n_workers', os.cpu_count() or 1)
+    n_workers = max(1, min(n_workers, len(jobs)))
+    n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+    logging.info(f"Running {len(jobs)} training jobs on {n_workers} worker(s) with {n_threads} thread(s) each")
+
+    with nullcontext() if save else tempfile.TemporaryDirectory(prefix='mlb_tuning_') as tuning_root:
+        if any(family in ('lightgbm', 'xgboost') for family in families):
+            # Create the study database here: workers creating the SQLite schema concurrently collide
+            TuningService.from_config(root=tuning_root).list_studies()
+
+        start = time.perf_counter()
+        results = Parallel(n_jobs=n_workers, max_nbytes='1M', mmap_mode='r')(
+            delayed(run_training_job)(
+                target, family,
+                data['matrices'][data['targets'][target]['matrix']],
+                data['targets'][target]['y'],
+                data['targets'][target]['features'],
+                n_threads, n_trials, save, tuning_root,
+            )
+            for target, family in jobs
+        )
+        wall_seconds = time.perf_counter() - start
+
+    comparison = pd.DataFrame(results).sort_values(['target', 'roc_auc'], ascending=[True, False])
+    job_seconds = float(comparison['job_seconds'].sum())
+    runtime = {
+        'n_jobs': len(jobs),
+        'n_workers': n_workers,
+        'threads_per_job': n_threads,
+        'wall_seconds': wall_seconds,
+        'sequential_job_seconds': job_seconds,
+        'speedup_vs_sequential': job_seconds / wall_seconds if wall_seconds > 0 else None,
+    }
+    return comparison.reset_index(drop=True), runtime
+
+
+def save_report(comparison, runtime, output_dir="analysis_results", sequential_runtime=None):
+    """Write the consolidated comparison and runtime metrics, and log a summary.
+
+    Args:
+        comparison: Per-job results from run_all
+        runtime: Runtime metrics of the concurrent run
+        output_dir: Directory for the CSV and JSON report
+        sequential_runtime: Runtime metrics of a measured sequential run, if any
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    best = comparison.loc[comparison.groupby('target')['roc_auc'].idxmax()]
+    report = {
+        'runtime': runtime,
+        'best_models': {row['target']: {'model': row['model'], 'roc_auc': row['roc_auc']}
+                        for _, row in best.iterrows()},
+        'results': comparison.to_dict(orient='records'),
+    }
+    if sequential_runtime is not None:
+        report['sequential_runtime'] = sequential_runtime
+        report['runtime']['measured_speedup'] = sequential_runtime['wall_seconds'] / runtime['wall_seconds']
+
+    comparison.to_csv(output_dir / "mlb_model_comparison.csv", index=False)
+    with open(output_dir / "mlb_model_comparison.json", 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    logging.info(f"\n{'='*80}")
+    logging.info("MLB MODEL COMPARISON - ALL TARGETS")
+    logging.info(f"{'='*80}")
+    columns = ['target', 'model', 'roc_auc', 'accuracy', 'precision', 'recall', 'val_auc', 'job_seconds']
+    logging.info(f"\n{comparison[columns].to_string(index=False)}")
+    for target, info in report['best_models'].items():
+        logging.info(f"Best model for {target}: {info['model']} (AUC: {info['roc_auc']:.4f})")
+
+    logging.info(f"Wall time: {runtime['wall_seconds']:.1f}s for {runtime['n_jobs']} jobs on "
+                 f"{runtime['n_workers']} worker(s); sum of job times {runtime['sequential_job_seconds']:.1f}s "
+                 f"({runtime['speedup_vs_sequential']:.2f}x)")
+    if sequential_runtime is not None:
+        logging.info(f"Measured sequential wall time: {sequential_runtime['wall_seconds']:.1f}s "
+                     f"({runtime['measured_speedup']:.2f}x speedup)")
+    logging.info(f"Report saved to {output_dir / 'mlb_model_comparison.json'}")
+    return report
+
+
+def main():
+    """Train every MLB target and model family concurrently and write one report."""
+    parser = argparse.ArgumentParser(description="Train all MLB targets and model families concurrently.")
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, help="Targets to train (default: all)")
+    parser.add_argument('--models', nargs='+', choices=MODEL_FAMILIES, help="Model families (default: all)")
+    parser.add_argument('--workers', type=int, help="Concurrent jobs (default: modeling.orchestration.n_workers)")
+    parser.add_argument('--trials', type=int, default=config.get('modeling.orchestration.n_trials', 30),
+                        help="Optuna trials for LightGBM/XGBoost")
+    parser.add_argument('--compare-sequential', action='store_true',
+                        help="Also run every job sequentially and report the measured speedup")
+    args = parser.parse_args()
+
+    sequential_runtime = None
+    if args.compare_sequential:
+        # The baseline persists nothing, so the concurrent run does not warm-start from its trials
+        logging.info("Running the sequential baseline...")
+        _, sequential_runtime = run_all(args.targets, args.models, n_workers=1, n_trials=args.trials, save=False)
+
+    comparison, runtime = run_all(args.targets, args.models, n_workers=args.workers, n_trials=args.trials)
+    if comparison is None:
+        logging.error("No modeling data found. Please run prepare_modeling_data_mlb.py first.")
+        return
+
+    save_report(comparison, runtime, sequential_runtime=sequential_runtime)
+
+    logging.info(f"\n{'='*80}")
+    logging.info("MLB TRAINING COMPLETE")
+    logging.info(f"{'='*80}")
+
+if __name__ == '__main__':
+    main()
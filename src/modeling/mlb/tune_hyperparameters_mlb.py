@@ -1,14 +1,20 @@
 import pandas as pd
 import numpy as np
 import logging
+import sys
 from pathlib import Path
-import optuna
 import lightgbm as lgb
 import xgboost as xgb
-from sklearn.model_selection import cross_val_score
 from sklearn.metrics import roc_auc_score
 import json
 
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.modeling.cross_validation import WalkForwardSplit, run_walk_forward
+from src.modeling.tuning import TuningService
+from src.utils.config import config
+
 # Setup logging
 log_dir = Path("logs")
 log_dir.mkdir(exist_ok=True)
@@ -44,88 +50,48 @@ def load_modeling_data(target='home_team_wins'):
         logging.error(f"Error loading training data: {e}. Please run data preparation first.")
         return None, None, None
 
-def lightgbm_objective(trial, X_train, y_train, cv_folds=3):
-    """The objective function for LightGBM hyperparameter optimization."""
-    
-    params = {
-        'objective': 'binary',
-        'metric': 'auc',
-        'verbosity': -1,
-        'boosting_type': 'gbdt',
-        'random_state': 42,
-        'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
-        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
-        'num_leaves': trial.suggest_int('num_leaves', 20, 300),
-        'max_depth': trial.suggest_int('max_depth', 3, 15),
-        'min_child_samples': trial.suggest_int('min_child_samples', 5, 100),
-        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-        'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 10.0, log=True),
-        'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 10.0, log=True),
-    }
-    
-    model = lgb.LGBMClassifier(**params)
-    
-    # Using cross-validation to get a more robust estimate of performance
-    cv_scores = cross_val_score(model, X_train, y_train, cv=cv_folds, scoring='roc_auc', n_jobs=-1)
-    
-    return cv_scores.mean()
+def tune_model(model_type, train_df, val_df, target, features, n_trials=50, cv_folds=3, service=None):
+    """Tune hyperparameters for a specific model type.
 
-def xgboost_objective(trial, X_train, y_train, cv_folds=3):
-    """The objective function for XGBoost hyperparameter optimization."""
-    
-    params = {
-        'objective': 'binary:logistic',
-        'eval_metric': 'auc',
-        'random_state': 42,
-        'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
-        'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
-        'max_depth': trial.suggest_int('max_depth', 3, 15),
-        'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
-        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-        'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 10.0, log=True),
-        'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 10.0, log=True),
-    }
-    
-    model = xgb.XGBClassifier(**params)
-    
-    # Using cross-validation to get a more robust estimate of performance
-    cv_scores = cross_val_score(model, X_train, y_train, cv=cv_folds, scoring='roc_auc', n_jobs=-1)
-    
-    return cv_scores.mean()
-
-def tune_model(model_type, train_df, target, features, n_trials=50, cv_folds=3):
-    """Tune hyperparameters for a specific model type."""
+    Trials are stored in the persistent study ``{model_type}_{target}``, pruned on the
+    validation fold, warm-started from the same model's studies for the other targets,
+    and the best parameters are exported to the model registry. The returned score is
+    the walk-forward AUC of the best parameters over train + validation.
+    """
     logging.info(f"Tuning {model_type} hyperparameters for {target}")
-    logging.info(f"Using {n_trials} trials with {cv_folds}-fold cross-validation")
-    
-    X_train = train_df[features]
-    y_train = train_df[target]
-    
-    # Create study
-    study_name = f"{model_type.lower()}_{target}"
-    study = optuna.create_study(direction='maximize', study_name=study_name)
-    
-    # Define objective function based on model type
-    if model_type.lower() == 'lightgbm':
-        objective_func = lambda trial: lightgbm_objective(trial, X_train, y_train, cv_folds)
-    elif model_type.lower() == 'xgboost':
-        objective_func = lambda trial: xgboost_objective(trial, X_train, y_train, cv_folds)
-    else:
-        raise ValueError(f"Unsupported model type: {model_type}")
-    
-    # Optimize
-    study.optimize(objective_func, n_trials=n_trials)
+    logging.info(f"Using {n_trials} pruned trials, confirmed with {cv_folds}-fold walk-forward validation")
+    
+    service = service or TuningService.from_config()
+    model_key = model_type.lower()
+    study_name = f"{model_key}_{target}"
+    
+    best_params, best_val_auc, study = service.tune(
+        model_key, study_name,
+        train_df[features], train_df[target], val_df[features], val_df[target],
+        n_trials=n_trials,
+        model_name=f"mlb_{study_name}",
+        warm_start_from=service.list_studies(prefix=f"{model_key}_"),
+        early_stopping_rounds=config.get('modeling.hyperparameter_tuning.early_stopping_rounds', 50)
+    )
+    
+    # Walk-forward check of the winner over the whole tuning period
+    combined_df = pd.concat([train_df, val_df], ignore_index=True)
+    dates = combined_df['game_date'] if 'game_date' in combined_df.columns else None
+    estimator = lgb.LGBMClassifier(**best_params) if model_key == 'lightgbm' else xgb.XGBClassifier(**best_params)
+    cv_results = run_walk_forward(
+        estimator, combined_df[features], combined_df[target],
+        WalkForwardSplit(n_splits=cv_folds, embargo_days=1), groups=dates
+    )
     
     logging.info(f"--- {model_type} Hyperparameter Tuning Complete ---")
-    logging.info(f"Number of finished trials: {len(study.trials)}")
-    logging.info(f"Best trial AUC: {study.best_value:.4f}")
+    logging.info(f"Number of stored trials: {len(study.trials)}")
+    logging.info(f"Best validation AUC: {best_val_auc:.4f}")
+    logging.info(f"Walk-forward AUC: {cv_results['mean_score']:.4f}")
     logging.info(f"Best parameters:")
-    for key, value in study.best_params.items():
+    for key, value in best_params.items():
         logging.info(f"  {key}: {value}")
     
-    return study.best_params, study.best_value, study
+    return best_params, cv_results['mean_score'], study
 
 def save_tuning_results(model_type, target, best_params, best_score, study):
     """Save hyperparameter tuning results."""
@@ -166,7 +132,7 @@ def save_tuning_results(model_type, target, best_params, best_score, study):
     
     logging.info(f"Study details saved to {study_file}")
 
-def tune_all_models_for_target(target='home_team_wins', n_trials=50):
+def tune_all_models_for_target(target='home_team_wins', n_trials=50, service=None):
     """Tune hyperparameters for all models for a specific target."""
     logging.info(f"\n{'='*60}")
     logging.info(f"HYPERPARAMETER TUNING FOR TARGET: {target.upper()}")
@@ -181,14 +147,11 @@ def tune_all_models_for_target(target='home_team_wins', n_trials=50):
     
     features = feature_info['features']
     
-    # Combine train and validation for cross-validation
-    combined_df = pd.concat([train_df, val_df], ignore_index=True)
-    
     results = {}
     
     # Tune LightGBM
     try:
-        lgb_params, lgb_score, lgb_study = tune_model('LightGBM', combined_df, target, features, n_trials)
+        lgb_params, lgb_score, lgb_study = tune_model('LightGBM', train_df, val_df, target, features, n_trials, service=service)
         save_tuning_results('LightGBM', target, lgb_params, lgb_score, lgb_study)
         results['lightgbm'] = {
             'best_params': lgb_params,
@@ -199,7 +162,7 @@ def tune_all_models_for_target(target='home_team_wins', n_trials=50):
     
     # Tune XGBoost
     try:
-        xgb_params, xgb_score, xgb_study = tune_model('XGBoost', combined_df, target, features, n_trials)
+        xgb_params, xgb_score, xgb_study = tune_model('XGBoost', train_df, val_df, target, features, n_trials, service=service)
         save_tuning_results('XGBoost', target, xgb_params, xgb_score, xgb_study)
         results['xgboost'] = {
             'best_params': xgb_params,
@@ -223,9 +186,12 @@ def main():
     
     all_results = {}
     
+    # One service for all targets: they share the feature matrix, so its binned datasets are reused
+    service = TuningService.from_config()
+    
     for target in targets:
         try:
-            results = tune_all_models_for_target(target, n_trials=30)  # Reduced for faster execution
+            results = tune_all_models_for_target(target, n_trials=30, service=service)  # Reduced for faster execution
             if results:
                 all_results[target] = results
         except Exception as e:
@@ -242,6 +208,7 @@ def main():
         for model_name, model_results in target_results.items():
             logging.info(f"  {model_name.upper()}: {model_results['best_score']:.4f} AUC")
     
+    logging.info(f"\n{service.dataset_cache.summary()}")
     logging.info(f"\n{'='*80}")
     logging.info("MLB HYPERPARAMETER TUNING COMPLETE")
     logging.info(f"{'='*80}")
@@ -0,0 +1,358 @@
+"""
+File-based model registry for the NBA/WNBA and MLB models.
+
+Each registered model name gets its own directory under the registry root:
+
+    {root}/{model_name}/tuned_params.json        best hyperparameters from tuning
+    {root}/{model_name}/versions/v{N}/bundle.joblib
+    {root}/{model_name}/versions/v{N}/manifest.json
+    {root}/{model_name}/aliases.json             e.g. {"prod": 3, "candidate": 4}
+
+A version bundle keeps everything needed to serve a model together: the
+estimator, its ordered feature list and schema hash, the scaler, the
+training parameters and metrics, and a fingerprint of the training data.
+Loading refuses bundles whose feature schema does not match the estimator,
+and bundles refuse to predict on frames that lack any of their features.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureSchemaError(ValueError):
+    """Raised when data or an estimator does not match a bundle's feature schema."""
+
+
+def feature_schema_hash(features: Iterable[str]) -> str:
+    """Hash of an ordered feature list.
+
+    Args:
+        features: Feature names in model input order
+
+    Returns:
+        Hex digest; equal only for identical names in identical order
+    """
+    return hashlib.sha256(json.dumps([str(f) for f in features]).encode()).hexdigest()[:16]
+
+
+def data_fingerprint(df: pd.DataFrame) -> Dict[str, Any]:
+    """Content fingerprint of a training frame.
+
+    Returns:
+        Dictionary with the row count, column count and a hash of the values
+    """
+    digest = hashlib.sha256(json.dumps([str(c) for c in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return {'n_rows': len(df), 'n_columns': df.shape[1], 'hash': digest.hexdigest()[:16]}
+
+
+def _estimator_features(model: Any) -> Optional[List[str]]:
+    """Feature names an estimator was fitted on, if it records them."""
+    for attr in ('feature_names_in_', 'feature_name_'):
+        names = getattr(model, attr, None)
+        if names is not None:
+            return [str(n) for n in names]
+    return None
+
+
+class ModelBundle:
+    """A trained estimator together with the artifacts needed to serve it."""
+
+    def __init__(self, model: Any, features: List[str], scaler: Any = None,
+                 params: Optional[Dict[str, Any]] = None, metrics: Optional[Dict[str, Any]] = None,
+                 training_data: Optional[Dict[str, Any]] = None, metadata: Optional[Dict[str, Any]] = None):
+        """Initialize the bundle.
+
+        Args:
+            model: Fitted estimator with predict/predict_proba
+            features: Ordered feature names the estimator expects
+            scaler: Fitted scaler applied to its own feature_names_in_ before predicting
+            params: Training hyperparameters
+            metrics: Evaluation metrics
+            training_data: Fingerprint of the training data (see data_fingerprint)
+            metadata: Registry information such as model name and version
+        """
+        self.model = model
+        self.features = list(features)
+        self.scaler = scaler
+        self.params = params or {}
+        self.metrics = metrics or {}
+        self.training_data = training_data or {}
+        self.metadata = metadata or {}
+        self.schema_hash = feature_schema_hash(self.features)
+
+    def validate(self) -> None:
+        """Check that the estimator and scaler were fitted on this bundle's features."""
+        model_features = _estimator_features(self.model)
+        if model_features is not None and model_features != self.features:
+            raise FeatureSchemaError(
+                f"Estimator was fitted on schema {feature_schema_hash(model_features)}, "
+                f"bundle declares {self.schema_hash}."
+            )
+        scaler_features = getattr(self.scaler, 'feature_names_in_', None)
+        if scaler_features is not None:
+            unknown = sorted(set(scaler_features) - set(self.features))
+            if unknown:
+                raise FeatureSchemaError(f"Scaler uses features outside the schema: {unknown[:10]}")
+
+    def check_schema(self, data: pd.DataFrame) -> None:
+        """Raise FeatureSchemaError if the frame lacks any of the bundle's features."""
+        missing = [f for f in self.features if f not in data.columns]
+        if missing:
+            raise FeatureSchemaError(
+                f"Input is missing {len(missing)} of {len(self.features)} features for schema "
+                f"{self.schema_hash}: {missing[:10]}"
+            )
+
+    def prepare(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Select, order and scale the model features of a frame.
+
+        Raises:
+            FeatureSchemaError: If any feature is missing
+        """
+        self.check_schema(data)
+        X = data[self.features].copy()
+        if self.scaler is not None:
+            scaled = [f for f in getattr(self.scaler, 'feature_names_in_', self.features) if f in X.columns]
+            if scaled:
+                X[scaled] = self.scaler.transform(X[scaled])
+        return X
+
+    def predict_proba(self, data: pd.DataFrame) -> np.ndarray:
+        """Class probabilities for a frame holding (at least) the bundle's features."""
+        return self.model.predict_proba(self.prepare(data))
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        """Class predictions for a frame holding (at least) the bundle's features."""
+        return self.model.predict(self.prepare(data))
+
+    def manifest(self) -> Dict[str, Any]:
+        """JSON-serializable description of the bundle (everything except the estimator and scaler)."""
+        return {
+            **self.metadata,
+            'schema_hash': self.schema_hash,
+            'features': self.features,
+            'has_scaler': self.scaler is not None,
+            'params': self.params,
+            'metrics': self.metrics,
+            'training_data': self.training_data,
+        }
+
+
+class ModelRegistry:
+    """Stores tuned hyperparameters and versioned model bundles by model name."""
+
+    # Loaded bundles, shared by all registry instances of the process
+    _bundle_cache: Dict[tuple, ModelBundle] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, root: str = "data/models/registry"):
+        """Initialize the registry.
+
+        Args:
+            root: Directory holding one sub-directory per model name
+        """
+        self.root = Path(root)
+
+    def _model_dir(self, model_name: str) -> Path:
+        model_dir = self.root / model_name
+        model_dir.mkdir(parents=True, exist_ok=True)
+        return model_dir
+
+    def _version_dir(self, model_name: str, version: int) -> Path:
+        return self.root / model_name / "versions" / f"v{version}"
+
+    def save_tuned_params(self, model_name: str, params: Dict[str, Any],
+                          metadata: Optional[Dict[str, Any]] = None) -> Path:
+        """Save the best hyperparameters found for a model.
+
+        Args:
+            model_name: Registry name of the model (e.g. 'mlb_lightgbm_home_team_wins')
+            params: Complete estimator parameters, including fixed ones
+            metadata: Extra information such as study name and best score
+
+        Returns:
+            Path of the written parameters file
+        """
+        params_path = self._model_dir(model_name) / "tuned_params.json"
+        payload = {
+            'model_name': model_name,
+            'params': params,
+            'metadata': metadata or {},
+            'updated_at': datetime.now().isoformat(),
+        }
+        with open(params_path, 'w') as f:
+            json.dump(payload, f, indent=2, default=str)
+
+        logger.info(f"Tuned parameters for '{model_name}' exported to {params_path}")
+        return params_path
+
+    def load_tuned_params(self, model_name: str) -> Optional[Dict[str, Any]]:
+        """Load the tuned hyperparameters of a model.
+
+        Args:
+            model_name: Registry name of the model
+
+        Returns:
+            Parameter dictionary, or None if the model has not been tuned
+        """
+        params_path = self.root / model_name / "tuned_params.json"
+        if not params_path.exists():
+            logger.info(f"No tuned parameters registered for '{model_name}'.")
+            return None
+
+        with open(params_path, 'r') as f:
+            return json.load(f)['params']
+
+    def list_versions(self, model_name: str) -> List[int]:
+        """Registered version numbers of a model, oldest first."""
+        versions_dir = self.root / model_name / "versions"
+        if not versions_dir.exists():
+            return []
+        return sorted(int(p.name[1:]) for p in versions_dir.glob("v*") if (p / "bundle.joblib").exists())
+
+    def register(self, model_name: str, model: Any, features: List[str], scaler: Any = None,
+                 params: Optional[Dict[str, Any]] = None, metrics: Optional[Dict[str, Any]] = None,
+                 training_data: Optional[pd.DataFrame] = None, aliases: Iterable[str] = ('candidate',),
+                 metadata: Optional[Dict[str, Any]] = None) -> int:
+        """Store a trained model as a new version.
+
+        Args:
+            model_name: Registry name of the model
+            model: Fitted estimator
+            features: Ordered feature names the estimator was fitted on
+            scaler: Fitted scaler to apply before predicting, if any
+            params: Training hyperparameters
+            metrics: Evaluation metrics
+            training_data: Training feature frame, fingerprinted (not stored)
+            aliases: Aliases to point at the new version
+            metadata: Extra manifest fields (e.g. target)
+
+        Returns:
+            The new version number
+
+        Raises:
+            FeatureSchemaError: If the estimator was fitted on different features
+        """
+        versions = self.list_versions(model_name)
+        version = (versions[-1] + 1) if versions else 1
+        bundle = ModelBundle(
+            model, features, scaler=scaler, params=params, metrics=metrics,
+            training_data=data_fingerprint(training_data) if training_data is not None else None,
+            metadata={**(metadata or {}), 'model_name': model_name, 'version': version,
+                      'registered_at': datetime.now().isoformat()},
+        )
+        bundle.validate()
+
+        version_dir = self._version_dir(model_name, version)
+        version_dir.mkdir(parents=True, exist_ok=True)
+        joblib.dump(bundle, version_dir / "bundle.joblib")
+        with open(version_dir / "manifest.json", 'w') as f:
+            json.dump(bundle.manifest(), f, indent=2, default=str)
+
+        for alias in aliases:
+            self.set_alias(model_name, alias, version)
+
+        logger.info(f"Registered '{model_name}' v{version} (schema {bundle.schema_hash}, "
+                    f"aliases: {list(aliases) or 'none'})")
+        return version
+
+    def get_aliases(self, model_name: str) -> Dict[str, int]:
+        """Alias -> version mapping of a model."""
+        aliases_path = self.root / model_name / "aliases.json"
+        if not aliases_path.exists():
+            return {}
+        with open(aliases_path, 'r') as f:
+            return json.load(f)
+
+    def set_alias(self, model_name: str, alias: str, version: int) -> None:
+        """Point an alias (e.g. 'prod') at a registered version."""
+        if version not in self.list_versions(model_name):
+            raise ValueError(f"'{model_name}' has no version {version}.")
+        aliases = self.get_aliases(model_name)
+        aliases[alias] = version
+        aliases_path = self._model_dir(model_name) / "aliases.json"
+        tmp_path = aliases_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(aliases, f, indent=2)
+        tmp_path.replace(aliases_path)
+        logger.info(f"'{model_name}' alias '{alias}' -> v{version}")
+
+    def promote(self, model_name: str, from_alias: str = 'candidate', to_alias: str = 'prod') -> int:
+        """Point to_alias at the version currently behind from_alias.
+
+        Returns:
+            The promoted version
+        """
+        version = self.resolve(model_name, from_alias)
+        if version is None:
+            raise ValueError(f"'{model_name}' has no '{from_alias}' version to promote.")
+        self.set_alias(model_name, to_alias, version)
+        return version
+
+    def resolve(self, model_name: str, alias: str) -> Optional[int]:
+        """Version behind an alias, or None."""
+        return self.get_aliases(model_name).get(alias)
+
+    def load(self, model_name: str, alias: Optional[str] = 'prod', version: Optional[int] = None,
+             expected_schema: Optional[str] = None) -> ModelBundle:
+        """Load a model bundle by alias or explicit version.
+
+        Bundles are cached per process, so repeated loads only re-read the
+        (small) alias file.
+
+        Args:
+            model_name: Registry name of the model
+            alias: Alias to resolve when no version is given
+            version: Explicit version number
+            expected_schema: Feature schema hash the caller will serve; refused if different
+
+        Returns:
+            The model bundle
+
+        Raises:
+            FileNotFoundError: If the model, alias or version does not exist
+            FeatureSchemaError: If the stored schema does not match
+        """
+        if version is None:
+            version = self.resolve(model_name, alias)
+            if version is None:
+                raise FileNotFoundError(f"'{model_name}' has no version with alias '{alias}'.")
+
+        cache_key = (str(self.root.resolve()), model_name, version)
+        with self._cache_lock:
+            bundle = self._bundle_cache.get(cache_key)
+        if bundle is None:
+            bundle_path = self._version_dir(model_name, version) / "bundle.joblib"
+            if not bundle_path.exists():
+                raise FileNotFoundError(f"Bundle for '{model_name}' v{version} not found at {bundle_path}.")
+            bundle = joblib.load(bundle_path)
+            if feature_schema_hash(bundle.features) != bundle.schema_hash:
+                raise FeatureSchemaError(f"Stored schema hash of '{model_name}' v{version} is corrupt.")
+            bundle.validate()
+            with self._cache_lock:
+                self._bundle_cache[cache_key] = bundle
+            logger.info(f"Loaded '{model_name}' v{version} from {bundle_path}")
+
+        if expected_schema is not None and expected_schema != bundle.schema_hash:
+            raise FeatureSchemaError(
+                f"'{model_name}' v{version} expects schema {bundle.schema_hash}, caller serves {expected_schema}."
+            )
+        return bundle
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forget all bundles loaded in this process."""
+        with cls._cache_lock:
+            cls._bundle_cache.clear()
@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
 import logging
+import sys
 from pathlib import Path
-from sklearn.model_selection import train_test_split
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.modeling.cross_validation import chronological_split
+from src.preprocessing.dtypes import unify_categories
 
 # Setup logging
 log_dir = Path("logs")
@@ -29,16 +35,10 @@ def load_final_dataset():
         logging.error(f"Error loading final dataset: {e}. Please ensure previous steps ran successfully.")
         return None
 
-def prepare_modeling_data(df):
-    """Prepares the data for modeling by defining a target variable and splitting the data."""
-    logging.info("--- PREPARING MODELING DATA WITH ODDS FEATURES ---")
-    if df is None:
-        logging.error("DataFrame is None. Aborting model preparation.")
-        return None, None
-
-    logging.info("Preparing data for modeling...")
-
-    # --- Advanced Feature Engineering ---
+def add_matchup_features(df):
+    """Adds whether the player is at home and the opponent's recent points allowed."""
+    # Categorical team ids compare only with matching categories
+    unify_categories(df, ['team_id', 'home_team_id'])
     # Is the player's team home or away?
     df['is_home'] = (df['team_id'] == df['home_team_id']).astype(int)
     
@@ -48,6 +48,24 @@ def prepare_modeling_data(df):
         df['away_team_points_against_roll_avg_5g'],
         df['home_team_points_against_roll_avg_5g']
     )
+    return df
+
+def prepare_modeling_data(df, test_size=0.2, embargo_days=0):
+    """Prepares the data for modeling by defining a target variable and splitting the data.
+
+    The split is chronological: the most recent ``test_size`` share of game dates
+    is held out, so no game in the training set is played after a test game.
+    Without a 'date' column the existing row order is treated as chronological.
+    """
+    logging.info("--- PREPARING MODELING DATA WITH ODDS FEATURES ---")
+    if df is None:
+        logging.error("DataFrame is None. Aborting model preparation.")
+        return None, None
+
+    logging.info("Preparing data for modeling...")
+
+    # --- Advanced Feature Engineering ---
+    df = add_matchup_features(df)
     
     # Create matchup-specific feature
     df['points_vs_opp_avg'] = df['points_roll_avg_5g'] - df['opponent_points_against_roll_avg_5g']
@@ -94,13 +112,22 @@ def prepare_modeling_data(df):
     X = df_model[features]
     y = df_model[target]
     
-    # 4. Split Data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    logging.info(f"Data split into training ({len(X_train)} rows) and testing ({len(X_test)} rows).")
+    # 4. Split Data (walk forward in time instead of a random split)
+    dates = df_model['date'] if 'date' in df_model.columns else None
+    if dates is not None:
+        order = np.argsort(pd.to_datetime(dates).to_numpy(), kind='stable')
+        X, y, dates = X.iloc[order], y.iloc[order], dates.iloc[order]
+    train_idx, test_idx = chronological_split(dates, test_size=test_size, embargo_days=embargo_days, n_samples=len(X))
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+    logging.info(f"Data split chronologically into training ({len(X_train)} rows) and testing ({len(X_test)} rows).")
 
-    # Combine features and target for saving
+    # Combine features and target for saving; keep the game date for walk-forward tuning
     train_df = X_train.assign(points_over_avg_5g=y_train)
     test_df = X_test.assign(points_over_avg_5g=y_test)
+    if dates is not None:
+        train_df.insert(0, 'date', dates.iloc[train_idx].values)
+        test_df.insert(0, 'date', dates.iloc[test_idx].values)
     
     return train_df, test_df
 
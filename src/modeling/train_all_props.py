@@ -0,0 +1,366 @@
+"""
+Concurrent training of one model per configured NBA prop.
+
+``prepare_model_data`` and ``advanced_model`` build and train the points model
+only. This script loads the featured player-games once and derives, from one shared
+feature matrix, the target of every prop in ``modeling.target_props`` (did the
+player beat their average of the last five games in that prop?) and the features the
+prop's model sees: the shared game context plus the prop's own player features and
+odds. The prop models are fitted concurrently on a thread pool (LightGBM releases
+the GIL while fitting, so the jobs share the matrix instead of copying it into
+processes), each capped at its share of the cores, and are registered together
+once all of them are trained. Adding a prop costs one more model fit.
+
+Two kinds of prop model are trained: the over/under-average classifiers
+(``nba_lightgbm_{prop}_over_avg_5g``) and count distributions
+(``nba_lightgbm_{prop}_distribution``, see distributions.py) that price any line.
+Features are limited to those the slate (src/prediction/slate.py) rebuilds from
+recent game logs: rolling averages, rest days, home/away and opponent defence.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.feature_engineering.player_features import PlayerFeatures
+from src.modeling.advanced_model import DEFAULT_PARAMS
+from src.modeling.cross_validation import chronological_split
+from src.modeling.distributions import CountDistributionModel, nbinom_log_likelihood, prob_over
+from src.modeling.model_registry import ModelRegistry
+from src.modeling.prepare_model_data import add_matchup_features, load_final_dataset
+from src.utils.config import config
+
+# Setup logging
+log_dir = Path("logs")
+log_dir.mkdir(exist_ok=True)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(log_dir / "nba_prop_training.log"),
+        logging.StreamHandler()
+    ]
+)
+
+# Box score columns summed into each prop (overridden by modeling.prop_stats)
+PROP_STATS = {
+    'points': ['points'],
+    'rebounds': ['rebounds'],
+    'assists': ['assists'],
+    'three_pointers': ['three_pointers_made'],
+    'points_rebounds_assists': ['points', 'rebounds', 'assists'],
+}
+
+# Game context every prop model sees
+SHARED_FEATURES = ['game_score_roll_avg_5g', 'home_rest_days', 'away_rest_days', 'is_home',
+                   'opponent_points_against_roll_avg_5g']
+
+AVERAGE_WINDOW = 5
+
+# Neutral odds of props without a posted line, as data_integrator.py and the slate fill them
+DEFAULT_ODDS = {'line': 0, 'over_odds': -110, 'under_odds': -110}
+
+# Over/under-average classifiers, or count distributions pricing any line
+MODEL_KINDS = ('over_average', 'distribution')
+
+
+def prop_target(prop: str) -> str:
+    """Target column of a prop, e.g. 'points_over_avg_5g'."""
+    return f'{prop}_over_avg_{AVERAGE_WINDOW}g'
+
+
+def prop_model_name(prop: str, kind: str = 'over_average') -> str:
+    """Registry name of a prop's model, e.g. 'nba_lightgbm_points_over_avg_5g'."""
+    if kind == 'distribution':
+        return f'nba_lightgbm_{prop}_distribution'
+    return f'nba_lightgbm_{prop_target(prop)}'
+
+
+class PropDatasets:
+    """Targets, rows and feature subsets of several props over one shared feature matrix."""
+
+    def __init__(self, df: pd.DataFrame, props: Sequence[str], prop_stats: Optional[Dict[str, List[str]]] = None,
+                 rolling_windows: Optional[List[int]] = None, test_size: float = 0.2, embargo_days: int = 0):
+        """
+        Args:
+            df: Featured player-games (featured_data.csv), one row per player-game.
+            props: Props to build targets for.
+            prop_stats: Box score columns of each prop (default PROP_STATS).
+            rolling_windows: Windows of the rolling-average features (default: those
+                of the configured PlayerFeatures).
+            test_size: Share of the latest game dates held out for evaluation.
+            embargo_days: Days dropped between the training and test blocks.
+
+        Raises:
+            ValueError: If a prop has no known stats or its stats/averages are missing.
+        """
+        prop_stats = prop_stats or PROP_STATS
+        unknown = [prop for prop in props if prop not in prop_stats]
+        if unknown:
+            raise ValueError(f"No stats configured for props {unknown} (see modeling.prop_stats)")
+        if rolling_windows is None:
+            rolling_windows = PlayerFeatures(config.get('feature_engineering.player_features', {})).rolling_windows
+        self.props = list(props)
+        self.prop_stats = {prop: list(prop_stats[prop]) for prop in self.props}
+
+        df = add_matchup_features(df)
+        if 'date' in df.columns:
+            df = df.iloc[np.argsort(pd.to_datetime(df['date']).to_numpy(), kind='stable')]
+        self.dates = df['date'].reset_index(drop=True) if 'date' in df.columns else None
+
+        # Each prop's features: the shared context, its stats' rolling averages and its odds
+        self.features: Dict[str, List[str]] = {}
+        self.odds_features: Dict[str, List[str]] = {}
+        for prop, stats in self.prop_stats.items():
+            own = [f'{stat}_roll_avg_{window}g' for stat in stats for window in rolling_windows]
+            odds = [f'fanduel_{prop}_{field}' for field in DEFAULT_ODDS]
+            # The slate serves every prop's odds, so props never posted get the neutral line
+            df = df.assign(**{f'fanduel_{prop}_{field}': default for field, default in DEFAULT_ODDS.items()
+                              if f'fanduel_{prop}_{field}' not in df.columns})
+            self.features[prop] = [col for col in dict.fromkeys(SHARED_FEATURES + own) if col in df.columns] + odds
+            self.odds_features[prop] = odds
+        self.columns = list(dict.fromkeys(col for features in self.features.values() for col in features))
+        # One float32 copy of every feature used; missing values are left to LightGBM
+        self.X = np.ascontiguousarray(df[self.columns].to_numpy(dtype=np.float32, na_value=np.nan))
+
+        self.y: Dict[str, np.ndarray] = {}
+        self.valid: Dict[str, np.ndarray] = {}
+        # Graded count and last-5-game average of each prop (the distribution model's target and test line)
+        self.values: Dict[str, np.ndarray] = {}
+        self.averages: Dict[str, np.ndarray] = {}
+        for prop, stats in self.prop_stats.items():
+            averages = [f'{stat}_roll_avg_{AVERAGE_WINDOW}g' for stat in stats]
+            missing = [col for col in stats + averages if col not in df.columns]
+            if missing:
+                raise ValueError(f"Prop '{prop}' needs columns {missing} (add its stats to "
+                                 f"feature_engineering.player_features.stats_to_average)")
+            value = df[stats].astype(np.float64).sum(axis=1, min_count=len(stats)).to_numpy()
+            average = df[averages].astype(np.float64).sum(axis=1, min_count=len(averages)).to_numpy()
+            self.values[prop], self.averages[prop] = value, average
+            # Rows without an average (a player's first game) have no target
+            self.valid[prop] = ~(np.isnan(value) | np.isnan(average))
+            self.y[prop] = (value > average).astype(np.int8)
+
+        # One chronological split shared by every prop
+        self.train_idx, self.test_idx = chronological_split(
+            self.dates, test_size=test_size, embargo_days=embargo_days, n_samples=len(self.X))
+        logging.info(f"Prop datasets: {len(self.X)} rows x {len(self.columns)} shared features "
+                     f"({self.X.nbytes / 1024 ** 2:.1f} MB) for {len(self.props)} props")
+
+    def feature_names(self, prop: str, kind: str = 'over_average') -> List[str]:
+        """Features of a prop's model; distributions leave out the odds, since they price the line."""
+        if kind == 'distribution':
+            return [col for col in self.features[prop] if col not in self.odds_features[prop]]
+        return self.features[prop]
+
+    def rows(self, prop: str, kind: str = 'over_average') -> Tuple[np.ndarray, np.ndarray]:
+        """Training and test rows of the prop (rows with a target only)."""
+        valid = self.valid[prop] if kind == 'over_average' else ~np.isnan(self.values[prop])
+        return self.train_idx[valid[self.train_idx]], self.test_idx[valid[self.test_idx]]
+
+    def frame(self, prop: str, rows: np.ndarray, kind: str = 'over_average') -> pd.DataFrame:
+        """The prop's features on the given rows."""
+        features = self.feature_names(prop, kind)
+        columns = [self.columns.index(col) for col in features]
+        return pd.DataFrame(self.X[np.ix_(rows, columns)], columns=features)
+
+
+def train_prop_model(datasets: PropDatasets, prop: str, params: Dict[str, Any],
+                     n_threads: int = 1) -> Tuple[Any, Dict[str, Any]]:
+    """Fit and evaluate one prop's model.
+
+    Args:
+        datasets: The shared prop datasets
+        prop: Prop to train
+        params: LightGBM classifier parameters
+        n_threads: Native threads the fit may use
+
+    Returns:
+        Tuple of (fitted model, test metrics and timing)
+    """
+    start = time.perf_counter()
+    train_rows, test_rows = datasets.rows(prop)
+    X_train = datasets.frame(prop, train_rows)
+    y_train, y_test = datasets.y[prop][train_rows], datasets.y[prop][test_rows]
+
+    model = lgb.LGBMClassifier(**{**params, 'n_jobs': n_threads})
+    model.fit(X_train, y_train)
+
+    metrics = {'prop': prop, 'n_train': len(train_rows), 'n_test': len(test_rows),
+               'n_features': len(datasets.features[prop]), 'base_rate': float(y_train.mean())}
+    if len(test_rows):
+        proba = model.predict_proba(datasets.frame(prop, test_rows))[:, 1]
+        metrics['accuracy'] = accuracy_score(y_test, proba > 0.5)
+        metrics['log_loss'] = log_loss(y_test, proba, labels=[0, 1])
+        metrics['roc_auc'] = roc_auc_score(y_test, proba) if len(np.unique(y_test)) == 2 else np.nan
+    metrics['fit_seconds'] = time.perf_counter() - start
+    return model, metrics
+
+
+def train_prop_distribution(datasets: PropDatasets, prop: str, params: Dict[str, Any],
+                            n_threads: int = 1) -> Tuple[Any, Dict[str, Any]]:
+    """Fit and evaluate one prop's count distribution.
+
+    Besides the fit of the distribution (mean absolute error, negative binomial log
+    loss and 80% interval coverage), the test metrics price a half-point line just
+    above each player's last-5-game average, the question the over/under-average
+    classifiers answer, so both kinds can be compared.
+
+    Args:
+        datasets: The shared prop datasets
+        prop: Prop to train
+        params: LightGBM parameters of the mean model
+        n_threads: Native threads the fit may use
+
+    Returns:
+        Tuple of (fitted CountDistributionModel, test metrics and timing)
+    """
+    start = time.perf_counter()
+    kind = 'distribution'
+    train_rows, test_rows = datasets.rows(prop, kind)
+    model = CountDistributionModel({**params, 'n_jobs': n_threads})
+    model.fit(datasets.frame(prop, train_rows, kind), datasets.values[prop][train_rows])
+
+    metrics = {'prop': prop, 'n_train': len(train_rows), 'n_test': len(test_rows),
+               'n_features': len(datasets.feature_names(prop, kind)), 'dispersion': model.dispersion_}
+    if len(test_rows):
+        y_test = datasets.values[prop][test_rows]
+        mean, dispersion = model.predict_distribution(datasets.frame(prop, test_rows, kind))
+        metrics['mae'] = float(np.abs(mean - y_test).mean())
+        metrics['log_loss'] = float(-nbinom_log_likelihood(y_test, mean, model.dispersion_).mean())
+        quantiles = model.quantiles(datasets.frame(prop, test_rows, kind), [0.1, 0.9])
+        metrics['coverage_80'] = float(((y_test >= quantiles[:, 0]) & (y_test <= quantiles[:, 1])).mean())
+
+        average = datasets.averages[prop][test_rows]
+        priced = ~np.isnan(average)
+        line = np.floor(average[priced]) + 0.5
+        p_over = prob_over(mean[priced], dispersion[priced], line)
+        over = (y_test[priced] > line).astype(int)
+        metrics['line_brier'] = float(np.mean((p_over - over) ** 2))
+        metrics['line_auc'] = roc_auc_score(over, p_over) if len(np.unique(over)) == 2 else np.nan
+    metrics['fit_seconds'] = time.perf_counter() - start
+    return model, metrics
+
+
+def register_prop_models(models: Dict[str, Any], datasets: PropDatasets, comparison: pd.DataFrame,
+                         registry: Optional[ModelRegistry] = None, kind: str = 'over_average') -> Dict[str, int]:
+    """Register every prop model as a new 'candidate' version (and 'prod' where there is none yet).
+
+    The versions share a ``training_run`` id in their manifests, marking them as
+    trained together on the same data.
+
+    Returns:
+        Dictionary of registered version per prop
+    """
+    registry = registry or ModelRegistry(config.get('paths.model_registry', 'data/models/registry'))
+    training_run = uuid.uuid4().hex[:12]
+    metrics = comparison.set_index('prop').to_dict(orient='index')
+    versions = {}
+    for prop, model in models.items():
+        name = prop_model_name(prop, kind)
+        train_rows, _ = datasets.rows(prop, kind)
+        aliases = ['candidate'] if registry.resolve(name, 'prod') else ['candidate', 'prod']
+        target = prop_target(prop) if kind == 'over_average' else prop
+        versions[prop] = registry.register(
+            name, model, datasets.feature_names(prop, kind), params=model.get_params(), metrics=metrics[prop],
+            training_data=datasets.frame(prop, train_rows, kind), aliases=aliases,
+            metadata={'target': target, 'kind': kind, 'prop': prop, 'stats': datasets.prop_stats[prop],
+                      'training_run': training_run, 'props': list(models)},
+        )
+    logging.info(f"Registered {len(versions)} prop models (training run {training_run})")
+    return versions
+
+
+def run_all_props(df: pd.DataFrame, props: Optional[Sequence[str]] = None, params: Optional[Dict[str, Any]] = None,
+                  n_workers: Optional[int] = None, register: bool = True,
+                  registry: Optional[ModelRegistry] = None,
+                  kind: str = 'over_average') -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Train a model for every prop concurrently and register them together.
+
+    Args:
+        df: Featured player-games
+        props: Props to train (default: modeling.target_props)
+        params: LightGBM parameters for every prop (default: each prop's tuned
+            parameters from the registry, else advanced_model.DEFAULT_PARAMS)
+        n_workers: Concurrent fits (default: modeling.orchestration.n_workers)
+        register: Whether to register the trained models
+        registry: Registry to use (default: ``paths.model_registry``)
+        kind: 'over_average' classifiers or 'distribution' count models
+
+    Returns:
+        Tuple of (comparison DataFrame, fitted model per prop). Nothing is
+        registered if any fit fails.
+    """
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown prop model kind '{kind}' (expected one of {MODEL_KINDS})")
+    props = list(props or config.get('modeling.target_props', list(PROP_STATS)))
+    datasets = PropDatasets(df, props, prop_stats={**PROP_STATS, **(config.get('modeling.prop_stats', {}) or {})})
+    registry = registry or ModelRegistry(config.get('paths.model_registry', 'data/models/registry'))
+
+    n_workers = n_workers or config.get('modeling.orchestration.n_workers', os.cpu_count() or 1)
+    n_workers = max(1, min(n_workers, len(props)))
+    n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+    logging.info(f"Training {len(props)} prop models on {n_workers} worker(s) with {n_threads} thread(s) each")
+
+    train = train_prop_model if kind == 'over_average' else train_prop_distribution
+
+    def job(prop):
+        return train(datasets, prop, params or registry.load_tuned_params(prop_model_name(prop, kind))
+                     or DEFAULT_PARAMS, n_threads)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='prop-model') as pool:
+        results = list(pool.map(job, props))
+    wall_seconds = time.perf_counter() - start
+
+    models = {prop: model for prop, (model, _) in zip(props, results)}
+    comparison = pd.DataFrame([metrics for _, metrics in results])
+    logging.info(f"Trained {len(props)} prop models in {wall_seconds:.1f}s "
+                 f"(sum of fits {comparison['fit_seconds'].sum():.1f}s)")
+    if register:
+        comparison['version'] = comparison['prop'].map(
+            register_prop_models(models, datasets, comparison, registry, kind))
+    return comparison, models
+
+
+def main():
+    """Train and register a model of one kind for every configured prop from featured_data.csv."""
+    parser = argparse.ArgumentParser(description="Train one model per NBA prop from the shared feature matrix.")
+    parser.add_argument('--props', nargs='+', help="Props to train (default: modeling.target_props)")
+    parser.add_argument('--workers', type=int, help="Concurrent fits (default: modeling.orchestration.n_workers)")
+    parser.add_argument('--kind', choices=MODEL_KINDS, default='over_average',
+                        help="Over/under-average classifiers or count distributions pricing any line")
+    parser.add_argument('--no-register', action='store_true', help="Train and evaluate without registering")
+    args = parser.parse_args()
+
+    df = load_final_dataset()
+    if df is None:
+        return
+    comparison, _ = run_all_props(df, args.props, n_workers=args.workers, register=not args.no_register,
+                                  kind=args.kind)
+
+    output_dir = Path("analysis_results")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    comparison.to_csv(output_dir / f"nba_prop_comparison_{args.kind}.csv", index=False)
+    with open(output_dir / f"nba_prop_comparison_{args.kind}.json", 'w') as f:
+        json.dump(comparison.to_dict(orient='records'), f, indent=2, default=str)
+    logging.info(f"\n{comparison.to_string(index=False)}")
+
+
+if __name__ == '__main__':
+    main()
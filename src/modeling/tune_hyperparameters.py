@@ -1,9 +1,18 @@
 import pandas as pd
 import logging
+import sys
 from pathlib import Path
-import optuna
 import lightgbm as lgb
-from sklearn.model_selection import cross_val_score
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.modeling.cross_validation import WalkForwardSplit, chronological_split, run_walk_forward
+from src.modeling.tuning import TuningService
+from src.utils.config import config
+
+# Study name in the tuning storage and model name in the registry
+MODEL_NAME = 'nba_lightgbm_points_over_avg_5g'
 
 # Setup logging
 log_dir = Path("logs")
@@ -29,49 +38,37 @@ def load_modeling_data():
         logging.error(f"Error loading training data: {e}. Please run the data preparation script first.")
         return None
 
-def objective(trial, X, y):
-    """The objective function for Optuna to optimize."""
-    
-    param = {
-        'objective': 'binary',
-        'metric': 'auc',
-        'verbosity': -1,
-        'boosting_type': 'gbdt',
-        'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
-        'learning_rate': trial.suggest_float('learning_rate', 1e-3, 0.1, log=True),
-        'num_leaves': trial.suggest_int('num_leaves', 20, 300),
-        'max_depth': trial.suggest_int('max_depth', 3, 12),
-        'min_child_samples': trial.suggest_int('min_child_samples', 5, 100),
-        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
-        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-        'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 10.0, log=True),
-        'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 10.0, log=True),
-    }
-
-    model = lgb.LGBMClassifier(**param, random_state=42)
-    
-    # Using cross-validation to get a more robust estimate of performance
-    score = cross_val_score(model, X, y, n_jobs=-1, cv=3, scoring='roc_auc').mean()
-    
-    return score
-
-
 if __name__ == '__main__':
     train_data = load_modeling_data()
     
     if train_data is not None:
-        X_train = train_data.drop(columns=['points_over_avg_5g'])
+        X_train = train_data.drop(columns=['points_over_avg_5g', 'date'], errors='ignore')
         y_train = train_data['points_over_avg_5g']
+        dates = train_data['date'] if 'date' in train_data.columns else None
         
-        study = optuna.create_study(direction='maximize')
-        study.optimize(lambda trial: objective(trial, X_train, y_train), n_trials=50) # Run 50 trials
+        # The most recent games of the training set form the early-stopping / pruning fold
+        fit_idx, val_idx = chronological_split(dates, test_size=0.2, n_samples=len(X_train))
+        
+        service = TuningService.from_config()
+        best_params, best_value, study = service.tune(
+            'lightgbm', MODEL_NAME,
+            X_train.iloc[fit_idx], y_train.iloc[fit_idx], X_train.iloc[val_idx], y_train.iloc[val_idx],
+            n_trials=50, model_name=MODEL_NAME,
+            early_stopping_rounds=config.get('modeling.hyperparameter_tuning.early_stopping_rounds', 50),
+            search_space={'learning_rate_range': (1e-3, 0.1), 'max_depth_range': (3, 12)}
+        )
         
         logging.info("--- Hyperparameter Tuning Complete ---")
-        logging.info(f"Number of finished trials: {len(study.trials)}")
+        logging.info(f"Number of stored trials: {len(study.trials)}")
         logging.info("Best trial:")
-        best_trial = study.best_trial
-        
-        logging.info(f"  Value (ROC AUC): {best_trial.value}")
+        logging.info(f"  Value (validation ROC AUC): {best_value}")
         logging.info("  Params: ")
-        for key, value in best_trial.params.items():
-            logging.info(f"    {key}: {value}") 
\ No newline at end of file
+        for key, value in best_params.items():
+            logging.info(f"    {key}: {value}")
+        
+        # Confirm the winner with walk-forward validation over the whole training period
+        cv_results = run_walk_forward(
+            lgb.LGBMClassifier(**best_params), X_train, y_train,
+            WalkForwardSplit(n_splits=3, embargo_days=1), groups=dates
+        )
+        logging.info(f"Walk-forward ROC AUC of best params: {cv_results['mean_score']:.4f}")
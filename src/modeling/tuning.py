@@ -0,0 +1,464 @@
+"""
+Persistent, parallel hyperparameter tuning for the LightGBM and XGBoost models.
+
+Studies are stored in SQLite so they survive the process and can be resumed
+or extended later. Several worker processes can optimize the same study at
+once, trials are pruned early from intermediate validation AUC, and the best
+parameters are exported to the model registry for the training scripts.
+Binned training matrices come from a shared DatasetCache, so the feature
+matrix is binned once per study rather than once per trial.
+"""
+
+import logging
+import math
+import os
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import lightgbm as lgb
+import optuna
+import xgboost as xgb
+from joblib import Parallel, delayed
+from sklearn.metrics import roc_auc_score
+
+from .dataset_cache import DatasetCache
+from .model_registry import ModelRegistry
+from ..utils.config import config
+
+logger = logging.getLogger(__name__)
+
+LIGHTGBM_FIXED_PARAMS = {
+    'objective': 'binary',
+    'metric': 'auc',
+    'verbosity': -1,
+    'boosting_type': 'gbdt',
+    'random_state': 42,
+}
+
+XGBOOST_FIXED_PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'auc',
+    'random_state': 42,
+}
+
+
+def suggest_lightgbm_params(trial: optuna.Trial, learning_rate_range: Tuple[float, float] = (0.01, 0.3),
+                            max_depth_range: Tuple[int, int] = (3, 15)) -> Dict[str, Any]:
+    """Samples a LightGBM search-space point.
+
+    Args:
+        trial: Optuna trial
+        learning_rate_range: Log-uniform bounds for the learning rate
+        max_depth_range: Bounds for the tree depth
+
+    Returns:
+        Tunable parameters (without the fixed ones)
+    """
+    return {
+        'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
+        'learning_rate': trial.suggest_float('learning_rate', *learning_rate_range, log=True),
+        'num_leaves': trial.suggest_int('num_leaves', 20, 300),
+        'max_depth': trial.suggest_int('max_depth', *max_depth_range),
+        'min_child_samples': trial.suggest_int('min_child_samples', 5, 100),
+        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+        'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 10.0, log=True),
+        'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 10.0, log=True),
+    }
+
+
+def suggest_xgboost_params(trial: optuna.Trial, learning_rate_range: Tuple[float, float] = (0.01, 0.3),
+                           max_depth_range: Tuple[int, int] = (3, 15)) -> Dict[str, Any]:
+    """Samples an XGBoost search-space point.
+
+    Args:
+        trial: Optuna trial
+        learning_rate_range: Log-uniform bounds for the learning rate
+        max_depth_range: Bounds for the tree depth
+
+    Returns:
+        Tunable parameters (without the fixed ones)
+    """
+    return {
+        'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
+        'learning_rate': trial.suggest_float('learning_rate', *learning_rate_range, log=True),
+        'max_depth': trial.suggest_int('max_depth', *max_depth_range),
+        'min_child_weight': trial.suggest_int('min_child_weight', 1, 10),
+        'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+        'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+        'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 10.0, log=True),
+        'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 10.0, log=True),
+    }
+
+
+class LightGBMPruningCallback:
+    """Reports LightGBM validation scores to Optuna and prunes unpromising trials."""
+
+    def __init__(self, trial: optuna.Trial, metric: str = 'auc', valid_name: str = 'valid_0',
+                 report_interval: int = 10):
+        self.trial = trial
+        self.metric = metric
+        self.valid_name = valid_name
+        self.report_interval = report_interval
+
+    def __call__(self, env: Any) -> None:
+        if (env.iteration + 1) % self.report_interval != 0:
+            return
+        for entry in env.evaluation_result_list:
+            if entry[0] == self.valid_name and entry[1] == self.metric:
+                self.trial.report(entry[2], step=env.iteration)
+                if self.trial.should_prune():
+                    raise optuna.TrialPruned(f"Trial pruned at iteration {env.iteration}.")
+                return
+
+
+class XGBoostPruningCallback(xgb.callback.TrainingCallback):
+    """Reports XGBoost validation scores to Optuna and prunes unpromising trials."""
+
+    def __init__(self, trial: optuna.Trial, metric: str = 'auc', valid_name: str = 'validation_0',
+                 report_interval: int = 10):
+        super().__init__()
+        self.trial = trial
+        self.metric = metric
+        self.valid_name = valid_name
+        self.report_interval = report_interval
+
+    def after_iteration(self, model: Any, epoch: int, evals_log: Dict[str, Dict[str, List[float]]]) -> bool:
+        if (epoch + 1) % self.report_interval != 0:
+            return False
+        scores = evals_log.get(self.valid_name, {}).get(self.metric)
+        if scores:
+            score = scores[-1][0] if isinstance(scores[-1], tuple) else scores[-1]
+            self.trial.report(float(score), step=epoch)
+            if self.trial.should_prune():
+                raise optuna.TrialPruned(f"Trial pruned at iteration {epoch}.")
+        return False
+
+
+def lightgbm_objective(trial: optuna.Trial, X_train: Any, y_train: Any, X_val: Any, y_val: Any,
+                       early_stopping_rounds: int = 50, n_jobs: int = -1,
+                       search_space: Optional[Dict[str, Any]] = None,
+                       dataset_cache: Optional[DatasetCache] = None) -> float:
+    """Fits one LightGBM trial with early stopping and pruning on the validation fold.
+
+    Trains on binned datasets from the cache, so only the first trial pays
+    for binning the feature matrix.
+
+    Returns:
+        Validation ROC AUC at the best iteration
+    """
+    params = {**LIGHTGBM_FIXED_PARAMS, **suggest_lightgbm_params(trial, **(search_space or {})), 'n_jobs': n_jobs}
+    cache = dataset_cache or DatasetCache(root=None)
+    train_set, val_set = cache.lightgbm_datasets(X_train, y_train, X_val, y_val)
+
+    booster = lgb.train(
+        {k: v for k, v in params.items() if k != 'n_estimators'},
+        train_set,
+        num_boost_round=params['n_estimators'],
+        valid_sets=[val_set],
+        valid_names=['valid_0'],
+        callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False), LightGBMPruningCallback(trial)],
+    )
+    trial.set_user_attr('best_iteration', int(booster.best_iteration or params['n_estimators']))
+    return roc_auc_score(y_val, booster.predict(X_val, num_iteration=booster.best_iteration))
+
+
+def xgboost_objective(trial: optuna.Trial, X_train: Any, y_train: Any, X_val: Any, y_val: Any,
+                      early_stopping_rounds: int = 50, n_jobs: int = -1,
+                      search_space: Optional[Dict[str, Any]] = None,
+                      dataset_cache: Optional[DatasetCache] = None) -> float:
+    """Fits one XGBoost trial with early stopping and pruning on the validation fold.
+
+    Trains on quantized matrices from the cache, so only the first trial in
+    each process pays for sketching the feature matrix.
+
+    Returns:
+        Validation ROC AUC at the best iteration
+    """
+    params = {**XGBOOST_FIXED_PARAMS, **suggest_xgboost_params(trial, **(search_space or {})), 'n_jobs': n_jobs}
+    cache = dataset_cache or DatasetCache(root=None)
+    dtrain, dval = cache.xgboost_matrices(X_train, y_train, X_val, y_val)
+
+    booster = xgb.train(
+        {k: v for k, v in params.items() if k != 'n_estimators'},
+        dtrain,
+        num_boost_round=params['n_estimators'],
+        evals=[(dval, 'validation_0')],
+        early_stopping_rounds=early_stopping_rounds,
+        callbacks=[XGBoostPruningCallback(trial)],
+        verbose_eval=False,
+    )
+    best_iteration = getattr(booster, 'best_iteration', None)
+    trial.set_user_attr('best_iteration', int(best_iteration + 1) if best_iteration is not None else params['n_estimators'])
+    iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+    return roc_auc_score(y_val, booster.predict(dval, iteration_range=iteration_range))
+
+
+OBJECTIVES = {
+    'lightgbm': (lightgbm_objective, LIGHTGBM_FIXED_PARAMS),
+    'xgboost': (xgboost_objective, XGBOOST_FIXED_PARAMS),
+}
+
+
+def _optimize_worker(study_name: str, storage_url: str, pruner: optuna.pruners.BasePruner,
+                     objective: Callable[[optuna.Trial], float], n_trials: int) -> int:
+    """Runs trials for a study from a worker process; the study is shared via storage."""
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(study_name=study_name, storage=_make_storage(storage_url), pruner=pruner)
+    study.optimize(objective, n_trials=n_trials, catch=(ValueError,))
+    return n_trials
+
+
+def _has_complete_trial(study: optuna.Study) -> bool:
+    """Whether a study has a completed trial, without which best_value and best_params raise."""
+    return bool(study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,)))
+
+
+def _make_storage(storage_url: str) -> optuna.storages.RDBStorage:
+    # Generous lock timeout: several processes write trial results to the same SQLite file
+    return optuna.storages.RDBStorage(storage_url, engine_kwargs={'connect_args': {'timeout': 60}})
+
+
+class TuningService:
+    """Runs Optuna studies against a persistent SQLite storage."""
+
+    def __init__(self, storage_path: str = "data/models/tuning/optuna_studies.db", n_workers: int = 1,
+                 registry: Optional[ModelRegistry] = None, n_warmup_steps: int = 50, n_startup_trials: int = 5,
+                 dataset_cache: Optional[DatasetCache] = None, n_threads: Optional[int] = None):
+        """Initialize the tuning service.
+
+        Args:
+            storage_path: SQLite file holding all studies
+            n_workers: Worker processes optimizing a study concurrently
+            registry: Registry receiving the exported best parameters (default: ``paths.model_registry``)
+            n_warmup_steps: Boosting iterations before a trial may be pruned
+            n_startup_trials: Completed trials before pruning starts
+            dataset_cache: Cache of binned matrices shared by all studies (in-memory if None)
+            n_threads: Native threads per worker; defaults to an even share of the cores
+        """
+        self.storage_path = Path(storage_path)
+        self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self.storage_url = f"sqlite:///{self.storage_path}"
+        self.n_workers = max(1, n_workers)
+        self.registry = registry or ModelRegistry(config.get('paths.model_registry', 'data/models/registry'))
+        self.pruner = optuna.pruners.MedianPruner(n_startup_trials=n_startup_trials, n_warmup_steps=n_warmup_steps)
+        self.dataset_cache = dataset_cache or DatasetCache(root=None)
+        self.n_threads = n_threads
+
+    @classmethod
+    def from_config(cls, root: Optional[str] = None, **overrides: Any) -> 'TuningService':
+        """Create a service from the 'modeling.hyperparameter_tuning' configuration section.
+
+        Args:
+            root: Directory holding the study storage, the registry receiving the
+                exported parameters and the dataset cache, instead of their configured
+                paths (e.g. a temporary directory for runs that must not persist anything)
+            **overrides: Overrides of the configured constructor arguments
+        """
+        tuning_config = config.get('modeling.hyperparameter_tuning', {})
+        if root is not None:
+            paths = {'storage': Path(root) / 'optuna_studies.db', 'registry': Path(root) / 'registry',
+                     'dataset_cache': Path(root) / 'dataset_cache'}
+        else:
+            paths = {'storage': tuning_config.get('storage_path', 'data/models/tuning/optuna_studies.db'),
+                     'registry': config.get('paths.model_registry', 'data/models/registry'),
+                     'dataset_cache': tuning_config.get('dataset_cache_dir', 'data/models/dataset_cache')}
+        settings = dict(
+            storage_path=str(paths['storage']),
+            n_workers=tuning_config.get('n_workers', 1),
+            registry=ModelRegistry(str(paths['registry'])),
+            n_warmup_steps=tuning_config.get('pruning_warmup_steps', 50),
+            dataset_cache=DatasetCache(
+                root=str(paths['dataset_cache']),
+                lightgbm_params={'max_bin': tuning_config.get('max_bin', 255)},
+                xgboost_params={'max_bin': tuning_config.get('max_bin', 256)},
+            ),
+        )
+        settings.update(overrides)
+        return cls(**settings)
+
+    @property
+    def threads_per_worker(self) -> int:
+        """Native threads each worker's model may use without oversubscribing the cores."""
+        if self.n_threads:
+            return self.n_threads
+        return max(1, (os.cpu_count() or 1) // self.n_workers)
+
+    def get_study(self, study_name: str, direction: str = 'maximize') -> optuna.Study:
+        """Create a study, or resume it if it already exists in storage."""
+        return optuna.create_study(
+            study_name=study_name,
+            storage=_make_storage(self.storage_url),
+            direction=direction,
+            pruner=self.pruner,
+            load_if_exists=True,
+        )
+
+    def list_studies(self, prefix: str = '') -> List[str]:
+        """Names of the stored studies starting with a prefix."""
+        names = optuna.study.get_all_study_names(storage=_make_storage(self.storage_url))
+        return sorted(name for name in names if name.startswith(prefix))
+
+    def warm_start(self, study: optuna.Study, source_studies: List[str], top_k: int = 5) -> int:
+        """Enqueue the best trials of previous studies as the first trials of a study.
+
+        Args:
+            study: Study to seed
+            source_studies: Names of stored studies to copy trials from
+            top_k: Number of best trials taken from each source
+
+        Returns:
+            Number of trials enqueued
+        """
+        storage = _make_storage(self.storage_url)
+        enqueued = 0
+        for source_name in source_studies:
+            if source_name == study.study_name:
+                continue
+            try:
+                source = optuna.load_study(study_name=source_name, storage=storage)
+            except KeyError:
+                logger.warning(f"Warm-start source study '{source_name}' not found.")
+                continue
+
+            completed = [t for t in source.trials if t.state == optuna.trial.TrialState.COMPLETE]
+            reverse = source.direction == optuna.study.StudyDirection.MAXIMIZE
+            for trial in sorted(completed, key=lambda t: t.value, reverse=reverse)[:top_k]:
+                study.enqueue_trial(trial.params, skip_if_exists=True)
+                enqueued += 1
+
+        if enqueued:
+            logger.info(f"Warm-started '{study.study_name}' with {enqueued} trials from {source_studies}")
+        return enqueued
+
+    def optimize(self, study_name: str, objective: Callable[[optuna.Trial], float], n_trials: int,
+                 warm_start_from: Optional[List[str]] = None) -> optuna.Study:
+        """Run trials for a study, spreading them over the worker processes.
+
+        Args:
+            study_name: Name of the (possibly existing) study
+            objective: Picklable objective function taking a trial
+            n_trials: New trials to run in this call
+            warm_start_from: Stored studies whose best trials seed this one
+
+        Returns:
+            The study, reloaded with the trials of all workers
+        """
+        study = self.get_study(study_name)
+        if warm_start_from:
+            self.warm_start(study, warm_start_from)
+
+        previous_trials = len(study.trials)
+        logger.info(f"Optimizing '{study_name}': {n_trials} trials on {self.n_workers} worker(s) "
+                    f"({previous_trials} trials already stored)")
+
+        if self.n_workers == 1:
+            study.optimize(objective, n_trials=n_trials, catch=(ValueError,))
+        else:
+            shares = [n_trials // self.n_workers + (1 if i < n_trials % self.n_workers else 0)
+                      for i in range(self.n_workers)]
+            Parallel(n_jobs=self.n_workers)(
+                delayed(_optimize_worker)(study_name, self.storage_url, self.pruner, objective, share)
+                for share in shares if share > 0
+            )
+            study = self.get_study(study_name)
+
+        states = [t.state for t in study.trials[previous_trials:]]
+        best = f"{study.best_value:.4f}" if _has_complete_trial(study) else "none (no trial completed)"
+        logger.info(f"Study '{study_name}' finished: "
+                    f"{states.count(optuna.trial.TrialState.COMPLETE)} complete, "
+                    f"{states.count(optuna.trial.TrialState.PRUNED)} pruned. Best AUC: {best}")
+        return study
+
+    def best_params(self, study: optuna.Study, model_type: str) -> Dict[str, Any]:
+        """Complete estimator parameters of the best trial, with n_estimators set to its best iteration.
+
+        If no trial of the study completed, the parameters of its first enqueued
+        (warm-start) trial are used, or the fixed parameters alone if none was enqueued.
+        """
+        _, fixed_params = OBJECTIVES[model_type.lower()]
+        if not _has_complete_trial(study):
+            enqueued = [t for t in study.trials if 'fixed_params' in t.system_attrs]
+            fallback = enqueued[0].system_attrs['fixed_params'] if enqueued else {}
+            logger.warning(f"No trial of study '{study.study_name}' completed; falling back to "
+                           f"{'enqueued' if enqueued else 'default'} parameters.")
+            return {**fixed_params, **fallback}
+
+        params = {**fixed_params, **study.best_params}
+        best_iteration = study.best_trial.user_attrs.get('best_iteration')
+        if best_iteration:
+            params['n_estimators'] = best_iteration
+        return params
+
+    def export_best_params(self, study: optuna.Study, model_type: str, model_name: str) -> Dict[str, Any]:
+        """Write the best parameters of a study to the model registry.
+
+        Nothing is exported if no trial completed, so earlier tuned parameters are kept.
+
+        Returns:
+            The exported (or fallback) parameter dictionary
+        """
+        params = self.best_params(study, model_type)
+        if not _has_complete_trial(study):
+            logger.warning(f"Not exporting parameters for '{model_name}': study '{study.study_name}' "
+                           f"has no completed trial.")
+            return params
+        self.registry.save_tuned_params(model_name, params, metadata={
+            'study_name': study.study_name,
+            'storage': str(self.storage_path),
+            'best_value': study.best_value,
+            'best_trial': study.best_trial.number,
+            'n_trials': len(study.trials),
+            'tuned_at': datetime.now().isoformat(),
+        })
+        return params
+
+    def tune(self, model_type: str, study_name: str, X_train: Any, y_train: Any, X_val: Any, y_val: Any,
+             n_trials: int = 50, model_name: Optional[str] = None, warm_start_from: Optional[List[str]] = None,
+             early_stopping_rounds: int = 50, search_space: Optional[Dict[str, Any]] = None
+             ) -> Tuple[Dict[str, Any], float, optuna.Study]:
+        """Tune a LightGBM or XGBoost model on a train/validation split.
+
+        Args:
+            model_type: 'lightgbm' or 'xgboost'
+            study_name: Persistent study name
+            X_train, y_train: Training fold
+            X_val, y_val: Validation fold used for early stopping and pruning
+            n_trials: New trials to run
+            model_name: Registry name to export the best parameters to (skipped if None)
+            warm_start_from: Stored studies whose best trials seed this one
+            early_stopping_rounds: Patience of early stopping on the validation fold
+            search_space: Optional learning_rate_range / max_depth_range overrides
+
+        Returns:
+            Tuple of (best estimator parameters, best validation AUC, study); the AUC
+            is NaN and the parameters are the fallback ones if no trial completed
+        """
+        if model_type.lower() not in OBJECTIVES:
+            raise ValueError(f"Unsupported model type: {model_type}")
+
+        objective_func, _ = OBJECTIVES[model_type.lower()]
+
+        # Bin once up front so the first trial is not skewed and workers find the binary files
+        if model_type.lower() == 'lightgbm':
+            self.dataset_cache.lightgbm_datasets(X_train, y_train, X_val, y_val)
+        else:
+            self.dataset_cache.xgboost_matrices(X_train, y_train, X_val, y_val)
+
+        objective = partial(
+            objective_func, X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val,
+            early_stopping_rounds=early_stopping_rounds, n_jobs=self.threads_per_worker,
+            search_space=search_space, dataset_cache=self.dataset_cache,
+        )
+        start = time.perf_counter()
+        study = self.optimize(study_name, objective, n_trials, warm_start_from=warm_start_from)
+        logger.info(f"Tuning '{study_name}' took {time.perf_counter() - start:.1f}s; {self.dataset_cache.summary()}")
+
+        params = self.best_params(study, model_type)
+        if model_name:
+            self.export_best_params(study, model_type, model_name)
+        best_value = study.best_value if _has_complete_trial(study) else math.nan
+        return params, best_value, study
@@ -11,14 +11,52 @@ import joblib
 import json
 import logging
 import sqlite3
+import sys
 from pathlib import Path
 from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple
 
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.modeling.model_registry import ModelRegistry, FeatureSchemaError
+from src.utils.cache import cache_key, cache_stats, get_cache
+from src.utils.config import config
+from src.utils.instrumentation import instrumented, profiled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Weather features (3 features)
+WEATHER_DEFAULTS = {
+    'weather_dome_game': 0,
+    'weather_extreme_conditions': 0, 
+    'weather_hitting_favorability': 1  # Assume favorable conditions
+}
+
+# Ballpark climate features (7 features)
+BALLPARK_CLIMATE_DEFAULTS = {
+    'ballpark_climate_humid_continental': 1,  # Most common
+    'ballpark_climate_humid_subtropical': 0,
+    'ballpark_climate_mediterranean': 0,
+    'ballpark_climate_oceanic': 0,
+    'ballpark_climate_semi_arid': 0,
+    'ballpark_climate_tropical': 0,
+    'ballpark_climate_unknown': 0,
+}
+
+# Climate features (7 features) - these are separate from ballpark_climate
+CLIMATE_DEFAULTS = {
+    'climate_desert': 0,
+    'climate_humid_continental': 0,
+    'climate_humid_subtropical': 1,  # Most common
+    'climate_mediterranean': 0,
+    'climate_oceanic': 0,
+    'climate_semi_arid': 0,
+    'climate_tropical': 0,
+}
+
 class MLBPredictionPipeline:
     """
     Production pipeline for MLB game outcome predictions.
@@ -27,19 +65,49 @@ class MLBPredictionPipeline:
     with real baseball intelligence.
     """
     
-    def __init__(self, model_dir: str = "data/models/mlb", db_path: str = "data/sports_model.db"):
+    def __init__(self, model_dir: str = "data/models/mlb", db_path: str = "data/sports_model.db",
+                 registry_root: str = "data/models/registry"):
         """Initialize the prediction pipeline."""
         self.model_dir = Path(model_dir)
         self.db_path = Path(db_path)
+        self.registry = ModelRegistry(registry_root)
+        # Team lookups are shared with every other pipeline in this process
+        self.cache = get_cache('team_stats')
+        self.min_confidence = config.get('prediction.min_confidence', 0.55)
+        self.bundle = None
         self.model = None
         self.scaler = None
         self.features = None
         self.model_metadata = None
         
-    def load_model(self, target: str = "home_team_wins", model_type: str = "xgboost"):
-        """Load the trained model and associated artifacts."""
+    def load_model(self, target: str = "home_team_wins", model_type: str = "xgboost", alias: str = "prod"):
+        """Load the trained model and associated artifacts.
+        
+        The registered bundle behind ``alias`` is preferred: it carries the model, its
+        feature schema and its scaler together. Models trained before the registry
+        existed are loaded from their separate model, params, feature and scaler files.
+        """
         logger.info(f"Loading {model_type} model for {target}...")
         
+        model_name = f"mlb_{model_type}_{target}"
+        try:
+            self.bundle = self.registry.load(model_name, alias=alias)
+        except FileNotFoundError:
+            self.bundle = None
+            logger.info(f"No '{alias}' version of {model_name} in the model registry, loading model files")
+        except FeatureSchemaError as e:
+            logger.error(f"Refusing to serve {model_name}: {e}")
+            return False
+        
+        if self.bundle is not None:
+            self.model = self.bundle.model
+            self.features = self.bundle.features
+            self.scaler = self.bundle.scaler
+            self.model_metadata = {**self.bundle.manifest(), 'best_auc': self.bundle.metrics.get('roc_auc', 'Unknown')}
+            logger.info(f"Model loaded from registry: {model_name} v{self.bundle.metadata.get('version')} "
+                        f"(schema {self.bundle.schema_hash}, {len(self.features)} features)")
+            return True
+        
         try:
             # Load model
             model_path = self.model_dir / f"{model_type}_{target}.joblib"
@@ -79,83 +147,107 @@ class MLBPredictionPipeline:
     def get_team_stats(self, team_id: str) -> Dict:
         """Get aggregated team statistics from the database."""
         logger.info(f"Fetching team stats for {team_id}")
+        return self.get_teams_stats([team_id]).get(team_id, {})
+    
+    @instrumented()
+    def get_teams_stats(self, team_ids: List[str]) -> Dict[str, Dict]:
+        """Get aggregated statistics for many teams with a single query.
+        
+        Args:
+            team_ids: Team abbreviations (e.g., 'NYY')
+            
+        Returns:
+            Dictionary mapping each team found in the database to its batting stats
+            and its ``pitching_``-prefixed pitching stats
+        """
+        team_ids = list(dict.fromkeys(team_ids))
+        if not team_ids:
+            return {}
         
         if not self.db_path.exists():
             logger.warning("Database not found, using default stats")
             return {}
         
+        # Aggregates are all-time, so they are cached per team under the data version only
+        keys = {team_id: cache_key('mlb', 'team_stats', team_id, source=self.db_path) for team_id in team_ids}
+        cached = {team_id: self.cache.get(key) for team_id, key in keys.items()}
+        to_fetch = [team_id for team_id, stats in cached.items() if stats is None]
+        
+        if to_fetch:
+            fetched = self._query_teams_stats(to_fetch)
+            if fetched is None:
+                return {team_id: stats for team_id, stats in cached.items() if stats}
+            for team_id in to_fetch:
+                # Teams missing from the database are cached as empty so they are not re-queried
+                cached[team_id] = fetched.get(team_id, {})
+                self.cache.set(keys[team_id], cached[team_id])
+        
+        return {team_id: stats for team_id, stats in cached.items() if stats}
+    
+    def _query_teams_stats(self, team_ids: List[str]) -> Optional[Dict[str, Dict]]:
+        """Run the batting/pitching aggregate query for the given teams; None on error."""
         conn = sqlite3.connect(str(self.db_path))
         
         try:
-            # Get team ID mapping (abbreviation to numeric ID)
-            team_mapping_query = """
-                SELECT team_id, team_abbreviation
-                FROM mlb_teams
-                WHERE team_abbreviation = ?
+            placeholders = ", ".join("?" * len(team_ids))
+            # Map abbreviations to numeric IDs, then aggregate batting and pitching per team
+            query = f"""
+                WITH teams AS (
+                    SELECT CAST(team_id AS TEXT) AS team_id, team_abbreviation
+                    FROM mlb_teams
+                    WHERE team_abbreviation IN ({placeholders})
+                ),
+                batting AS (
+                    SELECT 
+                        team_id,
+                        AVG(CAST(at_bats AS FLOAT)) as avg_at_bats,
+                        AVG(CAST(runs AS FLOAT)) as avg_runs,
+                        AVG(CAST(hits AS FLOAT)) as avg_hits,
+                        AVG(CAST(rbi AS FLOAT)) as avg_rbi,
+                        AVG(CAST(home_runs AS FLOAT)) as avg_home_runs,
+                        AVG(CAST(walks AS FLOAT)) as avg_walks,
+                        AVG(CAST(strikeouts AS FLOAT)) as avg_strikeouts,
+                        AVG(CAST(batting_avg AS FLOAT)) as team_batting_avg,
+                        AVG(CAST(on_base_plus_slugging AS FLOAT)) as team_ops
+                    FROM mlb_batter_stats 
+                    WHERE team_id IN (SELECT team_id FROM teams) AND at_bats > 0
+                    GROUP BY team_id
+                ),
+                pitching AS (
+                    SELECT 
+                        team_id,
+                        AVG(CAST(innings_pitched AS FLOAT)) as pitching_avg_innings_pitched,
+                        AVG(CAST(hits_allowed AS FLOAT)) as pitching_avg_hits_allowed,
+                        AVG(CAST(runs_allowed AS FLOAT)) as pitching_avg_runs_allowed,
+                        AVG(CAST(earned_runs AS FLOAT)) as pitching_avg_earned_runs,
+                        AVG(CAST(walks AS FLOAT)) as pitching_avg_walks_allowed,
+                        AVG(CAST(strikeouts AS FLOAT)) as pitching_avg_strikeouts_pitched,
+                        AVG(CAST(home_runs_allowed AS FLOAT)) as pitching_avg_hrs_allowed,
+                        AVG(CAST(era AS FLOAT)) as pitching_team_era
+                    FROM mlb_pitcher_stats 
+                    WHERE team_id IN (SELECT team_id FROM teams) AND innings_pitched > 0
+                    GROUP BY team_id
+                )
+                SELECT t.team_abbreviation, b.*, p.*
+                FROM teams t
+                LEFT JOIN batting b ON b.team_id = t.team_id
+                LEFT JOIN pitching p ON p.team_id = t.team_id
             """
-            team_mapping = pd.read_sql(team_mapping_query, conn, params=[team_id])
             
-            if team_mapping.empty:
-                logger.warning(f"Team {team_id} not found in database")
-                return {}
+            stats = pd.read_sql(query, conn, params=team_ids)
+            stats = stats.drop(columns='team_id').set_index('team_abbreviation').fillna(0.0)
             
-            numeric_team_id = str(team_mapping.iloc[0]['team_id'])
+            missing = [team_id for team_id in team_ids if team_id not in stats.index]
+            if missing:
+                logger.warning(f"Teams not found in database: {missing}")
             
-            # Get batting stats
-            batting_query = """
-                SELECT 
-                    AVG(CAST(at_bats AS FLOAT)) as avg_at_bats,
-                    AVG(CAST(runs AS FLOAT)) as avg_runs,
-                    AVG(CAST(hits AS FLOAT)) as avg_hits,
-                    AVG(CAST(rbi AS FLOAT)) as avg_rbi,
-                    AVG(CAST(home_runs AS FLOAT)) as avg_home_runs,
-                    AVG(CAST(walks AS FLOAT)) as avg_walks,
-                    AVG(CAST(strikeouts AS FLOAT)) as avg_strikeouts,
-                    AVG(CAST(batting_avg AS FLOAT)) as team_batting_avg,
-                    AVG(CAST(on_base_plus_slugging AS FLOAT)) as team_ops
-                FROM mlb_batter_stats 
-                WHERE team_id = ? AND at_bats > 0
-            """
-            
-            batting_stats = pd.read_sql(batting_query, conn, params=[numeric_team_id])
-            
-            # Get pitching stats
-            pitching_query = """
-                SELECT 
-                    AVG(CAST(innings_pitched AS FLOAT)) as avg_innings_pitched,
-                    AVG(CAST(hits_allowed AS FLOAT)) as avg_hits_allowed,
-                    AVG(CAST(runs_allowed AS FLOAT)) as avg_runs_allowed,
-                    AVG(CAST(earned_runs AS FLOAT)) as avg_earned_runs,
-                    AVG(CAST(walks AS FLOAT)) as avg_walks_allowed,
-                    AVG(CAST(strikeouts AS FLOAT)) as avg_strikeouts_pitched,
-                    AVG(CAST(home_runs_allowed AS FLOAT)) as avg_hrs_allowed,
-                    AVG(CAST(era AS FLOAT)) as team_era
-                FROM mlb_pitcher_stats 
-                WHERE team_id = ? AND innings_pitched > 0
-            """
-            
-            pitching_stats = pd.read_sql(pitching_query, conn, params=[numeric_team_id])
-            
-            # Combine stats
-            team_stats = {}
-            
-            # Add batting stats
-            if not batting_stats.empty:
-                for col in batting_stats.columns:
-                    team_stats[col] = batting_stats.iloc[0][col] if not pd.isna(batting_stats.iloc[0][col]) else 0.0
-            
-            # Add pitching stats with prefix
-            if not pitching_stats.empty:
-                for col in pitching_stats.columns:
-                    pitching_col = f"pitching_{col}"
-                    team_stats[pitching_col] = pitching_stats.iloc[0][col] if not pd.isna(pitching_stats.iloc[0][col]) else 0.0
-            
-            logger.info(f"Retrieved {len(team_stats)} stats for {team_id}")
-            return team_stats
+            teams_stats = stats.to_dict(orient='index')
+            logger.info(f"Retrieved stats for {len(teams_stats)} of {len(team_ids)} teams")
+            return teams_stats
             
         except Exception as e:
-            logger.error(f"Error fetching team stats for {team_id}: {e}")
-            return {}
+            logger.error(f"Error fetching team stats for {team_ids}: {e}")
+            return None
         finally:
             conn.close()
     
@@ -179,6 +271,19 @@ class MLBPredictionPipeline:
         if not self.features:
             raise ValueError("Model not loaded. Call load_model() first.")
         
+        # Get real team stats from database
+        home_stats = self.get_team_stats(game_data['home_team_id'])
+        away_stats = self.get_team_stats(game_data['away_team_id'])
+        
+        # Convert to DataFrame with exact feature order
+        df = pd.DataFrame([self._game_feature_row(game_data, home_stats, away_stats)])
+        df_result = df[self.features].copy()  # Ensure exact order and features
+        
+        logger.info(f"Features prepared: {len(df_result.columns)} features")
+        return df_result
+    
+    def _game_feature_row(self, game_data: Dict, home_stats: Dict, away_stats: Dict) -> Dict:
+        """Build the feature dictionary of one game from its info and both teams' stats."""
         # Initialize feature dictionary with zeros
         features_dict = {feature: 0.0 for feature in self.features}
         
@@ -196,10 +301,6 @@ class MLBPredictionPipeline:
         features_dict['home_rest_days'] = game_data.get('home_rest_days', 1)
         features_dict['away_rest_days'] = game_data.get('away_rest_days', 1)
         
-        # Get real team stats from database
-        home_stats = self.get_team_stats(game_data['home_team_id'])
-        away_stats = self.get_team_stats(game_data['away_team_id'])
-        
         # Map home team stats
         for stat_name, stat_value in home_stats.items():
             home_feature = f"home_{stat_name}"
@@ -214,69 +315,56 @@ class MLBPredictionPipeline:
         
         # Set default weather and ballpark features to match EXACT training feature names
         # These are the exact 17 weather/ballpark features from the training data
-        
-        # Weather features (3 features)
-        weather_defaults = {
-            'weather_dome_game': 0,
-            'weather_extreme_conditions': 0, 
-            'weather_hitting_favorability': 1  # Assume favorable conditions
-        }
-        
-        # Ballpark climate features (7 features)
-        ballpark_climate_defaults = {
-            'ballpark_climate_humid_continental': 1,  # Most common
-            'ballpark_climate_humid_subtropical': 0,
-            'ballpark_climate_mediterranean': 0,
-            'ballpark_climate_oceanic': 0,
-            'ballpark_climate_semi_arid': 0,
-            'ballpark_climate_tropical': 0,
-            'ballpark_climate_unknown': 0,
-        }
-        
-        # Climate features (7 features) - these are separate from ballpark_climate
-        climate_defaults = {
-            'climate_desert': 0,
-            'climate_humid_continental': 0,
-            'climate_humid_subtropical': 1,  # Most common
-            'climate_mediterranean': 0,
-            'climate_oceanic': 0,
-            'climate_semi_arid': 0,
-            'climate_tropical': 0,
-        }
-        
-        # Update with defaults that match training feature names exactly
-        features_dict.update(weather_defaults)
-        features_dict.update(ballpark_climate_defaults)
-        features_dict.update(climate_defaults)
+        features_dict.update(WEATHER_DEFAULTS)
+        features_dict.update(BALLPARK_CLIMATE_DEFAULTS)
+        features_dict.update(CLIMATE_DEFAULTS)
         
         # Override with any provided weather/ballpark data
         for key, value in game_data.items():
             if key in features_dict:
                 features_dict[key] = value
         
-        # Convert to DataFrame with exact feature order
-        df = pd.DataFrame([features_dict])
-        df_result = df[self.features].copy()  # Ensure exact order and features
-        
-        logger.info(f"Features prepared: {len(df_result.columns)} features")
-        return df_result
+        return features_dict
     
-    def predict_game(self, game_data: Dict) -> Dict:
+    @instrumented()
+    def prepare_games_features(self, games_data: List[Dict]) -> Tuple[pd.DataFrame, List[Dict]]:
         """
-        Predict the outcome of a single MLB game using real team stats.
+        Prepare one feature matrix for many games, fetching all team stats in one query.
         
         Args:
-            game_data: Dictionary containing game information
+            games_data: List of game data dictionaries (see prepare_game_features)
             
         Returns:
-            Dictionary with prediction results
+            Feature matrix in model feature order and the games it covers; games whose
+            features could not be built are logged and left out
         """
-        if self.model is None:
+        if not self.features:
             raise ValueError("Model not loaded. Call load_model() first.")
         
-        # Prepare features with real team stats
-        features_df = self.prepare_game_features(game_data)
+        team_ids = [game[side] for game in games_data for side in ('home_team_id', 'away_team_id') if side in game]
+        teams_stats = self.get_teams_stats(team_ids)
+        
+        rows, prepared = [], []
+        for game_data in games_data:
+            try:
+                rows.append(self._game_feature_row(game_data,
+                                                   teams_stats.get(game_data['home_team_id'], {}),
+                                                   teams_stats.get(game_data['away_team_id'], {})))
+                prepared.append(game_data)
+            except Exception as e:
+                logger.error(f"Error preparing features for game {game_data}: {e}")
         
+        # Columns in exact model feature order
+        features_df = pd.DataFrame(rows, columns=self.features)
+        logger.info(f"Features prepared: {len(prepared)} games x {len(self.features)} features")
+        return features_df, prepared
+    
+    @instrumented('transform')
+    def _transform(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        """Apply the model's schema check and scaling to a feature matrix."""
+        # Registered bundles check the feature schema and scale in one step
+        if self.bundle is not None:
+            return self.bundle.prepare(features_df)
         # Apply scaling if scaler is available
         if self.scaler is not None:
             # Only scale features that the scaler was trained on
@@ -290,52 +378,71 @@ class MLBPredictionPipeline:
                 scaled_values = self.scaler.transform(features_df[features_to_scale])
                 features_df_scaled[features_to_scale] = scaled_values
             
-            features_df = features_df_scaled
             logger.info(f"Scaled {len(features_to_scale)} features, left {len(features_not_scaled)} unscaled")
+            return features_df_scaled
+        return features_df
+    
+    def _build_result(self, game_data: Dict, probabilities: np.ndarray) -> Dict:
+        """Turn one game's class probabilities into a prediction result."""
+        home_win_prob = probabilities[1]  # Probability of home team winning
+        away_win_prob = probabilities[0]  # Probability of away team winning
+        
+        # Binary prediction, as the classifiers' own predict() derives it
+        prediction = int(np.argmax(probabilities))
+        
+        # Calculate confidence and betting recommendation
+        confidence = abs(home_win_prob - 0.5) * 2  # Scale to 0-1
+        
+        # Betting recommendation based on confidence threshold
+        betting_threshold = self.min_confidence  # Only bet if we're this confident (55% by default)
+        should_bet = max(home_win_prob, away_win_prob) >= betting_threshold
+        
+        return {
+            'game_info': {
+                'home_team': game_data['home_team_id'],
+                'away_team': game_data['away_team_id'],
+                'date': game_data['game_date']
+            },
+            'prediction': {
+                'home_win_probability': round(home_win_prob, 4),
+                'away_win_probability': round(away_win_prob, 4),
+                'predicted_winner': game_data['home_team_id'] if prediction == 1 else game_data['away_team_id'],
+                'confidence': round(confidence, 4)
+            },
+            'betting': {
+                'should_bet': should_bet,
+                'recommended_bet': game_data['home_team_id'] if home_win_prob >= betting_threshold else (
+                    game_data['away_team_id'] if away_win_prob >= betting_threshold else 'No bet'
+                ),
+                'edge': round(max(home_win_prob, away_win_prob) - 0.5, 4)
+            },
+            'model_info': {
+                'model_type': 'XGBoost',
+                'target': 'home_team_wins',
+                'expected_auc': self.model_metadata.get('best_auc', 'Unknown') if self.model_metadata else 'Unknown',
+                'features_used': len(self.features) if self.features else 0
+            }
+        }
+    
+    def predict_game(self, game_data: Dict) -> Dict:
+        """
+        Predict the outcome of a single MLB game using real team stats.
+        
+        Args:
+            game_data: Dictionary containing game information
+            
+        Returns:
+            Dictionary with prediction results
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded. Call load_model() first.")
+        
+        # Prepare features with real team stats
+        features_df = self._transform(self.prepare_game_features(game_data))
         
         # Make prediction
         try:
-            # Get probability predictions
-            probabilities = self.model.predict_proba(features_df)[0]
-            home_win_prob = probabilities[1]  # Probability of home team winning
-            away_win_prob = probabilities[0]  # Probability of away team winning
-            
-            # Get binary prediction
-            prediction = self.model.predict(features_df)[0]
-            
-            # Calculate confidence and betting recommendation
-            confidence = abs(home_win_prob - 0.5) * 2  # Scale to 0-1
-            
-            # Betting recommendation based on confidence threshold
-            betting_threshold = 0.55  # Only bet if we're 55%+ confident
-            should_bet = max(home_win_prob, away_win_prob) >= betting_threshold
-            
-            result = {
-                'game_info': {
-                    'home_team': game_data['home_team_id'],
-                    'away_team': game_data['away_team_id'],
-                    'date': game_data['game_date']
-                },
-                'prediction': {
-                    'home_win_probability': round(home_win_prob, 4),
-                    'away_win_probability': round(away_win_prob, 4),
-                    'predicted_winner': game_data['home_team_id'] if prediction == 1 else game_data['away_team_id'],
-                    'confidence': round(confidence, 4)
-                },
-                'betting': {
-                    'should_bet': should_bet,
-                    'recommended_bet': game_data['home_team_id'] if home_win_prob >= betting_threshold else (
-                        game_data['away_team_id'] if away_win_prob >= betting_threshold else 'No bet'
-                    ),
-                    'edge': round(max(home_win_prob, away_win_prob) - 0.5, 4)
-                },
-                'model_info': {
-                    'model_type': 'XGBoost',
-                    'target': 'home_team_wins',
-                    'expected_auc': self.model_metadata.get('best_auc', 'Unknown') if self.model_metadata else 'Unknown',
-                    'features_used': len(self.features) if self.features else 0
-                }
-            }
+            result = self._build_result(game_data, self.model.predict_proba(features_df)[0])
             
             logger.info(f"Prediction completed: {result['prediction']['predicted_winner']} "
                        f"({result['prediction']['confidence']:.1%} confidence)")
@@ -346,26 +453,65 @@ class MLBPredictionPipeline:
             logger.error(f"Error making prediction: {e}")
             raise
     
+    @instrumented()
+    def score_games(self, games_data: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Score many games with one feature matrix and one ``predict_proba`` call.
+        
+        Args:
+            games_data: List of game data dictionaries
+            
+        Returns:
+            One prediction result per input game, or None for games whose features
+            could not be built
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded. Call load_model() first.")
+        
+        features_df, prepared = self.prepare_games_features(games_data)
+        if not prepared:
+            return [None] * len(games_data)
+        
+        probabilities = self.model.predict_proba(self._transform(features_df))
+        scored = {id(game_data): self._build_result(game_data, game_probabilities)
+                  for game_data, game_probabilities in zip(prepared, probabilities)}
+        return [scored.get(id(game_data)) for game_data in games_data]
+    
+    def _score_game(self, game_data: Dict) -> Optional[Dict]:
+        """Score one game through the batch path; None (logged) if it fails."""
+        try:
+            return self.score_games([game_data])[0]
+        except Exception as e:
+            logger.error(f"Error predicting game {game_data}: {e}")
+            return None
+    
+    @profiled('mlb_prediction')
     def predict_multiple_games(self, games_data: List[Dict]) -> List[Dict]:
         """
         Predict outcomes for multiple games.
         
+        All team stats come from one query, the games form a single feature matrix
+        that is scaled once, and one ``predict_proba`` call scores every game. If the
+        batch fails (e.g. one game's features cannot be scored), the games are scored
+        one by one so only the bad ones are dropped.
+        
         Args:
             games_data: List of game data dictionaries
             
         Returns:
-            List of prediction results
+            List of prediction results, in input order
         """
         logger.info(f"Predicting outcomes for {len(games_data)} games...")
         
-        results = []
-        for game_data in games_data:
-            try:
-                result = self.predict_game(game_data)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error predicting game {game_data}: {e}")
-                continue
+        if self.model is None:
+            raise ValueError("Model not loaded. Call load_model() first.")
+        
+        try:
+            scored = self.score_games(games_data)
+        except Exception as e:
+            logger.error(f"Error predicting {len(games_data)} games as one batch: {e}; scoring them one by one")
+            scored = [self._score_game(game_data) for game_data in games_data]
+        results = [result for result in scored if result is not None]
         
         logger.info(f"Successfully predicted {len(results)} out of {len(games_data)} games")
         return results
@@ -418,7 +564,8 @@ class MLBPredictionPipeline:
                 'expected_auc': self.model_metadata.get('best_auc', 'Unknown') if self.model_metadata else 'Unknown',
                 'model_type': 'XGBoost',
                 'features_count': len(self.features) if self.features else 0
-            }
+            },
+            'cache': cache_stats()
         }
         
         logger.info(f"Betting report generated: {len(recommended_bets)} recommended bets out of {total_games} games")
@@ -479,6 +626,8 @@ def main():
     print(f"Average Edge: {report['summary']['average_edge']:.1%}")
     print(f"Home Bias: {report['bias_analysis']['home_bias_percentage']}%")
     print(f"Expected Model AUC: {report['model_performance']['expected_auc']}")
+    for name, stats in report['cache'].items():
+        print(f"Cache '{name}': {stats['hit_rate']:.1%} hit rate ({stats['hits']} hits, {stats['misses']} misses)")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
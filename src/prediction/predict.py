@@ -7,11 +7,16 @@ import sys
 # Add project root to the Python path
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
-from src.utils.database import db_manager
+from src.utils.config import config
+from src.utils.database import db_manager, Games, Players, PlayerGameStats
 from src.feature_engineering.player_features import PlayerFeatures
 from src.feature_engineering.game_features import GameFeatures
 from src.feature_engineering.team_features import TeamFeatures
-from sqlalchemy import text
+from src.modeling.model_registry import ModelRegistry, ModelBundle, FeatureSchemaError, feature_schema_hash
+from src.modeling.tree_inference import TreeEnsemble
+from src.utils.cache import cache_key, get_cache
+from src.utils.instrumentation import instrumented
+from sqlalchemy import bindparam, func, select
 
 # Setup logging
 log_dir = Path("logs")
@@ -25,8 +30,23 @@ logging.basicConfig(
     ]
 )
 
+# Shared with every prediction in this process; dropped when new NBA data is ingested
+# by this process. Ingests by other processes are only seen once entries expire
+# (prediction.cache.ttl_seconds).
+_lookup_cache = get_cache('nba_lookups')
+
+@instrumented()
 def load_model(model_path="data/models/advanced_model.joblib"):
-    """Loads the trained model from the specified path."""
+    """Loads the trained model from the specified path.
+
+    An up-to-date compiled copy next to it (``advanced_model.npz``, written by
+    advanced_model.py) is preferred: it is scored with NumPy alone.
+    """
+    compiled_path = Path(model_path).with_suffix('.npz')
+    if compiled_path.exists() and (not Path(model_path).exists()
+                                   or compiled_path.stat().st_mtime >= Path(model_path).stat().st_mtime):
+        logging.info(f"Loading compiled model from {compiled_path}...")
+        return TreeEnsemble.load(compiled_path)
     logging.info(f"Loading model from {model_path}...")
     try:
         model = joblib.load(model_path)
@@ -36,26 +56,78 @@ def load_model(model_path="data/models/advanced_model.joblib"):
         logging.error(f"Model file not found at {model_path}.")
         return None
 
-def get_player_game_log(session, player_id, game_date):
+@instrumented()
+def load_registered_model(model_name="nba_lightgbm_points_over_avg_5g", alias="prod", features=None):
+    """Loads a model bundle (model, feature schema, scaler) from the model registry.
+
+    ``features`` is the ordered feature list the caller serves; a bundle registered
+    with any other schema is refused. Without it the bundle checks each prediction's
+    columns instead (see make_prediction).
+    """
+    logging.info(f"Loading '{model_name}' ({alias}) from the model registry...")
+    expected_schema = feature_schema_hash(features) if features is not None else None
+    try:
+        registry = ModelRegistry(config.get('paths.model_registry', 'data/models/registry'))
+        bundle = registry.load(model_name, alias=alias, expected_schema=expected_schema)
+        logging.info(f"Model v{bundle.metadata.get('version')} loaded (schema {bundle.schema_hash}).")
+        return bundle
+    except (FileNotFoundError, FeatureSchemaError) as e:
+        logging.error(f"Could not load registered model: {e}")
+        return None
+
+# Statements are built once and reused: values are always bound per call, never
+# formatted into the SQL, so the compiled form is cached and nothing is injectable.
+# They run on session.connection(), inside the session's transaction.
+_GAME_INFO = select(Games.__table__).where(Games.game_id == bindparam('game_id'))
+
+_PLAYER_INFO = select(Players.__table__).where(Players.player_id == bindparam('player_id'))
+
+_PLAYER_GAME_LOG = (
+    select(*PlayerGameStats.__table__.c, Games.date)
+    .join(Games, PlayerGameStats.game_id == Games.game_id)
+    .where(PlayerGameStats.player_id == bindparam('player_id'), Games.date < bindparam('before_date'))
+    .order_by(Games.date.desc())
+    .limit(bindparam('n_games'))
+)
+
+_ranked_logs = (
+    select(*PlayerGameStats.__table__.c, Games.date,
+           func.row_number().over(partition_by=PlayerGameStats.player_id,
+                                  order_by=Games.date.desc()).label('game_rank'))
+    .join(Games, PlayerGameStats.game_id == Games.game_id)
+    .where(PlayerGameStats.player_id.in_(bindparam('player_ids', expanding=True)),
+           Games.date < bindparam('before_date'))
+    .subquery()
+)
+_PLAYER_GAME_LOGS = select(_ranked_logs).where(_ranked_logs.c.game_rank <= bindparam('n_games'))
+
+def _as_datetime(value):
+    """Bound dates must be datetimes for the DateTime column type."""
+    return pd.Timestamp(value).to_pydatetime()
+
+def get_player_game_log(session, player_id, game_date, n_games=20):
     """Fetches the game log for a player up to a certain date."""
-    query = f"""
-    SELECT s.*, g.date
-    FROM player_game_stats s
-    JOIN games g ON s.game_id = g.game_id
-    WHERE s.player_id = '{player_id}' AND g.date < '{game_date}'
-    ORDER BY g.date DESC
-    LIMIT 20;
+    params = {'player_id': str(player_id), 'before_date': _as_datetime(game_date), 'n_games': n_games}
+    return pd.read_sql(_PLAYER_GAME_LOG, session.connection(), params=params)
+
+def get_player_game_logs(session, player_ids, before_date, n=20):
+    """Fetches the last ``n`` games before a date for many players in one query.
+
+    Returns one row per player-game with a ``game_rank`` column (1 = most recent).
     """
-    return pd.read_sql(text(query), session.bind)
+    params = {'player_ids': [str(player_id) for player_id in player_ids],
+              'before_date': _as_datetime(before_date), 'n_games': n}
+    return pd.read_sql(_PLAYER_GAME_LOGS, session.connection(), params=params)
 
 def get_game_info(session, game_id):
     """Fetches information about a specific game."""
-    return pd.read_sql(text(f"SELECT * FROM games WHERE game_id = '{game_id}'"), session.bind)
+    return pd.read_sql(_GAME_INFO, session.connection(), params={'game_id': str(game_id)})
 
 def get_player_info(session, player_id):
     """Fetches information about a specific player."""
-    return pd.read_sql(text(f"SELECT * FROM players WHERE player_id = '{player_id}'"), session.bind)
+    return pd.read_sql(_PLAYER_INFO, session.connection(), params={'player_id': str(player_id)})
 
+@instrumented()
 def fetch_prediction_data(game_id, player_id):
     """
     Fetches and prepares the data needed for a prediction from the database.
@@ -63,21 +135,25 @@ def fetch_prediction_data(game_id, player_id):
     logging.info(f"Fetching data for game_id={game_id} and player_id={player_id}...")
     
     with db_manager.get_session() as session:
-        game_info = get_game_info(session, game_id)
+        # Game and player rows are reused across calls until new NBA data is ingested
+        game_info = _lookup_cache.get_or_compute(cache_key('nba', 'game_info', str(game_id)),
+                                                 lambda: get_game_info(session, game_id))
         if game_info.empty:
             logging.error(f"No game found with game_id={game_id}")
             return None
         
         game_date = game_info['date'].iloc[0]
         
-        player_log = get_player_game_log(session, player_id, game_date)
+        player_log = _lookup_cache.get_or_compute(cache_key('nba', 'player_game_log', str(player_id), as_of=game_date),
+                                                  lambda: get_player_game_log(session, player_id, game_date))
         
         # Create a single-row DataFrame with the game and player info
         prediction_instance = game_info.copy()
         prediction_instance['player_id'] = player_id
 
         # Get player's team_id and add it to the instance
-        player_info = get_player_info(session, player_id)
+        player_info = _lookup_cache.get_or_compute(cache_key('nba', 'player_info', str(player_id)),
+                                                   lambda: get_player_info(session, player_id))
         if not player_info.empty:
             prediction_instance['team_id'] = player_info['team_id'].iloc[0]
         else:
@@ -101,6 +177,7 @@ def fetch_prediction_data(game_id, player_id):
 
         return full_data_for_features
 
+@instrumented()
 def engineer_features(raw_data):
     """
     Applies the same feature engineering logic used during training.
@@ -120,18 +197,36 @@ def engineer_features(raw_data):
     # Return only the last row, which corresponds to the game we want to predict
     return features_df.tail(1)
 
+@instrumented()
 def make_prediction(model, data):
-    """Makes a prediction using the loaded model and input data."""
+    """Makes a prediction using the loaded model (or registered model bundle) and input data.
+
+    Registered bundles refuse to predict when any of their features is missing.
+    """
     if model is None:
         logging.error("Model is not loaded. Cannot make a prediction.")
         return None
     
+    if isinstance(model, ModelBundle):
+        try:
+            prediction = model.predict(data)
+            prediction_proba = model.predict_proba(data)
+        except FeatureSchemaError as e:
+            logging.error(f"Refusing to predict: {e}")
+            return None
+        logging.info(f"Prediction: {'Over' if prediction[0] == 1 else 'Under'}")
+        logging.info(f"Prediction probability: {prediction_proba[0]}")
+        return prediction, prediction_proba
+    
     # Ensure data has the same columns as the training data
     # This is a simplified approach; a more robust solution would save/load column lists
     model_features = model.feature_name_
     
     # Check for missing columns and add them with a default value (e.g., 0)
     missing_cols = set(model_features) - set(data.columns)
+    if missing_cols:
+        logging.warning(f"Zero-filling {len(missing_cols)} missing feature(s) for an unregistered model: "
+                        f"{sorted(missing_cols)[:10]}")
     for c in missing_cols:
         data[c] = 0
         
@@ -151,7 +246,7 @@ def make_prediction(model, data):
 
 if __name__ == '__main__':
     # Example usage
-    model = load_model()
+    model = load_registered_model() or load_model()
     if model:
         # These would be the inputs for the prediction
         example_game_id = "401585609" # Example game
@@ -0,0 +1,566 @@
+"""
+Long-running HTTP/JSON prediction server.
+
+Models are loaded once and kept warm, per-date NBA slate features are cached, and
+concurrent requests to an endpoint are coalesced into micro-batches so that one
+model call serves many requests. Everything runs on the standard library's
+asyncio; model calls happen on a worker thread so the event loop stays responsive.
+
+Endpoints:
+    POST /predict/nba   {"prop": "points", "player_id": "...", "date": "YYYY-MM-DD"}
+                        or {"prop": "points", "features": {...}}
+    POST /predict/mlb   {"home_team_id": "NYY", "away_team_id": "BOS", "game_date": "YYYY-MM-DD", ...}
+    GET  /health
+    GET  /metrics       p50/p95/p99 latency, throughput and batch sizes per endpoint,
+                        and cache hit rates
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.utils.config import config
+from src.utils.cache import cache_stats
+from src.modeling.model_registry import ModelRegistry, FeatureSchemaError, feature_schema_hash
+from src.prediction.mlb_prediction_pipeline import MLBPredictionPipeline
+from src.prediction.slate import (PROP_STATS, prop_features, prop_model_name, load_slate_data,
+                                  build_slate_features)
+
+logger = logging.getLogger(__name__)
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+MAX_BODY_BYTES = 1 << 20
+MLB_FIELDS = {'home_team_id', 'away_team_id', 'game_date'}
+# Optional MLB fields passed to the model as they are, so they must be numbers
+MLB_NUMERIC_FIELDS = {'home_rest_days', 'away_rest_days'}
+
+
+class RequestError(Exception):
+    """A request that cannot be served, with the HTTP status to answer it with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyMetrics:
+    """Rolling latency, throughput and batch-size statistics per endpoint."""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self.started = time.time()
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+        self.batch_sizes = defaultdict(lambda: deque(maxlen=window))
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True) -> None:
+        self.requests[endpoint] += 1
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def record_batch(self, endpoint: str, size: int) -> None:
+        self.batch_sizes[endpoint].append(size)
+
+    def summary(self) -> Dict[str, Any]:
+        """Latency percentiles (ms) over the last ``window`` requests and lifetime throughput."""
+        uptime = time.time() - self.started
+        endpoints = {}
+        for endpoint, count in self.requests.items():
+            latencies = np.asarray(self.latencies[endpoint]) * 1000
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            batches = self.batch_sizes.get(endpoint)
+            endpoints[endpoint] = {
+                'requests': count,
+                'errors': self.errors[endpoint],
+                'throughput_rps': round(count / uptime, 2) if uptime > 0 else 0.0,
+                'latency_ms': {'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3),
+                               'mean': round(float(latencies.mean()), 3)},
+                'mean_batch_size': round(float(np.mean(batches)), 2) if batches else None,
+            }
+        return {'uptime_seconds': round(uptime, 1), 'endpoints': endpoints}
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests into batches for one model call.
+
+    A batch is dispatched when ``max_batch_size`` requests are waiting or
+    ``max_wait_ms`` has passed since its first request, whichever comes first.
+    ``predict_batch`` receives the list of payloads and returns one result per
+    payload; a result that is an exception is raised to that request only.
+    """
+
+    def __init__(self, name: str, predict_batch: Callable[[List[Any]], List[Any]],
+                 executor: ThreadPoolExecutor, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 metrics: Optional[LatencyMetrics] = None):
+        self.name = name
+        self.predict_batch = predict_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, payload: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((payload, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            payloads = [payload for payload, _ in batch]
+            if self.metrics is not None:
+                self.metrics.record_batch(self.name, len(batch))
+            try:
+                results = await loop.run_in_executor(self.executor, self.predict_batch, payloads)
+            except Exception as e:
+                logger.exception(f"{self.name} batch of {len(batch)} failed")
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class PredictionService:
+    """Warm models and feature caches behind the batch prediction functions."""
+
+    def __init__(self, registry: ModelRegistry, mlb_pipeline: Optional[MLBPredictionPipeline] = None,
+                 alias: str = 'prod', feature_cache_ttl: float = 300.0, feature_cache_size: int = 8):
+        self.registry = registry
+        self.alias = alias
+        self.mlb_pipeline = mlb_pipeline
+        self.nba_bundles = {}
+        self.feature_cache_ttl = feature_cache_ttl
+        self.feature_cache_size = feature_cache_size
+        self._slate_features: "OrderedDict[str, Tuple[float, pd.DataFrame]]" = OrderedDict()
+
+    def warm(self, props: List[str]) -> Dict[str, Any]:
+        """Loads every available prop model up front; returns what is being served.
+
+        Models registered with another feature schema than the slate builds are not served.
+        """
+        for prop in props:
+            try:
+                self.nba_bundles[prop] = self.registry.load(
+                    prop_model_name(prop), alias=self.alias, expected_schema=feature_schema_hash(prop_features(prop)))
+            except (FileNotFoundError, FeatureSchemaError) as e:
+                logger.warning(f"Not serving prop '{prop}': {e}")
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'nba_props': {prop: bundle.metadata.get('version') for prop, bundle in self.nba_bundles.items()},
+            'mlb_model': self.mlb_pipeline is not None and self.mlb_pipeline.model is not None,
+            'cached_slates': list(self._slate_features),
+        }
+
+    def slate_features(self, slate_date: str) -> pd.DataFrame:
+        """Feature matrix of a date's slate, indexed by player_id and cached for the TTL."""
+        cached = self._slate_features.get(slate_date)
+        if cached is not None and time.time() - cached[0] < self.feature_cache_ttl:
+            self._slate_features.move_to_end(slate_date)
+            return cached[1]
+
+        from src.utils.database import db_manager
+        with db_manager.get_session() as session:
+            data = load_slate_data(session, slate_date)
+        matrix = (build_slate_features(data, slate_date, list(self.nba_bundles)) if data is not None
+                  else pd.DataFrame(columns=['player_id']))
+        matrix = matrix.drop_duplicates('player_id').set_index('player_id', drop=False)
+
+        self._slate_features[slate_date] = (time.time(), matrix)
+        self._slate_features.move_to_end(slate_date)
+        while len(self._slate_features) > self.feature_cache_size:
+            self._slate_features.popitem(last=False)
+        return matrix
+
+    def _nba_rows(self, payloads: List[Dict]) -> List[Any]:
+        """One feature row (a Series) per payload, or the error to answer it with."""
+        rows = []
+        for payload in payloads:
+            try:
+                rows.append(self._nba_row(payload))
+            except Exception as e:
+                if not isinstance(e, RequestError):
+                    logger.exception(f"Error building features for {payload}")
+                rows.append(e)
+        return rows
+
+    def _nba_row(self, payload: Dict) -> pd.Series:
+        """Validated feature row of one NBA request.
+
+        Raises:
+            RequestError: 400 for a malformed request, 404 for a player not on the slate
+        """
+        features = payload.get('features')
+        if features is not None:
+            if not isinstance(features, dict):
+                raise RequestError(400, "'features' must be a JSON object of numbers")
+            try:
+                return pd.Series(features, dtype=float)
+            except (TypeError, ValueError):
+                raise RequestError(400, "'features' must be a JSON object of numbers")
+        if not payload.get('player_id') or not payload.get('date'):
+            raise RequestError(400, "Provide 'features' or both 'player_id' and 'date'")
+        try:
+            slate_date = pd.Timestamp(str(payload['date'])).strftime('%Y-%m-%d')
+        except ValueError:
+            raise RequestError(400, f"Invalid date: {payload['date']!r}")
+        matrix = self.slate_features(slate_date)
+        player_id = str(payload['player_id'])
+        if player_id not in matrix.index:
+            raise RequestError(404, f"Player {player_id} is not on the {slate_date} slate")
+        return matrix.loc[player_id]
+
+    @staticmethod
+    def _score_rows(bundle, rows: List[pd.Series]) -> List[Any]:
+        """Over probability of each row with one model call; rows are scored one by
+        one if the batch fails, so only the rows that cannot be scored get an error."""
+        try:
+            return list(bundle.predict_proba(pd.DataFrame(rows))[:, 1])
+        except Exception as e:
+            logger.warning(f"Batch of {len(rows)} rows failed ({e}); scoring them one by one")
+        scored = []
+        for row in rows:
+            try:
+                scored.append(bundle.predict_proba(pd.DataFrame([row]))[0, 1])
+            except Exception as e:
+                scored.append(RequestError(400, f"Could not score these features: {e}"))
+        return scored
+
+    def predict_nba(self, payloads: List[Dict]) -> List[Any]:
+        """Scores a micro-batch of NBA prop requests with one model call per prop."""
+        results: List[Any] = [None] * len(payloads)
+        rows = self._nba_rows(payloads)
+        by_prop = defaultdict(list)
+        for i, (payload, row) in enumerate(zip(payloads, rows)):
+            prop = payload.get('prop', 'points')
+            if isinstance(row, Exception):
+                results[i] = row
+            elif not isinstance(prop, str) or prop not in self.nba_bundles:
+                results[i] = RequestError(404, f"No model is served for prop {prop!r}")
+            else:
+                missing = [feature for feature in self.nba_bundles[prop].features if feature not in row.index]
+                if missing:
+                    results[i] = RequestError(400, f"Missing {len(missing)} of {len(self.nba_bundles[prop].features)} "
+                                                   f"features: {missing}")
+                else:
+                    by_prop[prop].append(i)
+
+        for prop, indices in by_prop.items():
+            bundle = self.nba_bundles[prop]
+            for i, probability in zip(indices, self._score_rows(bundle, [rows[i] for i in indices])):
+                if isinstance(probability, Exception):
+                    results[i] = probability
+                    continue
+                row = rows[i]
+                results[i] = {
+                    'prop': prop,
+                    'player_id': payloads[i].get('player_id'),
+                    'game_id': row.get('game_id'),
+                    'probability_over': round(float(probability), 4),
+                    'predicted_outcome': 'over' if probability >= 0.5 else 'under',
+                    'confidence': round(float(abs(probability - 0.5) * 2), 4),
+                    'model': f"{prop_model_name(prop)}:v{bundle.metadata.get('version')}",
+                }
+        return results
+
+    def _mlb_game(self, payload: Dict) -> Dict:
+        """Validated copy of one MLB request, with team ids as strings and numeric fields as floats.
+
+        Raises:
+            RequestError: 400 for a missing or malformed field
+        """
+        missing = MLB_FIELDS - set(payload)
+        if missing:
+            raise RequestError(400, f"Missing field(s): {sorted(missing)}")
+        game = dict(payload)
+        for side in ('home_team_id', 'away_team_id'):
+            if not isinstance(game[side], (str, int)) or isinstance(game[side], bool) or game[side] == '':
+                raise RequestError(400, f"'{side}' must be a team id")
+            game[side] = str(game[side])
+        try:
+            datetime.strptime(str(game['game_date']).split(' ')[0], '%Y-%m-%d')
+        except ValueError:
+            raise RequestError(400, f"Invalid game_date: {game['game_date']!r} (expected YYYY-MM-DD)")
+        numeric = MLB_NUMERIC_FIELDS | set(self.mlb_pipeline.features or [])
+        for field in numeric & set(game):
+            try:
+                game[field] = float(game[field])
+            except (TypeError, ValueError):
+                raise RequestError(400, f"'{field}' must be a number")
+        return game
+
+    def predict_mlb(self, payloads: List[Dict]) -> List[Any]:
+        """Scores a micro-batch of MLB games with one model call."""
+        if self.mlb_pipeline is None or self.mlb_pipeline.model is None:
+            return [RequestError(503, "No MLB model is loaded")] * len(payloads)
+
+        results: List[Any] = [None] * len(payloads)
+        games = {}
+        for i, payload in enumerate(payloads):
+            try:
+                games[i] = self._mlb_game(payload)
+            except RequestError as e:
+                results[i] = e
+        valid = list(games)
+        try:
+            scored = self.mlb_pipeline.score_games([games[i] for i in valid])
+        except Exception as e:
+            logger.warning(f"MLB batch of {len(valid)} games failed ({e}); scoring them one by one")
+            scored = []
+            for i in valid:
+                try:
+                    scored.extend(self.mlb_pipeline.score_games([games[i]]))
+                except Exception as e:
+                    scored.append(RequestError(400, f"Could not score this game: {e}"))
+        for i, result in zip(valid, scored):
+            results[i] = result if result is not None else RequestError(400, "Could not build features for this game")
+        return results
+
+
+class PredictionServer:
+    """asyncio HTTP/1.1 front end routing JSON requests to the micro-batchers."""
+
+    def __init__(self, service: PredictionService, host: str = '127.0.0.1', port: int = 8080,
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0, metrics_window: int = 10000):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.metrics = LatencyMetrics(metrics_window)
+        # One model thread per endpoint: batches of an endpoint run in order, endpoints in parallel
+        self.executors = {name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'predict-{name}')
+                          for name in ('nba', 'mlb')}
+        self.batchers = {
+            '/predict/nba': MicroBatcher('/predict/nba', service.predict_nba, self.executors['nba'],
+                                         max_batch_size, max_wait_ms, self.metrics),
+            '/predict/mlb': MicroBatcher('/predict/mlb', service.predict_mlb, self.executors['mlb'],
+                                         max_batch_size, max_wait_ms, self.metrics),
+        }
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    @classmethod
+    def from_config(cls, service: PredictionService, **overrides) -> "PredictionServer":
+        """Builds a server from the ``prediction.server`` section of the config."""
+        settings = {
+            'host': config.get('prediction.server.host', '127.0.0.1'),
+            'port': config.get('prediction.server.port', 8080),
+            'max_batch_size': config.get('prediction.server.max_batch_size', 64),
+            'max_wait_ms': config.get('prediction.server.max_wait_ms', 5.0),
+            'metrics_window': config.get('prediction.server.metrics_window', 10000),
+        }
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(service, **settings)
+
+    async def start(self) -> None:
+        for batcher in self.batchers.values():
+            batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Prediction server listening on http://{self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        for executor in self.executors.values():
+            executor.shutdown(wait=False)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except RequestError as e:
+                    # The body was left unread, so the connection cannot carry another request
+                    self._write_response(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Method, path, headers and body of the next request, or None at end of stream.
+
+        Raises:
+            RequestError: 400 for a malformed Content-Length, 413 for a body over
+                MAX_BODY_BYTES; the body is not read in either case
+        """
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise RequestError(400, f"Invalid Content-Length: {headers['content-length']!r}")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"Request body of {length} bytes is over the {MAX_BODY_BYTES} byte limit")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target.split('?', 1)[0], headers, body
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        start = time.perf_counter()
+        status, payload = 500, {'error': 'Internal server error'}
+        try:
+            status, payload = 200, await self._route(method, path, body)
+        except RequestError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            logger.exception(f"Error serving {method} {path}")
+            payload = {'error': str(e)}
+        finally:
+            if path in self.batchers:
+                self.metrics.record(path, time.perf_counter() - start, ok=status == 200)
+        return status, payload
+
+    async def _route(self, method: str, path: str, body: bytes) -> Any:
+        if path == '/health':
+            return {'status': 'ok', **self.service.status()}
+        if path == '/metrics':
+            return {**self.metrics.summary(), 'caches': cache_stats()}
+        if path not in self.batchers:
+            raise RequestError(404, f"Unknown endpoint {path}")
+        if method != 'POST':
+            raise RequestError(405, f"{path} only accepts POST")
+        try:
+            payload = json.loads(body or b'{}')
+        except json.JSONDecodeError as e:
+            raise RequestError(400, f"Invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise RequestError(400, "Request body must be a JSON object")
+        return await self.batchers[path].submit(payload)
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        body = json.dumps(payload, default=_json_default).encode()
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def build_service(alias: str = 'prod', mlb_target: str = 'home_team_wins',
+                  mlb_model_type: str = 'xgboost') -> PredictionService:
+    """Loads every served model once so that requests only pay for inference."""
+    registry = ModelRegistry(config.get('paths.model_registry', 'data/models/registry'))
+    mlb_pipeline = MLBPredictionPipeline(registry_root=str(registry.root))
+    if not mlb_pipeline.load_model(target=mlb_target, model_type=mlb_model_type, alias=alias):
+        logger.warning("MLB model could not be loaded; /predict/mlb will answer 503")
+        mlb_pipeline = None
+    service = PredictionService(registry, mlb_pipeline, alias=alias,
+                                feature_cache_ttl=config.get('prediction.server.feature_cache_ttl_seconds', 300))
+    status = service.warm(config.get('modeling.target_props', list(PROP_STATS)))
+    logger.info(f"Warm models: {status}")
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve NBA prop and MLB game predictions over HTTP.")
+    parser.add_argument("--host", type=str, default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--max-batch-size", type=int, default=None)
+    parser.add_argument("--max-wait-ms", type=float, default=None)
+    parser.add_argument("--model-alias", type=str, default="prod")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = PredictionServer.from_config(build_service(args.model_alias), host=args.host, port=args.port,
+                                          max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger.info("Prediction server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Slate-wide batch prediction for NBA player props.
+
+Every game on a date is scored in one pass instead of one (game, player) pair at a
+time: a handful of set-based queries pull the slate, the active rosters and their
+recent history, one feature matrix is built for every rostered player, each prop
+model is called once on that matrix and the predictions are bulk-written to
+``model_predictions``.
+
+With count-distribution prop models (``prediction.prop_model_kind: distribution``)
+the single call per prop yields each player's predicted distribution, and the posted
+line is priced from it; the mean and dispersion are returned and stored with the
+predictions so any other book's line can be priced without calling the model again.
+"""
+
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, insert, select, union_all
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.utils.config import config
+from src.utils.database import Games, ModelPredictions, Players, PropOdds, db_manager
+from src.utils.instrumentation import instrumented, profiled
+from src.feature_engineering.player_features import PlayerFeatures
+from src.modeling.model_registry import ModelRegistry, FeatureSchemaError, feature_schema_hash
+from src.modeling.distributions import prob_over
+from src.prediction.predict import get_player_game_logs
+
+logger = logging.getLogger(__name__)
+
+# Box-score columns each prop is graded on
+PROP_STATS = {
+    'points': ['points'],
+    'rebounds': ['rebounds'],
+    'assists': ['assists'],
+    'three_pointers': ['three_pointers_made'],
+    'points_rebounds_assists': ['points', 'rebounds', 'assists'],
+}
+
+# Game context every prop model sees, as in train_all_props.py
+SHARED_FEATURES = ['game_score_roll_avg_5g', 'home_rest_days', 'away_rest_days', 'is_home',
+                   'opponent_points_against_roll_avg_5g']
+
+# Recent games pulled per player; enough for the longest rolling window
+HISTORY_GAMES = 20
+# Window of the opponent defence feature used by prepare_model_data.py
+TEAM_WINDOW = 5
+SPORTSBOOK = 'FanDuel'
+# Neutral odds used when a book has not posted a line, as in run_pipeline.py
+DEFAULT_ODDS = {'line': 0, 'over_odds': -110, 'under_odds': -110}
+
+
+PROP_MODEL_KINDS = ('over_average', 'distribution')
+PREDICTION_COLUMNS = ['game_id', 'player_id', 'prop_type', 'model_name', 'predicted_probability',
+                      'predicted_outcome', 'confidence_score', 'features_used']
+# Stored with the predictions of count-distribution models, NULL otherwise
+DISTRIBUTION_COLUMNS = ['predicted_mean', 'dispersion']
+
+
+def prop_model_name(prop: str, kind: str = 'over_average') -> str:
+    """Registry name of the over/under-average (or count-distribution) model for a prop."""
+    if kind == 'distribution':
+        return f"nba_lightgbm_{prop}_distribution"
+    return f"nba_lightgbm_{prop}_over_avg_5g"
+
+
+def prop_features(prop: str, kind: str = 'over_average') -> List[str]:
+    """Features the slate serves to a prop's model, in model input order.
+
+    Built as train_all_props.PropDatasets builds them (the shared context, the
+    rolling averages of the prop's stats, then its odds), so their schema hash is
+    the one a model trained there was registered with. Distributions leave out the odds.
+    """
+    windows = PlayerFeatures(config={}).rolling_windows
+    own = [f'{stat}_roll_avg_{window}g' for stat in PROP_STATS[prop] for window in windows]
+    features = list(dict.fromkeys(SHARED_FEATURES + own))
+    if kind != 'distribution':
+        features += [f'{SPORTSBOOK.lower()}_{prop}_{field}' for field in DEFAULT_ODDS]
+    return features
+
+
+def prop_stat_column(prop: str) -> str:
+    """Column holding the graded box-score value of a prop."""
+    stats = PROP_STATS[prop]
+    return stats[0] if len(stats) == 1 else prop
+
+
+def normalize_prop_types(prop_types: pd.Series) -> pd.Series:
+    """Maps book market names ('player_points', 'Points') onto prop names ('points')."""
+    return prop_types.str.lower().str.removeprefix('player_')
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    """Records the wall time of a pipeline stage in ``timings``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def _day_bounds(slate_date: Union[str, date, datetime]) -> Tuple[datetime, datetime]:
+    day = pd.Timestamp(slate_date).normalize().to_pydatetime()
+    return day, day + timedelta(days=1)
+
+
+def get_slate_games(connection, slate_date) -> pd.DataFrame:
+    """Fetches every game scheduled on ``slate_date``."""
+    start, end = _day_bounds(slate_date)
+    query = (select(Games.game_id, Games.date, Games.home_team_id, Games.away_team_id)
+             .where(Games.date >= start, Games.date < end))
+    return pd.read_sql(query, connection)
+
+
+def get_slate_rosters(connection, team_ids: List[str]) -> pd.DataFrame:
+    """Fetches the active players of the given teams."""
+    query = (select(Players.player_id, Players.team_id)
+             .where(Players.team_id.in_(team_ids), Players.active.is_(True)))
+    return pd.read_sql(query, connection)
+
+
+def get_recent_team_games(connection, team_ids: List[str], before, n_games: int = TEAM_WINDOW) -> pd.DataFrame:
+    """Fetches the last ``n_games`` completed games of many teams, one row per team and game."""
+    played = (Games.date < before) & Games.home_score.isnot(None)
+    home = select(Games.home_team_id.label('team_id'), Games.date,
+                  Games.away_score.label('points_against')).where(played)
+    away = select(Games.away_team_id.label('team_id'), Games.date,
+                  Games.home_score.label('points_against')).where(played)
+    team_games = union_all(home, away).subquery()
+    game_rank = func.row_number().over(
+        partition_by=team_games.c.team_id, order_by=team_games.c.date.desc()
+    ).label('game_rank')
+    ranked = (select(team_games, game_rank)
+              .where(team_games.c.team_id.in_(team_ids))
+              .subquery())
+    return pd.read_sql(select(ranked).where(ranked.c.game_rank <= n_games), connection)
+
+
+def get_slate_odds(connection, game_ids: List[str], sportsbook: str = SPORTSBOOK) -> pd.DataFrame:
+    """Fetches the prop lines a sportsbook has posted for the slate."""
+    query = (select(PropOdds.game_id, PropOdds.player_id, PropOdds.prop_type, PropOdds.line,
+                    PropOdds.over_odds, PropOdds.under_odds, PropOdds.timestamp)
+             .where(PropOdds.game_id.in_(game_ids), PropOdds.sportsbook == sportsbook))
+    return pd.read_sql(query, connection)
+
+
+@instrumented()
+def load_slate_data(session, slate_date) -> Optional[Dict[str, pd.DataFrame]]:
+    """Runs the set-based queries for a slate; returns None when no game is scheduled.
+
+    Every query runs on the session's connection, inside its transaction.
+    """
+    connection = session.connection()
+    games = get_slate_games(connection, slate_date)
+    if games.empty:
+        return None
+    team_ids = pd.unique(games[['home_team_id', 'away_team_id']].values.ravel()).tolist()
+    rosters = get_slate_rosters(connection, team_ids)
+    start, _ = _day_bounds(slate_date)
+    return {
+        'games': games,
+        'rosters': rosters,
+        'player_stats': get_player_game_logs(session, rosters['player_id'].tolist(), start, n=HISTORY_GAMES),
+        'team_games': get_recent_team_games(connection, team_ids, start),
+        'odds': get_slate_odds(connection, games['game_id'].tolist()),
+    }
+
+
+def _player_averages(player_stats: pd.DataFrame, windows: Iterable[int], stats: List[str]) -> pd.DataFrame:
+    """Means of each stat over every player's last ``window`` games, one row per player."""
+    averages = []
+    for window in windows:
+        recent = player_stats[player_stats['game_rank'] <= window]
+        means = recent.groupby('player_id')[stats].mean()
+        averages.append(means.add_suffix(f'_roll_avg_{window}g'))
+    return pd.concat(averages, axis=1)
+
+
+def _team_context(team_games: pd.DataFrame, slate_day: datetime) -> pd.DataFrame:
+    """Rest days and recent points allowed, one row per team."""
+    team_games = team_games.assign(date=pd.to_datetime(team_games['date']).dt.normalize())
+    grouped = team_games.groupby('team_id')
+    return pd.DataFrame({
+        'rest_days': (pd.Timestamp(slate_day) - grouped['date'].max()).dt.days,
+        f'team_points_against_roll_avg_{TEAM_WINDOW}g': grouped['points_against'].mean(),
+    })
+
+
+def _odds_features(odds: pd.DataFrame, props: List[str]) -> pd.DataFrame:
+    """Latest line and prices per (game, player), one set of columns per prop."""
+    prefix = SPORTSBOOK.lower()
+    if odds.empty:
+        return pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=['game_id', 'player_id']))
+    odds = (odds.assign(prop_type=normalize_prop_types(odds['prop_type']))
+            .sort_values('timestamp')
+            .drop_duplicates(['game_id', 'player_id', 'prop_type'], keep='last'))
+    odds = odds[odds['prop_type'].isin(props)]
+    wide = odds.pivot(index=['game_id', 'player_id'], columns='prop_type', values=list(DEFAULT_ODDS))
+    wide.columns = [f'{prefix}_{prop}_{field}' for field, prop in wide.columns]
+    return wide
+
+
+@instrumented()
+def build_slate_features(data: Dict[str, pd.DataFrame], slate_date, props: List[str]) -> pd.DataFrame:
+    """Builds one feature row per rostered player on the slate.
+
+    Mirrors the training features: rolling means over the games before the slate,
+    rest days, the opponent's recent points allowed and the posted FanDuel line.
+    Minutes are not known before tip-off, so ``minutes_played`` is the player's
+    recent average. Players without any previous game are left out.
+    """
+    slate_day, _ = _day_bounds(slate_date)
+    player_features = PlayerFeatures(config={})
+
+    player_stats = data['player_stats'].copy()
+    player_stats = player_features.create_game_score(player_stats)
+    for prop in props:
+        if len(PROP_STATS[prop]) > 1:
+            player_stats[prop] = player_stats[PROP_STATS[prop]].sum(axis=1)
+    stats = list(dict.fromkeys(player_features.stats_to_average + ['minutes_played']
+                               + [prop_stat_column(prop) for prop in props]))
+    averages = _player_averages(player_stats, player_features.rolling_windows, stats)
+
+    games = data['games']
+    home = games.merge(data['rosters'], left_on='home_team_id', right_on='team_id').assign(is_home=1)
+    away = games.merge(data['rosters'], left_on='away_team_id', right_on='team_id').assign(is_home=0)
+    matrix = pd.concat([home, away], ignore_index=True)
+    matrix = matrix.merge(averages, left_on='player_id', right_index=True, how='inner')
+
+    team = _team_context(data['team_games'], slate_day)
+    defence = team[f'team_points_against_roll_avg_{TEAM_WINDOW}g']
+    matrix['home_rest_days'] = matrix['home_team_id'].map(team['rest_days'])
+    matrix['away_rest_days'] = matrix['away_team_id'].map(team['rest_days'])
+    opponent = np.where(matrix['is_home'] == 1, matrix['away_team_id'], matrix['home_team_id'])
+    matrix[f'opponent_points_against_roll_avg_{TEAM_WINDOW}g'] = pd.Series(opponent, index=matrix.index).map(defence)
+    matrix['points_vs_opp_avg'] = matrix['points_roll_avg_5g'] - matrix[f'opponent_points_against_roll_avg_{TEAM_WINDOW}g']
+    matrix['minutes_played'] = matrix['minutes_played_roll_avg_5g']
+
+    matrix = matrix.merge(_odds_features(data['odds'], props), left_on=['game_id', 'player_id'],
+                          right_index=True, how='left')
+    for prop in props:
+        for field, default in DEFAULT_ODDS.items():
+            column = f'{SPORTSBOOK.lower()}_{prop}_{field}'
+            matrix[column] = matrix[column].fillna(default) if column in matrix else default
+
+    n_dropped = len(data['rosters']) - matrix['player_id'].nunique()
+    if n_dropped:
+        logger.info(f"Skipping {n_dropped} rostered player(s) without a previous game.")
+    return matrix.reset_index(drop=True)
+
+
+@instrumented()
+def score_slate(matrix: pd.DataFrame, props: List[str], registry: ModelRegistry,
+                alias: str = 'prod', kind: str = 'over_average') -> pd.DataFrame:
+    """Scores the slate matrix with one model call per prop.
+
+    Over/under-average models give a probability per rostered player. Distribution
+    models price the posted FanDuel line of every player with one; their rows also
+    carry ``line``, ``predicted_mean`` and ``dispersion``. Models registered with
+    another feature schema than the slate serves (see prop_features) are skipped.
+    """
+    scored = []
+    for prop in props:
+        model_name = prop_model_name(prop, kind)
+        try:
+            bundle = registry.load(model_name, alias=alias,
+                                   expected_schema=feature_schema_hash(prop_features(prop, kind)))
+            if kind == 'distribution':
+                mean, dispersion = bundle.model.predict_distribution(bundle.prepare(matrix))
+            else:
+                probability = bundle.predict_proba(matrix)[:, 1]
+        except (FileNotFoundError, FeatureSchemaError) as e:
+            logger.warning(f"Skipping prop '{prop}': {e}")
+            continue
+
+        rows = matrix
+        extra = {}
+        if kind == 'distribution':
+            # Lines are 0 where the book has not posted one
+            line = matrix[f'{SPORTSBOOK.lower()}_{prop}_line'].to_numpy(dtype=float)
+            posted = line > 0
+            rows, line, mean, dispersion = matrix[posted], line[posted], mean[posted], dispersion[posted]
+            probability = prob_over(mean, dispersion, line)
+            extra = {'line': line, 'predicted_mean': mean, 'dispersion': dispersion}
+        features_used = rows[bundle.features].to_json(orient='records', lines=True).splitlines()
+        scored.append(pd.DataFrame({
+            'game_id': rows['game_id'].astype(str).values,
+            'player_id': rows['player_id'].astype(str).values,
+            'prop_type': prop,
+            'model_name': model_name,
+            'predicted_probability': probability,
+            'predicted_outcome': np.where(probability >= 0.5, 'over', 'under'),
+            'confidence_score': np.abs(probability - 0.5) * 2,
+            'features_used': features_used,
+            **extra,
+        }))
+    if not scored:
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+    return pd.concat(scored, ignore_index=True)
+
+
+@instrumented()
+def write_predictions(session, predictions: pd.DataFrame) -> int:
+    """Replaces the slate's stored predictions with one bulk insert."""
+    if predictions.empty:
+        return 0
+    rows = predictions.reindex(columns=PREDICTION_COLUMNS + DISTRIBUTION_COLUMNS)
+    rows = rows.astype(object).where(rows.notna(), None)
+    session.execute(delete(ModelPredictions).where(
+        ModelPredictions.game_id.in_(predictions['game_id'].unique().tolist()),
+        ModelPredictions.model_name.in_(predictions['model_name'].unique().tolist()),
+    ))
+    session.execute(insert(ModelPredictions), rows.to_dict('records'))
+    session.commit()
+    return len(predictions)
+
+
+@profiled('nba_slate')
+def predict_slate(slate_date, props: Optional[List[str]] = None, alias: str = 'prod',
+                  registry: Optional[ModelRegistry] = None, session=None,
+                  write: bool = True, kind: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Predicts every configured prop for every rostered player on a date.
+
+    Args:
+        slate_date: Date of the slate (anything ``pd.Timestamp`` accepts).
+        props: Props to score; defaults to ``modeling.target_props``.
+        alias: Registry alias of the models to serve.
+        registry: Model registry; defaults to ``paths.model_registry``.
+        session: Database session; a new one is opened when omitted.
+        write: Whether to store the predictions in ``model_predictions``.
+        kind: Prop models to serve, 'over_average' or 'distribution'; defaults to
+            ``prediction.prop_model_kind``.
+
+    Returns:
+        The predictions and the wall time of each stage in seconds.
+    """
+    props = props or config.get('modeling.target_props', ['points'])
+    unknown = set(props) - set(PROP_STATS)
+    if unknown:
+        raise ValueError(f"Unknown prop(s): {sorted(unknown)}")
+    kind = kind or config.get('prediction.prop_model_kind', 'over_average')
+    if kind not in PROP_MODEL_KINDS:
+        raise ValueError(f"Unknown prop model kind '{kind}' (expected one of {PROP_MODEL_KINDS})")
+    registry = registry or ModelRegistry(config.get('paths.model_registry', 'data/models/registry'))
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    own_session = session is None
+    session = session or db_manager.get_session()
+    try:
+        with _timed(timings, 'query'):
+            data = load_slate_data(session, slate_date)
+        if data is None:
+            logger.info(f"No games scheduled on {slate_date}.")
+            timings['total'] = time.perf_counter() - start
+            return score_slate(pd.DataFrame(), [], registry), timings
+
+        with _timed(timings, 'features'):
+            matrix = build_slate_features(data, slate_date, props)
+        with _timed(timings, 'predict'):
+            predictions = score_slate(matrix, props, registry, alias, kind)
+        with _timed(timings, 'write'):
+            n_written = write_predictions(session, predictions) if write else 0
+    finally:
+        if own_session:
+            session.close()
+
+    timings['total'] = time.perf_counter() - start
+    logger.info(f"Slate {slate_date}: {len(data['games'])} games, {len(matrix)} players, "
+                f"{len(predictions)} predictions ({n_written} written) in {timings['total']:.3f}s "
+                f"[" + ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in timings.items()
+                                 if stage != 'total') + "]")
+    return predictions, timings
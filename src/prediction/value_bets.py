@@ -0,0 +1,198 @@
+"""
+Value-bet engine: turns model probabilities into sized bet recommendations.
+
+Model probabilities are joined with the latest prop lines of every sportsbook in one
+pass. Each book's two-way price is stripped of its vig, the edge and fractional-Kelly
+stake of both sides are computed as arrays, the best side and book is kept per prop,
+the ``prediction`` config thresholds and per-game cap are applied with a grouped rank,
+and the surviving bets are bulk-inserted into ``bet_recommendations``.
+
+Predictions from count-distribution models (``predicted_mean`` and ``dispersion``,
+stored with them by the slate) are priced at each book's own line rather than at the
+line the model was scored on.
+"""
+
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, insert, select
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.utils.config import config
+from src.utils.database import BetRecommendations, ModelPredictions, PropOdds, db_manager
+from src.utils.odds import DEFAULT_AMERICAN_ODDS, american_to_decimal, kelly_fraction, remove_vig
+from src.modeling.distributions import prob_over, prob_under
+from src.prediction.slate import normalize_prop_types
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_COLUMNS = ['game_id', 'player_id', 'prop_type', 'sportsbook', 'line', 'bet_type',
+                          'model_probability', 'implied_probability', 'edge', 'stake_recommendation',
+                          'confidence_level']
+
+
+def get_latest_odds(connection, game_ids: List[str]) -> pd.DataFrame:
+    """Fetches the latest line of every book for each prop of the given games."""
+    query = (select(PropOdds.game_id, PropOdds.player_id, PropOdds.sportsbook, PropOdds.prop_type,
+                    PropOdds.line, PropOdds.over_odds, PropOdds.under_odds, PropOdds.timestamp)
+             .where(PropOdds.game_id.in_(game_ids)))
+    return pd.read_sql(query, connection)
+
+
+def get_latest_predictions(connection, game_ids: List[str]) -> pd.DataFrame:
+    """Fetches the most recent stored prediction per (game, player, prop), with the
+    time it was stored.
+
+    ``predicted_mean`` and ``dispersion`` are NULL (NaN) for over/under-average models.
+    """
+    latest = (select(func.max(ModelPredictions.prediction_id))
+              .where(ModelPredictions.game_id.in_(game_ids))
+              .group_by(ModelPredictions.game_id, ModelPredictions.player_id, ModelPredictions.prop_type))
+    query = (select(ModelPredictions.game_id, ModelPredictions.player_id, ModelPredictions.prop_type,
+                    ModelPredictions.predicted_probability, ModelPredictions.predicted_mean,
+                    ModelPredictions.dispersion, ModelPredictions.created_at)
+             .where(ModelPredictions.prediction_id.in_(latest)))
+    return pd.read_sql(query, connection)
+
+
+def find_value_bets(predictions: pd.DataFrame, odds: pd.DataFrame,
+                    value_threshold: Optional[float] = None, min_confidence: Optional[float] = None,
+                    max_bets_per_game: Optional[int] = None, kelly_multiplier: Optional[float] = None,
+                    max_stake: Optional[float] = None) -> pd.DataFrame:
+    """Selects and sizes value bets from over probabilities and posted lines.
+
+    Args:
+        predictions: game_id, player_id, prop_type and predicted_probability (of the over);
+            rows with ``predicted_mean`` and ``dispersion`` have both sides priced at
+            every book's line from the predicted distribution instead.
+        odds: game_id, player_id, prop_type, sportsbook, line, over_odds and under_odds;
+            when a prop was re-posted, the row with the latest ``timestamp`` is used.
+        value_threshold: Minimum edge over the no-vig probability (``prediction.value_threshold``).
+        min_confidence: Minimum model probability of the side bet (``prediction.min_confidence``).
+        max_bets_per_game: Bets kept per game, highest edge first (``prediction.max_bets_per_game``).
+        kelly_multiplier: Share of the full-Kelly stake to bet (``prediction.kelly_fraction``).
+        max_stake: Largest stake as a share of bankroll (``prediction.max_stake``).
+
+    Returns:
+        One row per recommended bet with the ``bet_recommendations`` columns, plus
+        ``decimal_odds`` and ``american_odds`` of the chosen price.
+    """
+    value_threshold = config.get('prediction.value_threshold', 0.05) if value_threshold is None else value_threshold
+    min_confidence = config.get('prediction.min_confidence', 0.55) if min_confidence is None else min_confidence
+    max_bets_per_game = config.get('prediction.max_bets_per_game', 5) if max_bets_per_game is None else max_bets_per_game
+    kelly_multiplier = config.get('prediction.kelly_fraction', 0.25) if kelly_multiplier is None else kelly_multiplier
+    max_stake = config.get('prediction.max_stake', 0.05) if max_stake is None else max_stake
+
+    if predictions.empty or odds.empty:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS + ['decimal_odds', 'american_odds'])
+
+    keys = ['game_id', 'player_id', 'prop_type']
+    odds = odds.assign(prop_type=normalize_prop_types(odds['prop_type']))
+    if 'timestamp' in odds:
+        odds = odds.sort_values('timestamp').drop_duplicates(keys + ['sportsbook'], keep='last')
+    predictions = predictions.astype({'game_id': str, 'player_id': str})
+    odds = odds.astype({'game_id': str, 'player_id': str})
+    distribution = ['predicted_mean', 'dispersion'] if {'predicted_mean', 'dispersion'} <= set(predictions) else []
+    joined = predictions[keys + ['predicted_probability'] + distribution].merge(odds, on=keys, how='inner')
+    over_odds = joined['over_odds'].fillna(DEFAULT_AMERICAN_ODDS).to_numpy(dtype=float)
+    under_odds = joined['under_odds'].fillna(DEFAULT_AMERICAN_ODDS).to_numpy(dtype=float)
+    valid = ~np.isnan(american_to_decimal(over_odds) + american_to_decimal(under_odds))
+    if not valid.all():
+        logger.warning(f"Skipping {int((~valid).sum())} line(s) with invalid American odds (between -100 and +100)")
+        joined, over_odds, under_odds = joined[valid], over_odds[valid], under_odds[valid]
+
+    p_over = joined['predicted_probability'].to_numpy(dtype=float, copy=True)
+    p_under = 1 - p_over
+    if distribution:
+        # Pushes on whole-number lines belong to neither side; over/under-average rows keep their probability
+        mean, dispersion = joined['predicted_mean'].to_numpy(dtype=float), joined['dispersion'].to_numpy(dtype=float)
+        priced = ~(np.isnan(mean) | np.isnan(dispersion))
+        mean, dispersion, line = mean[priced], dispersion[priced], joined['line'].to_numpy(dtype=float)[priced]
+        p_over[priced], p_under[priced] = prob_over(mean, dispersion, line), prob_under(mean, dispersion, line)
+    fair_over, fair_under = remove_vig(over_odds, under_odds)
+
+    # Score both sides, then keep the side with the larger edge
+    edge_over, edge_under = p_over - fair_over, p_under - fair_under
+    take_over = edge_over >= edge_under
+    model_probability = np.where(take_over, p_over, p_under)
+    american = np.where(take_over, over_odds, under_odds)
+    decimal = american_to_decimal(american)
+    stake = np.minimum(kelly_multiplier * kelly_fraction(model_probability, decimal), max_stake)
+
+    bets = pd.DataFrame({
+        'game_id': joined['game_id'].to_numpy(),
+        'player_id': joined['player_id'].to_numpy(),
+        'prop_type': joined['prop_type'].to_numpy(),
+        'sportsbook': joined['sportsbook'].to_numpy(),
+        'line': joined['line'].to_numpy(dtype=float),
+        'bet_type': np.where(take_over, 'over', 'under'),
+        'model_probability': model_probability,
+        'implied_probability': np.where(take_over, fair_over, fair_under),
+        'edge': np.where(take_over, edge_over, edge_under),
+        'stake_recommendation': stake,
+        'decimal_odds': decimal,
+        'american_odds': american.astype(int),
+    })
+    bets = bets[(bets['edge'] >= value_threshold) & (bets['model_probability'] >= min_confidence)
+                & (bets['stake_recommendation'] > 0)]
+
+    # Shop the line: one bet per prop, at the book offering the best edge
+    bets = bets.sort_values(['edge', 'stake_recommendation'], ascending=False, kind='mergesort')
+    bets = bets.drop_duplicates(keys, keep='first')
+    bets = bets[bets.groupby('game_id')['edge'].rank(method='first', ascending=False) <= max_bets_per_game]
+
+    bets['confidence_level'] = np.select(
+        [bets['edge'] >= 2 * value_threshold, bets['edge'] >= 1.5 * value_threshold],
+        ['high', 'medium'], default='low')
+    return bets[RECOMMENDATION_COLUMNS + ['decimal_odds', 'american_odds']].reset_index(drop=True)
+
+
+def write_recommendations(session, recommendations: pd.DataFrame) -> int:
+    """Replaces the pending recommendations of the affected games with one bulk insert."""
+    if recommendations.empty:
+        return 0
+    session.execute(delete(BetRecommendations).where(
+        BetRecommendations.game_id.in_(recommendations['game_id'].unique().tolist()),
+        BetRecommendations.status == 'pending',
+    ))
+    rows = recommendations[RECOMMENDATION_COLUMNS].assign(status='pending')
+    session.execute(insert(BetRecommendations), rows.to_dict('records'))
+    session.commit()
+    return len(rows)
+
+
+def recommend_bets(game_ids: List[str], predictions: Optional[pd.DataFrame] = None,
+                   session=None, write: bool = True, **thresholds) -> pd.DataFrame:
+    """Recommends value bets for games from their stored (or given) predictions.
+
+    Args:
+        game_ids: Games to consider.
+        predictions: Over probabilities to use instead of the latest stored predictions.
+        session: Database session; a new one is opened when omitted.
+        write: Whether to store the recommendations in ``bet_recommendations``.
+        **thresholds: Overrides of the ``find_value_bets`` thresholds.
+    """
+    game_ids = [str(game_id) for game_id in game_ids]
+    own_session = session is None
+    session = session or db_manager.get_session()
+    try:
+        # Read through the session so predictions it has not committed yet are seen
+        connection = session.connection()
+        if predictions is None:
+            predictions = get_latest_predictions(connection, game_ids)
+        odds = get_latest_odds(connection, game_ids)
+        recommendations = find_value_bets(predictions, odds, **thresholds)
+        n_written = write_recommendations(session, recommendations) if write else 0
+    finally:
+        if own_session:
+            session.close()
+
+    logger.info(f"{len(recommendations)} value bets from {len(predictions)} predictions and "
+                f"{len(odds)} lines across {len(game_ids)} games ({n_written} written)")
+    return recommendations
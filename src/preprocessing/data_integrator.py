@@ -1,7 +1,10 @@
 import logging
+import numpy as np
 import pandas as pd
 from typing import Dict, Any
 
+from src.preprocessing.dtypes import align_categories, feature_float_dtype, unify_categories
+
 logger = logging.getLogger(__name__)
 
 class DataIntegrator:
@@ -33,7 +36,8 @@ class DataIntegrator:
             logger.error("Integration failed: 'game_id' column missing in one of the DataFrames.")
             raise ValueError("Both DataFrames must contain a 'game_id' column.")
             
-        # Merge player stats with game data
+        # Merge player stats with game data (a categorical game_id stays categorical)
+        align_categories(player_stats_df, games_df, ['game_id'])
         merged_df = pd.merge(
             player_stats_df, 
             games_df, 
@@ -41,10 +45,68 @@ class DataIntegrator:
             how=self.config.get('merge_strategy', 'left')
         )
         
+        # The player's team and the game's teams compare as categoricals only with common categories
+        unify_categories(merged_df, ['team_id', 'home_team_id', 'away_team_id'])
+
         logger.info(f"Integration complete. Merged {len(merged_df)} records.")
         
         return merged_df
 
+    def integrate_sportsbook_odds(self, features_df: pd.DataFrame, odds_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Integrates historical sportsbook points lines into the features DataFrame.
+        
+        Args:
+            features_df: DataFrame with one row per player-game.
+            odds_df: Prop odds rows (any book, any prop type).
+            
+        Returns:
+            ``features_df`` with the FanDuel points line and prices of each player-game.
+        """
+        logger.info("Integrating historical sportsbook odds...")
+        if odds_df.empty:
+            logger.warning("Odds DataFrame is empty. Skipping integration.")
+            # Still need to create the columns for the model
+            features_df['fanduel_points_line'] = 0
+            features_df['fanduel_points_over_odds'] = -110
+            features_df['fanduel_points_under_odds'] = -110
+            return features_df
+
+        # We will just use FanDuel for now for simplicity, and only its points market:
+        # other props would repeat each player-game once per market
+        fanduel_odds = odds_df[odds_df['sportsbook'] == 'FanDuel']
+        if 'prop_type' in fanduel_odds.columns:
+            prop_types = fanduel_odds['prop_type'].str.lower().str.removeprefix('player_')
+            fanduel_odds = fanduel_odds[prop_types == 'points']
+        if 'timestamp' in fanduel_odds.columns:
+            # A re-posted line is stored as a new row; the latest one is the line of the game
+            fanduel_odds = (fanduel_odds.sort_values('timestamp', kind='mergesort')
+                            .drop_duplicates(['game_id', 'player_id'], keep='last'))
+        fanduel_odds = fanduel_odds.rename(columns={
+            'line': 'fanduel_points_line',
+            'over_odds': 'fanduel_points_over_odds',
+            'under_odds': 'fanduel_points_under_odds'
+        })
+
+        # Select relevant columns and merge
+        odds_to_merge = fanduel_odds[['game_id', 'player_id', 'fanduel_points_line', 'fanduel_points_over_odds', 'fanduel_points_under_odds']].copy()
+        # Player-games without a line get NaN prices; keep compact (dtype plan) prices float32
+        for col in ['fanduel_points_over_odds', 'fanduel_points_under_odds']:
+            if feature_float_dtype(odds_to_merge[col].dtype) == np.float32:
+                odds_to_merge[col] = odds_to_merge[col].astype(np.float32)
+        
+        # Need to make sure player_id types match for merging
+        if isinstance(features_df['player_id'].dtype, pd.CategoricalDtype):
+            align_categories(features_df, odds_to_merge, ['game_id', 'player_id'])
+        else:
+            features_df['player_id'] = features_df['player_id'].astype(str)
+            odds_to_merge['player_id'] = odds_to_merge['player_id'].astype(str)
+        
+        merged_df = pd.merge(features_df, odds_to_merge, on=['game_id', 'player_id'], how='left')
+
+        logger.info("Sportsbook odds integration complete.")
+        return merged_df
+
 def main():
     """
     Main function to test the DataIntegrator.
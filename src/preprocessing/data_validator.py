@@ -1,80 +1,309 @@
 import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# Offending row indices kept per rule in a report
+DEFAULT_SAMPLE_SIZE = 5
+
+
+class ValidationReport:
+    """Outcome of validating one frame or a stream of chunks.
+
+    ``rules`` maps each rule name (e.g. ``range:points``, ``unique:game_id+player_id``)
+    to its kind, columns, violation count and a sample of offending row indices.
+    """
+
+    def __init__(self, rule_specs: List[Tuple[str, str, List[str]]], sample_size: int = DEFAULT_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.rows = 0
+        self.invalid_rows = 0
+        self.missing_columns: List[str] = []
+        self.rules: Dict[str, Dict[str, Any]] = {
+            name: {'kind': kind, 'columns': columns, 'violations': 0, 'sample_rows': []}
+            for name, kind, columns in rule_specs
+        }
+
+    @property
+    def passed(self) -> bool:
+        return not self.missing_columns and self.invalid_rows == 0
+
+    @property
+    def failed_rules(self) -> Dict[str, Dict[str, Any]]:
+        return {name: rule for name, rule in self.rules.items() if rule['violations']}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'passed': self.passed, 'rows': self.rows, 'invalid_rows': self.invalid_rows,
+                'missing_columns': self.missing_columns, 'rules': self.rules}
+
+    def log(self) -> None:
+        if self.missing_columns:
+            logger.error(f"Validation failed: Missing required columns: {self.missing_columns}")
+        for name, rule in self.failed_rules.items():
+            logger.error(f"Validation failed: {name} violated by {rule['violations']} row(s), "
+                         f"e.g. rows {rule['sample_rows']}")
+        if self.passed:
+            logger.info(f"Validation passed for {self.rows} rows ({len(self.rules)} rules).")
+        else:
+            logger.error(f"Validation found {self.invalid_rows} invalid row(s) out of {self.rows}.")
+
+
+class ChunkValidator:
+    """Validates a stream of chunks against compiled rules.
+
+    Uniqueness is enforced across chunks: the key hashes of every row seen so far are
+    kept, so a key repeated in a later chunk is a violation just as in one frame. A
+    single frame validated with ``across_chunks=False`` skips the hashing.
+    """
+
+    def __init__(self, validator: 'DataValidator', across_chunks: bool = True):
+        self.validator = validator
+        self.across_chunks = across_chunks
+        self.report = ValidationReport(validator.rule_specs, validator.sample_size)
+        # Sorted key hashes of earlier chunks, and the latest chunk's, merged on the next feed
+        self._seen_keys = [np.empty(0, dtype=np.uint64) for _ in validator.unique_constraints]
+        self._pending_keys: List[Optional[np.ndarray]] = [None for _ in validator.unique_constraints]
+
+    def feed(self, chunk: pd.DataFrame) -> np.ndarray:
+        """Validates ``chunk``, updates the report and returns its per-rule violation matrix."""
+        missing = [col for col in self.validator.required_columns if col not in chunk.columns]
+        for col in missing:
+            if col not in self.report.missing_columns:
+                self.report.missing_columns.append(col)
+
+        violations = self._evaluate(chunk)
+        self.report.rows += len(chunk)
+        if violations.size:
+            invalid = violations.any(axis=0)
+            self.report.invalid_rows += int(invalid.sum())
+            counts = violations.sum(axis=1)
+            for rule, row, count in zip(self.report.rules.values(), violations, counts):
+                if count:
+                    rule['violations'] += int(count)
+                    room = self.report.sample_size - len(rule['sample_rows'])
+                    if room > 0:
+                        rule['sample_rows'].extend(chunk.index[np.flatnonzero(row)[:room]].tolist())
+        return violations
+
+    def split(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Validates ``chunk`` and returns its valid rows and its invalid rows.
+
+        Invalid rows carry a ``validation_errors`` column naming the rules they broke.
+        """
+        violations = self.feed(chunk)
+        if not violations.size:
+            return chunk, chunk.iloc[0:0].assign(validation_errors=pd.Series(dtype=object))
+        invalid = violations.any(axis=0)
+        names = np.array(list(self.report.rules))
+        errors = [';'.join(names[violations[:, position]]) for position in np.flatnonzero(invalid)]
+        return chunk[~invalid], chunk[invalid].assign(validation_errors=errors)
+
+    def _evaluate(self, chunk: pd.DataFrame) -> np.ndarray:
+        """One pass over the rule columns: every rule becomes a row of a boolean matrix."""
+        n = len(chunk)
+        masks = []
+        # Each column is pulled out and coerced once, however many rules read it
+        arrays: Dict[str, Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]] = {}
+        for col in self.validator.rule_columns:
+            if col in chunk.columns:
+                arrays[col] = _column_arrays(chunk[col], self.validator.column_types.get(col),
+                                             col in self.validator.range_checks)
+
+        absent = np.zeros(n, dtype=bool)
+        constraint = 0
+        for name, kind, columns in self.validator.rule_specs:
+            if kind == 'unique':
+                masks.append(self._duplicates(chunk, columns, constraint) if set(columns) <= set(chunk.columns)
+                             else absent)
+                constraint += 1
+                continue
+            col = columns[0]
+            if col not in arrays:
+                masks.append(absent)
+                continue
+            is_null, is_bad_type, numeric = arrays[col]
+            if kind == 'not_null':
+                masks.append(is_null)
+            elif kind == 'type':
+                masks.append(is_bad_type)
+            else:
+                low, high = self.validator.range_checks[col]
+                # Missing values are left to the not_null rules
+                masks.append(absent if numeric is None else (numeric < low) | (numeric > high))
+        return np.vstack(masks) if masks else np.zeros((0, n), dtype=bool)
+
+    def _duplicates(self, chunk: pd.DataFrame, columns: List[str], constraint: int) -> np.ndarray:
+        if not self.across_chunks:
+            return chunk.duplicated(subset=columns).to_numpy()
+
+        # 64-bit row hashes of the key; a false duplicate needs a hash collision
+        keys = pd.util.hash_pandas_object(chunk[columns], index=False).to_numpy()
+        duplicated = pd.Series(keys).duplicated().to_numpy()
+        seen = self._seen_keys[constraint]
+        pending = self._pending_keys[constraint]
+        if pending is not None:
+            # Two sorted runs: the stable sort (timsort) merges them in linear time
+            seen = self._seen_keys[constraint] = np.sort(np.concatenate([seen, np.sort(pending)]), kind='stable')
+        if seen.size:
+            positions = np.minimum(np.searchsorted(seen, keys), seen.size - 1)
+            duplicated = duplicated | (seen[positions] == keys)
+        self._pending_keys[constraint] = keys
+        return duplicated
+
+
+def _column_arrays(column: pd.Series, expected_type: Optional[str],
+                   needs_numeric: bool) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Null mask, type-violation mask and float values (None if not numeric) of a column."""
+    is_null = column.isna().to_numpy()
+    numeric = None
+    is_bad_type = np.zeros(len(column), dtype=bool)
+
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        numeric = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        if expected_type not in (None, 'numeric'):
+            is_bad_type = ~is_null
+    elif expected_type == 'numeric' or (expected_type is None and needs_numeric):
+        coerced = pd.to_numeric(column, errors='coerce')
+        numeric = coerced.to_numpy(dtype=np.float64, na_value=np.nan)
+        if expected_type == 'numeric':
+            is_bad_type = np.isnan(numeric) & ~is_null
+    elif expected_type == 'string':
+        if not pd.api.types.is_string_dtype(column) or pd.api.types.infer_dtype(column, skipna=True) != 'string':
+            is_bad_type = np.fromiter((not isinstance(value, str) for value in column), bool, len(column)) & ~is_null
+    elif expected_type == 'datetime':
+        if not pd.api.types.is_datetime64_any_dtype(column):
+            is_bad_type = pd.to_datetime(column, errors='coerce').isna().to_numpy() & ~is_null
+    return is_null, is_bad_type, numeric
+
+
 class DataValidator:
-    """Validates the integrity and quality of the data."""
+    """Validates the integrity and quality of the data.
+
+    The configured rules are compiled once into a plan that evaluates every range,
+    null, type and uniqueness rule in a single pass and reports every failure, not
+    just the first. Frames can be validated whole or as a stream of chunks, and rows
+    breaking the rules can be quarantined instead of halting the pipeline.
+    """
 
     def __init__(self, config: Dict[str, Any]):
         """
         Initializes the DataValidator.
-        
+
         Args:
-            config: Configuration dictionary for validation rules.
+            config: Configuration dictionary for validation rules: ``required_columns``,
+                ``range_checks`` ({column: {min, max}}), ``not_null`` (columns),
+                ``column_types`` ({column: numeric|string|datetime}), ``unique_constraints``
+                (lists of columns), ``on_failure`` (halt or quarantine), ``quarantine_dir``
+                and ``sample_size``.
         """
         self.config = config
+        self.required_columns: List[str] = list(config.get('required_columns', []))
+        self.range_checks: Dict[str, Tuple[float, float]] = {
+            col: (ranges.get('min', -np.inf), ranges.get('max', np.inf))
+            for col, ranges in config.get('range_checks', {}).items()
+        }
+        self.not_null: List[str] = list(config.get('not_null', []))
+        self.column_types: Dict[str, str] = dict(config.get('column_types', {}))
+        self.unique_constraints: List[List[str]] = [list(cols) for cols in config.get('unique_constraints', [])]
+        self.on_failure = config.get('on_failure', 'halt')
+        self.quarantine_dir = Path(config.get('quarantine_dir', 'data/quarantine'))
+        self.sample_size = config.get('sample_size', DEFAULT_SAMPLE_SIZE)
+
+        unknown_types = set(self.column_types.values()) - {'numeric', 'string', 'datetime'}
+        if unknown_types:
+            raise ValueError(f"Unknown column types in validation config: {sorted(unknown_types)}")
+        if self.on_failure not in ('halt', 'quarantine'):
+            raise ValueError(f"on_failure must be 'halt' or 'quarantine', not '{self.on_failure}'")
+
+        # The compiled plan: (name, kind, columns) per rule, in evaluation order
+        self.rule_specs: List[Tuple[str, str, List[str]]] = (
+            [(f"not_null:{col}", 'not_null', [col]) for col in self.not_null]
+            + [(f"type:{col}", 'type', [col]) for col in self.column_types]
+            + [(f"range:{col}", 'range', [col]) for col in self.range_checks]
+            + [(f"unique:{'+'.join(cols)}", 'unique', cols) for cols in self.unique_constraints]
+        )
+        self.rule_columns = list(dict.fromkeys(self.not_null + list(self.column_types) + list(self.range_checks)))
+
+    def stream(self) -> ChunkValidator:
+        """Starts validating a stream of chunks; feed them in order."""
+        return ChunkValidator(self)
+
+    def validate(self, df: pd.DataFrame) -> ValidationReport:
+        """Validates a whole frame in one pass and returns the full report."""
+        frame = ChunkValidator(self, across_chunks=False)
+        frame.feed(df)
+        return frame.report
+
+    def validate_chunks(self, chunks: Iterable[pd.DataFrame]) -> ValidationReport:
+        """Validates a stream of chunks, uniqueness included across chunks."""
+        stream = self.stream()
+        for chunk in chunks:
+            stream.feed(chunk)
+        return stream.report
+
+    def quarantine(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, ValidationReport]:
+        """Splits ``df`` into its valid rows and its quarantined rows, with the report."""
+        frame = ChunkValidator(self, across_chunks=False)
+        valid, quarantined = frame.split(df)
+        return valid, quarantined, frame.report
+
+    def quarantine_path(self, name: str) -> Path:
+        """A new file in ``quarantine_dir`` for the quarantined rows of ``name``."""
+        return self.quarantine_dir / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.csv"
+
+    def write_quarantine(self, quarantined: pd.DataFrame, name: str, path: Optional[Path] = None) -> Optional[Path]:
+        """Saves quarantined rows to ``quarantine_dir`` for inspection.
+
+        Rows are appended to ``path`` when one is given (the header is written only
+        when the file is created), so chunks of one run share a single file.
+        """
+        if quarantined.empty:
+            return None
+        path = Path(path) if path is not None else self.quarantine_path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        exists = path.exists()
+        quarantined.to_csv(path, mode='a' if exists else 'w', header=not exists)
+        logger.warning(f"Quarantined {len(quarantined)} row(s) to {path}")
+        return path
+
+    def check_player_game_stats(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Validates the player game stats and applies the ``on_failure`` policy.
+
+        Returns:
+            The frame to continue with: ``df`` itself when it passes, its valid rows
+            when invalid rows are quarantined, or None when the pipeline should halt.
+        """
+        logger.info("Starting player game stats validation...")
+        valid, quarantined, report = self.quarantine(df)
+        report.log()
+        if report.passed:
+            return df
+        if self.on_failure == 'quarantine' and not report.missing_columns:
+            self.write_quarantine(quarantined, 'player_game_stats')
+            return valid
+        return None
 
     def validate_player_game_stats(self, df: pd.DataFrame) -> bool:
         """
         Validates the player game stats DataFrame.
-        
+
         Args:
             df: DataFrame with cleaned player game stats.
-            
+
         Returns:
             True if validation passes, False otherwise.
         """
         logger.info("Starting player game stats validation...")
-        
-        # 1. Check for required columns
-        required_cols = self.config.get('required_columns', [])
-        if not self._check_required_columns(df, required_cols):
-            return False
-        
-        # 2. Check data ranges
-        range_checks = self.config.get('range_checks', {})
-        if not self._check_data_ranges(df, range_checks):
-            return False
-            
-        # 3. Check for uniqueness constraints
-        unique_constraints = self.config.get('unique_constraints', [])
-        if not self._check_uniqueness(df, unique_constraints):
-            return False
-
-        logger.info("Player game stats validation successful.")
-        return True
-
-    def _check_required_columns(self, df: pd.DataFrame, required_cols: List[str]) -> bool:
-        """Checks if all required columns are present."""
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            logger.error(f"Validation failed: Missing required columns: {missing_cols}")
-            return False
-        logger.info("Required columns check passed.")
-        return True
-
-    def _check_data_ranges(self, df: pd.DataFrame, range_checks: Dict[str, Dict[str, float]]) -> bool:
-        """Checks if data values are within specified ranges."""
-        for col, ranges in range_checks.items():
-            if col in df.columns:
-                min_val = ranges.get('min', -float('inf'))
-                max_val = ranges.get('max', float('inf'))
-                if not df[col].between(min_val, max_val).all():
-                    logger.error(f"Validation failed: Column '{col}' has values out of range [{min_val}, {max_val}].")
-                    return False
-        logger.info("Data range checks passed.")
-        return True
-        
-    def _check_uniqueness(self, df: pd.DataFrame, unique_constraints: List[List[str]]) -> bool:
-        """Checks for uniqueness on a set of columns."""
-        for cols in unique_constraints:
-            if df.duplicated(subset=cols).any():
-                logger.error(f"Validation failed: Duplicates found for columns {cols}")
-                return False
-        logger.info("Uniqueness checks passed.")
-        return True
+        report = self.validate(df)
+        report.log()
+        return report.passed
+
 
 def main():
     """
@@ -91,7 +320,7 @@ def main():
         'minutes_played': [25, 30, 28, -5] # Invalid minute
     }
     df = pd.DataFrame(data)
-    
+
     # Example validation config
     config = {
         'required_columns': ['player_id', 'game_id', 'points'],
@@ -101,13 +330,13 @@ def main():
         },
         'unique_constraints': [['player_id', 'game_id']]
     }
-    
+
     validator = DataValidator(config)
-    
+
     logger.info("Validating DataFrame...")
     is_valid = validator.validate_player_game_stats(df)
-    
+
     logger.info(f"Validation result: {'Success' if is_valid else 'Failed'}")
-    
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,192 @@
+"""
+Compact dtypes for the player-game frames.
+
+Straight out of the database every id is a Python string and every stat an int64 or
+float64. The dtype plan (``preprocessing.dtypes`` in the config) is applied once, at
+load time: ids and team codes become categoricals, counting stats int8/int16, prices
+and lines float32 and dates datetime64. The later stages keep those dtypes:
+categorical merge keys are given common categories before a merge
+(``align_categories``) and features computed from compact columns are float32
+(``feature_float_dtype``).
+
+Integer casts are checked against the data: a column whose values do not fit the
+planned type is widened to the smallest integer type that holds them, and one with
+missing or fractional values becomes float32, so no count is ever truncated.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.instrumentation import MB, frame_memory
+
+logger = logging.getLogger(__name__)
+
+_INTEGER_TYPES = ['int8', 'int16', 'int32', 'int64']
+
+
+def feature_float_dtype(*dtypes) -> np.dtype:
+    """Float dtype of a feature computed from columns of the given dtypes.
+
+    float32 when every input is a numeric type of at most 32 bits (as the dtype plan
+    produces), float64 otherwise.
+    """
+    numeric = []
+    for dtype in dtypes:
+        if not isinstance(dtype, np.dtype) or dtype.kind not in 'iuf':
+            return np.dtype(np.float64)
+        numeric.append(dtype)
+    return np.result_type(np.float32, *numeric)
+
+
+def _categories(column: pd.Series) -> pd.Index:
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.categories
+    return pd.Index(column.dropna().unique())
+
+
+def align_categories(left: pd.DataFrame, right: pd.DataFrame, keys: Sequence[str]) -> None:
+    """Gives categorical merge keys the same categories on both sides, in place.
+
+    Merging categoricals with different categories falls back to plain strings; with
+    the union of the categories on both sides the merged key stays categorical.
+    """
+    for key in keys:
+        if not (isinstance(left[key].dtype, pd.CategoricalDtype) or isinstance(right[key].dtype, pd.CategoricalDtype)):
+            continue
+        dtype = pd.CategoricalDtype(_categories(left[key]).union(_categories(right[key])))
+        for df in (left, right):
+            if df[key].dtype != dtype:
+                df[key] = df[key].astype(dtype)
+
+
+def unify_categories(df: pd.DataFrame, columns: Sequence[str]) -> None:
+    """Gives the categorical ``columns`` of one frame the same categories, in place.
+
+    Categoricals compare with each other only if their categories match, e.g. a
+    player's team_id (from the stats) with the game's home_team_id (from the games).
+    """
+    present = [col for col in columns if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype)]
+    if len(present) < 2:
+        return
+    categories = df[present[0]].cat.categories
+    for col in present[1:]:
+        categories = categories.union(df[col].cat.categories)
+    dtype = pd.CategoricalDtype(categories)
+    for col in present:
+        if df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+
+
+def _fitting_integer(column: pd.Series, planned: str) -> Optional[str]:
+    """Smallest integer type, from ``planned`` up, holding every value (None if none does)."""
+    values = column.to_numpy()
+    if values.dtype.kind == 'f' and not np.array_equal(values, np.round(values)):
+        return None
+    low, high = values.min(), values.max()
+    for dtype in _INTEGER_TYPES[_INTEGER_TYPES.index(planned):]:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return None
+
+
+class DtypePlan:
+    """Casts frames to the configured compact dtypes and reports the memory saved."""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initializes the DtypePlan.
+
+        Args:
+            config: The ``preprocessing.dtypes`` section: ``enabled``, column lists
+                ``category``, ``int8``, ``int16``, ``float32`` and ``datetime``, and
+                ``drop`` (columns removed at load). An entry of ``category`` may itself
+                be a list of columns sharing one set of categories (e.g. the team id
+                columns), so they can be compared and concatenated as categoricals.
+        """
+        self.config = config
+        self.enabled = config.get('enabled', True)
+        self.drop = list(config.get('drop', []))
+        self.category_groups: List[List[str]] = [
+            list(entry) if isinstance(entry, (list, tuple)) else [entry] for entry in config.get('category', [])]
+        self.casts: Dict[str, str] = {}
+        for dtype in ('int8', 'int16', 'float32', 'datetime'):
+            for col in config.get(dtype, []):
+                self.casts[col] = dtype
+        # (frame name, bytes before, bytes after) of every reported frame
+        self.report: List[Tuple[str, int, int]] = []
+
+    def apply(self, df: pd.DataFrame, name: Optional[str] = None) -> pd.DataFrame:
+        """
+        Returns ``df`` with the planned dtypes.
+
+        Columns the plan does not name are left alone, as are columns whose values
+        cannot take the planned type (e.g. non-numeric stats, left for the validator).
+
+        Args:
+            df: A frame as loaded from the database.
+            name: If given, the frame's memory before and after is logged and added to
+                ``report`` under this name.
+        """
+        if not self.enabled:
+            return df
+        before = frame_memory(df) if name else 0
+
+        df = df.drop(columns=[col for col in self.drop if col in df.columns])
+        columns = {}
+        for group in self.category_groups:
+            present = [col for col in group if col in df.columns]
+            if not present:
+                continue
+            categories = pd.Index(pd.unique(pd.concat([df[col] for col in present], ignore_index=True).dropna()))
+            dtype = pd.CategoricalDtype(categories.sort_values())
+            for col in present:
+                columns[col] = df[col].astype(dtype)
+        for col, dtype in self.casts.items():
+            if col in df.columns:
+                cast = self._cast(df[col], dtype)
+                if cast is not None:
+                    columns[col] = cast
+        if columns:
+            df = df.assign(**columns)
+
+        if name:
+            after = frame_memory(df)
+            self.report.append((name, before, after))
+            logger.info(f"Dtype plan: {name} {before / MB:.1f} MB -> {after / MB:.1f} MB "
+                        f"({1 - after / max(before, 1):.0%} less)")
+        return df
+
+    def _cast(self, column: pd.Series, dtype: str) -> Optional[pd.Series]:
+        if dtype == 'datetime':
+            if pd.api.types.is_datetime64_any_dtype(column):
+                return None
+            try:
+                return pd.to_datetime(column)
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Dtype plan: column '{column.name}' left as is, not datetimes ({e})")
+                return None
+
+        if not pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+            logger.warning(f"Dtype plan: column '{column.name}' left as {column.dtype}, not numeric")
+            return None
+        if dtype == 'float32' or column.isna().any():
+            return column.astype(np.float32)
+        if len(column) == 0:
+            return column.astype(dtype)
+        fitting = _fitting_integer(column, dtype)
+        if fitting is None:
+            return column.astype(np.float32)
+        if fitting != dtype:
+            logger.warning(f"Dtype plan: column '{column.name}' does not fit {dtype}, using {fitting}")
+        return column.astype(fitting)
+
+    def summary(self) -> pd.DataFrame:
+        """The memory report as a table (MB before and after, and the reduction)."""
+        table = pd.DataFrame(self.report, columns=['frame', 'before_mb', 'after_mb'])
+        table[['before_mb', 'after_mb']] = table[['before_mb', 'after_mb']] / MB
+        table['reduction'] = 1 - table['after_mb'] / table['before_mb'].where(table['before_mb'] > 0)
+        return table
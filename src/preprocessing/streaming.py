@@ -0,0 +1,196 @@
+"""
+Bounded-memory streaming execution of the NBA feature pipeline.
+
+The batch pipeline holds every table and every intermediate frame at once. Here the
+player game stats are split into partitions of players by a stable hash of
+``player_id`` (rolling player features only look at a player's own games), and a
+generator pulls one partition at a time from the database, runs it through cleaning,
+validation, integration and feature engineering and appends it to the output file.
+Game- and team-level features depend only on the games, so they are computed once on
+the one-row-per-game frame and joined onto each partition.
+
+Memory is bounded by the partition size (``partition_rows``); the process's peak RSS
+is checked after every partition and the run is aborted once it passes
+``max_memory_mb``.
+"""
+
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from src.feature_engineering.game_features import GameFeatures
+from src.feature_engineering.player_features import PlayerFeatures
+from src.feature_engineering.team_features import TeamFeatures
+from src.preprocessing.data_cleaner import DataCleaner
+from src.preprocessing.data_integrator import DataIntegrator
+from src.preprocessing.data_validator import DataValidator
+from src.preprocessing.dtypes import DtypePlan, align_categories
+from src.utils.config import Config
+from src.utils.instrumentation import MB, peak_rss_bytes, profile_stage
+
+logger = logging.getLogger(__name__)
+
+# Ids bound per IN (...) query; well under SQLite's variable limit
+IN_CLAUSE_CHUNK = 5000
+
+_STATS_FOR_PLAYERS = text("SELECT * FROM player_game_stats WHERE player_id IN :player_ids").bindparams(
+    bindparam('player_ids', expanding=True))
+_ODDS_FOR_PLAYERS = text("SELECT * FROM prop_odds WHERE player_id IN :player_ids").bindparams(
+    bindparam('player_ids', expanding=True))
+
+
+class MemoryLimitExceeded(MemoryError):
+    """The streaming run's peak memory passed the configured cap."""
+
+
+def player_partitions(player_ids: pd.Series, n_partitions: int) -> np.ndarray:
+    """Stable partition number of each player id (the same across runs and processes)."""
+    hashes = pd.util.hash_array(player_ids.astype(str).to_numpy(dtype=object))
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+def plan_partitions(connection, partition_rows: int) -> List[List[str]]:
+    """Groups players into partitions of roughly ``partition_rows`` stat rows each."""
+    counts = pd.read_sql(text("SELECT player_id, COUNT(*) AS n_rows FROM player_game_stats GROUP BY player_id"),
+                         connection)
+    if counts.empty:
+        return []
+    n_partitions = max(1, math.ceil(counts['n_rows'].sum() / partition_rows))
+    counts['partition'] = player_partitions(counts['player_id'], n_partitions)
+    return [group['player_id'].tolist() for _, group in counts.groupby('partition', sort=True)]
+
+
+def _read_for_players(connection, query, player_ids: List[str]) -> pd.DataFrame:
+    frames = [pd.read_sql(query, connection, params={'player_ids': player_ids[start:start + IN_CLAUSE_CHUNK]})
+              for start in range(0, len(player_ids), IN_CLAUSE_CHUNK)]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def iter_partitions(connection, partitions: List[List[str]]) -> Iterator[Tuple[int, pd.DataFrame, pd.DataFrame]]:
+    """Yields (partition number, stats, odds) one partition at a time."""
+    for number, player_ids in enumerate(partitions):
+        yield (number, _read_for_players(connection, _STATS_FOR_PLAYERS, player_ids),
+               _read_for_players(connection, _ODDS_FOR_PLAYERS, player_ids))
+
+
+def game_level_features(games_df: pd.DataFrame, game_creator: GameFeatures,
+                        team_creator: TeamFeatures) -> pd.DataFrame:
+    """Rest-day and team-strength features of each game, keyed by game_id."""
+    featured = team_creator.create_team_strength_features(game_creator.create_game_context_features(games_df))
+    new_columns = [col for col in featured.columns if col not in games_df.columns]
+    return featured[['game_id'] + new_columns]
+
+
+class StreamingPipeline:
+    """Runs the NBA feature pipeline one player partition at a time."""
+
+    def __init__(self, config: Config):
+        """
+        Args:
+            config: The project configuration (``preprocessing`` and
+                ``feature_engineering`` sections are read).
+        """
+        streaming = config.get('preprocessing.streaming', {}) or {}
+        self.partition_rows = streaming.get('partition_rows', 250000)
+        self.max_memory_mb = streaming.get('max_memory_mb')
+        self.dtype_plan = DtypePlan(config.get('preprocessing.dtypes', {}))
+        self.cleaner = DataCleaner(config.get('preprocessing.cleaning', {}))
+        self.validator = DataValidator(config.get('preprocessing.validation', {}))
+        self.integrator = DataIntegrator(config.get('preprocessing.integration', {}))
+        self.player_creator = PlayerFeatures(config.get('feature_engineering.player_features', {}))
+        self.game_creator = GameFeatures(config.get('feature_engineering.game_features', {}))
+        self.team_creator = TeamFeatures(config.get('feature_engineering.team_features', {}))
+
+    def process_partition(self, stats: pd.DataFrame, odds: pd.DataFrame, games: pd.DataFrame,
+                          game_features: pd.DataFrame, validation,
+                          quarantine_path: Optional[Path] = None) -> Optional[pd.DataFrame]:
+        """Features of one partition, or None if validation says to halt.
+
+        Quarantined rows are appended to ``quarantine_path`` (a new file per call if None).
+        """
+        stats, odds = self.dtype_plan.apply(stats), self.dtype_plan.apply(odds)
+        cleaned = self.cleaner.clean_player_game_stats(stats)
+        valid, quarantined = validation.split(cleaned)
+        if validation.report.missing_columns:
+            return None
+        if len(quarantined):
+            if self.validator.on_failure != 'quarantine':
+                return None
+            self.validator.write_quarantine(quarantined, 'player_game_stats', quarantine_path)
+
+        integrated = self.integrator.integrate_game_data(valid, games)
+        features = self.player_creator.create_rolling_averages(integrated)
+        align_categories(features, game_features, ['game_id'])
+        features = features.merge(game_features, on='game_id', how='left')
+        return self.integrator.integrate_sportsbook_odds(features, odds)
+
+    def run(self, connection, output_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        Streams every partition to ``output_path`` (CSV, written atomically).
+
+        Returns:
+            A run summary (partitions, rows, peak RSS, quarantined rows), or None if
+            validation halted the run; the output file is then left untouched.
+        """
+        output_path = Path(output_path)
+        games = pd.read_sql(text("SELECT * FROM games WHERE game_id IN "
+                                 "(SELECT DISTINCT game_id FROM player_game_stats)"), connection)
+        games = self.dtype_plan.apply(games, 'games')
+        with profile_stage('game_level_features', games) as stage:
+            game_features = stage.output(game_level_features(games, self.game_creator, self.team_creator))
+
+        partitions = plan_partitions(connection, self.partition_rows)
+        logger.info(f"Streaming {len(partitions)} partition(s) of ~{self.partition_rows} rows "
+                    f"({sum(map(len, partitions))} players)")
+
+        validation = self.validator.stream()
+        # One quarantine file for the whole run; every partition appends to it
+        quarantine_path = self.validator.quarantine_path('player_game_stats')
+        partial_path = output_path.with_name(output_path.name + '.partial')
+        rows_out, largest_partition = 0, 0
+        try:
+            for number, stats, odds in iter_partitions(connection, partitions):
+                with profile_stage(f'partition_{number}', stats) as stage:
+                    features = stage.output(self.process_partition(
+                        stats, odds, games, game_features, validation, quarantine_path))
+                if features is None:
+                    validation.report.log()
+                    return None
+                features.to_csv(partial_path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+                rows_out += len(features)
+                largest_partition = max(largest_partition, len(stats))
+                del stats, odds, features
+                self._check_memory(number)
+            os.replace(partial_path, output_path)
+        finally:
+            if partial_path.exists():
+                partial_path.unlink()
+
+        validation.report.log()
+        peak = peak_rss_bytes()
+        summary = {
+            'partitions': len(partitions),
+            'rows_in': validation.report.rows,
+            'rows_out': rows_out,
+            'quarantined_rows': validation.report.invalid_rows,
+            'largest_partition_rows': largest_partition,
+            'peak_rss_mb': None if peak is None else round(peak / MB, 1),
+        }
+        logger.info(f"Streaming pipeline wrote {rows_out} rows from {len(partitions)} partition(s) to "
+                    f"{output_path}; peak RSS {summary['peak_rss_mb']} MB")
+        return summary
+
+    def _check_memory(self, number: int) -> None:
+        peak = peak_rss_bytes()
+        if self.max_memory_mb is None or peak is None:
+            return
+        if peak / MB > self.max_memory_mb:
+            raise MemoryLimitExceeded(
+                f"Peak RSS {peak / MB:.0f} MB passed preprocessing.streaming.max_memory_mb "
+                f"({self.max_memory_mb} MB) after partition {number}; lower partition_rows")
@@ -0,0 +1,156 @@
+"""
+In-process TTL/LRU cache for team and player lookups.
+
+Entries are keyed by (domain, kind, entity, as_of, data version). The data version
+of a domain is bumped whenever new stats are ingested in this process, which makes
+every older key unreachable and drops those entries; lookups against a database file
+can also fold the file's modification time into the version so that writes from
+other processes are picked up too. Caches are shared per name within a process.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = 900.0, name: str = 'cache',
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            stored_at, value = entry
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the cached value, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drops every entry (or those whose key matches ``predicate``); returns the count."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate is None or predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+
+_registry_lock = threading.Lock()
+_caches: Dict[str, TTLCache] = {}
+_versions: Dict[str, int] = defaultdict(int)
+
+
+def get_cache(name: str) -> TTLCache:
+    """Returns the process-wide cache of that name, sized from ``prediction.cache``."""
+    with _registry_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(maxsize=config.get('prediction.cache.maxsize', 4096),
+                                     ttl=config.get('prediction.cache.ttl_seconds', 900), name=name)
+        return _caches[name]
+
+
+def data_version(domain: str) -> int:
+    """Number of ingests recorded for ``domain`` in this process."""
+    return _versions[domain]
+
+
+def bump_data_version(domain: str) -> int:
+    """Records an ingest for ``domain`` and drops every cached entry of that domain."""
+    with _registry_lock:
+        _versions[domain] += 1
+        caches = list(_caches.values())
+    dropped = sum(cache.invalidate(lambda key: isinstance(key, tuple) and key[:1] == (domain,))
+                  for cache in caches)
+    if dropped:
+        logger.debug(f"New {domain} data: dropped {dropped} cached entries")
+    return _versions[domain]
+
+
+def cache_key(domain: str, kind: str, entity: Hashable, as_of: Any = None,
+              source: Optional[os.PathLike] = None) -> tuple:
+    """Key of an entity lookup at a date under the current data version.
+
+    ``source`` names a database file whose modification time becomes part of the
+    version, so that writes made by other processes also miss the cache.
+    """
+    version: Any = _versions[domain]
+    if source is not None:
+        try:
+            version = (version, os.stat(source).st_mtime_ns)
+        except OSError:
+            version = (version, None)
+    return (domain, kind, entity, None if as_of is None else str(as_of), version)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit-rate counters of every shared cache, for run reports."""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats for cache in caches}
@@ -4,11 +4,12 @@ Database utilities for the NBA/WNBA predictive model.
 
 import logging
 from typing import Dict, List, Any, Optional
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, func
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, Float, DateTime, Boolean, Text, func
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 from datetime import datetime
 
 from .config import config
+from .cache import bump_data_version
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -94,7 +95,8 @@ class PropOdds(Base):
     under_odds = Column(Integer)
     over_implied_prob = Column(Float)
     under_implied_prob = Column(Float)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    # Part of the key so every re-posted line is kept; readers take the latest one they may see
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -111,6 +113,8 @@ class ModelPredictions(Base):
     predicted_outcome = Column(String(10))  # over, under
     confidence_score = Column(Float)
     features_used = Column(Text)  # JSON string of features
+    predicted_mean = Column(Float)  # count-distribution models only
+    dispersion = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -149,6 +153,61 @@ class Teams(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+def _rekey_prop_odds(connection, constraint_name: Optional[str]) -> None:
+    """Adds ``timestamp`` to the primary key of an existing prop_odds table."""
+    connection.execute(text("UPDATE prop_odds SET timestamp = COALESCE(created_at, CURRENT_TIMESTAMP) "
+                            "WHERE timestamp IS NULL"))
+    key = ', '.join(column.name for column in PropOdds.__table__.primary_key.columns)
+    if connection.dialect.name == 'sqlite':
+        # SQLite cannot alter a primary key, so the table is rebuilt
+        columns = ', '.join(column.name for column in PropOdds.__table__.columns)
+        connection.execute(text("ALTER TABLE prop_odds RENAME TO prop_odds_old"))
+        PropOdds.__table__.create(connection)
+        connection.execute(text(f"INSERT INTO prop_odds ({columns}) SELECT {columns} FROM prop_odds_old"))
+        connection.execute(text("DROP TABLE prop_odds_old"))
+    else:
+        connection.execute(text(f"ALTER TABLE prop_odds DROP CONSTRAINT {constraint_name}"))
+        connection.execute(text(f"ALTER TABLE prop_odds ADD PRIMARY KEY ({key})"))
+
+
+# Columns added to existing tables since they were first created
+ADDED_COLUMNS = {
+    'model_predictions': [ModelPredictions.predicted_mean, ModelPredictions.dispersion],
+}
+
+
+def migrate_schema(engine) -> List[str]:
+    """Brings tables created by an earlier version of the schema up to date.
+
+    ``create_all`` only creates missing tables, so changes to existing ones are
+    applied here. Safe to run on every start: up-to-date tables are left alone.
+
+    Returns:
+        The changes made
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    changes = []
+    with engine.begin() as connection:
+        if 'prop_odds' in tables:
+            key = inspector.get_pk_constraint('prop_odds')
+            if 'timestamp' not in key['constrained_columns']:
+                _rekey_prop_odds(connection, key.get('name'))
+                changes.append("prop_odds: re-posted lines are kept (timestamp added to the primary key)")
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            for column in columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}"))
+                    changes.append(f"{table}: added column {column.name}")
+    for change in changes:
+        logger.info(f"Schema migration: {change}")
+    return changes
+
+
 class DatabaseManager:
     """Database manager for the sports model."""
     
@@ -176,11 +235,17 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Failed to establish database connection: {e}")
             raise
+        try:
+            # Existing databases get the columns the current code reads and writes
+            migrate_schema(self.engine)
+        except Exception as e:
+            logger.warning(f"Could not migrate the database schema: {e}")
     
     def create_tables(self):
-        """Create all database tables."""
+        """Create all database tables and migrate existing ones to the current schema."""
         try:
             if self.engine:
+                migrate_schema(self.engine)
                 Base.metadata.create_all(bind=self.engine)
                 logger.info("Database tables created successfully")
         except Exception as e:
@@ -209,6 +274,7 @@ class DatabaseManager:
                 game = Games(**game_data)
                 session.add(game)
                 session.commit()
+                bump_data_version('nba')
                 logger.info(f"Game inserted: {game_data.get('game_id')}")
                 return True
         except Exception as e:
@@ -244,6 +310,7 @@ class DatabaseManager:
                     logger.info(f"Inserting stats for player {stats_data['player_id']} in game {stats_data['game_id']}")
                 
                 session.commit()
+                bump_data_version('nba')
                 return True
         except Exception as e:
             logger.error(f"Failed to insert player stats: {e}")
@@ -263,6 +330,7 @@ class DatabaseManager:
                 odds = PropOdds(**odds_data)
                 session.add(odds)
                 session.commit()
+                bump_data_version('nba')
                 return True
         except Exception as e:
             logger.error(f"Failed to insert prop odds: {e}")
@@ -343,6 +411,7 @@ class DatabaseManager:
                 team = Teams(**team_data)
                 session.add(team)
                 session.commit()
+                bump_data_version('nba')
                 return True
         except Exception as e:
             logger.error(f"Failed to insert team: {e}")
@@ -362,6 +431,7 @@ class DatabaseManager:
                 player = Players(**player_data)
                 session.add(player)
                 session.commit()
+                bump_data_version('nba')
                 return True
         except Exception as e:
             logger.error(f"Failed to insert player: {e}")
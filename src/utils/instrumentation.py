@@ -0,0 +1,286 @@
+"""
+Stage-level timing and memory instrumentation for the pipelines.
+
+A ``StageProfiler`` records, for every stage run while it is active, the wall time,
+the CPU time, how far the stage pushed the process's peak RSS, the rows going in and
+coming out and the memory of the DataFrames it produced. Each record is appended to a
+JSON-lines file as soon as its stage finishes, and a summary table is logged when the
+profiler closes. Like a ``RotatingFileHandler``, the file is rolled over to ``.1``,
+``.2``, ... once it would grow past ``instrumentation.max_bytes``, keeping
+``instrumentation.backup_count`` old files, so long-running services calling profiled
+entry points do not grow it without bound.
+
+Stages are opened explicitly with ``profiler.stage(name)`` or by decorating a function
+with ``@instrumented()``. Decorated functions record into whichever profiler is active
+in the current context; with none active they cost a single context-variable lookup.
+"""
+
+import functools
+import json
+import logging
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .config import config
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; peak RSS is then not reported
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_active_profiler: ContextVar[Optional['StageProfiler']] = ContextVar('stage_profiler', default=None)
+
+MB = 1024 * 1024
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _frames(obj: Any) -> List[Any]:
+    """DataFrames and Series in ``obj``, looking one level into dicts, lists and tuples."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return [obj]
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, (list, tuple)):
+        return [item for item in obj if isinstance(item, (pd.DataFrame, pd.Series))]
+    return []
+
+
+def count_rows(obj: Any) -> Optional[int]:
+    """Total rows of the DataFrames in ``obj``, or None if it holds none."""
+    frames = _frames(obj)
+    return sum(len(frame) for frame in frames) if frames else None
+
+
+def frame_memory(obj: Any, deep: bool = True) -> Optional[int]:
+    """Total memory in bytes of the DataFrames in ``obj``, or None if it holds none."""
+    frames = _frames(obj)
+    if not frames:
+        return None
+    return int(sum(frame.memory_usage(index=True, deep=deep).sum() if isinstance(frame, pd.DataFrame)
+                   else frame.memory_usage(index=True, deep=deep) for frame in frames))
+
+
+class Stage:
+    """A stage being measured; callers report what it consumed and produced."""
+
+    def __init__(self, name: str, inputs: Any = None):
+        self.name = name
+        self.rows_in = count_rows(inputs)
+        self.rows_out: Optional[int] = None
+        self.output_bytes: Optional[int] = None
+        self._output: Any = None
+
+    def input(self, obj: Any) -> Any:
+        """Record ``obj`` as the stage's input and return it."""
+        self.rows_in = count_rows(obj)
+        return obj
+
+    def output(self, obj: Any) -> Any:
+        """Record ``obj`` as the stage's output and return it."""
+        self._output = obj
+        return obj
+
+
+class StageProfiler:
+    """Collects stage records for one pipeline run.
+
+    Use it as a context manager around the run: it becomes the active profiler for
+    ``@instrumented`` functions and logs a summary table on exit.
+    """
+
+    def __init__(self, pipeline: str, output: Optional[str] = None, enabled: Optional[bool] = None,
+                 deep_memory: Optional[bool] = None, max_bytes: Optional[int] = None,
+                 backup_count: Optional[int] = None):
+        self.pipeline = pipeline
+        self.enabled = config.get('instrumentation.enabled', True) if enabled is None else enabled
+        output = config.get('instrumentation.output', 'logs/stages.jsonl') if output is None else output
+        self.output = Path(output) if output else None
+        self.deep_memory = config.get('instrumentation.deep_memory', True) if deep_memory is None else deep_memory
+        # 0 never rolls the file over
+        self.max_bytes = config.get('instrumentation.max_bytes', 10 * MB) if max_bytes is None else max_bytes
+        self.backup_count = config.get('instrumentation.backup_count', 5) if backup_count is None else backup_count
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records: List[Dict[str, Any]] = []
+        self._depth = 0
+        self._token = None
+        self._start: Optional[float] = None
+        self.total_seconds: Optional[float] = None
+
+    def __enter__(self) -> 'StageProfiler':
+        self._token = _active_profiler.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _active_profiler.reset(self._token)
+        self.total_seconds = time.perf_counter() - self._start
+        if self.enabled and self.records:
+            self.log_summary()
+
+    @contextmanager
+    def stage(self, name: str, inputs: Any = None) -> Iterator[Stage]:
+        """Measures the enclosed block as stage ``name``."""
+        stage = Stage(name, inputs)
+        if not self.enabled:
+            yield stage
+            return
+
+        started_at = datetime.now().isoformat(timespec='milliseconds')
+        rss_before = peak_rss_bytes()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        self._depth += 1
+        error = None
+        try:
+            yield stage
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            rss_after = peak_rss_bytes()
+            self._depth -= 1
+            # Measured outside the timed window; deep memory of object columns is not free
+            stage.rows_out = count_rows(stage._output)
+            stage.output_bytes = frame_memory(stage._output, deep=self.deep_memory)
+            self._record({
+                'run_id': self.run_id,
+                'pipeline': self.pipeline,
+                'stage': name,
+                'depth': self._depth,
+                'started_at': started_at,
+                'wall_seconds': round(wall, 6),
+                'cpu_seconds': round(cpu, 6),
+                'peak_rss_delta_mb': None if rss_after is None else round((rss_after - rss_before) / MB, 3),
+                'peak_rss_mb': None if rss_after is None else round(rss_after / MB, 3),
+                'rows_in': stage.rows_in,
+                'rows_out': stage.rows_out,
+                'output_mb': None if stage.output_bytes is None else round(stage.output_bytes / MB, 3),
+                'status': 'ok' if error is None else 'error',
+                'error': error,
+            })
+
+    def _record(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+        if self.output is None:
+            return
+        line = json.dumps(record) + '\n'
+        try:
+            self.output.parent.mkdir(parents=True, exist_ok=True)
+            self._roll_over(len(line.encode()))
+            with open(self.output, 'a') as f:
+                f.write(line)
+        except OSError as e:
+            logger.warning(f"Could not write stage record to {self.output}: {e}")
+            self.output = None
+
+    def _roll_over(self, n_bytes: int) -> None:
+        """Shifts the output to ``.1`` (and older files up by one) if ``n_bytes`` more would exceed max_bytes."""
+        if not self.max_bytes or not self.output.exists() or self.output.stat().st_size + n_bytes <= self.max_bytes:
+            return
+        if self.backup_count <= 0:
+            self.output.unlink()
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            older = self.output.with_name(f"{self.output.name}.{index}")
+            if older.exists():
+                older.replace(self.output.with_name(f"{self.output.name}.{index + 1}"))
+        self.output.replace(self.output.with_name(f"{self.output.name}.1"))
+
+    def summary(self) -> pd.DataFrame:
+        """One row per recorded stage, in completion order."""
+        columns = ['stage', 'depth', 'wall_seconds', 'cpu_seconds', 'peak_rss_delta_mb', 'rows_in',
+                   'rows_out', 'output_mb', 'status']
+        return pd.DataFrame(self.records, columns=columns).astype({'rows_in': 'Int64', 'rows_out': 'Int64'})
+
+    def format_summary(self) -> str:
+        """The summary as a fixed-width text table, nested stages indented."""
+        table = self.summary()
+        if table.empty:
+            return f"{self.pipeline}: no stages recorded"
+        table['stage'] = ['  ' * depth + stage for stage, depth in zip(table['stage'], table['depth'])]
+        for column in ('rows_in', 'rows_out'):
+            table[column] = table[column].astype(object).where(table[column].notna(), '-')
+        table = table.drop(columns='depth').rename(columns={
+            'wall_seconds': 'wall_s', 'cpu_seconds': 'cpu_s', 'peak_rss_delta_mb': 'rss_delta_mb'})
+        text = table.to_string(index=False, na_rep='-', float_format=lambda value: f"{value:.3f}")
+        total = f"{self.total_seconds:.3f}s" if self.total_seconds is not None else "in progress"
+        return f"{self.pipeline} run {self.run_id} ({total} total)\n{text}"
+
+    def log_summary(self) -> None:
+        logger.info("Stage summary:\n" + self.format_summary())
+
+
+def active_profiler() -> Optional[StageProfiler]:
+    """The profiler active in the current context, if any."""
+    return _active_profiler.get()
+
+
+@contextmanager
+def profile_stage(name: str, inputs: Any = None) -> Iterator[Stage]:
+    """Measures the enclosed block in the active profiler; a no-op stage without one."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield Stage(name)
+        return
+    with profiler.stage(name, inputs) as stage:
+        yield stage
+
+
+def instrumented(name: Optional[str] = None):
+    """Decorator recording each call as a stage of the active profiler.
+
+    Rows in are counted over the DataFrames among the arguments and rows out over
+    those in the return value (looking one level into dicts, lists and tuples).
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active_profiler.get()
+            if profiler is None or not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage_name, list(args) + list(kwargs.values())) as stage:
+                return stage.output(func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def profiled(pipeline: str):
+    """Decorator for pipeline entry points.
+
+    Each call runs under its own ``StageProfiler`` named ``pipeline``, so the stages
+    inside it are recorded and summarised; when a profiler is already active the call
+    is recorded as a single stage of that profiler instead.
+    """
+    def decorator(func):
+        stage = instrumented(pipeline)(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_profiler.get() is not None:
+                return stage(*args, **kwargs)
+            with StageProfiler(pipeline):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
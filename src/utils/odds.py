@@ -0,0 +1,49 @@
+"""
+Vectorized American-odds arithmetic shared by bet selection, backtesting and simulation.
+
+Every function accepts scalars or NumPy/pandas arrays and works element-wise.
+"""
+
+import numpy as np
+
+# Price assumed when a book has not posted one
+DEFAULT_AMERICAN_ODDS = -110
+
+
+def american_to_decimal(odds):
+    """Decimal odds (total return per unit staked) of American odds.
+
+    American prices lie at or beyond +/-100; anything in between (or missing) is
+    not a price and maps to NaN.
+    """
+    odds = np.asarray(odds, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decimal = np.where(odds > 0, 1 + odds / 100, 1 + 100 / np.abs(odds))
+    return np.where(np.abs(odds) >= 100, decimal, np.nan)
+
+
+def implied_probability(odds):
+    """Break-even probability of American odds, vig included."""
+    return 1 / american_to_decimal(odds)
+
+
+def remove_vig(over_odds, under_odds):
+    """No-vig probabilities of a two-way market, normalizing the implied pair to sum to one."""
+    over = implied_probability(over_odds)
+    under = implied_probability(under_odds)
+    total = over + under
+    return over / total, under / total
+
+
+def kelly_fraction(probability, decimal_odds):
+    """Full-Kelly share of bankroll for a bet; zero when the bet has no positive edge."""
+    probability = np.asarray(probability, dtype=float)
+    net = np.asarray(decimal_odds, dtype=float) - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = (probability * net - (1 - probability)) / net
+    return np.clip(np.nan_to_num(fraction, nan=0.0), 0.0, 1.0)
+
+
+def expected_value(probability, decimal_odds):
+    """Expected profit per unit staked."""
+    return np.asarray(probability, dtype=float) * np.asarray(decimal_odds, dtype=float) - 1
@@ -0,0 +1,192 @@
+"""
+Whole-command profiling for the CLI entry points.
+
+``profile_run(mode, name)`` wraps a command in one of three profilers and, when the
+command finishes (or fails), writes the raw output to ``logs/profiles/`` and prints
+the top hotspots:
+
+- ``cprofile``: deterministic cProfile; writes a ``.pstats`` file for pstats,
+  snakeviz or gprof2dot.
+- ``sampling``: a stdlib sampling profiler that snapshots the command's stack every
+  few milliseconds from a background thread; writes collapsed stacks (``a;b;c 42``),
+  the input format of flamegraph.pl and speedscope. Low overhead, so timings stay
+  representative of an unprofiled run.
+- ``memory``: tracemalloc; writes the top-N allocation sites with their tracebacks
+  and the peak traced memory.
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sampling', 'memory')
+
+Frame = Tuple[str, str, int]
+
+
+def _output_path(output_dir: Path, name: str, mode: str, suffix: str) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return output_dir / f"{name}_{mode}_{stamp}{suffix}"
+
+
+def _frame_label(frame: Frame) -> str:
+    filename, function, lineno = frame
+    return f"{function} ({filename}:{lineno})"
+
+
+class SamplingProfiler:
+    """Samples one thread's call stack at a fixed interval from a background thread."""
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                # Root first, as collapsed stacks are written
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self) -> List[str]:
+        """Stacks in collapsed format, one ``frame;frame;... count`` line per stack."""
+        return [';'.join(_frame_label(frame) for frame in stack) + f" {count}"
+                for stack, count in self.stacks.most_common()]
+
+    def hotspots(self, top_n: int = 20) -> List[Dict]:
+        """Functions by own (leaf) samples, with their inclusive sample counts."""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack):
+                total[frame] += count
+        return [{'function': _frame_label(frame), 'own': count, 'total': total[frame]}
+                for frame, count in own.most_common(top_n)]
+
+
+def _report_cprofile(profiler: cProfile.Profile, path: Path, top_n: int) -> str:
+    profiler.dump_stats(str(path))
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream).strip_dirs()
+    stats.sort_stats('cumulative').print_stats(top_n)
+    stats.sort_stats('tottime').print_stats(top_n)
+    return stream.getvalue()
+
+
+def _report_sampling(profiler: SamplingProfiler, path: Path, top_n: int) -> str:
+    path.write_text('\n'.join(profiler.collapsed()) + '\n')
+    lines = [f"{profiler.samples} samples every {profiler.interval * 1000:.1f} ms",
+             f"{'own %':>7} {'total %':>8}  function"]
+    for spot in profiler.hotspots(top_n):
+        lines.append(f"{100 * spot['own'] / max(profiler.samples, 1):7.1f} "
+                     f"{100 * spot['total'] / max(profiler.samples, 1):8.1f}  {spot['function']}")
+    return '\n'.join(lines)
+
+
+def _report_memory(path: Path, top_n: int) -> str:
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    ])
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    summary = [f"Traced memory: {current / 2**20:.1f} MiB live at exit, {peak / 2**20:.1f} MiB peak",
+               f"Top {top_n} allocation sites (live at exit):"]
+    by_line = snapshot.statistics('lineno')[:top_n]
+    for rank, stat in enumerate(by_line, 1):
+        summary.append(f"{rank:3d}. {stat.size / 2**20:9.2f} MiB {stat.count:9d} blocks  {stat.traceback[0]}")
+
+    details = list(summary) + ['', 'Tracebacks:']
+    for rank, stat in enumerate(snapshot.statistics('traceback')[:top_n], 1):
+        details.append(f"#{rank}: {stat.size / 2**20:.2f} MiB in {stat.count} blocks")
+        details.extend(f"    {line}" for line in stat.traceback.format())
+    path.write_text('\n'.join(details) + '\n')
+    return '\n'.join(summary)
+
+
+@contextmanager
+def _profile(mode: str, name: str, output_dir: Path, top_n: int) -> Iterator[None]:
+    start = time.perf_counter()
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif mode == 'sampling':
+        profiler = SamplingProfiler(config.get('profiling.sampling_interval_ms', 5) / 1000)
+        profiler.start()
+    else:
+        tracemalloc.start(config.get('profiling.traceback_frames', 10))
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if mode == 'cprofile':
+            profiler.disable()
+            path = _output_path(output_dir, name, mode, '.pstats')
+            report = _report_cprofile(profiler, path, top_n)
+        elif mode == 'sampling':
+            profiler.stop()
+            path = _output_path(output_dir, name, mode, '.collapsed')
+            report = _report_sampling(profiler, path, top_n)
+        else:
+            path = _output_path(output_dir, name, mode, '.txt')
+            report = _report_memory(path, top_n)
+
+        print(f"\n=== {mode} profile of {name} ({elapsed:.2f}s) ===")
+        print(report)
+        print(f"Profile written to {path}")
+        logger.info(f"{mode} profile of {name} written to {path}")
+
+
+def profile_run(mode: Optional[str], name: str, output_dir: Optional[str] = None,
+                top_n: Optional[int] = None):
+    """Context manager profiling the enclosed command with ``mode``; a no-op for None."""
+    if mode is None:
+        return nullcontext()
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}'; expected one of {', '.join(PROFILE_MODES)}")
+    output_dir = Path(output_dir or config.get('profiling.output_dir', 'logs/profiles'))
+    top_n = top_n or config.get('profiling.top_n', 20)
+    return _profile(mode, name, output_dir, top_n)
+
+
+def add_profile_argument(parser) -> None:
+    """Adds the shared ``--profile`` option to an argparse parser."""
+    parser.add_argument('--profile', choices=PROFILE_MODES, default=None,
+                        help="Profile the run and write the report to logs/profiles/.")
@@ -0,0 +1,394 @@
+"""
+Synthetic NBA and MLB data at configurable scale, for benchmarks and tests.
+
+Fills the SQLAlchemy schema (teams, players, games, player_game_stats, prop_odds)
+and the mlb_* tables with seeded draws from realistic distributions:
+
+- NBA: 30 teams of 13 players with fixed per-minute rates, an 82-game schedule,
+  box scores whose points add up to the final score, and two books' lines and
+  prices for every prop of each rotation player.
+- MLB: 30 teams with offense and pitching strengths, a 162-game schedule with a
+  five-man rotation, batting lines whose runs add up to the score, and pitching
+  lines splitting the opponent's totals between the starter and two relievers.
+
+Seasons end in 2024 by default so that 1 to 20 seasons always lie in the past.
+
+Example usage:
+    python -m src.utils.synthetic_data --seasons 3 --output data/synthetic/sports_model.db
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, insert
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.utils.database import Base, Games, Players, PlayerGameStats, PropOdds, Teams
+from src.utils.odds import implied_probability
+
+logger = logging.getLogger(__name__)
+
+NBA_TEAMS = ['ATL', 'BOS', 'BKN', 'CHA', 'CHI', 'CLE', 'DAL', 'DEN', 'DET', 'GSW', 'HOU', 'IND', 'LAC', 'LAL',
+             'MEM', 'MIA', 'MIL', 'MIN', 'NOP', 'NYK', 'OKC', 'ORL', 'PHI', 'PHX', 'POR', 'SAC', 'SAS', 'TOR',
+             'UTA', 'WAS']
+MLB_TEAMS = ['ARI', 'ATL', 'BAL', 'BOS', 'CHC', 'CWS', 'CIN', 'CLE', 'COL', 'DET', 'HOU', 'KC', 'LAA', 'LAD',
+             'MIA', 'MIL', 'MIN', 'NYM', 'NYY', 'OAK', 'PHI', 'PIT', 'SD', 'SF', 'SEA', 'STL', 'TB', 'TEX',
+             'TOR', 'WSH']
+LAST_SEASON = 2024
+NBA_ROSTER = 13
+# Expected minutes by roster slot: five starters, then the bench
+NBA_MINUTES = np.array([34, 33, 32, 31, 30, 24, 22, 20, 16, 12, 8, 6, 4], dtype=float)
+NBA_GAMES_PER_TEAM = 82
+NBA_SEASON_DAYS = 165
+SPORTSBOOKS = ['FanDuel', 'DraftKings']
+# Minutes a player is expected to play to get props posted
+PROP_MIN_MINUTES = 20
+MLB_GAMES_PER_TEAM = 162
+MLB_LINEUP = 9
+MLB_ROTATION = 5
+MLB_BULLPEN = 8
+INSERT_CHUNK = 50000
+
+
+def _schedule(rng: np.random.Generator, n_teams: int, n_games: int, n_days: int):
+    """Random pairings spread over the season, no team playing twice on a day."""
+    per_day = np.full(n_days, n_games // n_days)
+    per_day[rng.choice(n_days, n_games % n_days, replace=False)] += 1
+    per_day = np.minimum(per_day, n_teams // 2)
+    order = np.argsort(rng.random((n_days, n_teams)), axis=1)
+    slots = np.arange(n_teams // 2)
+    keep = slots[None, :] < per_day[:, None]
+    days = np.broadcast_to(np.arange(n_days)[:, None], keep.shape)[keep]
+    home = order[:, 0::2][:, :n_teams // 2][keep]
+    away = order[:, 1::2][:, :n_teams // 2][keep]
+    return days, home, away
+
+
+def _nba_players(rng: np.random.Generator, teams: Sequence[str]) -> pd.DataFrame:
+    """Rosters with per-minute scoring, rebounding and playmaking rates."""
+    n = len(teams) * NBA_ROSTER
+    usage = rng.lognormal(0, 0.35, n)
+    three_share = rng.uniform(0.3, 1.7, n)
+    return pd.DataFrame({
+        'player_id': [f"{team}{slot:02d}" for team in teams for slot in range(NBA_ROSTER)],
+        'team_id': np.repeat(list(teams), NBA_ROSTER),
+        'slot': np.tile(np.arange(NBA_ROSTER), len(teams)),
+        'fg2_rate': 4.2 * usage / 36,
+        'fg3_rate': 1.4 * usage * three_share / 36,
+        'ft_rate': 2.1 * usage / 36,
+        'reb_rate': rng.lognormal(np.log(6.5), 0.4, n) / 36,
+        'ast_rate': rng.lognormal(np.log(3.2), 0.5, n) / 36,
+        'tov_rate': 1.6 * usage / 36,
+    })
+
+
+def generate_nba_season(rng: np.random.Generator, players: pd.DataFrame, year: int,
+                        teams: Sequence[str], odds: bool = True) -> Dict[str, pd.DataFrame]:
+    """One season of games, box scores and prop lines (games start in October of ``year``)."""
+    n_teams = len(teams)
+    n_games = n_teams * NBA_GAMES_PER_TEAM // 2
+    days, home, away = _schedule(rng, n_teams, n_games, NBA_SEASON_DAYS)
+    n_games = len(days)
+    start = pd.Timestamp(year, 10, 24, 19)
+    dates = start + pd.to_timedelta(days, unit='D')
+    game_ids = np.array([f"{year}{i:05d}" for i in range(n_games)])
+
+    # (game, side, slot) arrays for every roster spot of both teams
+    team_index = np.stack([home, away], axis=1)
+    roster = players.to_numpy()
+    player_index = team_index[:, :, None] * NBA_ROSTER + np.arange(NBA_ROSTER)[None, None, :]
+    shape = player_index.shape
+    played = (rng.random(shape) < 0.9) | (np.arange(NBA_ROSTER) < 5)
+    minutes = np.clip(rng.normal(NBA_MINUTES, 4, shape), 0, 48).round() * played
+
+    def draw(column, scale=1.0):
+        return rng.poisson(players[column].to_numpy()[player_index] * minutes * scale)
+
+    fg2m, fg3m, ftm = draw('fg2_rate'), draw('fg3_rate'), draw('ft_rate')
+    points = 2 * fg2m + 3 * fg3m + ftm
+    team_points = points.sum(axis=2)
+    # No ties: the home starter makes one more free throw
+    tied = team_points[:, 0] == team_points[:, 1]
+    ftm[tied, 0, 0] += 1
+    points[tied, 0, 0] += 1
+    team_points[tied, 0] += 1
+
+    rebounds = draw('reb_rate')
+    offensive = rng.binomial(rebounds, 0.25)
+    margin = team_points - team_points[:, ::-1]
+    stats = pd.DataFrame({
+        'game_id': np.repeat(game_ids, 2 * NBA_ROSTER),
+        'player_id': roster[player_index.ravel(), 0],
+        'team_id': roster[player_index.ravel(), 1],
+        'minutes_played': minutes.ravel().astype(int),
+        'field_goals_made': (fg2m + fg3m).ravel(),
+        'field_goals_attempted': (fg2m + fg3m + draw('fg2_rate', 1.1) + draw('fg3_rate', 1.8)).ravel(),
+        'three_pointers_made': fg3m.ravel(),
+        'three_pointers_attempted': (fg3m + draw('fg3_rate', 1.8)).ravel(),
+        'free_throws_made': ftm.ravel(),
+        'free_throws_attempted': (ftm + draw('ft_rate', 0.3)).ravel(),
+        'rebounds': rebounds.ravel(),
+        'offensive_rebounds': offensive.ravel(),
+        'defensive_rebounds': (rebounds - offensive).ravel(),
+        'assists': draw('ast_rate').ravel(),
+        'steals': rng.poisson(minutes / 36).ravel(),
+        'blocks': rng.poisson(0.6 * minutes / 36).ravel(),
+        'turnovers': draw('tov_rate').ravel(),
+        'personal_fouls': rng.poisson(2.4 * minutes / 36).ravel(),
+        'points': points.ravel(),
+        'plus_minus': np.broadcast_to(margin[:, :, None], shape).ravel(),
+    })[played.ravel()]
+
+    games = pd.DataFrame({
+        'game_id': game_ids,
+        'date': dates,
+        'home_team_id': np.asarray(teams)[home],
+        'away_team_id': np.asarray(teams)[away],
+        'home_team_name': np.asarray(teams)[home],
+        'away_team_name': np.asarray(teams)[away],
+        'home_score': team_points[:, 0],
+        'away_score': team_points[:, 1],
+        'season': str(year),
+        'league': 'NBA',
+    })
+    season = {'games': games, 'player_game_stats': stats.reset_index(drop=True)}
+    if odds:
+        season['prop_odds'] = _nba_prop_odds(rng, players, player_index, game_ids, dates)
+    return season
+
+
+def _nba_prop_odds(rng: np.random.Generator, players: pd.DataFrame, player_index: np.ndarray,
+                   game_ids: np.ndarray, dates: pd.DatetimeIndex) -> pd.DataFrame:
+    """Lines near each rotation player's expected stat line, priced around -110 by two books."""
+    rotation = NBA_MINUTES >= PROP_MIN_MINUTES
+    index = player_index[:, :, rotation]
+    expected_minutes = np.broadcast_to(NBA_MINUTES[rotation], index.shape)
+    rates = {column: players[column].to_numpy()[index] * expected_minutes
+             for column in ['fg2_rate', 'fg3_rate', 'ft_rate', 'reb_rate', 'ast_rate']}
+    expected = {
+        'points': 2 * rates['fg2_rate'] + 3 * rates['fg3_rate'] + rates['ft_rate'],
+        'rebounds': rates['reb_rate'],
+        'assists': rates['ast_rate'],
+        'three_pointers': rates['fg3_rate'],
+    }
+    expected['points_rebounds_assists'] = expected['points'] + expected['rebounds'] + expected['assists']
+
+    game = np.broadcast_to(np.arange(len(game_ids))[:, None, None], index.shape).ravel()
+    frames = []
+    for prop, mean in expected.items():
+        for book in SPORTSBOOKS:
+            line = np.floor(mean.ravel() + rng.normal(0, 0.1 * np.sqrt(mean.ravel()) + 0.3)) + 0.5
+            shade = rng.integers(-3, 4, line.size) * 5
+            over, under = -110 - shade, -110 + shade
+            frames.append(pd.DataFrame({
+                'game_id': game_ids[game],
+                'player_id': players['player_id'].to_numpy()[index.ravel()],
+                'sportsbook': book,
+                'prop_type': prop,
+                'line': np.maximum(line, 0.5),
+                # -100 < price < 100 is written on the plus side
+                'over_odds': np.where(over > -100, 200 + over, over),
+                'under_odds': np.where(under > -100, 200 + under, under),
+                'timestamp': dates[game] - pd.Timedelta(hours=2),
+            }))
+    prop_odds = pd.concat(frames, ignore_index=True)
+    prop_odds['over_implied_prob'] = implied_probability(prop_odds['over_odds'])
+    prop_odds['under_implied_prob'] = implied_probability(prop_odds['under_odds'])
+    return prop_odds
+
+
+def generate_mlb_season(rng: np.random.Generator, year: int, teams: Sequence[str],
+                        strengths: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """One season of MLB games with batting and pitching lines (late March to September)."""
+    n_teams = len(teams)
+    days, home, away = _schedule(rng, n_teams, n_teams * MLB_GAMES_PER_TEAM // 2, MLB_GAMES_PER_TEAM + 24)
+    n_games = len(days)
+    game_ids = np.array([f"{year}{i:05d}" for i in range(n_games)])
+    dates = (pd.Timestamp(year, 3, 28) + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d')
+    team_ids = strengths['team_id'].to_numpy()
+    offense, pitching = strengths['offense'].to_numpy(), strengths['pitching'].to_numpy()
+
+    # Runs for (home, away); extra innings break ties
+    sides = np.stack([home, away], axis=1)
+    rate = 4.5 * np.exp(offense[sides] - pitching[sides[:, ::-1]] + np.array([0.03, 0.0]))
+    runs = rng.poisson(rate)
+    tied = runs[:, 0] == runs[:, 1]
+    runs[tied, rng.integers(0, 2, tied.sum())] += 1
+
+    # Starters rotate through each team's five-man rotation
+    appearances = pd.Series(sides.ravel()).groupby(sides.ravel()).cumcount().to_numpy().reshape(sides.shape)
+    starters = sides * 100 + appearances % MLB_ROTATION
+
+    games = pd.DataFrame({
+        'game_id': game_ids,
+        'game_date': dates,
+        'home_team_id': np.asarray(teams)[home],
+        'away_team_id': np.asarray(teams)[away],
+        'home_team_score': runs[:, 0],
+        'away_team_score': runs[:, 1],
+        'season': year,
+        'home_starting_pitcher_id': 600000 + starters[:, 0],
+        'away_starting_pitcher_id': 600000 + starters[:, 1],
+    })
+
+    # Batting: (game, side, lineup spot)
+    team_runs = runs.ravel()
+    at_bats = rng.integers(3, 6, (n_games * 2, MLB_LINEUP))
+    average = strengths['batting_avg'].to_numpy()[sides.ravel()][:, None] + rng.normal(0, 0.02, (1, MLB_LINEUP))
+    hits = rng.binomial(at_bats, np.clip(average, 0.15, 0.35))
+    home_runs = rng.binomial(hits, 0.12)
+    walks = rng.poisson(0.35, at_bats.shape)
+    batters = pd.DataFrame({
+        'game_id': np.repeat(np.repeat(game_ids, 2), MLB_LINEUP),
+        'game_date': np.repeat(np.repeat(dates, 2), MLB_LINEUP),
+        'player_id': 500000 + (sides.ravel()[:, None] * 100 + np.arange(MLB_LINEUP)).ravel(),
+        'team_id': np.repeat(team_ids[sides.ravel()], MLB_LINEUP).astype(str),
+        'at_bats': at_bats.ravel(),
+        'runs': rng.multinomial(team_runs, np.full(MLB_LINEUP, 1 / MLB_LINEUP)).ravel(),
+        'hits': hits.ravel(),
+        'rbi': rng.multinomial(team_runs, np.full(MLB_LINEUP, 1 / MLB_LINEUP)).ravel(),
+        'home_runs': home_runs.ravel(),
+        'walks': walks.ravel(),
+        'strikeouts': rng.binomial(at_bats - hits, 0.3).ravel(),
+        'batting_avg': np.round(average, 3).ravel(),
+        'on_base_plus_slugging': np.round(2.6 * average + rng.normal(0, 0.05, at_bats.shape), 3).ravel(),
+    })
+
+    # Pitching: the starter and two relievers split what the other side produced
+    opponent = np.arange(n_games * 2).reshape(-1, 2)[:, ::-1].ravel()
+    faced = {
+        'hits_allowed': hits.sum(axis=1)[opponent],
+        'runs_allowed': team_runs[opponent],
+        'walks': walks.sum(axis=1)[opponent],
+        'strikeouts': batters['strikeouts'].to_numpy().reshape(-1, MLB_LINEUP).sum(axis=1)[opponent],
+        'home_runs_allowed': home_runs.sum(axis=1)[opponent],
+    }
+    starter_innings = np.clip(np.round(rng.normal(5.5, 1.2, n_games * 2) * 3) / 3, 1, 8)
+    relief_first = np.round((9 - starter_innings) * rng.uniform(0.3, 0.7, n_games * 2) * 3) / 3
+    innings = np.stack([starter_innings, relief_first, 9 - starter_innings - relief_first], axis=1)
+    share = innings / 9
+    split = {column: rng.multinomial(total, share) for column, total in faced.items()}
+    relievers = np.argsort(rng.random((n_games * 2, MLB_BULLPEN)), axis=1)[:, :2] + MLB_ROTATION
+    pitcher_slot = np.concatenate([(appearances % MLB_ROTATION).ravel()[:, None], relievers], axis=1)
+    pitchers = pd.DataFrame({
+        'game_id': np.repeat(np.repeat(game_ids, 2), 3),
+        'game_date': np.repeat(np.repeat(dates, 2), 3),
+        'player_id': 600000 + (sides.ravel()[:, None] * 100 + pitcher_slot).ravel(),
+        'team_id': np.repeat(team_ids[sides.ravel()], 3).astype(str),
+        'innings_pitched': np.round(innings, 1).ravel(),
+        **{column: values.ravel() for column, values in split.items()},
+        'earned_runs': rng.binomial(split['runs_allowed'], 0.9).ravel(),
+        'era': np.round(np.clip(4.2 - 4 * pitching[sides.ravel()][:, None] + rng.normal(0, 0.6, innings.shape),
+                                1.5, 8.0), 2).ravel(),
+    })
+    return {'mlb_games': games, 'mlb_batter_stats': batters, 'mlb_pitcher_stats': pitchers}
+
+
+def _bulk_insert(connection, model, frame: pd.DataFrame) -> None:
+    """Core executemany inserts in chunks of ``INSERT_CHUNK`` rows."""
+    for start in range(0, len(frame), INSERT_CHUNK):
+        connection.execute(insert(model), frame.iloc[start:start + INSERT_CHUNK].to_dict('records'))
+
+
+def generate_database(path: str, seasons: int = 1, leagues: Iterable[str] = ('nba', 'mlb'),
+                      last_season: int = LAST_SEASON, n_teams: int = 30, odds: bool = True,
+                      seed: int = 0) -> Dict[str, int]:
+    """Writes ``seasons`` synthetic seasons per league into a new SQLite file.
+
+    Args:
+        path: Database file; replaced if it exists.
+        seasons: Number of seasons, ending with ``last_season``.
+        leagues: 'nba' and/or 'mlb'.
+        n_teams: Teams per league (at most 30), to scale a database down.
+        odds: Whether to post NBA prop lines.
+        seed: Seed of every draw; equal arguments give identical databases.
+
+    Returns:
+        Row count per table.
+    """
+    if not 1 <= seasons <= 20:
+        raise ValueError("seasons must be between 1 and 20")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    rng = np.random.default_rng(seed)
+    years = range(last_season - seasons + 1, last_season + 1)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    counts: Dict[str, int] = {}
+    start_time = time.perf_counter()
+
+    def record(table, frame):
+        counts[table] = counts.get(table, 0) + len(frame)
+
+    with engine.begin() as connection:
+        if 'nba' in leagues:
+            teams = NBA_TEAMS[:n_teams]
+            players = _nba_players(rng, teams)
+            _bulk_insert(connection, Teams, pd.DataFrame({'team_id': teams, 'team_name': teams,
+                                                          'team_abbreviation': teams, 'league': 'NBA'}))
+            _bulk_insert(connection, Players, players.assign(full_name=players['player_id'], team_name=players['team_id'],
+                                                             league='NBA', active=True)[
+                ['player_id', 'full_name', 'team_id', 'team_name', 'league', 'active']])
+            record('teams', teams)
+            record('players', players)
+            for year in years:
+                season = generate_nba_season(rng, players, year, teams, odds=odds)
+                for table, model in [('games', Games), ('player_game_stats', PlayerGameStats),
+                                     ('prop_odds', PropOdds)]:
+                    if table in season:
+                        _bulk_insert(connection, model, season[table])
+                        record(table, season[table])
+                logger.info(f"NBA {year}: {len(season['games']):,} games, "
+                            f"{len(season['player_game_stats']):,} box scores")
+
+        if 'mlb' in leagues:
+            teams = MLB_TEAMS[:n_teams]
+            strengths = pd.DataFrame({
+                'team_id': 108 + np.arange(len(teams)),
+                'team_abbreviation': teams,
+                'offense': rng.normal(0, 0.1, len(teams)),
+                'pitching': rng.normal(0, 0.1, len(teams)),
+                'batting_avg': rng.normal(0.248, 0.01, len(teams)),
+            })
+            mlb_teams = strengths[['team_id', 'team_abbreviation']].assign(team_name=teams)
+            mlb_teams.to_sql('mlb_teams', connection, index=False)
+            record('mlb_teams', mlb_teams)
+            for year in years:
+                season = generate_mlb_season(rng, year, teams, strengths)
+                for table, frame in season.items():
+                    frame.to_sql(table, connection, index=False, if_exists='append', chunksize=INSERT_CHUNK)
+                    record(table, frame)
+                logger.info(f"MLB {year}: {len(season['mlb_games']):,} games")
+    engine.dispose()
+
+    logger.info(f"Synthetic database written to {path} in {time.perf_counter() - start_time:.1f}s: "
+                + ", ".join(f"{table} {count:,}" for table, count in counts.items()))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic NBA/MLB database.")
+    parser.add_argument("--seasons", type=int, default=1, help="Seasons per league (1-20).")
+    parser.add_argument("--output", type=str, default="data/synthetic/sports_model.db")
+    parser.add_argument("--leagues", nargs="+", choices=["nba", "mlb"], default=["nba", "mlb"])
+    parser.add_argument("--teams", type=int, default=30)
+    parser.add_argument("--no-odds", action="store_true", help="Skip NBA prop lines.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    generate_database(args.output, seasons=args.seasons, leagues=args.leagues, n_teams=args.teams,
+                      odds=not args.no_odds, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,13 @@ from datetime import datetime
 from pathlib import Path
 import sys
 import time
+from collections import defaultdict, deque
 
 # Add src to path for imports
 sys.path.append('src')
 from prediction.mlb_prediction_pipeline import MLBPredictionPipeline
+from analysis.backtest import settle_bets
+from utils.odds import DEFAULT_AMERICAN_ODDS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -76,49 +79,57 @@ def prepare_game_data_for_pipeline(games_df):
     logger.info(f"Prepared {len(games_data)} games for pipeline testing")
     return games_data
 
+def measure_sequential_rate(games_data, pipeline, sample_size=100):
+    """Measure games/sec of the one-game-at-a-time path on a sample, as a baseline."""
+    sample = games_data[:sample_size]
+    start_time = time.perf_counter()
+    for game_data in sample:
+        try:
+            pipeline.predict_game(game_data)
+        except Exception:
+            pass
+    elapsed = time.perf_counter() - start_time
+    rate = len(sample) / elapsed if elapsed > 0 else float('inf')
+    logger.info(f"Sequential baseline: {len(sample)} games in {elapsed:.2f}s ({rate:.1f} games/sec)")
+    return rate
+
 def run_large_scale_test(games_data, pipeline):
     """Run predictions on large dataset and collect results."""
     logger.info(f"Running large-scale test on {len(games_data)} games...")
     
-    start_time = time.time()
+    start_time = time.perf_counter()
+    predictions = pipeline.predict_multiple_games(games_data)
+    total_time = time.perf_counter() - start_time
+    
+    # Results come back in input order; games that could not be predicted are left out
+    pending = defaultdict(deque)
+    for game_data in games_data:
+        pending[(game_data['home_team_id'], game_data['away_team_id'], game_data['game_date'])].append(game_data)
+    
     results = []
-    errors = []
+    for prediction in predictions:
+        info = prediction['game_info']
+        game_data = pending[(info['home_team'], info['away_team'], info['date'])].popleft()
+        
+        # Add actual outcome for evaluation
+        prediction['actual_outcome'] = {
+            'home_wins': game_data['actual_home_wins'],
+            'home_score': game_data['actual_home_score'],
+            'away_score': game_data['actual_away_score'],
+            'total_runs': game_data['actual_home_score'] + game_data['actual_away_score']
+        }
+        results.append(prediction)
     
-    for i, game_data in enumerate(games_data):
-        try:
-            # Make prediction
-            prediction = pipeline.predict_game(game_data)
-            
-            # Add actual outcome for evaluation
-            prediction['actual_outcome'] = {
-                'home_wins': game_data['actual_home_wins'],
-                'home_score': game_data['actual_home_score'],
-                'away_score': game_data['actual_away_score'],
-                'total_runs': game_data['actual_home_score'] + game_data['actual_away_score']
-            }
-            
-            results.append(prediction)
-            
-            # Progress update
-            if (i + 1) % 100 == 0:
-                elapsed = time.time() - start_time
-                rate = (i + 1) / elapsed
-                logger.info(f"Processed {i + 1}/{len(games_data)} games ({rate:.1f} games/sec)")
-                
-        except Exception as e:
-            error_info = {
-                'game_id': game_data.get('game_id', 'unknown'),
-                'error': str(e),
-                'game_data': game_data
-            }
-            errors.append(error_info)
-            logger.error(f"Error predicting game {game_data.get('game_id', 'unknown')}: {e}")
-    
-    total_time = time.time() - start_time
-    logger.info(f"Large-scale test completed in {total_time:.1f} seconds")
+    errors = [
+        {'game_id': game_data.get('game_id', 'unknown'), 'error': 'prediction failed', 'game_data': game_data}
+        for remaining in pending.values() for game_data in remaining
+    ]
+    
+    rate = len(games_data) / total_time if total_time > 0 else float('inf')
+    logger.info(f"Large-scale test completed in {total_time:.2f} seconds ({rate:.1f} games/sec)")
     logger.info(f"Successfully predicted {len(results)} games, {len(errors)} errors")
     
-    return results, errors
+    return results, errors, rate
 
 def evaluate_predictions(results):
     """Evaluate prediction accuracy and betting performance."""
@@ -160,18 +171,21 @@ def evaluate_predictions(results):
     total_bets = len(betting_games)
     
     if total_bets > 0:
-        correct_bets = 0
-        for _, row in betting_games.iterrows():
-            if row['recommended_bet'] == row['home_team'] and row['actual_home_wins'] == 1:
-                correct_bets += 1
-            elif row['recommended_bet'] == row['away_team'] and row['actual_home_wins'] == 0:
-                correct_bets += 1
+        bet_won = (((betting_games['recommended_bet'] == betting_games['home_team']) & (betting_games['actual_home_wins'] == 1))
+                   | ((betting_games['recommended_bet'] == betting_games['away_team']) & (betting_games['actual_home_wins'] == 0)))
+        # Grade each pick as a one-unit bet at the standard price (no moneylines are stored)
+        settled = settle_bets(pd.DataFrame({
+            'line': 0.5, 'bet_type': 'over', 'actual_value': bet_won.astype(float).to_numpy(),
+            'american_odds': DEFAULT_AMERICAN_ODDS,
+        }))
         
-        betting_accuracy = correct_bets / total_bets
+        betting_accuracy = bet_won.mean()
+        betting_roi = settled['unit_profit'].mean()
         avg_edge = betting_games['edge'].mean()
         avg_confidence = betting_games['confidence'].mean()
     else:
         betting_accuracy = 0
+        betting_roi = 0
         avg_edge = 0
         avg_confidence = 0
     
@@ -200,6 +214,7 @@ def evaluate_predictions(results):
             'total_bets_recommended': total_bets,
             'betting_percentage': round(total_bets / total_games * 100, 1),
             'betting_accuracy': round(betting_accuracy, 4),
+            'betting_roi': round(betting_roi, 4),
             'average_edge': round(avg_edge, 4),
             'average_confidence': round(avg_confidence, 4)
         },
@@ -218,7 +233,7 @@ def evaluate_predictions(results):
     
     return evaluation, df
 
-def generate_detailed_report(evaluation, df, errors):
+def generate_detailed_report(evaluation, df, errors, throughput):
     """Generate comprehensive test report."""
     logger.info("Generating detailed test report...")
     
@@ -235,6 +250,7 @@ OVERALL PERFORMANCE:
 SPORTSBOOK PERFORMANCE:
 - Recommended Bets: {evaluation['betting_performance']['total_bets_recommended']:,} ({evaluation['betting_performance']['betting_percentage']:.1f}% of games)
 - Betting Accuracy: {evaluation['betting_performance']['betting_accuracy']:.1%}
+- Flat-Stake ROI at {DEFAULT_AMERICAN_ODDS}: {evaluation['betting_performance']['betting_roi']:.1%}
 - Average Edge: {evaluation['betting_performance']['average_edge']:.1%}
 - Average Confidence: {evaluation['betting_performance']['average_confidence']:.1%}
 
@@ -253,6 +269,12 @@ ERROR ANALYSIS:
 - Total Errors: {len(errors)}
 - Success Rate: {(1 - len(errors) / (evaluation['overall_performance']['total_games'] + len(errors))):.1%}
 
+THROUGHPUT:
+- Batch Prediction: {throughput['batch_games_per_sec']:.1f} games/sec
+- One Game at a Time: {throughput['sequential_games_per_sec']:.1f} games/sec
+- Speedup: {throughput['speedup']:.1f}x
+- Team Stats Cache: {throughput['cache']['hit_rate']:.1%} hit rate ({throughput['cache']['hits']:,} hits, {throughput['cache']['misses']:,} misses)
+
 PERFORMANCE BENCHMARKS:
 - Random Chance Accuracy: 50.0%
 - Random Chance AUC: 0.5000
@@ -306,8 +328,20 @@ def main():
         logger.error("Failed to load model - cannot run test")
         return
     
-    # Run predictions
-    results, errors = run_large_scale_test(games_data, pipeline)
+    # Run predictions, timing the batch path against the one-game-at-a-time baseline.
+    # Both start from an empty team stats cache, so neither is timed on the other's lookups.
+    pipeline.cache.clear()
+    sequential_rate = measure_sequential_rate(games_data, pipeline)
+    pipeline.cache.clear()
+    pipeline.cache.reset_stats()
+    results, errors, batch_rate = run_large_scale_test(games_data, pipeline)
+    throughput = {
+        'batch_games_per_sec': batch_rate,
+        'sequential_games_per_sec': sequential_rate,
+        'speedup': batch_rate / sequential_rate if sequential_rate else float('inf'),
+        'cache': pipeline.cache.stats
+    }
+    logger.info(f"Batch prediction is {throughput['speedup']:.1f}x faster than one game at a time")
     
     if not results:
         logger.error("No successful predictions - test failed")
@@ -317,7 +351,7 @@ def main():
     evaluation, df = evaluate_predictions(results)
     
     # Generate report
-    report = generate_detailed_report(evaluation, df, errors)
+    report = generate_detailed_report(evaluation, df, errors, throughput)
     
     # Save results
     output_dir = Path("analysis_results")
@@ -0,0 +1,12 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.config import config
+
+@pytest.fixture(autouse=True)
+def stage_records_in_tmp_path(monkeypatch, tmp_path):
+    """Profiled entry points write their stage records under the test's temp dir, not logs/."""
+    monkeypatch.setitem(config.config['instrumentation'], 'output', str(tmp_path / 'stages.jsonl'))
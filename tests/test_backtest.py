@@ -0,0 +1,175 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.database import Base, Games, ModelPredictions, PlayerGameStats, PropOdds
+from src.analysis.backtest import backtest, load_backtest_bets, max_drawdown, settle_bets, simulate_bankroll
+from src.modeling.distributions import prob_under
+
+@pytest.fixture
+def bets():
+    return pd.DataFrame({
+        'game_id': ['g1', 'g1', 'g2', 'g2', 'g3'],
+        'date': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-02', '2024-01-03']),
+        'season': '2024',
+        'prop_type': ['points', 'rebounds', 'points', 'assists', 'points'],
+        'sportsbook': ['FanDuel', 'FanDuel', 'DraftKings', 'FanDuel', 'DraftKings'],
+        'line': [20.5, 8.0, 15.5, 6.5, 10.5],
+        'bet_type': ['over', 'under', 'under', 'over', 'over'],
+        'model_probability': [0.60, 0.58, 0.62, 0.55, 0.65],
+        'american_odds': [-110, 150, 100, -110, -120],
+        'closing_odds': [-130, 150, -110, -105, -120],
+        'stake_recommendation': [0.04, 0.02, 0.05, 0.01, 0.03],
+        'actual_value': [25, 8, 20, np.nan, 11],
+    })
+
+def test_settles_wins_losses_pushes_and_voids(bets):
+    """Outcomes and unit profits follow the line and the American price."""
+    settled = settle_bets(bets)
+    assert settled['outcome'].tolist() == ['won', 'push', 'lost', 'void', 'won']
+    np.testing.assert_allclose(settled['unit_profit'], [100 / 110, 0, -1, 0, 100 / 120])
+    assert settled['clv'].iloc[0] == pytest.approx((1 + 100 / 110) / (1 + 100 / 130) - 1)
+    assert settled['clv'].iloc[1] == pytest.approx(0)
+
+def test_flat_staking_roi_and_drawdown(bets):
+    """Flat staking risks one unit per graded bet; ROI, drawdown and groups agree."""
+    results = backtest(bets, staking='flat', initial_bankroll=10)
+    summary = results['summary']
+    profit = 100 / 110 - 1 + 100 / 120
+    assert (summary['won'], summary['lost'], summary['push'], summary['void']) == (2, 1, 1, 1)
+    assert summary['staked'] == 4
+    assert summary['roi'] == pytest.approx(profit / 4)
+    assert summary['final_bankroll'] == pytest.approx(10 + profit)
+    assert summary['max_drawdown'] == pytest.approx(1 - (10 + 100 / 110 - 1) / (10 + 100 / 110))
+
+    by_book = results['by_group']['sportsbook']
+    assert by_book.loc['DraftKings', 'profit'] == pytest.approx(100 / 120 - 1)
+    assert set(results['calibration']) == {'season', 'prop_type', 'sportsbook'}
+
+def test_kelly_staking_compounds_by_day(bets):
+    """Same-day Kelly stakes share the start-of-day bankroll and days compound."""
+    settled = settle_bets(bets)
+    path = simulate_bankroll(settled, staking='kelly', initial_bankroll=100, kelly_multiplier=1.0, max_stake=0.04)
+    day1 = 1 + 0.04 * 100 / 110
+    day2 = day1 * (1 - 0.04)
+    day3 = day2 * (1 + 0.03 * 100 / 120)
+    np.testing.assert_allclose(path['bankroll'].to_numpy(), 100 * np.array([day1, day2, day3]))
+    assert path['stakes'].iloc[2] == pytest.approx(0.04 * 100 * day1)
+    assert path['stakes'].iloc[3] == 0
+    with pytest.raises(ValueError):
+        simulate_bankroll(settled, staking='martingale')
+
+def test_max_drawdown_measures_from_peak():
+    """Drawdown is the deepest fall below a running peak, including the start."""
+    assert max_drawdown(pd.Series([120.0, 90.0, 130.0]), 100) == pytest.approx(0.25)
+    assert max_drawdown(pd.Series([80.0]), 100) == pytest.approx(0.2)
+
+def test_scales_to_a_million_bets():
+    """A million bets settle, stake and summarize in a few seconds."""
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    large = pd.DataFrame({
+        'game_id': rng.integers(0, 50_000, n).astype(str),
+        'date': pd.Timestamp('2023-10-01') + pd.to_timedelta(rng.integers(0, 400, n), unit='D'),
+        'season': rng.choice(['2023', '2024'], n),
+        'prop_type': rng.choice(['points', 'rebounds', 'assists'], n),
+        'sportsbook': rng.choice(['FanDuel', 'DraftKings'], n),
+        'line': rng.integers(5, 30, n) + 0.5,
+        'bet_type': rng.choice(['over', 'under'], n),
+        'model_probability': rng.uniform(0.5, 0.7, n),
+        'american_odds': -110,
+        'stake_recommendation': 0.0005,
+        'actual_value': rng.integers(0, 40, n).astype(float),
+    })
+    start = time.perf_counter()
+    results = backtest(large, staking='kelly')
+    elapsed = time.perf_counter() - start
+    assert results['summary']['bets'] == n
+    assert elapsed < 30
+
+def test_load_backtest_bets_grades_stored_predictions(tmp_path):
+    """Stored predictions, lines and box scores of the backtest seasons become graded bets."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'backtest.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        Games(game_id='g1', date=pd.Timestamp('2024-01-05').to_pydatetime(), season='2024',
+              home_team_id='h', away_team_id='a', home_team_name='Home', away_team_name='Away'),
+        Games(game_id='g0', date=pd.Timestamp('2022-01-05').to_pydatetime(), season='2022',
+              home_team_id='h', away_team_id='a', home_team_name='Home', away_team_name='Away'),
+        ModelPredictions(game_id='g1', player_id='p1', prop_type='points', model_name='test',
+                         predicted_probability=0.70, created_at=pd.Timestamp('2024-01-05 10:00').to_pydatetime()),
+        ModelPredictions(game_id='g0', player_id='p1', prop_type='points', model_name='test',
+                         predicted_probability=0.70, created_at=pd.Timestamp('2022-01-05 10:00').to_pydatetime()),
+        PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='points',
+                 line=20.5, over_odds=-110, under_odds=-110, timestamp=pd.Timestamp('2024-01-05 09:00').to_pydatetime()),
+        PropOdds(game_id='g0', player_id='p1', sportsbook='FanDuel', prop_type='points',
+                 line=20.5, over_odds=-110, under_odds=-110, timestamp=pd.Timestamp('2022-01-05 09:00').to_pydatetime()),
+        PlayerGameStats(game_id='g1', player_id='p1', team_id='h', points=22, rebounds=5, assists=3,
+                        three_pointers_made=2),
+    ])
+    session.commit()
+
+    loaded = load_backtest_bets(session, years=[2024], value_threshold=0.05, min_confidence=0.55)
+    session.close()
+    assert loaded[['game_id', 'bet_type', 'actual_value', 'season']].values.tolist() == [['g1', 'over', 22, '2024']]
+    assert backtest(loaded)['summary']['won'] == 1
+
+def test_load_backtest_bets_replays_stored_distributions(tmp_path):
+    """Stored count distributions are priced at each stored line, as recommend_bets prices them."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'backtest.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        Games(game_id='g1', date=pd.Timestamp('2024-01-05').to_pydatetime(), season='2024',
+              home_team_id='h', away_team_id='a', home_team_name='Home', away_team_name='Away'),
+        ModelPredictions(game_id='g1', player_id='p1', prop_type='points', model_name='test',
+                         predicted_probability=0.5, predicted_mean=24.0, dispersion=0.05,
+                         created_at=pd.Timestamp('2024-01-05 10:00').to_pydatetime()),
+        PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='points',
+                 line=28.5, over_odds=-110, under_odds=-110, timestamp=pd.Timestamp('2024-01-05 09:00').to_pydatetime()),
+        PlayerGameStats(game_id='g1', player_id='p1', team_id='h', points=22, rebounds=5, assists=3,
+                        three_pointers_made=2),
+    ])
+    session.commit()
+
+    loaded = load_backtest_bets(session, years=[2024], value_threshold=0.05, min_confidence=0.55)
+    session.close()
+    assert loaded[['bet_type', 'line']].values.tolist() == [['under', 28.5]]
+    assert loaded['model_probability'].iloc[0] == pytest.approx(prob_under(24.0, 0.05, 28.5))
+
+def test_load_backtest_bets_prices_at_prediction_time(tmp_path):
+    """Bets take the price posted when the prediction was stored and close at the last pre-game price."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'backtest.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    at = lambda time: pd.Timestamp(f'2024-01-05 {time}').to_pydatetime()
+    session.add_all([
+        Games(game_id='g1', date=at('19:00'), season='2024',
+              home_team_id='h', away_team_id='a', home_team_name='Home', away_team_name='Away'),
+        ModelPredictions(game_id='g1', player_id='p1', prop_type='points', model_name='test',
+                         predicted_probability=0.70, created_at=at('10:00')),
+        PlayerGameStats(game_id='g1', player_id='p1', team_id='h', points=22, rebounds=5, assists=3,
+                        three_pointers_made=2),
+    ] + [PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='points', line=20.5,
+                  over_odds=over, under_odds=-110, timestamp=at(time))
+         for over, time in [(-110, '09:00'), (-150, '12:00'), (-160, '18:30'), (-300, '21:00')]])
+    session.commit()
+
+    loaded = load_backtest_bets(session, years=[2024], value_threshold=0.05, min_confidence=0.55)
+    session.close()
+    assert loaded[['american_odds', 'closing_odds']].values.tolist() == [[-110, -160]]
+    assert backtest(loaded)['summary']['mean_clv'] == pytest.approx((1 + 100 / 110) / (1 + 100 / 160) - 1)
+
+def test_backtest_without_bets(bets):
+    """A season without any qualifying bet summarizes to zero bets instead of failing."""
+    summary = backtest(bets.iloc[:0])['summary']
+    assert (summary['bets'], summary['staked'], summary['profit']) == (0, 0, 0)
+    assert np.isnan(summary['roi']) and summary['final_bankroll'] == 100.0
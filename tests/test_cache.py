@@ -0,0 +1,61 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.cache import TTLCache, bump_data_version, cache_key, data_version, get_cache
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction_and_hit_rate():
+    """The least recently used entry is evicted first and lookups are counted."""
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats['evictions'] == 1
+    assert cache.stats['hit_rate'] == pytest.approx(3 / 4)
+
+def test_entries_expire_after_ttl():
+    """Entries older than the TTL are treated as misses and recomputed."""
+    clock = Clock()
+    cache = TTLCache(ttl=10, clock=clock)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+
+    assert cache.get_or_compute('k', compute) == 1
+    clock.now = 5
+    assert cache.get_or_compute('k', compute) == 1
+    clock.now = 16
+    assert cache.get_or_compute('k', compute) == 2
+    assert cache.stats['expirations'] == 1
+
+def test_ingest_invalidates_domain():
+    """Bumping a domain's data version changes its keys and drops its cached entries only."""
+    cache = get_cache('test_domains')
+    nba_key, mlb_key = cache_key('nba', 'player_info', 'p1'), cache_key('mlb', 'team_stats', 'NYY', as_of='2024-07-01')
+    cache.set(nba_key, 'player')
+    cache.set(mlb_key, 'team')
+
+    version = data_version('nba')
+    assert bump_data_version('nba') == version + 1
+    assert cache_key('nba', 'player_info', 'p1') != nba_key
+    assert cache.get(nba_key) is None
+    assert cache.get(mlb_key) == 'team'
+
+def test_source_file_changes_version(tmp_path):
+    """Writes to a database file by another process also change the key."""
+    db = tmp_path / 'stats.db'
+    db.write_bytes(b'v1')
+    before = cache_key('mlb', 'team_stats', 'NYY', source=db)
+    os.utime(db, ns=(1, 1))
+    assert cache_key('mlb', 'team_stats', 'NYY', source=db) != before
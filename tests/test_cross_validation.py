@@ -0,0 +1,89 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.cross_validation import WalkForwardSplit, chronological_split, run_walk_forward
+
+@pytest.fixture
+def game_dates():
+    """Provides 60 days of games with three games per day."""
+    days = pd.date_range('2023-10-24', periods=60, freq='D')
+    return pd.Series(np.repeat(days, 3))
+
+def test_expanding_folds_never_train_on_future_games(game_dates):
+    """Every training row must be dated strictly before every test row of its fold."""
+    splitter = WalkForwardSplit(n_splits=4)
+    folds = list(splitter.split(np.zeros(len(game_dates)), groups=game_dates))
+
+    assert len(folds) == 4
+    for train_idx, test_idx in folds:
+        assert game_dates.iloc[train_idx].max() < game_dates.iloc[test_idx].min()
+
+    # Expanding window: training sets only grow
+    train_sizes = [len(train_idx) for train_idx, _ in folds]
+    assert train_sizes == sorted(train_sizes)
+
+def test_same_day_games_stay_together(game_dates):
+    """Games played on the same date are never split across train and test."""
+    splitter = WalkForwardSplit(n_splits=3)
+    for train_idx, test_idx in splitter.split(np.zeros(len(game_dates)), groups=game_dates):
+        assert set(game_dates.iloc[train_idx]).isdisjoint(set(game_dates.iloc[test_idx]))
+        assert len(test_idx) % 3 == 0
+
+def test_embargo_gap(game_dates):
+    """The embargo removes the days immediately before each test window."""
+    splitter = WalkForwardSplit(n_splits=3, embargo_days=5)
+    for train_idx, test_idx in splitter.split(np.zeros(len(game_dates)), groups=game_dates):
+        gap = (game_dates.iloc[test_idx].min() - game_dates.iloc[train_idx].max()).days
+        assert gap > 5
+
+def test_rolling_window_limits_history(game_dates):
+    """A rolling window only trains on the configured number of days."""
+    splitter = WalkForwardSplit(n_splits=3, window='rolling', train_days=10)
+    for train_idx, test_idx in splitter.split(np.zeros(len(game_dates)), groups=game_dates):
+        assert game_dates.iloc[train_idx].nunique() <= 10
+
+def test_invalid_configuration():
+    """Rolling windows need a length and there must be enough dates for the folds."""
+    with pytest.raises(ValueError):
+        WalkForwardSplit(window='rolling')
+    with pytest.raises(ValueError):
+        list(WalkForwardSplit(n_splits=5).split(np.zeros(4)))
+
+def test_chronological_split_without_dates():
+    """Without dates the row order is used and the last rows are held out."""
+    train_idx, test_idx = chronological_split(None, test_size=0.2, n_samples=10)
+    assert list(train_idx) == list(range(8))
+    assert list(test_idx) == [8, 9]
+
+def test_run_walk_forward_scores_each_fold(game_dates):
+    """The fold runner returns one score per fold."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({'f1': rng.normal(size=len(game_dates)), 'f2': rng.normal(size=len(game_dates))})
+    y = (X['f1'] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int)
+
+    results = run_walk_forward(LogisticRegression(), X, y, WalkForwardSplit(n_splits=3),
+                               groups=game_dates, n_jobs=1)
+
+    assert len(results['scores']) == 3
+    assert 0.5 < results['mean_score'] <= 1.0
+    assert [fold['fold'] for fold in results['folds']] == [0, 1, 2]
+
+def test_single_class_folds_score_nan(game_dates):
+    """A fold whose test rows hold one class scores NaN and is left out of the mean."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({'f1': rng.normal(size=len(game_dates))})
+    y = (X['f1'] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int)
+    cv = WalkForwardSplit(n_splits=3)
+    last_test = list(cv.split(X, y, game_dates))[-1][1]
+    y.iloc[last_test] = 1
+
+    results = run_walk_forward(LogisticRegression(), X, y, cv, groups=game_dates, n_jobs=1)
+
+    assert np.isnan(results['scores'][-1]) and not np.isnan(results['scores'][:-1]).any()
+    assert results['mean_score'] == pytest.approx(results['scores'][:-1].mean())
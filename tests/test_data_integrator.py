@@ -55,4 +55,15 @@ def test_missing_game_id_column(data_integrator_instance, sample_player_stats):
     games_no_id = pd.DataFrame({'id': ['g1'], 'date': ['2023-10-25']})
     
     with pytest.raises(ValueError, match="Both DataFrames must contain a 'game_id' column."):
-        data_integrator_instance.integrate_game_data(sample_player_stats, games_no_id) 
\ No newline at end of file
+        data_integrator_instance.integrate_game_data(sample_player_stats, games_no_id) 
+def test_reposted_lines_keep_one_row_per_player_game(data_integrator_instance, sample_player_stats):
+    """Only the latest FanDuel points line of a player-game is merged, whatever order the rows come in."""
+    odds = pd.DataFrame({
+        'game_id': ['g1', 'g1', 'g1'], 'player_id': [1, 1, 2], 'sportsbook': 'FanDuel', 'prop_type': 'player_points',
+        'line': [11.5, 10.5, 14.5], 'over_odds': [-120, -110, -110], 'under_odds': [100, -110, -110],
+        'timestamp': pd.to_datetime(['2023-10-25 12:00', '2023-10-25 09:00', '2023-10-25 09:00']),
+    })
+    merged = data_integrator_instance.integrate_sportsbook_odds(sample_player_stats.copy(), odds)
+
+    assert len(merged) == len(sample_player_stats)
+    assert merged.loc[(merged['game_id'] == 'g1') & (merged['player_id'] == '1'), 'fanduel_points_line'].tolist() == [11.5]
@@ -0,0 +1,92 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing.data_validator import DataValidator
+
+@pytest.fixture
+def rules():
+    return {
+        'required_columns': ['player_id', 'game_id', 'points'],
+        'not_null': ['player_id', 'game_id'],
+        'column_types': {'points': 'numeric'},
+        'range_checks': {'points': {'min': 0, 'max': 100}, 'minutes_played': {'min': 0, 'max': 70}},
+        'unique_constraints': [['player_id', 'game_id']],
+        'sample_size': 2,
+    }
+
+@pytest.fixture
+def stats():
+    return pd.DataFrame({
+        'player_id': ['1', '2', '1', '2', None, '3'],
+        'game_id': ['g1', 'g1', 'g2', 'g1', 'g3', 'g3'],
+        'points': [10, 15, 150, 22, 5, 'n/a'],
+        'minutes_played': [25, -5, 28, 30, 20, np.nan],
+    })
+
+def test_report_lists_every_failing_rule(rules, stats):
+    """All range, null, type and uniqueness violations are counted in one report."""
+    report = DataValidator(rules).validate(stats)
+
+    assert not report.passed
+    assert report.rows == 6 and report.invalid_rows == 5
+    failed = {name: rule['violations'] for name, rule in report.failed_rules.items()}
+    assert failed == {'not_null:player_id': 1, 'type:points': 1, 'range:points': 1,
+                      'range:minutes_played': 1, 'unique:player_id+game_id': 1}
+    assert report.rules['unique:player_id+game_id']['sample_rows'] == [3]
+    assert report.rules['range:minutes_played']['sample_rows'] == [1]
+
+def test_valid_frame_passes_and_matches_legacy_bool_api(rules):
+    """A clean frame passes and validate_player_game_stats still returns a bool."""
+    clean = pd.DataFrame({'player_id': ['1', '2'], 'game_id': ['g1', 'g1'], 'points': [3, 4]})
+    validator = DataValidator(rules)
+    assert validator.validate(clean).passed
+    assert validator.validate_player_game_stats(clean) is True
+
+def test_missing_required_columns_fail(rules):
+    """Missing required columns fail validation even with no bad rows."""
+    report = DataValidator(rules).validate(pd.DataFrame({'player_id': ['1'], 'game_id': ['g1']}))
+    assert report.missing_columns == ['points'] and not report.passed
+
+def test_chunked_validation_matches_whole_frame(rules, stats):
+    """Validating in chunks gives the same counts, duplicates across chunks included."""
+    validator = DataValidator(rules)
+    whole = validator.validate(stats)
+    chunked = validator.validate_chunks([stats.iloc[:2], stats.iloc[2:4], stats.iloc[4:]])
+    assert chunked.to_dict() == whole.to_dict()
+
+def test_quarantine_splits_rows_and_names_the_rules(rules, stats):
+    """Invalid rows are set aside with the rules they broke and the rest passes on."""
+    valid, quarantined, report = DataValidator(rules).quarantine(stats)
+    assert valid.index.tolist() == [0]
+    assert quarantined.index.tolist() == [1, 2, 3, 4, 5]
+    assert quarantined.loc[5, 'validation_errors'] == 'type:points'
+    assert quarantined.loc[3, 'validation_errors'] == 'unique:player_id+game_id'
+
+def test_check_applies_the_failure_policy(rules, stats, tmp_path):
+    """Quarantine mode writes the bad rows and continues; halt mode stops."""
+    halted = DataValidator(rules).check_player_game_stats(stats)
+    assert halted is None
+
+    validator = DataValidator({**rules, 'on_failure': 'quarantine', 'quarantine_dir': str(tmp_path)})
+    kept = validator.check_player_game_stats(stats)
+    assert kept.index.tolist() == [0]
+    [written] = tmp_path.glob('player_game_stats_*.csv')
+    assert len(pd.read_csv(written)) == 5
+
+def test_large_frame_reports_all_violations(rules):
+    """A 1M-row frame is validated in one call with exact counts."""
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'player_id': np.arange(n).astype(str), 'game_id': 'g1',
+                       'points': rng.integers(0, 50, n), 'minutes_played': rng.integers(0, 48, n)})
+    df.loc[[10, 500_000], 'points'] = 101
+    df.loc[999_999, 'player_id'] = '0'
+    report = DataValidator(rules).validate(df)
+    assert report.rules['range:points']['violations'] == 2
+    assert report.rules['unique:player_id+game_id']['sample_rows'] == [999_999]
+    assert report.invalid_rows == 3
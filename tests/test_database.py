@@ -0,0 +1,67 @@
+import sys
+import os
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.database import Base, ModelPredictions, PropOdds, migrate_schema
+
+@pytest.fixture
+def old_engine(tmp_path):
+    """A database whose prop_odds table keeps one line per (game, player, book, prop)."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE prop_odds (game_id VARCHAR(50), player_id VARCHAR(50), sportsbook VARCHAR(20), "
+            "prop_type VARCHAR(30), line FLOAT NOT NULL, over_odds INTEGER, under_odds INTEGER, "
+            "over_implied_prob FLOAT, under_implied_prob FLOAT, timestamp DATETIME, created_at DATETIME, "
+            "PRIMARY KEY (game_id, player_id, sportsbook, prop_type))"))
+        connection.execute(text(
+            "INSERT INTO prop_odds (game_id, player_id, sportsbook, prop_type, line, over_odds, under_odds, "
+            "timestamp, created_at) VALUES ('g1', 'p1', 'FanDuel', 'points', 20.5, -110, -110, "
+            "'2024-01-05 09:00:00.000000', '2024-01-05 09:00:00.000000')"))
+    return engine
+
+def test_migration_keeps_reposted_lines(old_engine):
+    """Migrating keeps the stored lines, lets a re-post be added and is a no-op the second time."""
+    assert len(migrate_schema(old_engine)) == 1
+    assert 'timestamp' in inspect(old_engine).get_pk_constraint('prop_odds')['constrained_columns']
+    Base.metadata.create_all(old_engine)
+
+    session = sessionmaker(bind=old_engine)()
+    session.add(PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='points', line=21.5,
+                         over_odds=-115, under_odds=-105, timestamp=datetime(2024, 1, 5, 12)))
+    session.commit()
+    lines = session.execute(select(PropOdds.line).order_by(PropOdds.timestamp)).scalars().all()
+    session.close()
+
+    assert lines == [20.5, 21.5]
+    assert migrate_schema(old_engine) == []
+
+def test_migration_adds_distribution_columns(tmp_path):
+    """Predictions stored before the distribution columns existed can be written and read with them."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE model_predictions (prediction_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "game_id VARCHAR(50) NOT NULL, player_id VARCHAR(50), prop_type VARCHAR(30) NOT NULL, "
+            "model_name VARCHAR(50) NOT NULL, predicted_probability FLOAT NOT NULL, predicted_outcome VARCHAR(10), "
+            "confidence_score FLOAT, features_used TEXT, created_at DATETIME)"))
+        connection.execute(text("INSERT INTO model_predictions (game_id, player_id, prop_type, model_name, "
+                                "predicted_probability) VALUES ('g1', 'p1', 'points', 'm', 0.6)"))
+
+    assert migrate_schema(engine) == ['model_predictions: added column predicted_mean',
+                                      'model_predictions: added column dispersion']
+    session = sessionmaker(bind=engine)()
+    session.add(ModelPredictions(game_id='g1', player_id='p2', prop_type='points', model_name='m',
+                                 predicted_probability=0.4, predicted_mean=18.0, dispersion=0.1))
+    session.commit()
+    rows = session.execute(select(ModelPredictions.predicted_mean, ModelPredictions.dispersion)
+                           .order_by(ModelPredictions.prediction_id)).all()
+    session.close()
+
+    assert [tuple(row) for row in rows] == [(None, None), (18.0, 0.1)]
+    assert migrate_schema(engine) == []
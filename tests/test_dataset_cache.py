@@ -0,0 +1,88 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.dataset_cache import DatasetCache, matrix_fingerprint
+
+@pytest.fixture
+def feature_data():
+    """Provides one feature matrix with two different targets, split in time order."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({'f1': rng.normal(size=300), 'f2': rng.normal(size=300)})
+    home_win = (X['f1'] > 0).astype(int)
+    high_scoring = (X['f2'] > 0).astype(int)
+    return X.iloc[:240], X.iloc[240:], home_win, high_scoring
+
+def test_fingerprint_tracks_content_and_columns(feature_data):
+    """Equal matrices share a fingerprint; changed values or column names do not."""
+    X_train, _, _, _ = feature_data
+    assert matrix_fingerprint(X_train) == matrix_fingerprint(X_train.copy())
+    assert matrix_fingerprint(X_train) != matrix_fingerprint(X_train * 2)
+    assert matrix_fingerprint(X_train) != matrix_fingerprint(X_train.rename(columns={'f1': 'g1'}))
+
+def test_lightgbm_dataset_reused_across_targets(tmp_path, feature_data):
+    """A second target on the same features reuses the binned dataset with the new label."""
+    X_train, X_val, home_win, high_scoring = feature_data
+    cache = DatasetCache(root=str(tmp_path))
+
+    first, _ = cache.lightgbm_datasets(X_train, home_win.iloc[:240], X_val, home_win.iloc[240:])
+    second, val_set = cache.lightgbm_datasets(X_train, high_scoring.iloc[:240], X_val, high_scoring.iloc[240:])
+
+    assert first is second
+    assert cache.stats['misses'] == 2
+    assert cache.stats['hits'] == 2
+    np.testing.assert_array_equal(second.get_label(), high_scoring.iloc[:240].to_numpy())
+    np.testing.assert_array_equal(val_set.get_label(), high_scoring.iloc[240:].to_numpy())
+    assert len(list(tmp_path.glob('lgb_*.bin'))) == 1
+
+def test_lightgbm_binary_loaded_by_new_cache(tmp_path, feature_data):
+    """A fresh cache (e.g. a worker process) loads the saved binary instead of re-binning."""
+    X_train, _, home_win, _ = feature_data
+    DatasetCache(root=str(tmp_path)).lightgbm_datasets(X_train, home_win.iloc[:240])
+
+    cache = DatasetCache(root=str(tmp_path))
+    dataset, _ = cache.lightgbm_datasets(X_train, home_win.iloc[:240])
+
+    assert cache.stats['disk_hits'] == 1
+    assert cache.stats['misses'] == 0
+    assert dataset.num_data() == 240
+
+def test_binning_params_are_part_of_the_key(tmp_path, feature_data):
+    """Different binning parameters never share a cached dataset."""
+    X_train, _, home_win, _ = feature_data
+    DatasetCache(root=str(tmp_path)).lightgbm_datasets(X_train, home_win.iloc[:240])
+    DatasetCache(root=str(tmp_path), lightgbm_params={'max_bin': 63}).lightgbm_datasets(X_train, home_win.iloc[:240])
+
+    assert len(list(tmp_path.glob('lgb_*.bin'))) == 2
+
+def test_xgboost_matrices_reused_in_memory(feature_data):
+    """Quantized XGBoost matrices are built once per process and relabelled per target."""
+    X_train, X_val, home_win, high_scoring = feature_data
+    cache = DatasetCache(root=None)
+
+    first, _ = cache.xgboost_matrices(X_train, home_win.iloc[:240], X_val, home_win.iloc[240:])
+    second, _ = cache.xgboost_matrices(X_train, high_scoring.iloc[:240], X_val, high_scoring.iloc[240:])
+
+    assert first is second
+    np.testing.assert_array_equal(second.get_label(), high_scoring.iloc[:240].to_numpy())
+
+def test_matrix_hashed_once_per_object(monkeypatch, feature_data):
+    """Repeated lookups of one matrix object hash it once; an equal copy is hashed again."""
+    from src.modeling import dataset_cache
+    X_train, X_val, home_win, _ = feature_data
+    calls = []
+    monkeypatch.setattr(dataset_cache, 'matrix_fingerprint',
+                        lambda X: calls.append(id(X)) or matrix_fingerprint(X))
+    cache = DatasetCache(root=None)
+
+    for _ in range(3):
+        cache.lightgbm_datasets(X_train, home_win.iloc[:240], X_val, home_win.iloc[240:])
+    assert len(calls) == 2
+
+    cache.lightgbm_datasets(X_train.copy(), home_win.iloc[:240])
+    assert len(calls) == 3
+    assert cache.stats['misses'] == 2
@@ -0,0 +1,60 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.distributions import CountDistributionModel, fit_dispersion, prob_over, prob_under
+
+PARAMS = {'n_estimators': 50, 'num_leaves': 7, 'learning_rate': 0.1, 'verbosity': -1, 'random_state': 0}
+
+def nbinom_sample(rng, mean, dispersion):
+    size = 1 / dispersion
+    return rng.negative_binomial(size, size / (size + mean))
+
+def test_line_probabilities_match_scipy_and_sampling():
+    """Half-point lines split the mass; whole-number lines leave the push to neither side."""
+    mean, dispersion = np.array([4.0, 22.0, 0.5]), np.array([0.1, 0.05, 0.3])
+    size = 1 / dispersion
+    expected = stats.nbinom(size, size / (size + mean)).sf([4, 24, 0])
+    np.testing.assert_allclose(prob_over(mean, dispersion, [4.5, 24.5, 0.5]), expected)
+    np.testing.assert_allclose(prob_over(mean, dispersion, [4.5, 24.5, 0.5])
+                               + prob_under(mean, dispersion, [4.5, 24.5, 0.5]), 1)
+
+    push = stats.nbinom(size, size / (size + mean)).pmf([4, 24, 1])
+    np.testing.assert_allclose(prob_over(mean, dispersion, [4, 24, 1]) + prob_under(mean, dispersion, [4, 24, 1]),
+                               1 - push)
+
+    draws = nbinom_sample(np.random.default_rng(0), 22.0, 0.05 * np.ones(200_000))
+    assert prob_over(22.0, 0.05, 24.5) == pytest.approx((draws > 24.5).mean(), abs=0.005)
+
+def test_fit_dispersion_recovers_overdispersion():
+    """Maximum likelihood finds the true dispersion, and practically zero for Poisson counts."""
+    rng = np.random.default_rng(1)
+    mean = rng.uniform(2, 25, 20_000)
+    assert fit_dispersion(nbinom_sample(rng, mean, 0.15), mean) == pytest.approx(0.15, rel=0.1)
+    assert fit_dispersion(rng.poisson(mean), mean) < 0.01
+
+def test_model_prices_any_line_from_one_fit():
+    """One fitted model prices a scalar, per-row or (rows x lines) grid of lines consistently."""
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame({'avg': rng.uniform(2, 30, 4000), 'noise': rng.normal(size=4000)})
+    y = nbinom_sample(rng, X['avg'].to_numpy(), 0.1)
+    model = CountDistributionModel(dict(PARAMS, objective='binary')).fit(X, y)
+
+    assert model.dispersion_ == pytest.approx(0.1, abs=0.04)
+    assert list(model.feature_names_in_) == ['avg', 'noise']
+    assert np.corrcoef(model.predict(X), X['avg'])[0, 1] > 0.95
+
+    lines = np.array([[4.5, 14.5, 24.5]] * len(X))
+    grid = model.prob_over(X, lines)
+    assert grid.shape == (len(X), 3) and (np.diff(grid, axis=1) <= 0).all()
+    np.testing.assert_allclose(grid[:, 1], model.prob_over(X, 14.5))
+    np.testing.assert_allclose(grid[:, 2], model.prob_over(X, lines[:, 2]))
+    np.testing.assert_allclose(grid + model.prob_under(X, lines), 1)
+
+    quantiles = model.quantiles(X.head(5), [0.1, 0.5, 0.9])
+    assert quantiles.shape == (5, 3) and (np.diff(quantiles, axis=1) >= 0).all()
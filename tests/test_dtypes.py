@@ -0,0 +1,99 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing.data_cleaner import DataCleaner
+from src.preprocessing.data_integrator import DataIntegrator
+from src.preprocessing.dtypes import DtypePlan, align_categories
+from src.feature_engineering.player_features import PlayerFeatures
+from src.feature_engineering.game_features import GameFeatures
+from src.feature_engineering.team_features import TeamFeatures
+from src.utils.config import config
+
+STATS = ['points', 'rebounds', 'offensive_rebounds', 'assists', 'steals', 'blocks', 'turnovers',
+         'field_goals_made', 'field_goals_attempted', 'free_throws_made', 'free_throws_attempted',
+         'personal_fouls', 'minutes_played']
+
+@pytest.fixture
+def plan():
+    return DtypePlan(config.get('preprocessing.dtypes', {}))
+
+@pytest.fixture
+def tables():
+    rng = np.random.default_rng(3)
+    games = pd.DataFrame({
+        'game_id': [f'g{i}' for i in range(8)],
+        'date': [f'2023-11-{day:02d} 00:00:00.000000' for day in range(1, 9)],
+        'home_team_id': ['BOS', 'NYK', 'LAL', 'BOS', 'NYK', 'LAL', 'BOS', 'NYK'],
+        'away_team_id': ['NYK', 'LAL', 'BOS', 'LAL', 'BOS', 'NYK', 'NYK', 'LAL'],
+        'home_team_name': 'Home', 'away_team_name': 'Away',
+        'home_score': rng.integers(90, 130, 8), 'away_score': rng.integers(90, 130, 8),
+        'updated_at': '2023-12-01',
+    })
+    stats = pd.DataFrame({'game_id': np.repeat(games['game_id'], 2).to_numpy(),
+                          'player_id': ['p1', 'p2'] * 8,
+                          'team_id': np.repeat(games['home_team_id'], 2).to_numpy(),
+                          'created_at': '2023-12-01'})
+    for stat in STATS:
+        stats[stat] = rng.integers(0, 12, len(stats))
+    odds = pd.DataFrame({'game_id': stats['game_id'], 'player_id': stats['player_id'], 'sportsbook': 'FanDuel',
+                         'prop_type': 'points', 'line': 8.5, 'over_odds': -110, 'under_odds': -110})
+    return {'games': games, 'stats': stats, 'odds': odds.iloc[:-3]}
+
+def run_pipeline(tables):
+    """Integration and feature stages of run_pipeline.py."""
+    integrator = DataIntegrator({})
+    df = DataCleaner({}).clean_player_game_stats(tables['stats'].copy())
+    df = integrator.integrate_game_data(df, tables['games'].copy())
+    df = PlayerFeatures({}).create_rolling_averages(df)
+    df = GameFeatures({}).create_game_context_features(df)
+    df = TeamFeatures({}).create_team_strength_features(df)
+    df = integrator.integrate_sportsbook_odds(df, tables['odds'].copy())
+    return df.sort_values(['player_id', 'date']).reset_index(drop=True)
+
+def test_plan_casts_checks_and_reports(plan):
+    """Planned columns shrink, values that do not fit are widened, never truncated."""
+    df = pd.DataFrame({'player_id': ['a', 'b', 'a'], 'points': [10, 300, 7], 'rebounds': [1.0, np.nan, 3.0],
+                       'assists': ['1', '2', 'x'], 'home_team_id': ['BOS', 'NYK', 'BOS'],
+                       'away_team_id': ['LAL', 'BOS', 'NYK'], 'date': ['2024-01-02'] * 3, 'created_at': 'now'})
+    planned = plan.apply(df, 'frame')
+
+    assert planned['points'].dtype == np.int16 and planned['points'].tolist() == [10, 300, 7]
+    assert planned['rebounds'].dtype == np.float32
+    assert planned['assists'].dtype == df['assists'].dtype
+    assert planned['player_id'].dtype == 'category' and 'created_at' not in planned
+    assert planned['home_team_id'].dtype == planned['away_team_id'].dtype
+    assert pd.api.types.is_datetime64_any_dtype(planned['date'])
+    [(name, before, after)] = plan.report
+    assert name == 'frame' and after < before
+
+def test_align_categories_keeps_merge_keys_categorical():
+    """Categoricals with different categories merge as categoricals once aligned."""
+    left = pd.DataFrame({'k': pd.Categorical(['a', 'b']), 'x': [1, 2]})
+    right = pd.DataFrame({'k': pd.Categorical(['b', 'c']), 'y': [3, 4]})
+    align_categories(left, right, ['k'])
+    merged = left.merge(right, on='k', how='left')
+    assert isinstance(merged['k'].dtype, pd.CategoricalDtype)
+    assert merged['y'].tolist()[1] == 3
+
+def test_compact_dtypes_survive_the_pipeline(plan, tables):
+    """Planned frames keep their compact dtypes through every stage, with the same values."""
+    default = run_pipeline(tables)
+    compact = run_pipeline({name: plan.apply(df) for name, df in tables.items()})
+
+    assert set(compact.columns) == set(default.columns) - {'created_at', 'updated_at'}
+    for col in ['game_id', 'player_id', 'team_id', 'home_team_id', 'away_team_id']:
+        assert isinstance(compact[col].dtype, pd.CategoricalDtype), col
+    assert compact['points'].dtype == np.int8
+    features = [col for col in compact.columns if '_roll_avg_' in col or col.endswith('rest_days')
+                or col.startswith('fanduel_')]
+    assert features and all(compact[col].dtype == np.float32 for col in features)
+    assert (compact['team_id'] == compact['home_team_id']).all()
+
+    for col in features + ['game_score']:
+        np.testing.assert_allclose(compact[col], default[col], rtol=1e-5, atol=1e-5)
+    assert compact.memory_usage(deep=True).sum() < default.memory_usage(deep=True).sum() / 2
@@ -0,0 +1,98 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.feature_engineering.feature_registry import FeatureExecutor, FeatureGroup, FeatureRegistry, nba_feature_registry
+from src.feature_engineering.player_features import PlayerFeatures
+from src.feature_engineering.game_features import GameFeatures
+from src.feature_engineering.team_features import TeamFeatures
+from src.utils.cache import TTLCache, bump_data_version
+from src.utils.config import config
+
+@pytest.fixture
+def player_games():
+    """Two players on each side of eight games between three teams."""
+    rng = np.random.default_rng(11)
+    home = ['BOS', 'NYK', 'LAL', 'BOS', 'NYK', 'LAL', 'BOS', 'NYK']
+    away = ['NYK', 'LAL', 'BOS', 'LAL', 'BOS', 'NYK', 'NYK', 'LAL']
+    rows = []
+    for i, (home_team, away_team) in enumerate(zip(home, away)):
+        for player, team in [('p1', home_team), ('p2', home_team), ('p3', away_team), ('p4', away_team)]:
+            rows.append({'game_id': f'g{i}', 'player_id': player, 'team_id': team,
+                         'date': pd.Timestamp('2023-11-01') + pd.Timedelta(days=2 * i + i % 3),
+                         'home_team_id': home_team, 'away_team_id': away_team,
+                         'home_score': 100 + i, 'away_score': 95 + 2 * i})
+    df = pd.DataFrame(rows)
+    for col in PlayerFeatures.GAME_SCORE_COLUMNS + ['rebounds', 'three_pointers_made', 'minutes_played']:
+        df[col] = rng.integers(0, 15, len(df))
+    return df
+
+def group(name, inputs, outputs, calls=None):
+    def compute(df):
+        if calls is not None:
+            calls.append((name, df.copy()))
+        return df.assign(**{col: df[inputs[0]] + 1 for col in outputs})
+    return FeatureGroup(name, keys=['game_id'], inputs=inputs, outputs=outputs, compute=compute)
+
+def test_levels_follow_data_dependencies():
+    """Groups reading another group's outputs run after it; others share a level."""
+    registry = FeatureRegistry()
+    registry.register(group('b', ['a_out'], ['b_out']))
+    registry.register(group('a', ['x'], ['a_out']))
+    registry.register(group('c', ['x'], ['c_out']))
+    assert [[g.name for g in level] for level in registry.levels()] == [['a', 'c'], ['b']]
+
+    with pytest.raises(ValueError, match='already produced'):
+        registry.register(group('d', ['x'], ['c_out']))
+    registry.register(group('e', ['f_out'], ['e_out']))
+    registry.register(group('f', ['e_out'], ['f_out']))
+    with pytest.raises(ValueError, match='circular'):
+        registry.levels()
+
+def test_groups_see_narrow_inputs_and_join_by_key():
+    """Each group gets only its keys and inputs, one row per key; results join back once."""
+    base = pd.DataFrame({'game_id': ['g1', 'g1', 'g2'], 'player_id': ['a', 'b', 'a'], 'x': [1, 1, 5], 'y': [0, 0, 0]})
+    calls = []
+    registry = FeatureRegistry()
+    registry.register(group('first', ['x'], ['first_out'], calls))
+    registry.register(group('second', ['first_out'], ['second_out'], calls))
+
+    result = FeatureExecutor(registry).run(base)
+    assert result['second_out'].tolist() == [3, 3, 7]
+    assert list(result.columns) == ['game_id', 'player_id', 'x', 'y', 'first_out', 'second_out']
+    [(_, first_input), (_, second_input)] = calls
+    assert list(first_input.columns) == ['game_id', 'x'] and len(first_input) == 2
+    assert list(second_input.columns) == ['game_id', 'first_out']
+
+def test_nba_groups_match_the_sequential_pipeline(player_games):
+    """The registry's output equals running the feature classes one after another."""
+    player_creator = PlayerFeatures(config.get('feature_engineering.player_features', {}))
+    sequential = player_creator.create_rolling_averages(player_games.copy())
+    sequential = GameFeatures({}).create_game_context_features(sequential)
+    sequential = TeamFeatures({}).create_team_strength_features(sequential)
+
+    result = FeatureExecutor(nba_feature_registry(config), max_workers=3).run(player_games.copy())
+    keys = ['player_id', 'game_id']
+    pd.testing.assert_frame_equal(result.sort_values(keys).reset_index(drop=True),
+                                  sequential.sort_values(keys).reset_index(drop=True))
+
+def test_results_are_cached_until_inputs_or_data_version_change():
+    """Unchanged inputs reuse a group's result; new inputs or a new data version recompute."""
+    base = pd.DataFrame({'game_id': ['g1', 'g2'], 'x': [1, 2]})
+    calls = []
+    registry = FeatureRegistry()
+    registry.register(group('only', ['x'], ['out'], calls))
+    executor = FeatureExecutor(registry, cache=TTLCache(maxsize=16, ttl=None))
+
+    executor.run(base)
+    executor.run(base.copy())
+    assert len(calls) == 1 and executor.timings['only']['cached']
+
+    executor.run(base.assign(x=[1, 3]))
+    bump_data_version('nba')
+    executor.run(base)
+    assert len(calls) == 3
@@ -0,0 +1,92 @@
+import sys
+import os
+import json
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.config import config
+from src.utils.instrumentation import StageProfiler, active_profiler, instrumented, profiled
+
+@instrumented()
+def double_rows(df):
+    return pd.concat([df, df])
+
+@profiled('toy_pipeline')
+def toy_pipeline(df):
+    return double_rows(df)
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({'player_id': range(100), 'name': [f'player {i}' for i in range(100)]})
+
+def test_stage_records_rows_memory_and_json_lines(tmp_path, frame):
+    """A stage records timings, row counts and output memory and writes one JSON line."""
+    output = tmp_path / 'stages.jsonl'
+    with StageProfiler('test', output=str(output)) as profiler:
+        with profiler.stage('filter', frame) as stage:
+            stage.output(frame[frame['player_id'] < 10])
+
+    record = profiler.records[0]
+    assert record['stage'] == 'filter' and record['status'] == 'ok'
+    assert record['rows_in'] == 100 and record['rows_out'] == 10
+    assert record['wall_seconds'] >= 0 and record['cpu_seconds'] >= 0 and record['output_mb'] > 0
+    assert json.loads(output.read_text().strip()) == record
+    assert 'filter' in profiler.format_summary()
+
+def test_decorated_functions_record_only_under_a_profiler(frame):
+    """Instrumented functions nest under the active profiler and are plain calls otherwise."""
+    assert len(double_rows(frame)) == 200 and active_profiler() is None
+
+    with StageProfiler('test', output='') as profiler:
+        with profiler.stage('outer', frame):
+            double_rows(frame)
+
+    inner, outer = profiler.records
+    assert (inner['stage'], inner['depth'], inner['rows_in'], inner['rows_out']) == ('double_rows', 1, 100, 200)
+    assert (outer['stage'], outer['depth']) == ('outer', 0)
+    assert active_profiler() is None
+
+def test_failed_stage_is_recorded_and_reraised():
+    """An exception inside a stage is recorded with an error status and propagates."""
+    with pytest.raises(ValueError):
+        with StageProfiler('test', output='') as profiler:
+            with profiler.stage('boom'):
+                raise ValueError("bad input")
+    assert profiler.records[0]['status'] == 'error'
+    assert 'bad input' in profiler.records[0]['error']
+
+def test_profiled_entry_point_opens_its_own_profiler_or_nests(frame, caplog, monkeypatch, tmp_path):
+    """Entry points log a summary on their own and become one stage inside another run."""
+    output = tmp_path / 'stages.jsonl'
+    monkeypatch.setitem(config.config['instrumentation'], 'output', str(output))
+    with caplog.at_level('INFO', logger='src.utils.instrumentation'):
+        assert len(toy_pipeline(frame)) == 200
+    assert 'toy_pipeline run' in caplog.text and 'double_rows' in caplog.text
+    assert [json.loads(line)['stage'] for line in output.read_text().splitlines()] == ['double_rows']
+
+    with StageProfiler('outer', output='') as profiler:
+        toy_pipeline(frame)
+    assert [record['stage'] for record in profiler.records] == ['double_rows', 'toy_pipeline']
+
+def test_disabled_profiler_records_nothing(frame):
+    """A disabled profiler runs stages without measuring them."""
+    with StageProfiler('test', output='', enabled=False) as profiler:
+        double_rows(frame)
+        with profiler.stage('skipped') as stage:
+            stage.output(frame)
+    assert profiler.records == []
+
+def test_output_rolls_over_past_max_bytes(tmp_path):
+    """The JSON-lines file rolls over once full, keeping backup_count older files."""
+    output = tmp_path / 'stages.jsonl'
+    with StageProfiler('test', output=str(output), max_bytes=2000, backup_count=2) as profiler:
+        for i in range(40):
+            with profiler.stage(f'stage_{i}'):
+                pass
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert files == ['stages.jsonl', 'stages.jsonl.1', 'stages.jsonl.2']
+    assert all(path.stat().st_size <= 2000 for path in tmp_path.iterdir())
+    stages = [json.loads(line)['stage'] for name in reversed(files) for line in (tmp_path / name).read_text().splitlines()]
+    assert stages == [f'stage_{i}' for i in range(40 - len(stages), 40)]
@@ -0,0 +1,105 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.feature_engineering import kernels
+from src.feature_engineering.player_features import PlayerFeatures
+
+BACKENDS = ['numpy'] + (['numba'] if kernels.NUMBA_AVAILABLE else [])
+
+@pytest.fixture
+def games():
+    """Players with 1 to 40 games, irregular rest, missing values and six opponents, sorted by player and date."""
+    rng = np.random.default_rng(5)
+    frames = []
+    for player, n in enumerate(rng.integers(1, 40, 25)):
+        frames.append(pd.DataFrame({
+            'player': player,
+            'date': pd.Timestamp('2023-10-20') + pd.to_timedelta(np.cumsum(rng.integers(1, 6, n)), unit='D'),
+            'value': np.where(rng.random(n) < 0.1, np.nan, rng.poisson(15, n).astype(float)),
+            'minutes': rng.integers(0, 40, n).astype(float),
+            'opponent': rng.integers(0, 6, n),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def offsets(games):
+    return kernels.group_offsets(games['player'].to_numpy())
+
+def days(games):
+    return games['date'].to_numpy('datetime64[s]').astype(np.int64) / 86400
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_ewm_time_decay_matches_pandas(games, backend):
+    """Equals pandas' time-based EWM of the earlier games."""
+    expected = games.groupby('player', group_keys=False)[['value', 'date']].apply(
+        lambda g: g['value'].ewm(halflife=pd.Timedelta(days=7), times=g['date']).mean().shift(1))
+    actual = kernels.ewm_time_decay(games['value'], days(games), offsets(games), 7, backend=backend)
+    np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-9)
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_streaks_match_pandas(games, backend):
+    """Signed runs of games above / at-or-below the player's earlier average, before each game."""
+    prior_mean = games.groupby('player')['value'].transform(lambda x: x.shift(1).expanding().mean())
+    flag = np.where(games['value'].isna() | prior_mean.isna(), 0, np.where(games['value'] > prior_mean, 1, -1))
+    flag = pd.Series(flag)
+    run = ((flag != flag.shift()) | (games['player'] != games['player'].shift())).cumsum()
+    after = flag * (flag.groupby(run).cumcount() + 1)
+    expected = after.groupby(games['player']).shift(1).fillna(0)
+
+    actual = kernels.streaks(games['value'], offsets(games), backend=backend)
+    np.testing.assert_array_equal(actual, expected.to_numpy(dtype=float))
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_weighted_rolling_mean_matches_pandas(games, backend):
+    """Minutes-weighted mean of the previous five games; NaN without played minutes."""
+    valid = games['value'].notna()
+    sums = pd.DataFrame({'weighted': (games['value'] * games['minutes']).where(valid, 0),
+                         'weight': games['minutes'].where(valid, 0)})
+    rolled = sums.groupby(games['player']).transform(lambda x: x.shift(1).rolling(5, min_periods=1).sum())
+    expected = (rolled['weighted'] / rolled['weight']).where(rolled['weight'] > 0)
+
+    actual = kernels.weighted_rolling_mean(games['value'], games['minutes'], offsets(games), 5, backend=backend)
+    np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-9)
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_rolling_mean_by_key_matches_pandas(games, backend):
+    """Mean of the previous three games against the same opponent."""
+    expected = games.groupby(['player', 'opponent'])['value'].transform(
+        lambda x: x.shift(1).rolling(3, min_periods=1).mean())
+    actual = kernels.rolling_mean_by_key(games['value'], games['opponent'], offsets(games), 3, backend=backend)
+    np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-9)
+
+    keys = games['opponent'].where(games.index % 4 != 0, -1)
+    assert np.isnan(kernels.rolling_mean_by_key(games['value'], keys, offsets(games), 3, backend=backend)[::4]).all()
+
+def test_player_features_adds_sequential_columns(games):
+    """Configured sequential features are float32 for compact stats and use earlier games only."""
+    df = pd.DataFrame({
+        'player_id': games['player'].astype(str), 'game_id': [f'g{i}' for i in range(len(games))],
+        'date': games['date'], 'points': games['value'].fillna(0).astype(np.int8),
+        'minutes_played': games['minutes'].astype(np.int8), 'team_id': 'BOS',
+        'home_team_id': np.where(games.index % 2 == 0, 'BOS', games['opponent'].astype(str)),
+        'away_team_id': np.where(games.index % 2 == 0, games['opponent'].astype(str), 'BOS')})
+    for col in PlayerFeatures.GAME_SCORE_COLUMNS[1:] + ['rebounds']:
+        df[col] = np.int8(1)
+    specs = [{'type': 'ewm', 'stat': 'points', 'halflife_days': 10}, {'type': 'streak', 'stat': 'game_score'},
+             {'type': 'minutes_weighted', 'stat': 'points', 'window': 5}, {'type': 'vs_opponent', 'stat': 'points'}]
+    creator = PlayerFeatures({'sequential_features': specs})
+
+    result = creator.create_rolling_averages(df.copy())
+    columns = ['points_ewm_10d', 'game_score_streak', 'points_min_wtd_avg_5g', 'points_vs_opp_avg_3g']
+    assert creator.feature_columns()[-4:] == columns
+    assert all(result[col].dtype == np.float32 for col in columns)
+    assert {'minutes_played', 'team_id'} <= set(creator.input_columns())
+
+    changed = df.copy()
+    changed['points'] = changed['points'].where(changed.index != changed.index[-1], np.int8(99))
+    rerun = creator.create_rolling_averages(changed)
+    pd.testing.assert_frame_equal(result.loc[[df.index[-1]], columns], rerun.loc[[df.index[-1]], columns])
+
+    with pytest.raises(ValueError, match='sequential feature type'):
+        PlayerFeatures({'sequential_features': [{'type': 'median', 'stat': 'points'}]})
@@ -0,0 +1,142 @@
+import sys
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.model_registry import ModelRegistry
+from src.prediction.mlb_prediction_pipeline import MLBPredictionPipeline
+from src.prediction.server import PredictionService
+
+TEAMS = {'NYY': 147, 'BOS': 111, 'LAD': 119, 'SF': 137}
+FEATURES = ['month', 'home_rest_days', 'away_rest_days', 'home_avg_runs', 'away_avg_runs',
+            'home_pitching_team_era', 'away_pitching_team_era', 'weather_hitting_favorability']
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Writes batting and pitching lines for four teams (SF has no pitching rows)."""
+    rng = np.random.default_rng(0)
+    path = tmp_path / "mlb.db"
+    conn = sqlite3.connect(path)
+    pd.DataFrame({'team_id': list(TEAMS.values()), 'team_abbreviation': list(TEAMS)}).to_sql('mlb_teams', conn)
+    batting = pd.DataFrame({'team_id': rng.choice(list(TEAMS.values()), 400).astype(str)})
+    for col in ['at_bats', 'runs', 'hits', 'rbi', 'home_runs', 'walks', 'strikeouts']:
+        batting[col] = rng.integers(0, 5, len(batting))
+    batting['batting_avg'] = rng.uniform(0.2, 0.3, len(batting))
+    batting['on_base_plus_slugging'] = rng.uniform(0.6, 0.9, len(batting))
+    batting.to_sql('mlb_batter_stats', conn)
+    pitching = pd.DataFrame({'team_id': rng.choice([147, 111, 119], 200).astype(str)})
+    for col in ['innings_pitched', 'hits_allowed', 'runs_allowed', 'earned_runs', 'walks',
+                'strikeouts', 'home_runs_allowed']:
+        pitching[col] = rng.integers(0, 7, len(pitching))
+    pitching['era'] = rng.uniform(2, 6, len(pitching))
+    pitching.to_sql('mlb_pitcher_stats', conn)
+    conn.close()
+    return path
+
+@pytest.fixture
+def pipeline(tmp_path, db_path):
+    """A pipeline serving a registered scaled logistic regression."""
+    ModelRegistry.clear_cache()
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(loc=3, size=(200, len(FEATURES))), columns=FEATURES)
+    y = (X['home_avg_runs'] - X['away_avg_runs'] + rng.normal(size=200) > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(pd.DataFrame(scaler.transform(X), columns=FEATURES), y)
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.register('mlb_xgboost_home_team_wins', model, FEATURES, scaler=scaler, aliases=['prod'])
+
+    pipeline = MLBPredictionPipeline(db_path=str(db_path), registry_root=str(tmp_path / "registry"))
+    assert pipeline.load_model()
+    yield pipeline
+    ModelRegistry.clear_cache()
+
+def make_games(n):
+    teams = list(TEAMS)
+    return [{'home_team_id': teams[i % 4], 'away_team_id': teams[(i + 1) % 4],
+             'game_date': f"2024-0{4 + i % 5}-1{i % 10}", 'home_rest_days': i % 3, 'away_rest_days': 1}
+            for i in range(n)]
+
+def test_batch_team_stats_match_single_team_lookup(pipeline):
+    """One query returns the same aggregates for every team, zero-filling missing pitching."""
+    stats = pipeline.get_teams_stats(list(TEAMS) + ['XXX'])
+
+    assert set(stats) == set(TEAMS)
+    assert stats['SF']['pitching_team_era'] == 0.0
+    conn = sqlite3.connect(pipeline.db_path)
+    expected = pd.read_sql("SELECT AVG(CAST(runs AS FLOAT)) AS r FROM mlb_batter_stats "
+                           "WHERE team_id = '147' AND at_bats > 0", conn)['r'][0]
+    conn.close()
+    assert stats['NYY']['avg_runs'] == pytest.approx(expected)
+    assert pipeline.get_team_stats('NYY') == stats['NYY']
+
+def test_multiple_games_match_single_game_predictions(pipeline):
+    """The vectorized path returns the same result dicts, in order, as predicting one game at a time."""
+    games = make_games(12)
+    batch = pipeline.predict_multiple_games(games)
+    single = [pipeline.predict_game(game) for game in games]
+
+    assert len(batch) == len(games)
+    for b, s in zip(batch, single):
+        assert b['game_info'] == s['game_info']
+        assert b['prediction']['predicted_winner'] == s['prediction']['predicted_winner']
+        assert b['prediction']['home_win_probability'] == pytest.approx(s['prediction']['home_win_probability'])
+        assert b['betting'] == s['betting']
+
+def test_bad_games_are_skipped(pipeline):
+    """A game whose features cannot be built is dropped without failing the batch."""
+    games = make_games(3)
+    games[1]['game_date'] = 'not a date'
+    results = pipeline.predict_multiple_games(games)
+    assert [r['game_info']['date'] for r in results] == [games[0]['game_date'], games[2]['game_date']]
+
+def test_team_stats_are_cached_until_the_database_changes(pipeline, mocker):
+    """Repeated batches reuse team aggregates; a write to the database refreshes them."""
+    pipeline.cache.clear()
+    query = mocker.spy(pipeline, '_query_teams_stats')
+    games = make_games(8)
+
+    pipeline.predict_multiple_games(games)
+    pipeline.predict_multiple_games(games)
+    assert query.call_count == 1
+
+    os.utime(pipeline.db_path, ns=(1, 1))
+    pipeline.predict_multiple_games(games)
+    assert query.call_count == 2
+    report = pipeline.generate_betting_report(pipeline.predict_multiple_games(games))
+    assert report['cache']['team_stats']['hits'] > 0
+
+def test_game_without_team_stats_does_not_fail_the_batch(pipeline, mocker):
+    """A game that cannot be scored is dropped; the rest of the batch is still predicted."""
+    get_teams_stats = pipeline.get_teams_stats
+
+    def without_sf_stats(team_ids):
+        stats = get_teams_stats(team_ids)
+        if 'SF' in stats:
+            stats['SF'] = {name: np.nan for name in stats['SF']}
+        return stats
+
+    games = make_games(4)
+    expected = [pipeline.predict_game(game) for game in games if 'SF' not in game.values()]
+    mocker.patch.object(pipeline, 'get_teams_stats', side_effect=without_sf_stats)
+    results = pipeline.predict_multiple_games(games)
+
+    assert [r['game_info'] for r in results] == [e['game_info'] for e in expected]
+    assert [r['prediction'] for r in results] == [e['prediction'] for e in expected]
+
+def test_server_answers_malformed_games_on_their_own(pipeline, tmp_path):
+    """The server's MLB batches refuse malformed games with a 400 and score the games batched with them."""
+    service = PredictionService(ModelRegistry(str(tmp_path / "registry")), pipeline)
+    games = make_games(2)
+    bad = [dict(games[0], home_team_id=['NYY']), dict(games[0], game_date='soon'),
+           dict(games[0], weather_hitting_favorability='high'), {'home_team_id': 'NYY'}]
+    results = service.predict_mlb([games[0]] + bad + [games[1]])
+
+    assert [getattr(r, 'status', 200) for r in results] == [200, 400, 400, 400, 400, 200]
+    assert [r['prediction'] for r in (results[0], results[-1])] == [
+        pipeline.predict_game(game)['prediction'] for game in games]
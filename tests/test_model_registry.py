@@ -0,0 +1,83 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.model_registry import ModelRegistry, FeatureSchemaError, feature_schema_hash
+from src.prediction.predict import make_prediction
+
+FEATURES = ['home_rest_days', 'away_rest_days', 'team_strength_diff']
+
+@pytest.fixture
+def registry(tmp_path):
+    """Provides an empty registry in a temp dir with a clean in-process cache."""
+    ModelRegistry.clear_cache()
+    yield ModelRegistry(str(tmp_path))
+    ModelRegistry.clear_cache()
+
+@pytest.fixture
+def trained():
+    """Provides training data, a fitted scaler and a model fitted on the scaled features."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(loc=5, scale=2, size=(200, 3)), columns=FEATURES)
+    y = (X['team_strength_diff'] > 5).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(pd.DataFrame(scaler.transform(X), columns=FEATURES), y)
+    return X, y, scaler, model
+
+def test_register_and_load_by_alias(registry, trained):
+    """Versions increment, aliases resolve and promotion moves prod."""
+    X, _, scaler, model = trained
+    v1 = registry.register('mlb_test', model, FEATURES, scaler=scaler, training_data=X,
+                           metrics={'roc_auc': 0.6}, aliases=['candidate', 'prod'])
+    v2 = registry.register('mlb_test', model, FEATURES, scaler=scaler, metrics={'roc_auc': 0.7})
+
+    assert (v1, v2) == (1, 2)
+    assert registry.load('mlb_test', alias='prod').metadata['version'] == 1
+    assert registry.load('mlb_test', alias='candidate').metrics['roc_auc'] == 0.7
+
+    registry.promote('mlb_test')
+    assert registry.load('mlb_test').metadata['version'] == 2
+    assert registry.list_versions('mlb_test') == [1, 2]
+
+def test_loaded_bundles_are_cached(registry, trained):
+    """Repeated loads of a version return the same in-memory bundle."""
+    X, _, scaler, model = trained
+    registry.register('mlb_test', model, FEATURES, scaler=scaler, aliases=['prod'])
+    assert registry.load('mlb_test') is ModelRegistry(str(registry.root)).load('mlb_test')
+
+def test_bundle_applies_scaler_and_column_order(registry, trained):
+    """Predictions from the bundle match scaling by hand, whatever the input column order."""
+    X, _, scaler, model = trained
+    registry.register('mlb_test', model, FEATURES, scaler=scaler, aliases=['prod'])
+    bundle = registry.load('mlb_test')
+
+    shuffled = X[FEATURES[::-1]].assign(game_id='g1')
+    expected = model.predict_proba(pd.DataFrame(scaler.transform(X), columns=FEATURES))
+    np.testing.assert_allclose(bundle.predict_proba(shuffled), expected)
+
+def test_refuses_mismatched_schema(registry, trained):
+    """Missing features, a wrongly declared schema or an unexpected schema hash are refused."""
+    X, _, scaler, model = trained
+    with pytest.raises(FeatureSchemaError):
+        registry.register('mlb_test', model, FEATURES[::-1], scaler=scaler)
+
+    registry.register('mlb_test', model, FEATURES, scaler=scaler, aliases=['prod'])
+    bundle = registry.load('mlb_test')
+    with pytest.raises(FeatureSchemaError):
+        bundle.predict_proba(X.drop(columns=['away_rest_days']))
+    with pytest.raises(FeatureSchemaError):
+        registry.load('mlb_test', expected_schema=feature_schema_hash(FEATURES[:2]))
+
+    # The prediction entry point refuses instead of zero-filling
+    assert make_prediction(bundle, X.drop(columns=['away_rest_days']).head(1)) is None
+
+def test_unknown_alias(registry):
+    """Loading an alias that was never set is reported as missing."""
+    with pytest.raises(FileNotFoundError):
+        registry.load('nba_missing_model', alias='prod')
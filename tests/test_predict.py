@@ -1,13 +1,18 @@
 import sys
 import os
+from datetime import datetime, timedelta
 import pandas as pd
 import pytest
 from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Since predict.py has a lot of imports, we import the functions we need to test directly
 from src.prediction.predict import load_model, fetch_prediction_data, make_prediction, engineer_features
+from src.prediction.predict import get_game_info, get_player_info, get_player_game_log, get_player_game_logs
+from src.utils.database import Base, Games, Players, PlayerGameStats
 
 @pytest.fixture
 def mock_model():
@@ -111,4 +116,50 @@ def test_engineer_features(mocker):
     # Assert that the create methods of our mocked classes were called
     mock_player_features.return_value.create_rolling_averages.assert_called_once()
     mock_game_features.return_value.create_game_context_features.assert_called_once()
-    mock_team_features.return_value.create_team_strength_features.assert_called_once() 
\ No newline at end of file
+    mock_team_features.return_value.create_team_strength_features.assert_called_once()
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    """Provides a session on a temp database with two players' game logs."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'predict.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Players(player_id=pid, full_name=pid, team_id='T1') for pid in ('p1', 'p2')])
+    for day in range(6):
+        game_id = f'g{day}'
+        session.add(Games(game_id=game_id, date=datetime(2023, 11, 1) + timedelta(days=day), home_team_id='T1',
+                          away_team_id='T2', home_team_name='T1', away_team_name='T2', season='2024'))
+        session.add_all([PlayerGameStats(game_id=game_id, player_id=pid, team_id='T1', points=day * k)
+                         for k, pid in ((1, 'p1'), (2, 'p2'))])
+    session.commit()
+    yield session
+    session.close()
+
+def test_data_access_binds_parameters(db_session):
+    """Lookups bind their values, so quotes in an id cannot change the query."""
+    assert get_game_info(db_session, 'g3')['game_id'].tolist() == ['g3']
+    assert get_player_info(db_session, 'p2')['team_id'].tolist() == ['T1']
+    assert get_player_info(db_session, "p1' OR '1'='1").empty
+
+    log = get_player_game_log(db_session, 'p1', '2023-11-05')
+    assert log['game_id'].tolist() == ['g3', 'g2', 'g1', 'g0']
+
+def test_batched_game_logs_match_single_player_logs(db_session):
+    """The window-function query returns each player's last n games before the date."""
+    logs = get_player_game_logs(db_session, ['p1', 'p2', 'missing'], '2023-11-06', n=3)
+
+    assert sorted(logs['player_id'].unique()) == ['p1', 'p2']
+    for player_id, player_log in logs.sort_values('game_rank').groupby('player_id'):
+        single = get_player_game_log(db_session, player_id, '2023-11-06', n_games=3)
+        assert player_log['game_id'].tolist() == single['game_id'].tolist()
+        assert player_log['game_rank'].tolist() == [1, 2, 3]
+
+def test_lookups_run_in_the_session_transaction(db_session):
+    """Lookups read through the session's connection, so they see its flushed, uncommitted rows."""
+    db_session.add(Players(player_id='p3', full_name='p3', team_id='T2'))
+    db_session.flush()
+
+    assert get_player_info(db_session, 'p3')['team_id'].tolist() == ['T2']
+    db_session.rollback()
+    assert get_player_info(db_session, 'p3').empty
@@ -0,0 +1,130 @@
+import sys
+import os
+import asyncio
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.model_registry import ModelRegistry
+from src.prediction.server import MAX_BODY_BYTES, PredictionServer, PredictionService
+from src.prediction.slate import prop_features, prop_model_name
+
+FEATURES = prop_features('points')
+
+@pytest.fixture
+def service(tmp_path):
+    """A service with a warm points model and no MLB model."""
+    ModelRegistry.clear_cache()
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(100, len(FEATURES))), columns=FEATURES)
+    registry = ModelRegistry(str(tmp_path))
+    registry.register(prop_model_name('points'), LogisticRegression().fit(X, (X['points_roll_avg_5g'] > 0).astype(int)),
+                      FEATURES, aliases=['prod'])
+    # Served features other than the slate's are refused at warm-up
+    registry.register(prop_model_name('rebounds'), LogisticRegression().fit(X, (X['points_roll_avg_5g'] > 0).astype(int)),
+                      FEATURES, aliases=['prod'])
+    service = PredictionService(registry)
+    service.warm(['points', 'rebounds'])
+    yield service
+    ModelRegistry.clear_cache()
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+def serve(service, scenario, **settings):
+    async def run():
+        server = PredictionServer(service, port=0, **settings)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.stop()
+    return asyncio.run(run())
+
+def test_concurrent_requests_share_micro_batches(service):
+    """Concurrent prop requests are answered individually from a few model calls."""
+    async def scenario(server):
+        payloads = [{'prop': 'points', 'features': {**dict.fromkeys(FEATURES, 0.0), 'points_roll_avg_5g': float(v)}}
+                    for v in np.linspace(-2, 2, 20)]
+        responses = await asyncio.gather(*(request(server.port, 'POST', '/predict/nba', p) for p in payloads))
+        return responses, (await request(server.port, 'GET', '/metrics'))[1]
+
+    responses, metrics = serve(service, scenario, max_batch_size=64, max_wait_ms=50)
+
+    assert [status for status, _ in responses] == [200] * 20
+    probabilities = [body['probability_over'] for _, body in responses]
+    assert probabilities == sorted(probabilities)
+    assert responses[0][1]['predicted_outcome'] == 'under' and responses[-1][1]['predicted_outcome'] == 'over'
+    nba = metrics['endpoints']['/predict/nba']
+    assert nba['requests'] == 20
+    assert nba['mean_batch_size'] > 1
+    assert set(nba['latency_ms']) >= {'p50', 'p95', 'p99'}
+
+def test_errors_are_per_request(service):
+    """Bad requests get their own error status without failing the rest of the batch."""
+    async def scenario(server):
+        return await asyncio.gather(
+            request(server.port, 'POST', '/predict/nba', {'prop': 'rebounds', 'features': {}}),
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points', 'features': {'home_rest_days': 1}}),
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points'}),
+            request(server.port, 'POST', '/predict/mlb', {'home_team_id': 'NYY'}),
+            request(server.port, 'GET', '/predict/nba'),
+            request(server.port, 'GET', '/nowhere'),
+            request(server.port, 'GET', '/health'),
+        )
+
+    responses = serve(service, scenario, max_wait_ms=20)
+    assert [status for status, _ in responses] == [404, 400, 400, 503, 405, 404, 200]
+    assert responses[-1][1]['nba_props'] == {'points': 1}
+
+def test_malformed_payloads_do_not_fail_their_batch(service):
+    """Features that are not numbers get a 400 while the requests batched with them are scored."""
+    good = dict.fromkeys(FEATURES, 0.5)
+    async def scenario(server):
+        return await asyncio.gather(
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points', 'features': good}),
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points', 'features': 'fast'}),
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points', 'features': [1, 2]}),
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points', 'features': {**good, 'is_home': 'yes'}}),
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points', 'features': {**good, 'is_home': None}}),
+            request(server.port, 'POST', '/predict/nba', {'prop': ['points'], 'features': good}),
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points', 'player_id': 'p1', 'date': 'soon'}),
+            request(server.port, 'POST', '/predict/nba', {'prop': 'points', 'features': good}),
+        )
+
+    responses = serve(service, scenario, max_batch_size=64, max_wait_ms=50)
+    assert [status for status, _ in responses] == [200, 400, 400, 400, 400, 404, 400, 200]
+    assert responses[0][1] == responses[-1][1]
+
+async def raw_request(port, head):
+    """Sends a request head without a body; returns the status once the server has closed the connection."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(head.encode())
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+    return int(response.split()[1])
+
+def test_bad_content_length_is_refused_without_reading_the_body(service):
+    """Malformed lengths get a 400 and oversized bodies a 413, and the connection is closed."""
+    async def scenario(server):
+        head = "POST /predict/nba HTTP/1.1\r\nHost: test\r\nContent-Length: {}\r\n\r\n"
+        return await asyncio.gather(
+            raw_request(server.port, head.format('ten')),
+            raw_request(server.port, head.format(-5)),
+            raw_request(server.port, head.format(MAX_BODY_BYTES + 1)),
+        )
+
+    assert serve(service, scenario) == [400, 400, 413]
@@ -0,0 +1,78 @@
+import sys
+import os
+import pstats
+import pytest
+from click.testing import CliRunner
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.profiling import SamplingProfiler, profile_run
+
+def busy_work(n=200000):
+    return sum(i * i for i in range(n))
+
+def allocate():
+    return [bytearray(1024) for _ in range(2000)]
+
+def test_cprofile_writes_pstats_and_prints_hotspots(tmp_path, capsys):
+    """cProfile output loads with pstats and the hotspots are printed."""
+    with profile_run('cprofile', 'unit', output_dir=str(tmp_path), top_n=5):
+        busy_work()
+    [path] = tmp_path.glob('unit_cprofile_*.pstats')
+    assert pstats.Stats(str(path)).total_calls > 0
+    assert 'busy_work' in capsys.readouterr().out
+
+def test_sampling_writes_collapsed_stacks(tmp_path, capsys):
+    """The sampling profiler writes one 'frame;frame count' line per distinct stack."""
+    with profile_run('sampling', 'unit', output_dir=str(tmp_path), top_n=5):
+        busy_work(3000000)
+    [path] = tmp_path.glob('unit_sampling_*.collapsed')
+    lines = path.read_text().splitlines()
+    assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any('busy_work' in line for line in lines)
+    assert 'samples every' in capsys.readouterr().out
+
+def test_sampling_hotspots_count_own_and_total_samples():
+    """Leaf frames get own samples; every frame on a stack gets total samples."""
+    profiler = SamplingProfiler()
+    outer, inner = ('a.py', 'outer', 1), ('a.py', 'inner', 5)
+    profiler.stacks.update({(outer, inner): 3, (outer,): 1})
+    profiler.samples = 4
+    spots = {spot['function'].split(' ')[0]: spot for spot in profiler.hotspots()}
+    assert (spots['inner']['own'], spots['inner']['total']) == (3, 3)
+    assert (spots['outer']['own'], spots['outer']['total']) == (1, 4)
+
+def test_memory_report_lists_allocation_sites(tmp_path, capsys):
+    """tracemalloc mode reports the allocating line among the top sites."""
+    with profile_run('memory', 'unit', output_dir=str(tmp_path), top_n=5):
+        kept = allocate()
+    [path] = tmp_path.glob('unit_memory_*.txt')
+    assert 'test_profiling.py' in path.read_text()
+    assert 'peak' in capsys.readouterr().out
+    assert len(kept) == 2000
+
+def test_profile_is_written_when_the_command_fails(tmp_path):
+    """A failing command still leaves its profile behind."""
+    with pytest.raises(RuntimeError):
+        with profile_run('cprofile', 'unit', output_dir=str(tmp_path)):
+            raise RuntimeError("command failed")
+    assert list(tmp_path.glob('unit_cprofile_*.pstats'))
+
+def test_no_mode_is_a_no_op_and_unknown_modes_fail(tmp_path):
+    """Without a mode nothing is written; an unknown mode is rejected."""
+    with profile_run(None, 'unit', output_dir=str(tmp_path)):
+        busy_work(10)
+    assert not list(tmp_path.iterdir())
+    with pytest.raises(ValueError):
+        profile_run('perf', 'unit')
+
+def test_main_cli_profile_option_wraps_subcommand(tmp_path, monkeypatch):
+    """main.py --profile profiles the invoked subcommand."""
+    from src.utils.config import config
+    import main
+    original_get = config.get
+    monkeypatch.setattr(config, 'get', lambda key, default=None: str(tmp_path)
+                        if key == 'profiling.output_dir' else original_get(key, default))
+    result = CliRunner().invoke(main.cli, ['--profile', 'cprofile', 'train'])
+    assert result.exit_code == 0, result.output
+    assert list(tmp_path.glob('train_cprofile_*.pstats'))
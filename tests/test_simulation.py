@@ -0,0 +1,100 @@
+import sys
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.database import Base, BetRecommendations, PropOdds
+from src.utils.odds import kelly_fraction
+from src.analysis.simulation import load_recommendations, simulate_bankroll
+
+@pytest.fixture
+def recommendations():
+    return pd.DataFrame({
+        'model_probability': [0.60, 0.58, 0.62, 0.56],
+        'decimal_odds': [2.0, 2.0, 1.9, 2.1],
+        'stake_recommendation': [0.05, 0.04, 0.05, 0.03],
+    })
+
+def test_results_do_not_depend_on_worker_count(recommendations):
+    """Per-chunk seeds make pooled and in-process runs identical."""
+    kwargs = dict(n_seasons=600, bets_per_season=200, chunk_size=200, seed=7)
+    inline = simulate_bankroll(recommendations, workers=0, **kwargs)
+    pooled = simulate_bankroll(recommendations, workers=2, **kwargs)
+    np.testing.assert_array_equal(inline['final_bankrolls'], pooled['final_bankrolls'])
+    assert inline['risk_of_ruin'] == pooled['risk_of_ruin']
+    pd.testing.assert_frame_equal(inline['kelly_curve'], pooled['kelly_curve'])
+
+def test_certain_outcomes_give_deterministic_paths():
+    """With sure wins every season compounds identically and nobody is ruined."""
+    sure = pd.DataFrame({'model_probability': [1.0, 1.0], 'decimal_odds': [2.0, 2.0],
+                         'stake_recommendation': [0.1, 0.1]})
+    results = simulate_bankroll(sure, n_seasons=50, workers=0, initial_bankroll=100)
+    np.testing.assert_allclose(results['final_bankrolls'], 121.0)
+    assert results['risk_of_ruin'] == 0
+    assert results['prob_profit'] == 1
+    assert results['percentile_curves'].index.tolist() == [1, 2]
+
+def test_flat_staking_ruin_and_percentile_order():
+    """Losing flat bets ruin most seasons, and percentile curves are ordered."""
+    losing = pd.DataFrame({'model_probability': [0.3], 'decimal_odds': [2.0], 'stake_recommendation': [0.0]})
+    results = simulate_bankroll(losing, n_seasons=2000, bets_per_season=300, staking='flat', flat_stake=1.0,
+                                initial_bankroll=50, ruin_level=0.2, workers=0, seed=1)
+    assert results['risk_of_ruin'] > 0.9
+    curves = results['percentile_curves']
+    assert (curves['p5'] <= curves['p50']).all() and (curves['p50'] <= curves['p95']).all()
+    with pytest.raises(ValueError):
+        simulate_bankroll(losing, staking='martingale')
+
+def test_optimal_kelly_multiplier_is_near_full_kelly():
+    """For a repeated edge the growth-optimal multiple of full Kelly is close to one."""
+    bet = pd.DataFrame({'model_probability': [0.6], 'decimal_odds': [2.0],
+                        'stake_recommendation': [kelly_fraction(0.6, 2.0) * 0.25]})
+    results = simulate_bankroll(bet, n_seasons=4000, bets_per_season=500, workers=0, seed=3)
+    assert results['optimal_kelly_multiplier'] == pytest.approx(1.0, abs=0.15)
+    curve = results['kelly_curve']
+    assert curve.loc[1.5, 'risk_of_ruin'] > curve.loc[0.25, 'risk_of_ruin']
+
+def test_load_recommendations_prices_the_recommended_side(tmp_path):
+    """Stored recommendations pick up the price of their side from prop_odds."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'simulation.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        BetRecommendations(game_id='g1', player_id='p1', prop_type='points', sportsbook='FanDuel', line=20.5,
+                           bet_type='under', model_probability=0.6, implied_probability=0.5, edge=0.1,
+                           stake_recommendation=0.05, confidence_level='high'),
+        BetRecommendations(game_id='g1', player_id='p2', prop_type='rebounds', sportsbook='FanDuel', line=8.5,
+                           bet_type='over', model_probability=0.6, implied_probability=0.5, edge=0.1,
+                           stake_recommendation=0.05, confidence_level='high'),
+        PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='player_points',
+                 line=20.5, over_odds=-120, under_odds=105),
+    ])
+    session.commit()
+    loaded = load_recommendations(session).sort_values('player_id')
+    session.close()
+    assert loaded['american_odds'].tolist() == [105, -110]
+
+def test_load_recommendations_uses_the_latest_reposted_line(tmp_path):
+    """A book's re-posted line prices the recommendation, whatever order the rows come back in."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'simulation.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        BetRecommendations(game_id='g1', player_id='p1', prop_type='points', sportsbook='FanDuel', line=20.5,
+                           bet_type='under', model_probability=0.6, implied_probability=0.5, edge=0.1,
+                           stake_recommendation=0.05, confidence_level='high'),
+        PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='player_points', line=20.5,
+                 over_odds=-130, under_odds=110, timestamp=datetime(2024, 1, 5, 18)),
+        PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='points', line=20.5,
+                 over_odds=-120, under_odds=100, timestamp=datetime(2024, 1, 5, 12)),
+    ])
+    session.commit()
+    loaded = load_recommendations(session)
+    session.close()
+    assert loaded['american_odds'].tolist() == [110]
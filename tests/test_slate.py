@@ -0,0 +1,143 @@
+import sys
+import os
+import io
+from datetime import datetime, timedelta
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.database import Base, Games, Players, PlayerGameStats, PropOdds, ModelPredictions
+from src.modeling.model_registry import ModelRegistry
+from src.modeling.distributions import CountDistributionModel, prob_over
+from src.prediction.slate import predict_slate, prop_features, prop_model_name
+
+FEATURES = prop_features('points')
+SLATE = datetime(2024, 1, 10)
+TEAMS = ['A', 'B', 'C', 'D']
+
+@pytest.fixture
+def session(tmp_path):
+    """Provides a session on a temp database with ten days of history and a two-game slate."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'slate.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    rng = np.random.default_rng(0)
+
+    for team in TEAMS:
+        for i in range(3):
+            session.add(Players(player_id=f'{team}{i}', full_name=f'{team}{i}', team_id=team, active=True))
+    session.add(Players(player_id='A9', full_name='A9', team_id='A', active=False))
+    session.add(Players(player_id='B9', full_name='B9', team_id='B', active=True))  # no history yet
+
+    for day in range(10):
+        for home, away in [('A', 'B'), ('C', 'D')]:
+            game_id = f'g{day}{home}'
+            session.add(Games(game_id=game_id, date=SLATE - timedelta(days=10 - day), home_team_id=home,
+                              away_team_id=away, home_team_name=home, away_team_name=away,
+                              home_score=int(rng.integers(90, 120)), away_score=int(rng.integers(90, 120)),
+                              season='2024'))
+            for team in (home, away):
+                for i in range(3):
+                    session.add(PlayerGameStats(game_id=game_id, player_id=f'{team}{i}', team_id=team,
+                                                minutes_played=30, points=int(rng.integers(0, 30)),
+                                                rebounds=int(rng.integers(0, 10)), assists=int(rng.integers(0, 8)),
+                                                three_pointers_made=int(rng.integers(0, 4))))
+    for home, away in [('A', 'B'), ('C', 'D')]:
+        session.add(Games(game_id=f'slate{home}', date=SLATE + timedelta(hours=19), home_team_id=home,
+                          away_team_id=away, home_team_name=home, away_team_name=away, season='2024'))
+    session.add(PropOdds(game_id='slateA', player_id='A0', sportsbook='FanDuel', prop_type='points',
+                         line=21.5, over_odds=-115, under_odds=-105))
+    session.commit()
+    yield session
+    session.close()
+
+@pytest.fixture
+def registry(tmp_path):
+    """Provides a registry holding a prod model for the points prop only."""
+    ModelRegistry.clear_cache()
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(size=(100, len(FEATURES))), columns=FEATURES)
+    # Game scores are missing (no shooting stats in the fixture); LightGBM takes them as they are
+    model = lgb.LGBMClassifier(n_estimators=10, verbosity=-1).fit(X, (X['points_roll_avg_5g'] > 0).astype(int))
+    registry.register(prop_model_name('points'), model, FEATURES, aliases=['prod'])
+    yield registry
+    ModelRegistry.clear_cache()
+
+def test_predicts_every_rostered_player_with_history(session, registry):
+    """One prediction per active player with history; props without a model are skipped."""
+    predictions, timings = predict_slate(SLATE.date(), props=['points', 'rebounds'], registry=registry,
+                                         session=session)
+
+    assert len(predictions) == 12
+    assert set(predictions['prop_type']) == {'points'}
+    assert predictions['predicted_probability'].between(0, 1).all()
+    assert set(predictions['predicted_outcome']) <= {'over', 'under'}
+    assert {'query', 'features', 'predict', 'write', 'total'} <= set(timings)
+    assert set(predictions.loc[predictions['player_id'].str.startswith('A'), 'game_id']) == {'slateA'}
+
+    stored = session.execute(select(ModelPredictions)).scalars().all()
+    assert len(stored) == 12
+
+def test_features_match_history(session, registry):
+    """Rolling means, rest days and posted lines come from the games before the slate."""
+    predictions, _ = predict_slate('2024-01-10', props=['points'], registry=registry, session=session)
+    features = pd.read_json(io.StringIO('\n'.join(predictions['features_used'])), lines=True)
+    features.index = predictions['player_id'].values
+
+    last_five = pd.DataFrame(session.execute(
+        select(PlayerGameStats.points).join(Games, PlayerGameStats.game_id == Games.game_id)
+        .where(PlayerGameStats.player_id == 'A0').order_by(Games.date.desc()).limit(5)
+    ).all())
+    assert features.loc['A0', 'points_roll_avg_5g'] == pytest.approx(last_five['points'].mean())
+    assert (features['home_rest_days'] == 1).all()
+    assert features.loc['A0', 'fanduel_points_line'] == 21.5
+    assert features.loc['A1', 'fanduel_points_line'] == 0
+
+def test_rerun_replaces_stored_predictions(session, registry):
+    """Predicting a slate twice does not duplicate its stored predictions."""
+    predict_slate(SLATE, props=['points'], registry=registry, session=session)
+    predict_slate(SLATE, props=['points'], registry=registry, session=session)
+    assert len(session.execute(select(ModelPredictions)).scalars().all()) == 12
+
+def test_distribution_models_price_posted_lines(session, registry):
+    """Distribution models price every posted line and return the distribution for other books."""
+    rng = np.random.default_rng(2)
+    features = prop_features('points', 'distribution')
+    X = pd.DataFrame(rng.uniform(0, 30, size=(200, len(features))), columns=features)
+    model = CountDistributionModel({'n_estimators': 10, 'verbosity': -1}).fit(X, rng.poisson(X['points_roll_avg_5g']))
+    registry.register(prop_model_name('points', 'distribution'), model, features, aliases=['prod'])
+
+    predictions, _ = predict_slate(SLATE, props=['points'], registry=registry, session=session, kind='distribution')
+
+    assert predictions[['player_id', 'line']].values.tolist() == [['A0', 21.5]]
+    row = predictions.iloc[0]
+    assert row['model_name'] == 'nba_lightgbm_points_distribution'
+    assert row['predicted_probability'] == pytest.approx(prob_over(row['predicted_mean'], row['dispersion'], 21.5))
+    stored = session.execute(select(ModelPredictions)).scalars().all()
+    assert [(p.player_id, p.model_name) for p in stored] == [('A0', 'nba_lightgbm_points_distribution')]
+
+    with pytest.raises(ValueError, match='prop model kind'):
+        predict_slate(SLATE, props=['points'], registry=registry, session=session, kind='quantile')
+
+def test_models_of_another_schema_are_skipped(session, registry):
+    """A model registered with other features than the slate serves is not loaded."""
+    rng = np.random.default_rng(3)
+    features = prop_features('rebounds')[::-1]
+    X = pd.DataFrame(rng.normal(size=(100, len(features))), columns=features)
+    model = lgb.LGBMClassifier(n_estimators=10, verbosity=-1).fit(X, (X.iloc[:, 0] > 0).astype(int))
+    registry.register(prop_model_name('rebounds'), model, features, aliases=['prod'])
+
+    predictions, _ = predict_slate(SLATE, props=['points', 'rebounds'], registry=registry, session=session)
+    assert set(predictions['prop_type']) == {'points'}
+
+def test_empty_slate(session, registry):
+    """A date without games returns no predictions."""
+    predictions, timings = predict_slate('2024-02-01', props=['points'], registry=registry, session=session)
+    assert predictions.empty
+    assert 'total' in timings
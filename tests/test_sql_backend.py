@@ -0,0 +1,81 @@
+import sys
+import os
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip('duckdb')
+
+from src.feature_engineering import sql_backend
+from src.feature_engineering.feature_registry import FeatureExecutor, nba_feature_backend, nba_feature_registry
+from src.feature_engineering.sql_backend import DuckDBFeatureBackend, write_parquet_snapshots
+from src.preprocessing.data_cleaner import DataCleaner
+from src.preprocessing.data_integrator import DataIntegrator
+from src.preprocessing.dtypes import DtypePlan
+from src.utils.config import config
+from src.utils.synthetic_data import generate_database
+
+KEYS = ['player_id', 'game_id']
+
+@pytest.fixture(scope='module')
+def source(tmp_path_factory):
+    """Parquet snapshots of a small synthetic database, and its tables."""
+    directory = tmp_path_factory.mktemp('sql_backend')
+    generate_database(str(directory / 'sports_model.db'), seasons=1, leagues=('nba',), n_teams=4, seed=9)
+    engine = create_engine(f"sqlite:///{directory / 'sports_model.db'}")
+    with engine.connect() as connection:
+        write_parquet_snapshots(connection, directory / 'snapshots')
+        tables = {name: pd.read_sql(text(f"SELECT * FROM {name}"), connection)
+                  for name in ('games', 'player_game_stats')}
+    return str(directory / 'snapshots'), tables
+
+def integrated(source, compact):
+    """Cleaned and integrated player games, as run_pipeline.py builds them."""
+    tables = {name: df.copy() for name, df in source[1].items()}
+    if compact:
+        plan = DtypePlan(config.get('preprocessing.dtypes', {}))
+        tables = {name: plan.apply(df) for name, df in tables.items()}
+    stats = DataCleaner({}).clean_player_game_stats(tables['player_game_stats'])
+    return DataIntegrator({}).integrate_game_data(stats, tables['games'])
+
+def assert_same_features(left, right):
+    left = left.sort_values(KEYS).reset_index(drop=True)
+    right = right.sort_values(KEYS).reset_index(drop=True)
+    assert list(left.columns) == list(right.columns)
+    pd.testing.assert_frame_equal(left, right, check_dtype=False, check_categorical=False, rtol=1e-5, atol=1e-6)
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_duckdb_features_match_pandas(source, compact):
+    """Window queries over the Parquet snapshots give the pandas feature columns and values."""
+    base = integrated(source, compact)
+    expected = FeatureExecutor(nba_feature_registry(config)).run(base.copy())
+    backend = DuckDBFeatureBackend(config, source=source[0])
+    actual = backend.run(base.copy())
+
+    assert_same_features(actual, expected)
+    new_columns = [col for col in actual.columns if col not in base.columns]
+    assert new_columns == backend.feature_columns()
+
+def test_only_the_given_rows_enter_the_windows(source):
+    """Rows dropped before feature engineering (e.g. quarantined) are left out of every window."""
+    base = integrated(source, compact=False)
+    base = base[base['player_id'].astype(str).str[-1] != '3'].iloc[::2].reset_index(drop=True)
+    expected = FeatureExecutor(nba_feature_registry(config)).run(base.copy())
+    actual = DuckDBFeatureBackend(config, source=source[0]).run(base.copy())
+    assert len(actual) == len(base)
+    assert_same_features(actual, expected)
+
+def test_backend_is_selected_by_config(monkeypatch):
+    """feature_engineering.backend picks DuckDB, falling back to pandas without duckdb."""
+    settings = {'feature_engineering.backend': 'duckdb', 'database.sqlite_path': 'data/sports_model.db'}
+    monkeypatch.setattr(config, 'get', lambda key, default=None: settings.get(key, default))
+    assert isinstance(nba_feature_backend(config), DuckDBFeatureBackend)
+
+    monkeypatch.setattr(sql_backend, 'duckdb', None)
+    assert isinstance(nba_feature_backend(config), FeatureExecutor)
+
+    settings['feature_engineering.backend'] = 'spark'
+    with pytest.raises(ValueError):
+        nba_feature_backend(config)
@@ -0,0 +1,94 @@
+import sys
+import os
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.preprocessing.streaming import MemoryLimitExceeded, StreamingPipeline, player_partitions, plan_partitions
+from src.utils.config import config
+from src.utils.synthetic_data import generate_database
+
+@pytest.fixture(scope='module')
+def engine(tmp_path_factory):
+    path = tmp_path_factory.mktemp('streaming') / 'sports_model.db'
+    generate_database(str(path), seasons=1, leagues=('nba',), n_teams=4, seed=5)
+    return create_engine(f"sqlite:///{path}")
+
+@pytest.fixture
+def pipeline():
+    pipeline = StreamingPipeline(config)
+    pipeline.partition_rows = 400
+    pipeline.max_memory_mb = None
+    return pipeline
+
+def batch_features(pipeline, engine):
+    """The in-memory pipeline of run_pipeline.py, step for step."""
+    with engine.connect() as connection:
+        stats = pd.read_sql(text("SELECT * FROM player_game_stats"), connection)
+        games = pd.read_sql(text("SELECT * FROM games"), connection)
+        odds = pd.read_sql(text("SELECT * FROM prop_odds"), connection)
+    stats, games, odds = (pipeline.dtype_plan.apply(df) for df in (stats, games, odds))
+    cleaned = pipeline.validator.check_player_game_stats(pipeline.cleaner.clean_player_game_stats(stats))
+    features = pipeline.player_creator.create_rolling_averages(pipeline.integrator.integrate_game_data(cleaned, games))
+    features = pipeline.game_creator.create_game_context_features(features)
+    features = pipeline.team_creator.create_team_strength_features(features)
+    return pipeline.integrator.integrate_sportsbook_odds(features, odds)
+
+def test_partitions_are_stable_and_cover_every_player(engine):
+    """Each player lands in exactly one partition, the same one every time."""
+    ids = pd.Series(['1', '2', '3', '42'])
+    assert (player_partitions(ids, 7) == player_partitions(ids.copy(), 7)).all()
+    with engine.connect() as connection:
+        partitions = plan_partitions(connection, 400)
+        n_players = connection.execute(text("SELECT COUNT(DISTINCT player_id) FROM player_game_stats")).scalar()
+    players = [player for partition in partitions for player in partition]
+    assert len(partitions) > 1 and len(players) == len(set(players)) == n_players
+
+def test_streaming_output_matches_batch_pipeline(pipeline, engine, tmp_path):
+    """Partition-at-a-time output equals the in-memory pipeline's, row for row."""
+    output = tmp_path / 'featured_data.csv'
+    with engine.connect() as connection:
+        summary = pipeline.run(connection, output)
+
+    batch_path = tmp_path / 'batch.csv'
+    batch_features(pipeline, engine).to_csv(batch_path, index=False)
+    streamed = pd.read_csv(output).sort_values(['player_id', 'game_id']).reset_index(drop=True)
+    batch = pd.read_csv(batch_path).sort_values(['player_id', 'game_id']).reset_index(drop=True)
+
+    assert summary['partitions'] > 1 and summary['rows_out'] == len(batch)
+    assert summary['largest_partition_rows'] < len(batch)
+    assert list(streamed.columns) == list(batch.columns)
+    pd.testing.assert_frame_equal(streamed, batch)
+
+def test_memory_cap_aborts_without_touching_the_output(pipeline, engine, tmp_path):
+    """Passing max_memory_mb stops the run and leaves no partial output behind."""
+    pipeline.max_memory_mb = 1
+    output = tmp_path / 'featured_data.csv'
+    with engine.connect() as connection, pytest.raises(MemoryLimitExceeded):
+        pipeline.run(connection, output)
+    assert list(tmp_path.iterdir()) == []
+
+def test_quarantined_rows_of_every_partition_share_one_file(pipeline, tmp_path):
+    """Bad rows in two partitions are all kept, in a single quarantine file for the run."""
+    path = tmp_path / 'sports_model.db'
+    generate_database(str(path), seasons=1, leagues=('nba',), n_teams=4, seed=5)
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        partitions = plan_partitions(connection, pipeline.partition_rows)
+        bad_players = [partitions[0][0], partitions[1][0]]
+        for player_id in bad_players:
+            connection.execute(text("UPDATE player_game_stats SET points = 150 WHERE rowid = "
+                                    "(SELECT MIN(rowid) FROM player_game_stats WHERE player_id = :player_id)"),
+                               {'player_id': player_id})
+    pipeline.validator.quarantine_dir = tmp_path / 'quarantine'
+
+    with engine.connect() as connection:
+        summary = pipeline.run(connection, tmp_path / 'featured_data.csv')
+
+    files = list((tmp_path / 'quarantine').iterdir())
+    assert summary['quarantined_rows'] == 2 and len(files) == 1
+    quarantined = pd.read_csv(files[0], index_col=0)
+    assert sorted(quarantined['player_id'].astype(str)) == sorted(map(str, bad_players))
+    assert (quarantined['points'] == 150).all()
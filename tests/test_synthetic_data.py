@@ -0,0 +1,61 @@
+import sys
+import os
+import sqlite3
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.synthetic_data import generate_database
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory):
+    path = tmp_path_factory.mktemp('synthetic') / 'sports_model.db'
+    counts = generate_database(str(path), seasons=2, n_teams=6, seed=3)
+    return path, counts
+
+def test_generates_requested_seasons_and_tables(database):
+    """Both leagues get every table for each season, ending with the last season."""
+    path, counts = database
+    conn = sqlite3.connect(path)
+    seasons = pd.read_sql("SELECT DISTINCT season FROM games ORDER BY season", conn)['season'].tolist()
+    mlb_seasons = pd.read_sql("SELECT DISTINCT season FROM mlb_games ORDER BY season", conn)['season'].tolist()
+    conn.close()
+    assert seasons == ['2023', '2024'] and mlb_seasons == [2023, 2024]
+    assert counts['games'] == 2 * 6 * 82 // 2
+    for table in ['teams', 'players', 'player_game_stats', 'prop_odds', 'mlb_teams', 'mlb_batter_stats',
+                  'mlb_pitcher_stats']:
+        assert counts[table] > 0
+
+def test_box_scores_add_up_to_final_scores(database):
+    """Team points and runs equal the game scores, and no game is tied."""
+    path, _ = database
+    conn = sqlite3.connect(path)
+    nba = pd.read_sql("""
+        SELECT g.home_score, g.away_score,
+               SUM(CASE WHEN s.team_id = g.home_team_id THEN s.points END) AS home_points,
+               SUM(CASE WHEN s.team_id = g.away_team_id THEN s.points END) AS away_points
+        FROM games g JOIN player_game_stats s ON s.game_id = g.game_id GROUP BY g.game_id
+    """, conn)
+    mlb = pd.read_sql("""
+        SELECT g.home_team_score, SUM(b.runs) AS runs
+        FROM mlb_games g
+        JOIN mlb_teams t ON t.team_abbreviation = g.home_team_id
+        JOIN mlb_batter_stats b ON b.game_id = g.game_id AND b.team_id = CAST(t.team_id AS TEXT)
+        GROUP BY g.game_id
+    """, conn)
+    conn.close()
+    assert (nba['home_score'] == nba['home_points']).all() and (nba['away_score'] == nba['away_points']).all()
+    assert (nba['home_score'] != nba['away_score']).all()
+    assert (mlb['home_team_score'] == mlb['runs']).all()
+
+def test_same_seed_gives_same_database(tmp_path, database):
+    """Generation is deterministic for a seed."""
+    path, _ = database
+    again = tmp_path / 'again.db'
+    generate_database(str(again), seasons=2, n_teams=6, seed=3)
+    query = "SELECT game_id, player_id, points, rebounds FROM player_game_stats ORDER BY game_id, player_id"
+    frames = [pd.read_sql(query, sqlite3.connect(p)) for p in (path, again)]
+    pd.testing.assert_frame_equal(*frames)
+    with pytest.raises(ValueError):
+        generate_database(str(tmp_path / 'bad.db'), seasons=21)
@@ -0,0 +1,103 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.feature_engineering.feature_registry import FeatureExecutor, nba_feature_registry
+from src.modeling.model_registry import ModelRegistry
+from src.modeling.prepare_model_data import add_matchup_features
+from src.modeling.train_all_props import PropDatasets, prop_model_name, run_all_props
+from src.preprocessing.data_cleaner import DataCleaner
+from src.preprocessing.data_integrator import DataIntegrator
+from src.prediction.slate import DEFAULT_ODDS, prop_features, score_slate
+from src.utils.config import config
+from src.utils.synthetic_data import generate_database
+
+PROPS = ['points', 'three_pointers', 'points_rebounds_assists']
+PARAMS = {'n_estimators': 20, 'num_leaves': 7, 'verbosity': -1, 'random_state': 0}
+
+@pytest.fixture(scope='module')
+def featured(tmp_path_factory):
+    """Featured player-games of a small synthetic season, as run_pipeline.py builds them."""
+    path = tmp_path_factory.mktemp('props') / 'sports_model.db'
+    generate_database(str(path), seasons=1, leagues=('nba',), n_teams=4, seed=3)
+    with create_engine(f"sqlite:///{path}").connect() as connection:
+        stats, games = (pd.read_sql(text(f"SELECT * FROM {name}"), connection)
+                        for name in ('player_game_stats', 'games'))
+    stats = DataCleaner({}).clean_player_game_stats(stats)
+    base = DataIntegrator({}).integrate_game_data(stats, games)
+    return FeatureExecutor(nba_feature_registry(config)).run(base)
+
+def test_targets_and_feature_subsets_share_one_matrix(featured):
+    """Every prop's target and features come from the one shared matrix and split."""
+    datasets = PropDatasets(featured.copy(), PROPS)
+
+    pra = featured[['points', 'rebounds', 'assists']].sum(axis=1)
+    pra_avg = featured[['points_roll_avg_5g', 'rebounds_roll_avg_5g', 'assists_roll_avg_5g']].sum(axis=1)
+    order = np.argsort(pd.to_datetime(featured['date']).to_numpy(), kind='stable')
+    expected = (pra > pra_avg).to_numpy()[order]
+    valid = datasets.valid['points_rebounds_assists']
+    np.testing.assert_array_equal(datasets.y['points_rebounds_assists'][valid], expected[valid])
+    assert not valid.all() and valid.mean() > 0.9
+
+    assert 'three_pointers_made_roll_avg_5g' in datasets.features['three_pointers']
+    assert 'points_roll_avg_5g' not in datasets.features['three_pointers']
+    assert {'points_roll_avg_10g', 'rebounds_roll_avg_3g', 'is_home'} <= set(datasets.features['points_rebounds_assists'])
+    assert 'points_ewm_10d' not in datasets.columns
+    assert datasets.X.shape == (len(featured), len(datasets.columns)) and datasets.X.dtype == np.float32
+
+    train_rows, test_rows = datasets.rows('points')
+    dates = pd.to_datetime(datasets.dates)
+    assert dates.iloc[train_rows].max() < dates.iloc[test_rows].min()
+
+    with pytest.raises(ValueError, match='No stats configured'):
+        PropDatasets(featured.copy(), ['double_doubles'])
+
+def test_props_train_concurrently_and_register_together(featured, tmp_path):
+    """One model per prop, fitted on a thread pool and registered under a shared training run."""
+    registry = ModelRegistry(root=str(tmp_path / 'registry'))
+    comparison, models = run_all_props(featured.copy(), PROPS, params=PARAMS, n_workers=2, registry=registry)
+
+    assert comparison['prop'].tolist() == PROPS and comparison['roc_auc'].between(0, 1).all()
+    assert (comparison['version'] == 1).all()
+    runs = set()
+    for prop in PROPS:
+        bundle = registry.load(prop_model_name(prop), alias='prod')
+        assert bundle.features == list(models[prop].feature_name_)
+        runs.add(bundle.metadata['training_run'])
+    assert len(runs) == 1
+
+def test_distribution_models_predict_the_count(featured, tmp_path):
+    """Distribution models are fitted on the counts, without odds, and registered under their own names."""
+    registry = ModelRegistry(root=str(tmp_path / 'registry'))
+    comparison, models = run_all_props(featured.copy(), PROPS, params=PARAMS, n_workers=2, registry=registry,
+                                       kind='distribution')
+
+    assert comparison['prop'].tolist() == PROPS
+    assert (comparison['dispersion'] > 0).all() and comparison['coverage_80'].between(0.5, 1).all()
+    bundle = registry.load(prop_model_name('points', 'distribution'), alias='prod')
+    assert bundle.metadata['kind'] == 'distribution'
+    assert not any(col.startswith('fanduel_') for col in bundle.features)
+    mean, dispersion = bundle.model.predict_distribution(bundle.prepare(add_matchup_features(featured.head(10).copy())))
+    assert (mean > 0).all() and (dispersion == models['points'].dispersion_).all()
+
+    with pytest.raises(ValueError, match='kind'):
+        run_all_props(featured.copy(), PROPS, kind='quantile', register=False)
+
+def test_trained_models_are_served_by_the_slate(featured, tmp_path):
+    """Freshly trained prop models pass the slate's schema check and score its feature rows."""
+    registry = ModelRegistry(root=str(tmp_path / 'registry'))
+    run_all_props(featured.copy(), PROPS, params=PARAMS, n_workers=2, registry=registry)
+    for prop in PROPS:
+        assert registry.load(prop_model_name(prop), alias='prod').features == prop_features(prop)
+
+    # The slate's feature rows: the featured columns plus every prop's line, unposted here
+    matrix = add_matchup_features(featured.tail(20).copy()).assign(**{
+        f'fanduel_{prop}_{field}': default for prop in PROPS for field, default in DEFAULT_ODDS.items()})
+    predictions = score_slate(matrix, PROPS, registry)
+    assert predictions.groupby('prop_type').size().to_dict() == {prop: 20 for prop in PROPS}
+    assert predictions['predicted_probability'].between(0, 1).all()
@@ -0,0 +1,77 @@
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.mlb.train_all_targets_mlb import load_shared_data, run_all, save_report
+from src.utils.config import config
+
+TARGETS = ['home_team_wins', 'close_game']
+
+@pytest.fixture
+def processed_dir(tmp_path):
+    """Writes prepared modeling data for two targets that share one feature matrix."""
+    rng = np.random.default_rng(0)
+    features = ['home_rest_days', 'away_rest_days', 'team_strength_diff']
+    n = {'train': 120, 'val': 30, 'test': 40}
+    offset = 0
+    for split, size in n.items():
+        X = pd.DataFrame(rng.normal(size=(size, len(features))), columns=features)
+        X['game_date'] = pd.date_range('2024-04-01', periods=size, freq='D').shift(offset).astype(str)
+        offset += size
+        X['home_team_wins'] = (X['team_strength_diff'] + rng.normal(scale=0.5, size=size) > 0).astype(int)
+        X['close_game'] = (X['home_rest_days'] + rng.normal(scale=0.5, size=size) > 0).astype(int)
+        for target in TARGETS:
+            X[features + [target, 'game_date']].to_csv(tmp_path / f"modeling_{split}_{target}.csv", index=False)
+    for target in TARGETS:
+        with open(tmp_path / f"modeling_info_{target}.json", 'w') as f:
+            json.dump({'features': features, 'target': target, 'n_features': len(features)}, f)
+    return tmp_path
+
+def test_targets_share_one_feature_matrix(processed_dir):
+    """Targets prepared from the same rows point at a single loaded matrix."""
+    data = load_shared_data(TARGETS, processed_dir)
+
+    assert len(data['matrices']) == 1
+    assert {info['matrix'] for info in data['targets'].values()} == {'matrix_0'}
+    assert data['matrices']['matrix_0']['train'].shape == (120, 3)
+    assert not np.array_equal(data['targets']['home_team_wins']['y']['test'],
+                              data['targets']['close_game']['y']['test'])
+
+def test_run_all_produces_consolidated_report(processed_dir, tmp_path):
+    """Every (target, family) job appears once in the comparison with runtime metrics."""
+    comparison, runtime = run_all(TARGETS, ['logistic_regression', 'random_forest'], n_workers=1,
+                                  processed_dir=processed_dir, save=False)
+
+    assert len(comparison) == 4
+    assert set(zip(comparison['target'], comparison['model'])) == {
+        (t, m) for t in TARGETS for m in ['logistic_regression', 'random_forest']
+    }
+    assert comparison['roc_auc'].between(0, 1).all()
+    assert runtime['n_jobs'] == 4
+    assert runtime['wall_seconds'] > 0
+
+    report = save_report(comparison, runtime, output_dir=tmp_path / "report")
+    assert set(report['best_models']) == set(TARGETS)
+    assert (tmp_path / "report" / "mlb_model_comparison.csv").exists()
+
+def test_missing_data_returns_none(tmp_path):
+    """Without prepared data there is nothing to schedule."""
+    assert run_all(TARGETS, processed_dir=tmp_path) == (None, None)
+
+def test_unsaved_runs_persist_nothing(processed_dir, tmp_path, monkeypatch):
+    """Without saving, tuning leaves no study, exported parameters or binned dataset behind."""
+    persistent = {'storage_path': tmp_path / 'tuning' / 'studies.db', 'dataset_cache_dir': tmp_path / 'cache'}
+    for key, path in persistent.items():
+        monkeypatch.setitem(config.config['modeling']['hyperparameter_tuning'], key, str(path))
+    monkeypatch.setitem(config.config['paths'], 'model_registry', str(tmp_path / 'registry'))
+
+    comparison, _ = run_all(['home_team_wins'], ['lightgbm'], n_workers=1, n_trials=2,
+                            processed_dir=processed_dir, save=False)
+
+    assert comparison['model'].tolist() == ['lightgbm']
+    assert not any(path.exists() for path in [*persistent.values(), tmp_path / 'registry'])
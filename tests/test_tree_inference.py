@@ -0,0 +1,124 @@
+import sys
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.tree_inference import TreeEnsemble, compile_model
+from src.prediction.predict import load_model, make_prediction
+
+LGB_PARAMS = {'n_estimators': 40, 'num_leaves': 15, 'verbosity': -1, 'random_state': 0}
+XGB_PARAMS = {'n_estimators': 40, 'max_depth': 5, 'random_state': 0}
+
+@pytest.fixture(scope='module')
+def data():
+    """Features with missing values, exact zeros and a small-integer column; binary, 3-class and count targets."""
+    rng = np.random.default_rng(0)
+    n = 2000
+    X = pd.DataFrame(rng.normal(size=(n, 5)), columns=['a', 'b', 'c', 'd', 'e'])
+    X['e'] = rng.integers(0, 3, n).astype(float)
+    binary = (X['a'] + X['e'] + rng.normal(size=n) > 1).astype(int)
+    classes = np.digitize(X['b'] + rng.normal(size=n), [-0.5, 0.5])
+    counts = rng.poisson(np.exp(1 + 0.4 * X['c']))
+    X = X.mask(rng.random(X.shape) < 0.1)
+    return X, binary, classes, counts
+
+def margin(model, X):
+    if isinstance(model, lgb.LGBMModel):
+        return model.predict(X, raw_score=True)
+    return model.predict(X, output_margin=True)
+
+def assert_parity(model, X, rtol):
+    ensemble = compile_model(model)
+    np.testing.assert_array_max_ulp(ensemble.predict_raw(X), margin(model, X), maxulp=1)
+    if hasattr(model, 'predict_proba'):
+        np.testing.assert_allclose(ensemble.predict_proba(X), model.predict_proba(X), rtol=rtol, atol=rtol)
+    np.testing.assert_allclose(ensemble.predict(X), model.predict(X), rtol=rtol)
+    return ensemble
+
+@pytest.mark.parametrize('target, estimator, params', [
+    ('binary', lgb.LGBMClassifier, {}),
+    ('binary', lgb.LGBMClassifier, {'zero_as_missing': True}),
+    ('classes', lgb.LGBMClassifier, {}),
+    ('counts', lgb.LGBMRegressor, {'objective': 'poisson'}),
+])
+def test_lightgbm_parity(data, target, estimator, params):
+    """Margins match LightGBM's to within 1 ulp; probabilities and labels match."""
+    X, binary, classes, counts = data
+    y = {'binary': binary, 'classes': classes, 'counts': counts}[target]
+    model = estimator(**LGB_PARAMS, **params).fit(X, y)
+    assert_parity(model, X, rtol=1e-12)
+    # Missing values seen only at prediction time follow LightGBM's no-missing rule
+    dense = estimator(**LGB_PARAMS, **params).fit(X.fillna(0), y)
+    assert_parity(dense, X, rtol=1e-12)
+
+@pytest.mark.parametrize('target, estimator, params', [
+    ('binary', xgb.XGBClassifier, {}),
+    ('classes', xgb.XGBClassifier, {}),
+    ('counts', xgb.XGBRegressor, {'objective': 'count:poisson'}),
+])
+def test_xgboost_parity(data, target, estimator, params):
+    """Margins match XGBoost's to within 1 ulp (float32); probabilities and labels match."""
+    X, binary, classes, counts = data
+    y = {'binary': binary, 'classes': classes, 'counts': counts}[target]
+    model = estimator(**XGB_PARAMS, **params).fit(X, y)
+    ensemble = assert_parity(model, X, rtol=1e-6)
+    assert ensemble.predict_raw(X).dtype == np.float32
+
+def test_early_stopped_models_use_their_best_iteration(data):
+    """Only the trees up to the best iteration are exported, as the libraries predict with them."""
+    X, binary, _, _ = data
+    fit, valid = slice(0, 1500), slice(1500, None)
+    lgb_model = lgb.LGBMClassifier(**dict(LGB_PARAMS, n_estimators=300)).fit(
+        X[fit], binary[fit], eval_set=[(X[valid], binary[valid])], callbacks=[lgb.early_stopping(5, verbose=False)])
+    xgb_model = xgb.XGBClassifier(**dict(XGB_PARAMS, n_estimators=300, early_stopping_rounds=5)).fit(
+        X[fit], binary[fit], eval_set=[(X[valid], binary[valid])], verbose=False)
+
+    assert assert_parity(lgb_model, X, rtol=1e-12).n_trees == lgb_model.best_iteration_
+    assert assert_parity(xgb_model, X, rtol=1e-6).n_trees == xgb_model.best_iteration + 1
+
+def test_saved_ensemble_scores_without_pickle(data, tmp_path):
+    """The .npz round-trips, loads without pickle, and takes reordered frames, arrays and single rows."""
+    X, binary, _, _ = data
+    model = lgb.LGBMClassifier(**LGB_PARAMS).fit(X, binary)
+    path = compile_model(model).save(tmp_path / 'model.npz')
+    ensemble = TreeEnsemble.load(path)
+
+    expected = model.predict_proba(X)
+    np.testing.assert_array_equal(ensemble.predict_proba(X[['e', 'd', 'c', 'b', 'a']]), ensemble.predict_proba(X))
+    np.testing.assert_allclose(ensemble.predict_proba(X.to_numpy()), expected, rtol=1e-12)
+    np.testing.assert_allclose(ensemble.predict_proba(X.to_numpy()[0])[0], expected[0], rtol=1e-12)
+    assert ensemble.feature_name_ == ['a', 'b', 'c', 'd', 'e'] and list(ensemble.classes) == [0, 1]
+    with pytest.raises(ValueError, match='Expected 5 features'):
+        ensemble.predict_proba(X.to_numpy()[:, :4])
+
+def test_load_model_prefers_the_compiled_copy(data, tmp_path):
+    """predict.load_model serves an up-to-date compiled copy in place of the pickled model."""
+    X, binary, _, _ = data
+    model = lgb.LGBMClassifier(**LGB_PARAMS).fit(X, binary)
+    joblib.dump(model, tmp_path / 'advanced_model.joblib')
+    assert isinstance(load_model(str(tmp_path / 'advanced_model.joblib')), lgb.LGBMClassifier)
+
+    compile_model(model).save(tmp_path / 'advanced_model.npz')
+    loaded = load_model(str(tmp_path / 'advanced_model.joblib'))
+    assert isinstance(loaded, TreeEnsemble)
+    prediction, probability = make_prediction(loaded, X.head(1).copy())
+    assert prediction[0] == model.predict(X.head(1))[0]
+    np.testing.assert_allclose(probability, model.predict_proba(X.head(1)), rtol=1e-12)
+
+def test_unsupported_models_are_refused(data):
+    """Categorical splits, linear trees and non-tree models are refused rather than mis-scored."""
+    X, binary, _, _ = data
+    categorical = X.assign(e=X['e'].fillna(0).astype(int).astype('category'))
+    with pytest.raises(ValueError, match='Categorical'):
+        compile_model(lgb.LGBMClassifier(**dict(LGB_PARAMS, min_data_per_group=5, cat_smooth=1)).fit(categorical, binary))
+    with pytest.raises(ValueError, match='Linear trees'):
+        compile_model(lgb.LGBMClassifier(**dict(LGB_PARAMS, linear_tree=True)).fit(X.fillna(0), binary))
+    with pytest.raises(TypeError, match='LogisticRegression'):
+        compile_model(LogisticRegression().fit(X.fillna(0), binary))
@@ -0,0 +1,100 @@
+import sys
+import os
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modeling.model_registry import ModelRegistry
+from src.modeling.tuning import LIGHTGBM_FIXED_PARAMS, TuningService
+from src.modeling import advanced_model
+from src.utils.config import config
+
+@pytest.fixture
+def classification_data():
+    """Provides a small, learnable binary classification problem split in time order."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({'f1': rng.normal(size=400), 'f2': rng.normal(size=400)})
+    y = (X['f1'] + rng.normal(scale=0.5, size=400) > 0).astype(int)
+    return X.iloc[:300], y.iloc[:300], X.iloc[300:], y.iloc[300:]
+
+@pytest.fixture
+def tuning_service(tmp_path):
+    """Provides a TuningService writing its study database and registry into a temp dir."""
+    return TuningService(storage_path=str(tmp_path / "studies.db"),
+                         registry=ModelRegistry(str(tmp_path / "registry")))
+
+def test_registry_round_trip(tmp_path):
+    """Saved parameters are returned as-is and unknown models return None."""
+    registry = ModelRegistry(str(tmp_path))
+    registry.save_tuned_params('nba_test_model', {'num_leaves': 31}, metadata={'best_value': 0.7})
+
+    assert registry.load_tuned_params('nba_test_model') == {'num_leaves': 31}
+    assert registry.load_tuned_params('missing_model') is None
+
+def test_tune_exports_best_params(tuning_service, classification_data):
+    """Tuning runs the trials, persists the study and exports complete parameters."""
+    X_train, y_train, X_val, y_val = classification_data
+    params, best_value, study = tuning_service.tune(
+        'lightgbm', 'lightgbm_test', X_train, y_train, X_val, y_val,
+        n_trials=3, model_name='mlb_lightgbm_test', early_stopping_rounds=10,
+    )
+
+    assert len(study.trials) == 3
+    assert 0.5 < best_value <= 1.0
+    assert params['objective'] == 'binary'
+    assert tuning_service.registry.load_tuned_params('mlb_lightgbm_test') == params
+
+def test_studies_resume_from_storage(tuning_service, classification_data):
+    """Running a study again adds trials to the stored one instead of starting over."""
+    X_train, y_train, X_val, y_val = classification_data
+    tuning_service.tune('xgboost', 'xgboost_test', X_train, y_train, X_val, y_val,
+                        n_trials=2, early_stopping_rounds=10)
+    _, _, study = tuning_service.tune('xgboost', 'xgboost_test', X_train, y_train, X_val, y_val,
+                                      n_trials=2, early_stopping_rounds=10)
+
+    assert len(study.trials) == 4
+    assert tuning_service.list_studies(prefix='xgboost_') == ['xgboost_test']
+
+def test_warm_start_enqueues_best_trials(tuning_service, classification_data):
+    """A new study starts with the best trials of a related stored study."""
+    X_train, y_train, X_val, y_val = classification_data
+    _, _, source = tuning_service.tune('lightgbm', 'lightgbm_source', X_train, y_train, X_val, y_val,
+                                       n_trials=3, early_stopping_rounds=10)
+
+    target = tuning_service.get_study('lightgbm_target')
+    assert tuning_service.warm_start(target, ['lightgbm_source'], top_k=2) == 2
+    assert tuning_service.warm_start(target, ['missing_study']) == 0
+
+def prune_every_trial(trial):
+    """Objective whose trials never complete."""
+    trial.suggest_int('num_leaves', 8, 64)
+    raise optuna.TrialPruned()
+
+def test_study_without_complete_trials_falls_back(tuning_service):
+    """With no completed trial the enqueued, then the default, parameters are used and nothing is exported."""
+    study = tuning_service.optimize('lightgbm_pruned', prune_every_trial, n_trials=2)
+    assert tuning_service.best_params(study, 'lightgbm') == LIGHTGBM_FIXED_PARAMS
+
+    study.enqueue_trial({'num_leaves': 20})
+    study = tuning_service.optimize('lightgbm_pruned', prune_every_trial, n_trials=1)
+    params = tuning_service.export_best_params(study, 'lightgbm', 'mlb_lightgbm_pruned')
+    assert params == {**LIGHTGBM_FIXED_PARAMS, 'num_leaves': 20}
+    assert tuning_service.registry.load_tuned_params('mlb_lightgbm_pruned') is None
+
+def test_default_registry_follows_config(tmp_path, classification_data, monkeypatch):
+    """Without an explicit registry, exported parameters and the advanced model land in paths.model_registry."""
+    monkeypatch.setitem(config.config['paths'], 'model_registry', str(tmp_path / "registry"))
+    service = TuningService(storage_path=str(tmp_path / "studies.db"))
+    service.registry.save_tuned_params(advanced_model.MODEL_NAME, {'num_leaves': 7})
+
+    X_train, y_train, _, _ = classification_data
+    model = LogisticRegression().fit(X_train, y_train)
+    advanced_model.register_model(model, X_train.assign(points_over_avg_5g=y_train))
+
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    assert registry.load_tuned_params(advanced_model.MODEL_NAME) == {'num_leaves': 7}
+    assert registry.resolve(advanced_model.MODEL_NAME, 'prod') is not None
@@ -0,0 +1,158 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.database import Base, BetRecommendations, ModelPredictions, PropOdds
+from src.utils.odds import american_to_decimal, kelly_fraction, remove_vig
+from src.modeling.distributions import prob_over, prob_under
+from src.prediction.slate import write_predictions
+from src.prediction.value_bets import find_value_bets, get_latest_predictions, recommend_bets
+
+THRESHOLDS = dict(value_threshold=0.05, min_confidence=0.55, max_bets_per_game=2, kelly_multiplier=0.25, max_stake=0.05)
+
+def test_odds_arithmetic():
+    """Decimal prices, vig removal and Kelly sizing match hand calculations."""
+    np.testing.assert_allclose(american_to_decimal([-110, 150, 100]), [1 + 100 / 110, 2.5, 2.0])
+    fair_over, fair_under = remove_vig(-110, -110)
+    assert fair_over == pytest.approx(0.5) and fair_under == pytest.approx(0.5)
+    assert kelly_fraction(0.6, 2.0) == pytest.approx(0.2)
+    assert kelly_fraction(0.4, 2.0) == 0
+
+def test_selects_side_book_and_caps_per_game():
+    """The better side at the best book is kept, thresholds apply and each game is capped."""
+    predictions = pd.DataFrame({
+        'game_id': ['g1'] * 4 + ['g2'],
+        'player_id': ['p1', 'p2', 'p3', 'p4', 'p5'],
+        'prop_type': 'points',
+        'predicted_probability': [0.70, 0.20, 0.65, 0.62, 0.52],
+    })
+    odds = pd.DataFrame({
+        'game_id': ['g1', 'g1', 'g1', 'g1', 'g1', 'g2'],
+        'player_id': ['p1', 'p1', 'p2', 'p3', 'p4', 'p5'],
+        'prop_type': ['player_points', 'points', 'points', 'points', 'points', 'points'],
+        'sportsbook': ['FanDuel', 'ESPNBet', 'FanDuel', 'FanDuel', 'FanDuel', 'FanDuel'],
+        'line': [20.5, 21.5, 10.5, 15.5, 12.5, 8.5],
+        'over_odds': [-110, 120, -110, -110, -110, -110],
+        'under_odds': [-110, -140, -110, -110, -110, -110],
+    })
+    bets = find_value_bets(predictions, odds, **THRESHOLDS)
+
+    assert bets.groupby('game_id').size().to_dict() == {'g1': 2}
+    p1 = bets.set_index('player_id').loc['p1']
+    assert (p1['sportsbook'], p1['bet_type'], p1['american_odds']) == ('ESPNBet', 'over', 120)
+    p2 = bets.set_index('player_id').loc['p2']
+    assert p2['bet_type'] == 'under' and p2['model_probability'] == pytest.approx(0.8)
+    assert (bets['stake_recommendation'] <= 0.05).all()
+    assert bets['edge'].is_monotonic_decreasing
+
+def test_invalid_american_odds_are_skipped():
+    """Prices between -100 and +100 are not odds: they convert to NaN and their lines are never bet."""
+    np.testing.assert_array_equal(np.isnan(american_to_decimal([-100, -99, 0, 50, 100, np.nan])),
+                                  [False, True, True, True, False, True])
+    predictions = pd.DataFrame({'game_id': 'g1', 'player_id': ['p1', 'p2'], 'prop_type': 'points',
+                                'predicted_probability': [0.9, 0.9]})
+    odds = pd.DataFrame({'game_id': 'g1', 'player_id': ['p1', 'p1', 'p2'], 'prop_type': 'points',
+                         'sportsbook': ['FanDuel', 'ESPNBet', 'FanDuel'], 'line': 20.5,
+                         'over_odds': [50, -110, -110], 'under_odds': [-110, -110, 0]})
+    bets = find_value_bets(predictions, odds, **THRESHOLDS)
+
+    assert bets[['player_id', 'sportsbook']].values.tolist() == [['p1', 'ESPNBet']]
+
+def test_distribution_predictions_are_priced_at_each_books_line():
+    """With a predicted distribution every book's line gets its own over and under probability."""
+    predictions = pd.DataFrame({'game_id': ['g1'], 'player_id': ['p1'], 'prop_type': 'points',
+                                'predicted_probability': [0.5], 'predicted_mean': [24.0], 'dispersion': [0.05]})
+    odds = pd.DataFrame({'game_id': 'g1', 'player_id': 'p1', 'prop_type': 'points',
+                         'sportsbook': ['FanDuel', 'ESPNBet', 'BetMGM'], 'line': [20.5, 23.5, 28.0],
+                         'over_odds': -110, 'under_odds': -110})
+    bets = find_value_bets(predictions, odds, **dict(THRESHOLDS, value_threshold=0.0, min_confidence=0.0))
+
+    bet = bets.iloc[0]
+    assert (bet['sportsbook'], bet['bet_type']) == ('BetMGM', 'under')
+    assert bet['model_probability'] == pytest.approx(prob_under(24.0, 0.05, 28.0))
+    assert bet['model_probability'] < 1 - prob_over(24.0, 0.05, 28.0)  # a push on 28 loses neither side
+
+def test_recommend_bets_writes_in_bulk(tmp_path):
+    """Stored predictions and lines produce stored pending recommendations, replaced on rerun."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bets.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        ModelPredictions(game_id='g1', player_id='p1', prop_type='points', model_name='m', predicted_probability=0.3),
+        ModelPredictions(game_id='g1', player_id='p1', prop_type='points', model_name='m', predicted_probability=0.7),
+        PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='points', line=20.5,
+                 over_odds=-110, under_odds=-110),
+    ])
+    session.commit()
+
+    for _ in range(2):
+        bets = recommend_bets(['g1'], session=session, **THRESHOLDS)
+    stored = session.execute(select(BetRecommendations)).scalars().all()
+
+    assert len(bets) == 1 and bets['bet_type'][0] == 'over'
+    assert len(stored) == 1 and stored[0].status == 'pending'
+    assert stored[0].edge == pytest.approx(0.2)
+
+def test_stored_distributions_are_priced_at_each_books_line(tmp_path):
+    """The slate stores the mean and dispersion, and recommend_bets prices every book's line from them."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bets.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    write_predictions(session, pd.DataFrame({
+        'game_id': 'g1', 'player_id': ['p1', 'p2'], 'prop_type': 'points',
+        'model_name': ['nba_lightgbm_points_distribution', 'nba_lightgbm_points_over_avg_5g'],
+        'predicted_probability': [0.5, 0.7], 'predicted_outcome': 'over', 'confidence_score': 0.0,
+        'features_used': '{}', 'predicted_mean': [24.0, np.nan], 'dispersion': [0.05, np.nan]}))
+    session.add_all([PropOdds(game_id='g1', player_id=player, sportsbook=book, prop_type='points', line=line,
+                              over_odds=-110, under_odds=-110)
+                     for player, book, line in [('p1', 'FanDuel', 20.5), ('p1', 'BetMGM', 28.0), ('p2', 'FanDuel', 20.5)]])
+    session.commit()
+
+    stored = get_latest_predictions(session.bind, ['g1']).set_index('player_id')
+    assert stored.loc['p1', ['predicted_mean', 'dispersion']].tolist() == [24.0, 0.05]
+    assert stored.loc['p2', ['predicted_mean', 'dispersion']].isna().all()
+
+    bets = recommend_bets(['g1'], session=session, write=False,
+                          **dict(THRESHOLDS, value_threshold=0.0, min_confidence=0.0)).set_index('player_id')
+    session.close()
+    assert (bets.loc['p1', 'sportsbook'], bets.loc['p1', 'bet_type']) == ('BetMGM', 'under')
+    assert bets.loc['p1', 'model_probability'] == pytest.approx(prob_under(24.0, 0.05, 28.0))
+    assert bets.loc['p2', 'model_probability'] == pytest.approx(0.7)
+
+def test_throughput():
+    """Tens of thousands of props across several books are scored well within a second."""
+    rng = np.random.default_rng(0)
+    n = 50_000
+    predictions = pd.DataFrame({'game_id': (np.arange(n) // 200).astype(str), 'player_id': np.arange(n).astype(str),
+                                'prop_type': 'points', 'predicted_probability': rng.uniform(0.2, 0.8, n)})
+    odds = pd.concat([predictions[['game_id', 'player_id', 'prop_type']].assign(
+        sportsbook=book, line=20.5, over_odds=rng.choice([-120, -110, 100], n),
+        under_odds=rng.choice([-120, -110, 100], n)) for book in ('FanDuel', 'ESPNBet', 'DraftKings')])
+
+    start = time.perf_counter()
+    bets = find_value_bets(predictions, odds, **THRESHOLDS)
+    assert time.perf_counter() - start < 2.0
+    assert bets.groupby('game_id').size().max() <= 2
+
+def test_recommend_bets_sees_uncommitted_predictions(tmp_path):
+    """Predictions and lines added in the caller's open transaction are priced."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bets.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        ModelPredictions(game_id='g1', player_id='p1', prop_type='points', model_name='m', predicted_probability=0.7),
+        PropOdds(game_id='g1', player_id='p1', sportsbook='FanDuel', prop_type='points', line=20.5,
+                 over_odds=-110, under_odds=-110),
+    ])
+    session.flush()
+
+    bets = recommend_bets(['g1'], session=session, write=False, **THRESHOLDS)
+    session.close()
+    assert bets['bet_type'].tolist() == ['over']